@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+#
+
+"""Classify the array arguments of generated calls by whether the array
+passed is contiguous in memory. A strided (non-contiguous) array passed to
+a dummy argument which is not assumed-shape is copied to a temporary
+array before the call (and back after the call)."""
+
+# Classes of actual arguments
+CONTIGUOUS = 'contiguous'
+STRIDED = 'strided'
+TEMPORARY = 'temporary'
+
+# Kinds of subscripts
+_FULL = 'full'
+_PARTIAL = 'partial'
+_SCALAR = 'scalar'
+
+def _strip_constant_one(dim):
+    """Return <dim> without a ccpp_constant_one lower bound"""
+    lbound, sep, ubound = dim.partition(':')
+    if sep and (lbound == 'ccpp_constant_one'):
+        return ubound
+    # end if
+    return dim
+
+def subscript_kind(subscript, dim):
+    """Return the kind of the subscript, <subscript>, for the dimension,
+    <dim>, of an array ('full' if it selects the entire dimension,
+    'scalar' if it selects a single element, or 'partial').
+    <subscript> and <dim> are standard name strings, a colon selects the
+    entire dimension. <dim> is None for a subscript of an array reference
+    which has no matching dimension.
+    >>> subscript_kind(':', 'ccpp_constant_one:vertical_layer_dimension')
+    'full'
+    >>> subscript_kind('vertical_layer_dimension', 'ccpp_constant_one:vertical_layer_dimension')
+    'full'
+    >>> subscript_kind('horizontal_loop_begin:horizontal_loop_end', 'ccpp_constant_one:horizontal_dimension')
+    'partial'
+    >>> subscript_kind('vertical_layer_index', 'ccpp_constant_one:vertical_layer_dimension')
+    'scalar'
+    >>> subscript_kind('index_of_water_vapor', None)
+    'scalar'
+    """
+    if subscript == ':':
+        return _FULL
+    # end if
+    if (dim is not None) and (_strip_constant_one(subscript) ==
+                              _strip_constant_one(dim)):
+        return _FULL
+    # end if
+    if ':' in subscript:
+        return _PARTIAL
+    # end if
+    return _SCALAR
+
+def section_contiguity(kinds):
+    """Return the class of the array section of a contiguous array with
+    subscripts of <kinds> (see subscript_kind). A section is contiguous
+    if every subscript before its first partial or scalar subscript is
+    full and every subscript after it is scalar.
+    >>> section_contiguity(['full', 'full'])
+    'contiguous'
+    >>> section_contiguity(['full', 'partial'])
+    'contiguous'
+    >>> section_contiguity(['partial', 'scalar'])
+    'contiguous'
+    >>> section_contiguity(['partial', 'full'])
+    'strided'
+    >>> section_contiguity(['scalar', 'full'])
+    'strided'
+    >>> section_contiguity([])
+    'contiguous'
+    """
+    found_subset = False
+    for kind in kinds:
+        if found_subset and (kind != _SCALAR):
+            return STRIDED
+        # end if
+        if kind != _FULL:
+            found_subset = True
+        # end if
+    # end for
+    return CONTIGUOUS
+
+def combine_contiguity(base, kinds):
+    """Return the class of the section with subscripts of <kinds> of an
+    array of class <base>. Sections of strided arrays are strided.
+    >>> combine_contiguity(CONTIGUOUS, ['full', 'scalar'])
+    'contiguous'
+    >>> combine_contiguity(STRIDED, ['full', 'full'])
+    'strided'
+    """
+    if base != CONTIGUOUS:
+        return STRIDED
+    # end if
+    return section_contiguity(kinds)
+
+class ArrayArgReport:
+    """Class to collect the array arguments of the calls in a suite's
+    caps and to write them, with their class, to a report file.
+    >>> report = ArrayArgReport('my_suite')
+    >>> report.add_argument('host_cap', 'my_suite_physics', 'temp', 'temp(cs:ce, 1:nlev)', STRIDED, True)
+    'strided'
+    >>> report.add_argument('my_suite_physics', 'my_scheme_run', 'temp', 'temp', STRIDED, False)
+    'temporary'
+    >>> report.add_argument('my_suite_physics', 'my_scheme_run', 'ps', 'ps', CONTIGUOUS, False)
+    'contiguous'
+    >>> report.counts()
+    {'contiguous': 1, 'strided': 1, 'temporary': 1}
+    """
+
+    __header = "Array arguments of the generated calls for suite {}"
+
+    def __init__(self, suite_name):
+        """Initialize a report for the suite, <suite_name>"""
+        self.__suite_name = suite_name
+        self.__args = list()
+
+    def add_argument(self, caller, callee, dummy, actual, contiguity,
+                     assumed_shape):
+        """Add the argument, <actual>, passed by <caller> to the dummy
+        argument, <dummy>, of <callee>. <contiguity> is the class of
+        <actual>. If <assumed_shape> is False, the dummy argument may not
+        be assumed-shape, and a strided <actual> requires a temporary.
+        Return the class of the argument."""
+        if (contiguity == STRIDED) and (not assumed_shape):
+            arg_class = TEMPORARY
+        else:
+            arg_class = contiguity
+        # end if
+        self.__args.append((caller, callee, dummy, actual, arg_class))
+        return arg_class
+
+    def counts(self):
+        """Return the number of arguments of each class"""
+        return {x : len([y for y in self.__args if y[4] == x])
+                for x in [CONTIGUOUS, STRIDED, TEMPORARY]}
+
+    def write(self, filename):
+        """Write the report to <filename>"""
+        titles = ('Caller', 'Callee', 'Dummy', 'Actual', 'Class')
+        widths = [max([len(x[index]) for x in self.__args + [titles]])
+                  for index in range(len(titles) - 1)]
+        row_fmt = '  '.join(['{{:<{}}}'.format(x) for x in widths]) + '  {}'
+        with open(filename, 'w') as rfile:
+            rfile.write('# ' + self.__header.format(self.__suite_name) + '\n')
+            counts = self.counts()
+            rfile.write('# ' + ', '.join(['{}: {}'.format(x, counts[x])
+                                          for x in counts]) + '\n')
+            rfile.write('# ' + TEMPORARY + ': a strided array passed to a ' +
+                        'scheme dummy argument which is not declared ' +
+                        'assumed-shape, it is copied\n')
+            rfile.write(row_fmt.format(*titles).rstrip() + '\n')
+            for arg in self.__args:
+                rfile.write(row_fmt.format(*arg).rstrip() + '\n')
+            # end for
+        # end with
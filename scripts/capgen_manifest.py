@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+
+"""
+Define the CapgenManifest object
+The manifest records the inputs used to create each file generated by
+capgen so that an incremental capgen run can skip work whose inputs
+have not changed.
+"""
+
+# Python library imports
+import glob
+import hashlib
+import json
+import os
+import tempfile
+
+## Version of the manifest file layout, update when the layout changes
+_MANIFEST_FORMAT = 1
+
+###############################################################################
+def file_digest(filename):
+###############################################################################
+    """Return a SHA-256 digest of the contents of <filename>."""
+    hasher = hashlib.sha256()
+    with open(filename, 'rb') as infile:
+        hasher.update(infile.read())
+    # end with
+    return hasher.hexdigest()
+
+###############################################################################
+def manifest_filename(datatable_file):
+###############################################################################
+    """Return the name of the capgen manifest file which accompanies the
+    CCPP datatable file, <datatable_file>.
+    >>> manifest_filename('/foo/bar/datatable.xml')
+    '/foo/bar/datatable_manifest.json'
+    """
+    return os.path.splitext(datatable_file)[0] + '_manifest.json'
+
+###############################################################################
+class CapgenManifest:
+###############################################################################
+    """Object to record and check the inputs of each generated file.
+    A generated file is current if it is unchanged since it was written
+    and none of its inputs, the framework source, or the framework
+    settings have changed since then.
+    >>> CapgenManifest('/nonexistent/manifest.json', {}).is_current('foo.F90', [])
+    False
+    """
+
+    def __init__(self, filename, settings):
+        """Initialize a CapgenManifest object from <filename> (if it exists).
+        <settings> is a dictionary of the framework settings which affect
+           the generated files (e.g., kind types and preprocessor symbols).
+        """
+        self.__filename = filename
+        self.__digests = {}
+        self.__outputs = {}
+        self.__signature = self.__compute_signature(settings)
+        self.__old_inputs = {}
+        self.__old_outputs = {}
+        try:
+            with open(filename, 'r') as mfile:
+                mdata = json.load(mfile)
+            # end with
+            if mdata.get('signature') == self.__signature:
+                self.__old_inputs = mdata['inputs']
+                self.__old_outputs = mdata['outputs']
+            # end if
+        except (OSError, ValueError, KeyError):
+            pass # No usable manifest, everything will be regenerated
+        # end try
+
+    @staticmethod
+    def __compute_signature(settings):
+        """Return a digest of the framework source and <settings>."""
+        hasher = hashlib.sha256()
+        hasher.update(str(_MANIFEST_FORMAT).encode('utf-8'))
+        hasher.update(json.dumps(settings, sort_keys=True,
+                                 default=str).encode('utf-8'))
+        scripts_dir = os.path.dirname(os.path.abspath(__file__))
+        src_files = glob.glob(os.path.join(scripts_dir, '**', '*.py'),
+                              recursive=True)
+        for src_file in sorted(src_files):
+            hasher.update(file_digest(src_file).encode('utf-8'))
+        # end for
+        return hasher.hexdigest()
+
+    def digest(self, filename):
+        """Return the digest for <filename>, compute it only once."""
+        if filename not in self.__digests:
+            self.__digests[filename] = file_digest(filename)
+        # end if
+        return self.__digests[filename]
+
+    def inputs_current(self, inputs):
+        """Return True iff <inputs> is exactly the set of inputs recorded in
+        the manifest and none of them has changed."""
+        if set(inputs) != set(self.__old_inputs):
+            return False
+        # end if
+        return all(self.digest(x) == self.__old_inputs[x] for x in inputs)
+
+    def is_current(self, outfile, inputs):
+        """Return True iff <outfile> was generated from <inputs>, none of
+        <inputs> has changed, and <outfile> has not been modified."""
+        if outfile not in self.__old_outputs:
+            return False
+        # end if
+        odata = self.__old_outputs[outfile]
+        if sorted(inputs) != odata['inputs']:
+            return False
+        # end if
+        for infile in inputs:
+            if self.__old_inputs.get(infile) != self.digest(infile):
+                return False
+            # end if
+        # end for
+        if not os.path.exists(outfile):
+            return False
+        # end if
+        return file_digest(outfile) == odata['digest']
+
+    def all_current(self, inputs):
+        """Return True iff <inputs> and all of the files recorded in the
+        manifest are current, i.e., there is nothing to regenerate."""
+        if (not self.__old_outputs) or (not self.inputs_current(inputs)):
+            return False
+        # end if
+        return all(self.is_current(x, self.__old_outputs[x]['inputs'])
+                   for x in self.__old_outputs)
+
+    def add_output(self, outfile, inputs):
+        """Record that <outfile> was generated from <inputs>."""
+        self.__outputs[outfile] = sorted(inputs)
+
+    def write(self):
+        """Write the manifest for the files recorded with add_output."""
+        inputs = {}
+        outputs = {}
+        for outfile, ofile_inputs in self.__outputs.items():
+            for infile in ofile_inputs:
+                inputs[infile] = self.digest(infile)
+            # end for
+            outputs[outfile] = {'inputs' : ofile_inputs,
+                                'digest' : file_digest(outfile)}
+        # end for
+        mdata = {'signature' : self.__signature, 'inputs' : inputs,
+                 'outputs' : outputs}
+        mdir = os.path.dirname(self.__filename)
+        with tempfile.NamedTemporaryFile('w', dir=mdir, suffix='.tmp',
+                                         delete=False) as mfile:
+            json.dump(mdata, mfile, indent=1, sort_keys=True)
+        # end with
+        os.replace(mfile.name, self.__filename)
+
+    @property
+    def filename(self):
+        """Return the name of this manifest's file"""
+        return self.__filename
+
+###############################################################################
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
@@ -10,13 +10,16 @@ from __future__ import absolute_import
 from __future__ import unicode_literals
 from __future__ import print_function
 
+import concurrent.futures
 import sys
 import os
 import logging
 import re
 # CCPP framework imports
+from capgen_manifest import CapgenManifest, manifest_filename
 from ccpp_database_obj import CCPPDatabaseObj
 from ccpp_datafile import generate_ccpp_datatable
+from ccpp_state_machine import CCPP_STATE_MACH
 from ccpp_suite import API
 from file_utils import check_for_writeable_file, remove_dir, replace_paths
 from file_utils import create_file_list, move_modified_files
@@ -26,9 +29,12 @@ from framework_env import parse_command_line
 from host_cap import write_host_cap
 from host_model import HostModel
 from metadata_table import parse_metadata_file, SCHEME_HEADER_TYPE
+from metadata_table import restore_metadata_tables
 from parse_tools import init_log, set_log_level, context_string
 from parse_tools import register_fortran_ddt_name
+from parse_tools import registered_fortran_ddt_names
 from parse_tools import CCPPError, ParseInternalError
+from var_props import VarCompatObj
 
 ## Capture the Framework root
 _SCRIPT_PATH = os.path.dirname(__file__)
@@ -134,9 +140,7 @@ def create_kinds_file(run_env, output_dir):
                                         run_env.kind_spec(kind_type)), 1)
         # end for
         kindf.write_preamble()
-        for kind_type in kind_types:
-            kindf.write("public :: {}".format(kind_type), 1)
-        # end for
+        kindf.write_block(["public :: {}".format(x) for x in kind_types], 1)
     # end with
     return kinds_filepath
 
@@ -439,6 +443,18 @@ def check_fortran_against_metadata(meta_headers, fort_headers,
                                       's' if num_errors > 1 else '',
                                       mfilename, ffilename))
     # end if
+    # Record the assumed-shape dummy arrays of each scheme routine
+    for mheader, fheader in header_dict.items():
+        if mheader.header_type == SCHEME_HEADER_TYPE:
+            for fvar in fheader.variable_list():
+                fdims = fvar.get_dimensions()
+                if fdims and all(x.strip() == ':' for x in fdims):
+                    lname = fvar.get_prop_value('local_name')
+                    mheader.add_assumed_shape_arg(lname)
+                # end if
+            # end for
+        # end if
+    # end for
     # No return, an exception is raised on error
 
 ###############################################################################
@@ -454,6 +470,31 @@ def duplicate_item_error(title, filename, itype, orig_item):
     # end if
     raise CCPPError(errmsg.format(**edict))
 
+###############################################################################
+def check_associated_fortran_file(filename, mtables, run_env):
+###############################################################################
+    """Parse the Fortran file associated with metadata file, <filename>,
+    and check it against <mtables>, the metadata tables parsed from
+    <filename>. Return the list of metadata headers from <mtables>."""
+    with run_env.phase_timer.phase('fortran_check'):
+        fort_file = find_associated_fortran_file(filename)
+        mheaders = list()
+        for sect in [x.sections() for x in mtables]:
+            mheaders.extend(sect)
+        # end for
+        # We only need the Fortran routines which have metadata
+        ftables = parse_fortran_file(fort_file, run_env,
+                                     table_names=[x.title for x in mheaders])
+        # Check Fortran against metadata (will raise an exception on error)
+        fheaders = list()
+        for sect in [x.sections() for x in ftables]:
+            fheaders.extend(sect)
+        # end for
+        check_fortran_against_metadata(mheaders, fheaders,
+                                       filename, fort_file, run_env.logger)
+    # end with
+    return mheaders
+
 ###############################################################################
 def parse_host_model_files(host_filenames, host_name, run_env):
 ###############################################################################
@@ -468,20 +509,10 @@ def parse_host_model_files(host_filenames, host_name, run_env):
     for filename in host_filenames:
         logger.info('Reading host model data from {}'.format(filename))
         # parse metadata file
-        mtables = parse_metadata_file(filename, known_ddts, run_env)
-        fort_file = find_associated_fortran_file(filename)
-        ftables = parse_fortran_file(fort_file, run_env)
-        # Check Fortran against metadata (will raise an exception on error)
-        mheaders = list()
-        for sect in [x.sections() for x in mtables]:
-            mheaders.extend(sect)
-        # end for
-        fheaders = list()
-        for sect in [x.sections() for x in ftables]:
-            fheaders.extend(sect)
-        # end for
-        check_fortran_against_metadata(mheaders, fheaders,
-                                       filename, fort_file, logger)
+        with run_env.phase_timer.phase('metadata_parse'):
+            mtables = parse_metadata_file(filename, known_ddts, run_env)
+        # end with
+        mheaders = check_associated_fortran_file(filename, mtables, run_env)
         # Check for duplicate tables, then add to dict
         for table in mtables:
             if table.table_name in table_dict:
@@ -510,34 +541,123 @@ def parse_host_model_files(host_filenames, host_name, run_env):
     host_model = HostModel(table_dict, host_name, run_env)
     return host_model
 
+###############################################################################
+def _init_scheme_worker(ddt_names):
+###############################################################################
+    """Initialize a scheme file worker process by registering the DDT
+    names known to the parent process, <ddt_names>."""
+    for ddt_name in ddt_names:
+        register_fortran_ddt_name(ddt_name)
+    # end for
+
+###############################################################################
+def _check_scheme_file(filename, tables_data, run_env):
+###############################################################################
+    """Worker process task to check the Fortran file associated with
+    <filename> against its metadata tables, <tables_data> (as returned by
+    MetadataTable.cache_data). An exception is raised on error.
+    Return the assumed-shape dummy arrays found by the check for each
+    section (see MetadataSection.assumed_shape_args), keyed by title."""
+    mtables = restore_metadata_tables(filename, tables_data, list(), run_env)
+    mheaders = check_associated_fortran_file(filename, mtables, run_env)
+    return {x.title : x.assumed_shape_args for x in mheaders}
+
+###############################################################################
+def parse_scheme_files_parallel(scheme_filenames, run_env):
+###############################################################################
+    """Parse <scheme_filenames> and check each file against its associated
+    Fortran file using <run_env>.jobs worker processes.
+    The metadata files are parsed in order in this process because each
+    file can use DDTs defined in the previous files. The Fortran files are
+    parsed and checked by the worker processes.
+    Return a list with a result for each file in <scheme_filenames>, either
+    the file's list of metadata tables or the exception raised while
+    processing that file. The list stops at the first metadata file which
+    cannot be parsed."""
+    results = list()
+    tasks = list()
+    known_ddts = list()
+    for filename in scheme_filenames:
+        try:
+            with run_env.phase_timer.phase('metadata_parse'):
+                mtables = parse_metadata_file(filename, known_ddts, run_env)
+            # end with
+        except (CCPPError, ParseInternalError) as perr:
+            results.append(perr)
+            break
+        # end try
+        for table in mtables:
+            for header in table.sections():
+                if header.header_type == 'ddt':
+                    known_ddts.append(header.title)
+                # end if
+            # end for
+        # end for
+        results.append(mtables)
+        tasks.append((filename, [x.cache_data() for x in mtables]))
+    # end for
+    ddt_names = registered_fortran_ddt_names()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=run_env.jobs,
+                                                initializer=_init_scheme_worker,
+                                                initargs=(ddt_names,)) as pool:
+        futures = [pool.submit(_check_scheme_file, fname, tdata, run_env)
+                   for fname, tdata in tasks]
+        for index, future in enumerate(futures):
+            exc = future.exception()
+            if exc is not None:
+                results[index] = exc
+                continue
+            # end if
+            # Record the assumed-shape dummy arrays found by the worker
+            assumed_shape = future.result()
+            for table in results[index]:
+                for header in table.sections():
+                    for lname in assumed_shape.get(header.title, []):
+                        header.add_assumed_shape_arg(lname)
+                    # end for
+                # end for
+            # end for
+        # end for
+    # end with
+    return results
+
 ###############################################################################
 def parse_scheme_files(scheme_filenames, run_env):
 ###############################################################################
     """
     Gather information from scheme files (e.g., init, run, and finalize
     methods) and return resulting dictionary.
+    If <run_env>.jobs is greater than one, the files are processed in
+    parallel (see parse_scheme_files_parallel) but the results and any
+    errors are identical to processing the files one at a time.
     """
     table_dict = {} # Duplicate check and for dependencies processing
     header_dict = {} # To check for duplicates
     known_ddts = list()
     logger = run_env.logger
-    for filename in scheme_filenames:
+    if run_env.jobs > 1:
+        results = parse_scheme_files_parallel(scheme_filenames, run_env)
+    else:
+        results = None
+    # end if
+    for index, filename in enumerate(scheme_filenames):
         logger.info('Reading CCPP schemes from {}'.format(filename))
-        # parse metadata file
-        mtables = parse_metadata_file(filename, known_ddts, run_env)
-        fort_file = find_associated_fortran_file(filename)
-        ftables = parse_fortran_file(fort_file, run_env)
-        # Check Fortran against metadata (will raise an exception on error)
-        mheaders = list()
-        for sect in [x.sections() for x in mtables]:
-            mheaders.extend(sect)
-        # end for
-        fheaders = list()
-        for sect in [x.sections() for x in ftables]:
-            fheaders.extend(sect)
-        # end for
-        check_fortran_against_metadata(mheaders, fheaders,
-                                       filename, fort_file, logger)
+        if results is None:
+            # parse metadata file
+            with run_env.phase_timer.phase('metadata_parse'):
+                mtables = parse_metadata_file(filename, known_ddts, run_env)
+            # end with
+            mheaders = check_associated_fortran_file(filename, mtables,
+                                                     run_env)
+        elif isinstance(results[index], Exception):
+            raise results[index]
+        else:
+            mtables = results[index]
+            mheaders = list()
+            for sect in [x.sections() for x in mtables]:
+                mheaders.extend(sect)
+            # end for
+        # end if
         # Check for duplicate tables, then add to dict
         for table in mtables:
             if table.table_name in table_dict:
@@ -563,14 +683,86 @@ def parse_scheme_files(scheme_filenames, run_env):
     return header_dict.values(), table_dict
 
 ###############################################################################
-def clean_capgen(cap_output_file, logger):
+def metadata_file_inputs(meta_files):
+###############################################################################
+    """Return a list with each file in <meta_files> followed by its
+    associated Fortran file"""
+    inputs = list()
+    for meta_file in meta_files:
+        inputs.append(meta_file)
+        inputs.append(find_associated_fortran_file(meta_file))
+    # end for
+    return inputs
+
+###############################################################################
+def capgen_settings(run_env):
+###############################################################################
+    """Return a dictionary of the <run_env> settings which affect the
+    files generated by capgen"""
+    kinds = {x : run_env.kind_spec(x) for x in run_env.kind_types()}
+    return {'kind_types' : kinds, 'preproc_defs' : run_env.preproc_defs,
+            'host_name' : run_env.host_name,
+            'use_error_obj' : run_env.use_error_obj,
+            'debug' : run_env.debug,
+            'fuse_var_transforms' : run_env.fuse_var_transforms,
+            'persistent_transform_buffers' :
+            run_env.persistent_transform_buffers,
+            'scheme_timers' : run_env.scheme_timers,
+            'run_chunk_size' : run_env.run_chunk_size,
+            'array_arg_report' : run_env.array_arg_report,
+            'datatable_database' : run_env.datatable_database}
+
 ###############################################################################
-    """Attempt to remove the files created by the last invocation of capgen"""
+def suite_cap_inputs(ccpp_api, scheme_headers, common_inputs):
+###############################################################################
+    """Return a dictionary, keyed by suite name, of the input files used
+    to generate each suite cap in <ccpp_api>.
+    Every suite cap depends on <common_inputs> (e.g., the host model files),
+    its SDF, and the metadata and Fortran files of the schemes which it
+    calls. Since DDTs can be used by any suite, files containing a DDT
+    definition are inputs to every suite."""
+    scheme_files = {}
+    ddt_files = list()
+    for header in scheme_headers:
+        meta_file = header.context.filename
+        if header.header_type == 'ddt':
+            ddt_files.append(meta_file)
+        else:
+            func_id, _, _ = CCPP_STATE_MACH.function_match(header.title)
+            scheme_files.setdefault(func_id, set()).add(meta_file)
+        # end if
+    # end for
+    suite_inputs = {}
+    for suite in ccpp_api.suites:
+        meta_files = set(ddt_files)
+        for scheme in ccpp_api.suite_schemes(suite):
+            meta_files.update(scheme_files.get(scheme, set()))
+        # end for
+        inputs = set(common_inputs)
+        inputs.add(suite.sdf_name)
+        inputs.update(metadata_file_inputs(meta_files))
+        suite_inputs[suite.name] = sorted(inputs)
+    # end for
+    return suite_inputs
+
+###############################################################################
+def clean_capgen(cap_output_file, logger, database_file=None):
+###############################################################################
+    """Attempt to remove the files created by the last invocation of capgen.
+    If <database_file> is not None, also remove that datatable database."""
     log_level = logger.getEffectiveLevel()
     set_log_level(logger, logging.INFO)
     if os.path.exists(cap_output_file):
         logger.info("Cleaning capgen files from {}".format(cap_output_file))
         delete_pathnames_from_file(cap_output_file, logger)
+        manifest_file = manifest_filename(cap_output_file)
+        if os.path.exists(manifest_file):
+            os.remove(manifest_file)
+        # end if
+        if database_file and os.path.exists(database_file):
+            logger.info("Clean: Removing {}".format(database_file))
+            os.remove(database_file)
+        # end if
     else:
         emsg = "Unable to run clean, {} not found"
         logger.error(emsg.format(cap_output_file))
@@ -581,7 +773,9 @@ def clean_capgen(cap_output_file, logger):
 def capgen(run_env, return_db=False):
 ###############################################################################
     """Parse indicated host, scheme, and suite files.
-    Generate code to allow host model to run indicated CCPP suites."""
+    Generate code to allow host model to run indicated CCPP suites.
+    If <run_env> is incremental, only generate files whose inputs have
+    changed since the last run."""
     ## A few sanity checks
     ## Make sure output directory is legit
     if os.path.exists(run_env.output_dir):
@@ -602,34 +796,59 @@ def capgen(run_env, return_db=False):
         register_fortran_ddt_name(ddt_name)
     # end for
     src_dir = os.path.join(_FRAMEWORK_ROOT, "src")
+    timer = run_env.phase_timer
     host_files = run_env.host_files
     host_name = run_env.host_name
     scheme_files = run_env.scheme_files
     # We need to create three lists of files, hosts, schemes, and SDFs
-    host_files = create_file_list(run_env.host_files, ['meta'], 'Host',
-                                  run_env.logger)
-    # The host model needs to know about the constituents module
-    const_mod = os.path.join(_SRC_ROOT, "ccpp_constituent_prop_mod.meta")
-    if const_mod not in host_files:
-        host_files.append(const_mod)
-    # end if
-    scheme_files = create_file_list(run_env.scheme_files, ['meta'],
-                                    'Scheme', run_env.logger)
-    sdfs = create_file_list(run_env.suites, ['xml'], 'Suite', run_env.logger)
+    with timer.phase('file_lists'):
+        host_files = create_file_list(run_env.host_files, ['meta'], 'Host',
+                                      run_env.logger)
+        # The host model needs to know about the constituents module
+        const_mod = os.path.join(_SRC_ROOT, "ccpp_constituent_prop_mod.meta")
+        if const_mod not in host_files:
+            host_files.append(const_mod)
+        # end if
+        scheme_files = create_file_list(run_env.scheme_files, ['meta'],
+                                        'Scheme', run_env.logger)
+        sdfs = create_file_list(run_env.suites, ['xml'], 'Suite',
+                                run_env.logger)
+    # end with
     check_for_writeable_file(run_env.datatable_file, "Cap output datatable")
+    if run_env.datatable_database:
+        check_for_writeable_file(run_env.datatable_database,
+                                 "Cap output datatable database")
+    # end if
     ##XXgoldyXX: Temporary warning
     if run_env.generate_docfiles:
         raise CCPPError("--generate-docfiles not yet supported")
     # end if
-    # First up, handle the host files
-    host_model = parse_host_model_files(host_files, host_name, run_env)
     # We always need to parse the ccpp_constituent_prop_ptr_t DDT
     const_prop_mod = os.path.join(src_dir, "ccpp_constituent_prop_mod.meta")
     if const_prop_mod not in scheme_files:
         scheme_files = [const_prop_mod] + scheme_files
     # end if
+    if run_env.incremental:
+        manifest = CapgenManifest(manifest_filename(run_env.datatable_file),
+                                  capgen_settings(run_env))
+        host_inputs = metadata_file_inputs(host_files)
+        all_inputs = host_inputs + metadata_file_inputs(scheme_files) + sdfs
+        if (not return_db) and manifest.all_current(all_inputs):
+            run_env.logger.info("All CCPP generated files are up to date")
+            return None
+        # end if
+    else:
+        manifest = None
+    # end if
+    # First up, handle the host files
+    with timer.phase('host_parse'):
+        host_model = parse_host_model_files(host_files, host_name, run_env)
+    # end with
     # Next, parse the scheme files
-    scheme_headers, scheme_tdict = parse_scheme_files(scheme_files, run_env)
+    with timer.phase('scheme_parse'):
+        scheme_headers, scheme_tdict = parse_scheme_files(scheme_files,
+                                                          run_env)
+    # end with
     if run_env.verbose:
         ddts = host_model.ddt_lib.keys()
         if ddts:
@@ -660,32 +879,69 @@ def capgen(run_env, return_db=False):
         # end if
         os.makedirs(outtemp_dir)
     # end if
-    ccpp_api = API(sdfs, host_model, scheme_headers, run_env)
-    cap_filenames = ccpp_api.write(outtemp_dir, run_env)
-    if run_env.generate_host_cap:
-        # Create a cap file
-        cap_module = host_model.ccpp_cap_name()
-        host_files = [write_host_cap(host_model, ccpp_api, cap_module,
-                                     outtemp_dir, run_env)]
-    else:
-        host_files = list()
-    # end if
-    # Create the kinds file
-    kinds_file = create_kinds_file(run_env, outtemp_dir)
-    # Move any changed files to output_dir and remove outtemp_dir
-    move_modified_files(outtemp_dir, run_env.output_dir,
-                        overwrite=run_env.force_overwrite, remove_src=True)
-    # We have to rename the files we created
-    if outtemp_dir != run_env.output_dir:
-        replace_paths(cap_filenames, outtemp_dir, run_env.output_dir)
-        replace_paths(host_files, outtemp_dir, run_env.output_dir)
-        kinds_file = kinds_file.replace(outtemp_dir, run_env.output_dir)
+    with timer.phase('suite_analysis'):
+        ccpp_api = API(sdfs, host_model, scheme_headers, run_env)
+    # end with
+    num_reused, num_checks = VarCompatObj.cache_statistics()
+    msg = "Variable compatibility checks: {}, {} reused from earlier checks"
+    run_env.logger.info(msg.format(num_checks, num_reused))
+    current_caps = {}
+    if manifest is not None:
+        suite_inputs = suite_cap_inputs(ccpp_api, scheme_headers, host_inputs)
+        for suite in ccpp_api.suites:
+            cap_file = os.path.join(run_env.output_dir, suite.cap_filename)
+            if manifest.is_current(cap_file, suite_inputs[suite.name]):
+                current_caps[suite.name] = cap_file
+            # end if
+        # end for
     # end if
+    with timer.phase('code_writing'):
+        cap_filenames = ccpp_api.write(outtemp_dir, run_env,
+                                       current_caps=current_caps)
+        if run_env.generate_host_cap:
+            # Create a cap file
+            cap_module = host_model.ccpp_cap_name()
+            host_files = [write_host_cap(host_model, ccpp_api, cap_module,
+                                         outtemp_dir, run_env)]
+        else:
+            host_files = list()
+        # end if
+        # Create the kinds file
+        kinds_file = create_kinds_file(run_env, outtemp_dir)
+    # end with
+    with timer.phase('file_moving'):
+        # Move any changed files to output_dir and remove outtemp_dir
+        move_modified_files(outtemp_dir, run_env.output_dir,
+                            overwrite=run_env.force_overwrite, remove_src=True)
+        # We have to rename the files we created
+        if outtemp_dir != run_env.output_dir:
+            replace_paths(cap_filenames, outtemp_dir, run_env.output_dir)
+            replace_paths(host_files, outtemp_dir, run_env.output_dir)
+            kinds_file = kinds_file.replace(outtemp_dir, run_env.output_dir)
+        # end if
+    # end with
     # Finally, create the database of generated files and caps
     # This can be directly in output_dir because it will not affect dependencies
-    generate_ccpp_datatable(run_env, host_model, ccpp_api,
-                            scheme_headers, scheme_tdict, host_files,
-                            cap_filenames, kinds_file, src_dir)
+    with timer.phase('datatable'):
+        generate_ccpp_datatable(run_env, host_model, ccpp_api,
+                                scheme_headers, scheme_tdict, host_files,
+                                cap_filenames, kinds_file, src_dir)
+    # end with
+    if manifest is not None:
+        # Record the inputs of each generated file for the next run
+        for suite, cap_file in zip(ccpp_api.suites, cap_filenames):
+            manifest.add_output(cap_file, suite_inputs[suite.name])
+        # end for
+        for host_cap in host_files:
+            manifest.add_output(host_cap, all_inputs)
+        # end for
+        manifest.add_output(kinds_file, [])
+        manifest.add_output(run_env.datatable_file, all_inputs)
+        if run_env.datatable_database:
+            manifest.add_output(run_env.datatable_database, all_inputs)
+        # end if
+        manifest.write()
+    # end if
     if return_db:
         return CCPPDatabaseObj(run_env, host_model=host_model, api=ccpp_api)
     # end if
@@ -703,9 +959,20 @@ def _main_func():
         set_log_level(framework_env.logger, logging.INFO)
     # end if
     if framework_env.clean:
-        clean_capgen(framework_env.datatable_file, framework_env.logger)
+        clean_capgen(framework_env.datatable_file, framework_env.logger,
+                     database_file=framework_env.datatable_database)
     else:
         _ = capgen(framework_env)
+        timer = framework_env.phase_timer
+        if framework_env.timing_report:
+            timer.write_report(framework_env.timing_report)
+        # end if
+        if framework_env.profile:
+            # Make sure the summary is not filtered out by the log level
+            log_level = max(framework_env.logger.getEffectiveLevel(),
+                            logging.INFO)
+            timer.log_report(framework_env.logger, level=log_level)
+        # end if
     # end if (clean)
 
 ###############################################################################
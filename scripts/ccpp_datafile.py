@@ -9,26 +9,81 @@ The CCPP datafile is a database consisting of several tables:
   for host-model metadata and scheme metadata. These filenames may serve
   as keys
 - A list of variable entries, keyed by standard name.
+The datatable is written as an XML file and optionally also as an SQLite
+database (see write_datatable_database). Reports can be run on either file.
 """
 
 ## NB: A new report must be added in two places:
 ##     1) In the list of DatatableReport._valid_reports
 ##     2) As an option in datatable_report
 
+## Many reports can be answered by one process, which reads each datatable
+## file only once (see DatatableIndex):
+##  - Batch mode (--batch <file>) runs each report request in <file> (one
+##    request per line, using the command-line report options).
+##  - Server mode (--serve <socket>) answers report requests sent to a UNIX
+##    socket until a shutdown request is received. A report command with
+##    --connect <socket> is answered by the server at <socket> if one is
+##    running, otherwise, it is answered directly.
+
 # Python library imports
 import argparse
+import json
 import logging
 import os
+import shlex
+import socket
+import socketserver
 import sys
 import xml.etree.ElementTree as ET
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None # Datatable databases are not available
+# end try
 # CCPP framework imports
 from metadata_table import UNKNOWN_PROCESS_TYPE
 from metavar import Var
-from parse_tools import read_xml_file, PrettyElementTree
+from parse_tools import read_xml_file, PrettyElementTree, CCPPError
 from suite_objects import VerticalLoop, Subcycle
 
 # Global data
 _INDENT_STR = "  "
+# DatatableIndex objects which have been read, keyed by datatable path
+_DATATABLE_INDEXES = {}
+# Version of the datatable database layout, update when the layout changes
+_DATABASE_FORMAT = 1
+# The first bytes of every SQLite database file
+_SQLITE_HEADER = b"SQLite format 3\x00"
+
+## The datatable database has a table for each datatable section.
+## Entries are numbered in datatable order.
+_DATABASE_SCHEMA = """
+CREATE TABLE datatable (format INTEGER, version TEXT, xml TEXT);
+CREATE TABLE files (section_id INTEGER, section TEXT,
+                    file_id INTEGER, path TEXT);
+CREATE TABLE schemes (scheme_id INTEGER PRIMARY KEY, name TEXT, process TEXT);
+CREATE TABLE scheme_phases (phase_id INTEGER PRIMARY KEY, scheme_id INTEGER,
+                            phase TEXT, name TEXT, subroutine_name TEXT,
+                            filename TEXT, module TEXT);
+CREATE TABLE call_lists (phase_id INTEGER, position INTEGER, name TEXT,
+                         intent TEXT, local_name TEXT);
+CREATE TABLE suites (suite_id INTEGER PRIMARY KEY, name TEXT, filename TEXT);
+CREATE TABLE groups (suite_id INTEGER, position INTEGER, name TEXT);
+CREATE TABLE var_dictionaries (dict_id INTEGER PRIMARY KEY, name TEXT,
+                               type TEXT, parent TEXT, sub_dictionaries TEXT);
+CREATE TABLE variables (dict_id INTEGER, position INTEGER, name TEXT,
+                        intent TEXT, protected INTEGER, dimensions TEXT,
+                        source_type TEXT, source_name TEXT, attributes TEXT);
+CREATE TABLE dependencies (position INTEGER, path TEXT);
+CREATE INDEX suite_names ON suites (name);
+CREATE INDEX suite_groups ON groups (suite_id, position);
+CREATE INDEX dictionary_names ON var_dictionaries (name, dict_id);
+CREATE INDEX dictionary_types ON var_dictionaries (type, dict_id);
+CREATE INDEX dictionary_variables ON variables (dict_id, position);
+CREATE INDEX variable_names ON variables (name);
+CREATE INDEX call_list_phases ON call_lists (phase_id, position);
+"""
 
 ## datatable_report must have an action for each report type
 _VALID_REPORTS = [{"report" : "host_files", "type" : bool,
@@ -121,25 +176,341 @@ class DatatableReport(object):
         """Return the list of valid actions for this class"""
         return cls.__valid_actions
 
+class DatatableIndex(object):
+    """An in-memory index of a datatable file which is read only once.
+    Variable dictionaries and variable protection are looked up by name
+    and the result of each report is saved so that repeated reports are
+    not recomputed."""
+
+    def __init__(self, datatable):
+        """Read the datatable file, <datatable>, and index its contents"""
+        self.__filename = datatable
+        self.__stamp = DatatableIndex.file_stamp(datatable)
+        self.__table = _read_datatable(datatable)
+        self.__var_dicts = {}
+        self.__dict_types = {}
+        var_dicts = self.__table.find("var_dictionaries")
+        if var_dicts is not None:
+            for vdict in var_dicts:
+                self.__var_dicts.setdefault(vdict.get("name"), []).append(vdict)
+                self.__dict_types.setdefault(vdict.get("type"), vdict)
+            # end for
+        # end if
+        self.__protected = {}
+        self.__reports = {}
+
+    @staticmethod
+    def file_stamp(datatable):
+        """Return a value which changes when the file, <datatable>, changes
+        or None if <datatable> cannot be found"""
+        try:
+            stat = os.stat(datatable)
+        except OSError:
+            return None
+        # end try
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def is_current(self):
+        """Return True if this index's datatable file has not changed since
+        it was read"""
+        return DatatableIndex.file_stamp(self.__filename) == self.__stamp
+
+    def find_var_dictionary(self, dict_name=None, dict_type=None):
+        """Find and return a var_dictionary named, <dict_name>.
+        If not found, return None"""
+        if (dict_name is None) and (dict_type is None):
+            raise ValueError(("At least one of <dict_name> or <dict_type> "
+                              "must contain a string"))
+        # end if
+        if dict_name is None:
+            return self.__dict_types.get(dict_type)
+        # end if
+        for vdict in self.__var_dicts.get(dict_name, []):
+            if (dict_type is None) or (vdict.get("type") == dict_type):
+                return vdict
+            # end if
+        # end for
+        return None
+
+    def dictionary_variables(self, var_dict):
+        """Return a list of the (name, intent) of each variable in
+        <var_dict>"""
+        dvars = var_dict.find("variables")
+        if dvars is None:
+            return []
+        # end if
+        return [(x.get("name"), x.get("intent")) for x in dvars]
+
+    def dictionary_parent(self, var_dict):
+        """Return the parent dictionary of <var_dict> or None if <var_dict>
+        has no parent"""
+        parent = var_dict.get("parent")
+        if parent is None:
+            return None
+        # end if
+        return self.find_var_dictionary(dict_name=parent)
+
+    def suite_group_names(self, suite_name):
+        """Return a list of the group names for suite, <suite_name>"""
+        return _retrieve_suite_group_names(self.__table, suite_name)
+
+    def protected_variables(self, var_dict):
+        """Return a dictionary of the protected status of each variable
+        in <var_dict>. Only the first entry for a variable is used."""
+        # Dictionary names are not unique so use the element as the key
+        if var_dict not in self.__protected:
+            protected = {}
+            dvars = var_dict.find("variables")
+            if dvars is not None:
+                for var in dvars:
+                    vname = var.get("name")
+                    if vname not in protected:
+                        protected[vname] = var.get("protected",
+                                                   default="False") == "True"
+                    # end if
+                # end for
+            # end if
+            self.__protected[var_dict] = protected
+        # end if
+        return self.__protected[var_dict]
+
+    def report(self, action, excl_prot):
+        """Return the result of report, <action>, on this index.
+        The result is only computed the first time it is requested."""
+        key = (action.action, action.value, excl_prot)
+        if key not in self.__reports:
+            self.__reports[key] = _report_result(self, action, excl_prot)
+        # end if
+        return self.__reports[key]
+
+    @property
+    def table(self):
+        """Return the root element of this index's datatable"""
+        return self.__table
+
+    @property
+    def filename(self):
+        """Return the name of this index's datatable file"""
+        return self.__filename
+
+class DatatableDatabase(object):
+    """A datatable database file (see write_datatable_database) which
+    answers reports with indexed queries. It provides the same interface
+    as DatatableIndex."""
+
+    def __init__(self, database):
+        """Open the datatable database file, <database>"""
+        if sqlite3 is None:
+            raise CCPPDatatableError("Python sqlite3 module is not available")
+        # end if
+        self.__filename = database
+        self.__stamp = DatatableIndex.file_stamp(database)
+        uri = "file:{}?mode=ro".format(os.path.abspath(database))
+        try:
+            self.__conn = sqlite3.connect(uri, uri=True,
+                                          check_same_thread=False)
+            dformat, = self.__conn.execute("SELECT format FROM datatable").fetchone()
+        except sqlite3.Error as err:
+            emsg = "Cannot read datatable database, {}, {}"
+            raise CCPPDatatableError(emsg.format(database, err)) from err
+        # end try
+        if dformat != _DATABASE_FORMAT:
+            emsg = "Unsupported datatable database format, {}, in {}"
+            raise CCPPDatatableError(emsg.format(dformat, database))
+        # end if
+        self.__table = None
+        self.__parents = {}
+        self.__protected = {}
+        self.__reports = {}
+
+    def __query(self, query, *args):
+        """Return all the rows of SQL query, <query>, with arguments, <args>"""
+        return self.__conn.execute(query, args).fetchall()
+
+    def is_current(self):
+        """Return True if this database file has not changed since it was
+        opened"""
+        return DatatableIndex.file_stamp(self.__filename) == self.__stamp
+
+    def find_var_dictionary(self, dict_name=None, dict_type=None):
+        """Find and return the ID of the var_dictionary named, <dict_name>.
+        If not found, return None"""
+        if (dict_name is None) and (dict_type is None):
+            raise ValueError(("At least one of <dict_name> or <dict_type> "
+                              "must contain a string"))
+        # end if
+        if dict_type is None:
+            rows = self.__query("SELECT dict_id FROM var_dictionaries "
+                                "WHERE name = ? ORDER BY dict_id LIMIT 1",
+                                dict_name)
+        elif dict_name is None:
+            rows = self.__query("SELECT dict_id FROM var_dictionaries "
+                                "WHERE type = ? ORDER BY dict_id LIMIT 1",
+                                dict_type)
+        else:
+            rows = self.__query("SELECT dict_id FROM var_dictionaries "
+                                "WHERE name = ? AND type = ? "
+                                "ORDER BY dict_id LIMIT 1", dict_name,
+                                dict_type)
+        # end if
+        if rows:
+            return rows[0][0]
+        # end if
+        return None
+
+    def dictionary_variables(self, var_dict):
+        """Return a list of the (name, intent) of each variable in the
+        var_dictionary with ID, <var_dict>"""
+        return self.__query("SELECT name, intent FROM variables "
+                            "WHERE dict_id = ? ORDER BY position", var_dict)
+
+    def dictionary_parent(self, var_dict):
+        """Return the ID of the parent dictionary of the var_dictionary with
+        ID, <var_dict>, or None if it has no parent"""
+        if var_dict not in self.__parents:
+            parent, = self.__query("SELECT parent FROM var_dictionaries "
+                                   "WHERE dict_id = ?", var_dict)[0]
+            if parent is not None:
+                parent = self.find_var_dictionary(dict_name=parent)
+            # end if
+            self.__parents[var_dict] = parent
+        # end if
+        return self.__parents[var_dict]
+
+    def suite_group_names(self, suite_name):
+        """Return a list of the group names for suite, <suite_name>"""
+        rows = self.__query("SELECT groups.name FROM groups JOIN suites "
+                            "ON groups.suite_id = suites.suite_id "
+                            "WHERE suites.name = ? "
+                            "ORDER BY groups.suite_id, groups.position",
+                            suite_name)
+        return [x[0] for x in rows]
+
+    def protected_variables(self, var_dict):
+        """Return a dictionary of the protected status of each variable
+        in the var_dictionary with ID, <var_dict>.
+        Only the first entry for a variable is used."""
+        if var_dict not in self.__protected:
+            protected = {}
+            for vname, vprot in self.__query("SELECT name, protected "
+                                             "FROM variables WHERE dict_id = ? "
+                                             "ORDER BY position", var_dict):
+                if vname not in protected:
+                    protected[vname] = bool(vprot)
+                # end if
+            # end for
+            self.__protected[var_dict] = protected
+        # end if
+        return self.__protected[var_dict]
+
+    def report(self, action, excl_prot):
+        """Return the result of report, <action>, on this database.
+        The result is only computed the first time it is requested."""
+        key = (action.action, action.value, excl_prot)
+        if key not in self.__reports:
+            self.__reports[key] = self.__report_result(action, excl_prot)
+        # end if
+        return self.__reports[key]
+
+    def __report_result(self, action, excl_prot):
+        """Perform a lookup <action> on this database and return the result"""
+        file_types = {"host_files" : "host_files",
+                      "suite_files" : "suite_files",
+                      "utility_files" : "utilities"}
+        if action.action_is("ccpp_files"):
+            rows = self.__query("SELECT path FROM files "
+                                "ORDER BY section_id, file_id")
+            result = [x[0] for x in rows]
+        elif action.action in file_types:
+            rows = self.__query("SELECT path FROM files WHERE section = ? "
+                                "ORDER BY section_id, file_id",
+                                file_types[action.action])
+            result = [x[0] for x in rows]
+        elif action.action_is("process_list"):
+            rows = self.__query("SELECT process, name FROM schemes "
+                                "WHERE process IS NOT NULL AND process != '' "
+                                "ORDER BY scheme_id")
+            result = ["{}={}".format(x[0], x[1]) for x in rows]
+        elif action.action_is("module_list"):
+            rows = self.__query("SELECT DISTINCT module FROM scheme_phases "
+                                "WHERE module IS NOT NULL")
+            result = sorted(x[0] for x in rows)
+        elif action.action_is("dependencies"):
+            rows = self.__query("SELECT DISTINCT path FROM dependencies "
+                                "WHERE path IS NOT NULL")
+            result = sorted(x[0] for x in rows)
+        elif action.action_is("suite_list"):
+            rows = self.__query("SELECT name FROM suites ORDER BY suite_id")
+            result = [x[0] for x in rows]
+        elif action.action_is("required_variables"):
+            result = _retrieve_variable_list(self, action.value,
+                                             excl_prot=excl_prot)
+        elif action.action_is("input_variables"):
+            result = _retrieve_variable_list(self, action.value,
+                                             intent_type="input",
+                                             excl_prot=excl_prot)
+        elif action.action_is("output_variables"):
+            result = _retrieve_variable_list(self, action.value,
+                                             intent_type="output",
+                                             excl_prot=excl_prot)
+        elif action.action_is("host_variables"):
+            result = _retrieve_variable_list(self, "host",
+                                             excl_prot=excl_prot,
+                                             intent_type="host")
+        else:
+            result = ''
+        # end if
+        return result
+
+    @property
+    def table(self):
+        """Return the root element of the datatable stored in this
+        database"""
+        if self.__table is None:
+            xml, = self.__query("SELECT xml FROM datatable")[0]
+            self.__table = ET.fromstring(xml)
+        # end if
+        return self.__table
+
+    @property
+    def filename(self):
+        """Return the name of this database file"""
+        return self.__filename
+
+class _RequestParser(argparse.ArgumentParser):
+    """An ArgumentParser for report requests which raises an exception
+    on error instead of exiting"""
+
+    def error(self, message):
+        """Raise an exception for the invalid request"""
+        raise CCPPDatatableError("Invalid report request: {}".format(message))
+
 ###
 ### Interface for retrieving datatable information
 ###
 
 ###############################################################################
-def _command_line_parser():
+def _command_line_parser(request=False):
 ###############################################################################
-    "Create and return an ArgumentParser for parsing the command line"
+    """Create and return an ArgumentParser for parsing the command line.
+    If <request> is True, create a parser for a single report request
+    (in batch or server mode) which has only the report options."""
     description = """
     Retrieve information about a ccpp_capgen run.
     The returned information is controlled by selecting an action from
     the list of optional arguments below.
-    Note that exactly one action is required.
+    Note that exactly one action is required unless --batch or --serve
+    is used.
     """
-    parser = argparse.ArgumentParser(description=description)
-    parser.add_argument("datatable", type=str,
-                        help="Path to a data table XML file created by capgen")
+    if request:
+        parser = _RequestParser(description=description, add_help=False)
+    else:
+        parser = argparse.ArgumentParser(description=description)
+        parser.add_argument("datatable", type=str,
+                            help="Path to a data table XML file created by capgen")
+    # end if
     ### Only one action per call
-    group = parser.add_mutually_exclusive_group(required=True)
+    group = parser.add_mutually_exclusive_group(required=False)
     for report in _VALID_REPORTS:
         rep_type = "--{}".format(report["report"].replace("_", "-"))
         if report["type"] is bool:
@@ -180,6 +551,24 @@ def _command_line_parser():
     help_str = "Indent depth for '--show' output (default: {})"
     parser.add_argument("--indent", type=int, required=False, default=2,
                         help=help_str.format(defval))
+    if not request:
+        help_str = ("Run each report request in <BATCH_FILE> ('-' for "
+                    "standard input), one request per line, using the "
+                    "report options above")
+        parser.add_argument("--batch", type=str, required=False,
+                            metavar="BATCH_FILE", help=help_str)
+        help_str = ("Answer report requests sent to UNIX socket, <SOCKET>, "
+                    "until a shutdown request is received")
+        parser.add_argument("--serve", type=str, required=False,
+                            metavar="SOCKET", help=help_str)
+        help_str = ("Send the report request to the server at <SOCKET>. "
+                    "If no server is running, answer the request directly")
+        parser.add_argument("--connect", type=str, required=False,
+                            metavar="SOCKET", help=help_str)
+        help_str = "Stop the server at the --connect <SOCKET>"
+        parser.add_argument("--shutdown", action='store_true',
+                            required=False, default=False, help=help_str)
+    # end if
     return parser
 
 ###############################################################################
@@ -188,8 +577,232 @@ def parse_command_line(args):
     """Create an ArgumentParser to parse and return command-line arguments"""
     parser = _command_line_parser()
     pargs = parser.parse_args(args)
+    action = _report_action(pargs)
+    if pargs.batch or pargs.serve:
+        if action or pargs.connect or pargs.shutdown:
+            parser.error("No report action, --connect, or --shutdown is "
+                         "allowed with --batch or --serve")
+        # end if
+        if pargs.batch and pargs.serve:
+            parser.error("Only one of --batch or --serve is allowed")
+        # end if
+    elif pargs.shutdown:
+        if (not pargs.connect) or action:
+            parser.error("--shutdown requires --connect and no report action")
+        # end if
+    elif not action:
+        parser.error("A report action is required")
+    # end if
+    return pargs
+
+###############################################################################
+def _report_action(pargs):
+###############################################################################
+    """Return the DatatableReport requested in the parsed arguments,
+    <pargs>, or None if no report was requested"""
+    arg_vars = vars(pargs)
+    action = None
+    errmsg = ''
+    esep = ''
+    for opt in arg_vars:
+        if (opt in DatatableReport.valid_actions()) and arg_vars[opt]:
+            if action:
+                errmsg += esep + "Duplicate action, '{}'".format(opt)
+                esep = '\n'
+            else:
+                action = DatatableReport(opt, arg_vars[opt])
+            # end if
+        # end if
+    # end for
+    if errmsg:
+        raise ValueError(errmsg)
+    # end if
+    return action
+
+###############################################################################
+def _parse_request(args):
+###############################################################################
+    """Parse and return a report request, <args>, a list of report options.
+    Raise CCPPDatatableError if <args> is not a valid report request."""
+    pargs = _command_line_parser(request=True).parse_args(args)
+    if _report_action(pargs) is None:
+        raise CCPPDatatableError("Invalid report request: A report action is required")
+    # end if
     return pargs
 
+###############################################################################
+def _request_args(pargs):
+###############################################################################
+    """Return a list of report options for the report requested in the
+    parsed arguments, <pargs>"""
+    action = _report_action(pargs)
+    args = ["--{}".format(action.action.replace("_", "-"))]
+    if isinstance(action.value, str):
+        args.append(action.value)
+    # end if
+    args.extend(["--separator", pargs.sep, "--line-wrap", str(pargs.line_wrap),
+                 "--indent", str(pargs.indent)])
+    if pargs.exclude_protected:
+        args.append("--exclude-protected")
+    # end if
+    return args
+
+###############################################################################
+def run_request(datatable, pargs):
+###############################################################################
+    """Return the report on <datatable> requested in the parsed arguments,
+    <pargs>, as it is printed on the command line"""
+    global _INDENT_STR
+    action = _report_action(pargs)
+    if action.action_is("show"):
+        _INDENT_STR = " "*pargs.indent
+        report = datatable_pretty_print(datatable, 0, line_wrap=pargs.line_wrap)
+    else:
+        report = datatable_report(datatable, action, pargs.sep,
+                                  pargs.exclude_protected)
+    # end if
+    return report.rstrip()
+
+###############################################################################
+def run_batch(datatable, batch_file):
+###############################################################################
+    """Run each report request in <batch_file> ('-' for standard input) on
+    <datatable> and return a list of the reports.
+    Each line of <batch_file> is a report request using the report
+    options of the command line, blank lines and comment lines (starting
+    with '#') are skipped."""
+    if batch_file == '-':
+        lines = sys.stdin.readlines()
+    else:
+        with open(batch_file, 'r') as bfile:
+            lines = bfile.readlines()
+        # end with
+    # end if
+    reports = list()
+    for line in lines:
+        if line.strip() and (not line.lstrip().startswith('#')):
+            reports.append(run_request(datatable,
+                                       _parse_request(shlex.split(line))))
+        # end if
+    # end for
+    return reports
+
+class _DatatableRequestHandler(socketserver.StreamRequestHandler):
+    """Answer the report requests on a connection to a datatable server.
+    Each request is a line containing a JSON object with the report
+    options ("args") and optionally the datatable ("datatable").
+    A request with "shutdown" set to true stops the server.
+    Each answer is a line containing a JSON object with either the
+    report ("report") or an error message ("error")."""
+
+    def handle(self):
+        """Answer each report request on this connection"""
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                if request.get("shutdown", False):
+                    self.server.running = False
+                    answer = {"report" : ""}
+                else:
+                    datatable = request.get("datatable", self.server.datatable)
+                    pargs = _parse_request(request["args"])
+                    answer = {"report" : run_request(datatable, pargs)}
+                # end if
+            except (CCPPError, ValueError, KeyError, TypeError) as err:
+                answer = {"error" : str(err)}
+            # end try
+            self.wfile.write((json.dumps(answer) + '\n').encode('utf-8'))
+            if not self.server.running:
+                break
+            # end if
+        # end for
+
+###############################################################################
+def _connect_to_server(socket_path):
+###############################################################################
+    """Return a socket connected to the datatable server at <socket_path>.
+    Raise OSError if there is no server running at <socket_path>."""
+    if not hasattr(socket, "AF_UNIX"):
+        raise OSError("UNIX sockets are not supported on this platform")
+    # end if
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(socket_path)
+    except OSError:
+        conn.close()
+        raise
+    # end try
+    return conn
+
+###############################################################################
+def serve_datatable(socket_path, datatable):
+###############################################################################
+    """Answer report requests sent to UNIX socket, <socket_path>, until a
+    shutdown request is received. <datatable> is read immediately and is
+    the datatable for requests which do not name one."""
+    if not hasattr(socket, "AF_UNIX"):
+        raise CCPPDatatableError("UNIX sockets are not supported on this platform")
+    # end if
+    if os.path.exists(socket_path):
+        try:
+            _connect_to_server(socket_path).close()
+        except OSError:
+            # A stale socket left by a server which did not shut down
+            os.remove(socket_path)
+        else:
+            emsg = "A datatable server is already running at {}"
+            raise CCPPDatatableError(emsg.format(socket_path))
+        # end try
+    # end if
+    datatable = os.path.abspath(datatable)
+    datatable_index(datatable)
+    server = socketserver.UnixStreamServer(socket_path,
+                                           _DatatableRequestHandler)
+    server.datatable = datatable
+    server.running = True
+    try:
+        while server.running:
+            server.handle_request()
+        # end while
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        # end if
+    # end try
+
+###############################################################################
+def query_datatable_server(socket_path, args, datatable=None, shutdown=False):
+###############################################################################
+    """Send the report request, <args> (a list of report options), for
+    <datatable> to the datatable server at <socket_path> and return the
+    report. If <datatable> is None, the server's datatable is used.
+    If <shutdown> is True, stop the server instead.
+    Raise OSError if there is no server running at <socket_path>."""
+    if shutdown:
+        request = {"shutdown" : True}
+    else:
+        request = {"args" : args}
+        if datatable is not None:
+            request["datatable"] = os.path.abspath(datatable)
+        # end if
+    # end if
+    with _connect_to_server(socket_path) as conn:
+        conn.sendall((json.dumps(request) + '\n').encode('utf-8'))
+        conn.shutdown(socket.SHUT_WR)
+        with conn.makefile('r', encoding='utf-8') as rfile:
+            answer = rfile.readline()
+        # end with
+    # end with
+    if not answer:
+        raise OSError("No answer from datatable server at {}".format(socket_path))
+    # end if
+    answer = json.loads(answer)
+    if "error" in answer:
+        raise CCPPDatatableError(answer["error"])
+    # end if
+    return answer["report"]
+
 ###
 ### Accessor functions to retrieve information from a datatable file
 ###
@@ -288,26 +901,6 @@ def _retrieve_dependencies(table):
     # end for
     return sorted(result)
 
-###############################################################################
-def _find_var_dictionary(table, dict_name=None, dict_type=None):
-###############################################################################
-    """Find and return a var_dictionary named, <dict_name> in <table>.
-    If not found, return None"""
-    var_dicts = table.find("var_dictionaries")
-    target_dict = None
-    if (dict_name is None) and (dict_type is None):
-        raise ValueError(("At least one of <dict_name> or <dict_type> must "
-                          "contain a string"))
-    # end if
-    for vdict in var_dicts:
-        if (((dict_name is None) or (vdict.get("name") == dict_name)) and
-            ((dict_type is None) or (vdict.get("type") == dict_type))):
-            target_dict = vdict
-            break
-        # end if
-    # end for
-    return target_dict
-
 ###############################################################################
 def _retrieve_suite_list(table):
 ###############################################################################
@@ -349,45 +942,35 @@ def _retrieve_suite_group_names(table, suite_name):
     return result
 
 ###############################################################################
-def _is_variable_protected(table, var_name, var_dict):
+def _is_variable_protected(dtable, var_name, var_dict):
 ###############################################################################
     """Determine whether variable, <var_name>, from <var_dict> is protected.
     So this by checking for the 'protected' attribute for <var_name> in
     <var_dict> or any of <var_dict>'s ancestors (parent dictionaries).
+    <dtable> is the DatatableIndex (or DatatableDatabase) containing
+    <var_dict>.
     """
     protected = False
     while (not protected) and (var_dict is not None):
-        dvars = var_dict.find("variables")
-        if dvars is not None:
-            for var in dvars:
-                if var.get("name") == var_name:
-                    protected = var.get("protected", default="False") == "True"
-                    break
-                # end if
-            # end for
-        # end if
-        parent = var_dict.get("parent")
-        if parent is not None:
-            var_dict = _find_var_dictionary(table, dict_name=parent)
-        else:
-            var_dict = None
-        # end if
+        protected = dtable.protected_variables(var_dict).get(var_name, False)
+        var_dict = dtable.dictionary_parent(var_dict)
     # end while
     return protected
 
 ###############################################################################
-def _retrieve_variable_list(table, suite_name,
+def _retrieve_variable_list(dtable, suite_name,
                             intent_type=None, excl_prot=True):
 ###############################################################################
     """Find and return a list of all the required variables in <suite_name>.
-    If suite, <suite_name>, is not found in <table>, return an empty list.
+    If suite, <suite_name>, is not found in <dtable> (a DatatableIndex or
+    DatatableDatabase), return an empty list.
     If <intent_type> is present, return only that variable type (input or
     output).
     If <excl_prot> is True, do not include protected variables"""
     # Note that suites do not have call lists so we have to collect
     # all the variables from the suite's groups.
     var_set = set()
-    excl_vars = list()
+    excl_vars = set()
     if intent_type == "host":
         allowed_intents = list()
     elif intent_type is None:
@@ -401,80 +984,92 @@ def _retrieve_variable_list(table, suite_name,
         raise CCPPDatatableError(emsg.format(intent_type))
     # end if
     if excl_prot or (intent_type == "host"):
-        host_dict = _find_var_dictionary(table, dict_type="host")
+        host_dict = dtable.find_var_dictionary(dict_type="host")
         if host_dict is not None:
-            hvars = host_dict.find("variables")
-            if hvars is not None:
-                for var in hvars:
-                    vname = var.get("name")
-                    if excl_prot:
-                        exclude = _is_variable_protected(table, vname,
-                                                         host_dict)
-                    else:
-                        exclude = False
+            for vname, _ in dtable.dictionary_variables(host_dict):
+                if excl_prot:
+                    exclude = _is_variable_protected(dtable, vname,
+                                                     host_dict)
+                else:
+                    exclude = False
+                # end if
+                if intent_type == "host":
+                    if not exclude:
+                        # Add to host variable set
+                        var_set.add(vname)
                     # end if
-                    if intent_type == "host":
-                        if not exclude:
-                            # Add to host variable set
-                            var_set.add(vname)
-                        # end if
-                    else:
-                        if exclude:
-                            # Add to list of protected variables
-                            excl_vars.append(vname)
-                        # end if
+                else:
+                    if exclude:
+                        # Add to list of protected variables
+                        excl_vars.add(vname)
                     # end if
-                # end for
-            # end if
+                # end if
+            # end for
         # end if
     # end if
     if intent_type != "host":
-        group_names = _retrieve_suite_group_names(table, suite_name)
+        group_names = dtable.suite_group_names(suite_name)
         for group in group_names:
             cl_name = group + "_call_list"
-            group_dict = _find_var_dictionary(table, dict_name=cl_name,
-                                              dict_type="group_call_list")
+            group_dict = dtable.find_var_dictionary(dict_name=cl_name,
+                                                    dict_type="group_call_list")
             if group_dict is not None:
-                gvars = group_dict.find("variables")
-                if gvars is not None:
-                    for var in gvars:
-                        vname = var.get("name")
-                        vintent = var.get("intent")
-                        if excl_prot:
-                            exclude = vname in excl_vars
-                            if not exclude:
-                                exclude = _is_variable_protected(table, vname,
-                                                                 group_dict)
-                            # end if
-                        else:
-                            exclude = False
-                        # end if
-                        if (vintent in allowed_intents) and (not exclude):
-                            var_set.add(vname)
+                for vname, vintent in dtable.dictionary_variables(group_dict):
+                    if excl_prot:
+                        exclude = vname in excl_vars
+                        if not exclude:
+                            exclude = _is_variable_protected(dtable, vname,
+                                                             group_dict)
                         # end if
-                    # end for
-                # end if
+                    else:
+                        exclude = False
+                    # end if
+                    if (vintent in allowed_intents) and (not exclude):
+                        var_set.add(vname)
+                    # end if
+                # end for
             # end if
         # end for
     # end if
     return sorted(var_set)
 
 ###############################################################################
-def datatable_report(datatable, action, sep, excl_prot=False):
+def datatable_index(datatable):
 ###############################################################################
-    """Perform a lookup <action> on <datatable> and return the result.
-    """
-    if not action:
-        emsg = "datatable_report: An action is required\n"
-        emsg += _command_line_parser().format_usage()
-        raise ValueError(emsg)
-    # end if
-    if not sep:
-        emsg = "datatable_report: A separator character (<sep>) is required\n"
-        emsg += _command_line_parser().format_usage()
-        raise ValueError(emsg)
+    """Return a DatatableIndex for the datatable file, <datatable>, or a
+    DatatableDatabase if <datatable> is a datatable database file.
+    The index is read once and reused until <datatable> changes."""
+    key = os.path.abspath(datatable)
+    dtable = _DATATABLE_INDEXES.get(key)
+    if (dtable is None) or (not dtable.is_current()):
+        if is_datatable_database(datatable):
+            dtable = DatatableDatabase(datatable)
+        else:
+            dtable = DatatableIndex(datatable)
+        # end if
+        _DATATABLE_INDEXES[key] = dtable
     # end if
-    table = _read_datatable(datatable)
+    return dtable
+
+###############################################################################
+def is_datatable_database(datatable):
+###############################################################################
+    """Return True if the file, <datatable>, is an SQLite database"""
+    try:
+        with open(datatable, 'rb') as dfile:
+            header = dfile.read(len(_SQLITE_HEADER))
+        # end with
+    except OSError:
+        return False
+    # end try
+    return header == _SQLITE_HEADER
+
+###############################################################################
+def _report_result(dtable, action, excl_prot):
+###############################################################################
+    """Perform a lookup <action> on DatatableIndex, <dtable>, and return
+    the result."""
+    table = dtable.table
     if action.action_is("ccpp_files"):
         result = _retrieve_ccpp_files(table)
     elif action.action_is("host_files"):
@@ -492,22 +1087,45 @@ def datatable_report(datatable, action, sep, excl_prot=False):
     elif action.action_is("suite_list"):
         result = _retrieve_suite_list(table)
     elif action.action_is("required_variables"):
-        result = _retrieve_variable_list(table, action.value,
+        result = _retrieve_variable_list(dtable, action.value,
                                          excl_prot=excl_prot)
     elif action.action_is("input_variables"):
-        result = _retrieve_variable_list(table, action.value,
+        result = _retrieve_variable_list(dtable, action.value,
                                          intent_type="input",
                                          excl_prot=excl_prot)
     elif action.action_is("output_variables"):
-        result = _retrieve_variable_list(table, action.value,
+        result = _retrieve_variable_list(dtable, action.value,
                                          intent_type="output",
                                          excl_prot=excl_prot)
     elif action.action_is("host_variables"):
-        result = _retrieve_variable_list(table, "host", excl_prot=excl_prot,
+        result = _retrieve_variable_list(dtable, "host", excl_prot=excl_prot,
                                          intent_type="host")
     else:
         result = ''
     # end if
+    return result
+
+###############################################################################
+def datatable_report(datatable, action, sep, excl_prot=False):
+###############################################################################
+    """Perform a lookup <action> on <datatable> and return the result.
+    <datatable> is the name of a datatable file (XML or database),
+    a DatatableIndex, or a DatatableDatabase.
+    """
+    if not action:
+        emsg = "datatable_report: An action is required\n"
+        emsg += _command_line_parser().format_usage()
+        raise ValueError(emsg)
+    # end if
+    if not sep:
+        emsg = "datatable_report: A separator character (<sep>) is required\n"
+        emsg += _command_line_parser().format_usage()
+        raise ValueError(emsg)
+    # end if
+    if not isinstance(datatable, (DatatableIndex, DatatableDatabase)):
+        datatable = datatable_index(datatable)
+    # end if
+    result = datatable.report(action, excl_prot)
     if isinstance(result, list):
         result = sep.join(result)
     # end if
@@ -628,8 +1246,11 @@ def datatable_pretty_print(datatable, indent, line_wrap):
 ###############################################################################
     """Create and return a pretty print string of the contents of <datatable>"""
     indent = 0
-    table = _read_datatable(datatable)
-    report = table_entry_pretty_print(table, indent, line_wrap=line_wrap)
+    if not isinstance(datatable, (DatatableIndex, DatatableDatabase)):
+        datatable = datatable_index(datatable)
+    # end if
+    report = table_entry_pretty_print(datatable.table, indent,
+                                      line_wrap=line_wrap)
     return report
 
 ###
@@ -847,6 +1468,131 @@ def _add_suite_object(parent, suite_object):
         _add_suite_object(obj_elem, obj_part)
     # end for
 
+###############################################################################
+def _database_rows(table):
+###############################################################################
+    """Return a dictionary with the rows of each datatable database table
+    for the datatable, <table> (the root element of a datatable)."""
+    rows = {x : list() for x in ["files", "schemes", "scheme_phases",
+                                 "call_lists", "suites", "groups",
+                                 "var_dictionaries", "variables",
+                                 "dependencies"]}
+    for section_id, section in enumerate(_find_table_section(table,
+                                                             "ccpp_files")):
+        for file_id, entry in enumerate(section):
+            if entry.tag != "file":
+                emsg = "Invalid file list entry type, '{}'"
+                raise CCPPDatatableError(emsg.format(entry.tag))
+            # end if
+            rows["files"].append((section_id, section.tag, file_id,
+                                  entry.text))
+        # end for
+    # end for
+    schemes = _find_table_section(table, "schemes")
+    for scheme_id, scheme in enumerate(schemes):
+        rows["schemes"].append((scheme_id, scheme.get("name"),
+                                scheme.get("process")))
+        for phase in scheme:
+            phase_id = len(rows["scheme_phases"])
+            rows["scheme_phases"].append((phase_id, scheme_id, phase.tag,
+                                          phase.get("name"),
+                                          phase.get("subroutine_name"),
+                                          phase.get("filename"),
+                                          phase.get("module")))
+            call_list = phase.find("call_list")
+            if call_list is not None:
+                for position, var in enumerate(call_list):
+                    rows["call_lists"].append((phase_id, position,
+                                               var.get("name"),
+                                               var.get("intent"),
+                                               var.get("local_name")))
+                # end for
+            # end if
+        # end for
+    # end for
+    suites = table.find("api/suites")
+    if suites is not None:
+        for suite_id, suite in enumerate(suites):
+            rows["suites"].append((suite_id, suite.get("name"),
+                                   suite.get("filename")))
+            groups = [x for x in suite if x.tag == "group"]
+            for position, group in enumerate(groups):
+                rows["groups"].append((suite_id, position, group.get("name")))
+            # end for
+        # end for
+    # end if
+    var_dicts = _find_table_section(table, "var_dictionaries")
+    for dict_id, vdict in enumerate(var_dicts):
+        rows["var_dictionaries"].append((dict_id, vdict.get("name"),
+                                         vdict.get("type"),
+                                         vdict.get("parent"),
+                                         vdict.findtext("sub_dictionaries")))
+        dvars = vdict.find("variables")
+        if dvars is not None:
+            for position, var in enumerate(dvars):
+                protected = var.get("protected", default="False") == "True"
+                rows["variables"].append((dict_id, position, var.get("name"),
+                                          var.get("intent"), int(protected),
+                                          var.findtext("dimensions"),
+                                          var.findtext("source_type"),
+                                          var.findtext("source_name"),
+                                          json.dumps(dict(var.attrib))))
+            # end for
+        # end if
+    # end for
+    depends = table.find("dependencies")
+    if depends is not None:
+        for position, dependency in enumerate(depends):
+            rows["dependencies"].append((position, dependency.text))
+        # end for
+    # end if
+    return rows
+
+###############################################################################
+def write_datatable_database(table, database, xml=None):
+###############################################################################
+    """Write the datatable, <table> (the root element of a datatable), to
+    the SQLite database file, <database>.
+    <xml> is the text of the datatable XML file which is stored for
+    pretty printing. If <xml> is None, <table> is converted to text.
+    The database is replaced atomically so that a report never reads a
+    partial database."""
+    if sqlite3 is None:
+        raise CCPPDatatableError("Python sqlite3 module is not available")
+    # end if
+    if xml is None:
+        xml = ET.tostring(table, encoding="unicode")
+    # end if
+    rows = _database_rows(table)
+    tmp_name = "{}.{}.tmp".format(database, os.getpid())
+    if os.path.exists(tmp_name):
+        os.remove(tmp_name)
+    # end if
+    try:
+        conn = sqlite3.connect(tmp_name)
+        try:
+            conn.executescript(_DATABASE_SCHEMA)
+            conn.execute("INSERT INTO datatable VALUES (?, ?, ?)",
+                         (_DATABASE_FORMAT, table.get("version"), xml))
+            for db_table, db_rows in rows.items():
+                if db_rows:
+                    values = ", ".join(["?"]*len(db_rows[0]))
+                    conn.executemany("INSERT INTO {} VALUES ({})".format(db_table,
+                                                                         values),
+                                     db_rows)
+                # end if
+            # end for
+            conn.commit()
+        finally:
+            conn.close()
+        # end try
+        os.replace(tmp_name, database)
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        # end if
+    # end try
+
 ###############################################################################
 def generate_ccpp_datatable(run_env, host_model, api, scheme_headers,
                             scheme_tdict, host_files, suite_files,
@@ -855,6 +1601,7 @@ def generate_ccpp_datatable(run_env, host_model, api, scheme_headers,
     """Write a CCPP datatable for <api> to <filename>.
     The datatable includes the generated filenames for the host cap,
     the suite caps, the ccpp_kinds module, and source code files.
+    If <run_env> has a datatable database, also write the datatable to it.
     """
     # Define new tree
     datatable = ET.Element("ccpp_datatable")
@@ -927,35 +1674,44 @@ def generate_ccpp_datatable(run_env, host_model, api, scheme_headers,
     # Write tree
     datatable_tree = PrettyElementTree(datatable)
     datatable_tree.write(run_env.datatable_file)
+    if run_env.datatable_database:
+        with open(run_env.datatable_file, 'r') as dfile:
+            xml = dfile.read()
+        # end with
+        write_datatable_database(datatable, run_env.datatable_database,
+                                 xml=xml)
+    # end if
 
 ###############################################################################
 
 if __name__ == "__main__":
     PARGS = parse_command_line(sys.argv[1:])
-    if PARGS.show:
-        _INDENT_STR = " "*PARGS.indent
-        LINE_WRAP = PARGS.line_wrap
-        REPORT = datatable_pretty_print(PARGS.datatable, 0, line_wrap=LINE_WRAP)
-    else:
-        ARG_VARS = vars(PARGS)
-        _ACTION = None
-        _ERRMSG = ''
-        _ESEP = ''
-        for opt in ARG_VARS:
-            if (opt in DatatableReport.valid_actions()) and ARG_VARS[opt]:
-                if _ACTION:
-                    _ERRMSG += _ESEP + "Duplicate action, '{}'".format(opt)
-                    _ESEP = '\n'
-                else:
-                    _ACTION = DatatableReport(opt, ARG_VARS[opt])
-                # end if
-            # end if
+    if PARGS.batch:
+        for REPORT in run_batch(PARGS.datatable, PARGS.batch):
+            print("{}".format(REPORT))
         # end for
-        if _ERRMSG:
-            raise ValueError(_ERRMSG)
+    elif PARGS.serve:
+        serve_datatable(PARGS.serve, PARGS.datatable)
+    elif PARGS.shutdown:
+        try:
+            query_datatable_server(PARGS.connect, None, shutdown=True)
+        except OSError:
+            pass # No server is running
+        # end try
+    else:
+        REPORT = None
+        if PARGS.connect:
+            try:
+                REPORT = query_datatable_server(PARGS.connect,
+                                                _request_args(PARGS),
+                                                datatable=PARGS.datatable)
+            except OSError:
+                REPORT = None # No server, answer the request here
+            # end try
+        # end if
+        if REPORT is None:
+            REPORT = run_request(PARGS.datatable, PARGS)
         # end if
-        REPORT = datatable_report(PARGS.datatable, _ACTION,
-                                  PARGS.sep, PARGS.exclude_protected)
+        print("{}".format(REPORT))
     # end if
-    print("{}".format(REPORT.rstrip()))
     sys.exit(0)
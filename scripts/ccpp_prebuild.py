@@ -3,6 +3,7 @@
 # Standard modules
 import argparse
 import collections
+import concurrent.futures
 import copy
 import filecmp
 import importlib
@@ -19,12 +20,15 @@ from common import STANDARD_VARIABLE_TYPES, STANDARD_INTEGER_TYPE, CCPP_TYPE
 from common import SUITE_DEFINITION_FILENAME_PATTERN
 from common import split_var_name_and_array_reference
 from metadata_parser import merge_dictionaries, parse_scheme_tables, parse_variable_tables
+from metadata_parser import enable_metadata_cache
 from mkcap import CapsMakefile, CapsCMakefile, CapsSourcefile, \
                   SchemesMakefile, SchemesCMakefile, SchemesSourcefile, \
                   TypedefsMakefile, TypedefsCMakefile, TypedefsSourcefile
 from mkdoc import metadata_to_html, metadata_to_latex
 from mkstatic import API, Suite, Group
 from mkstatic import CCPP_SUITE_VARIABLES
+from parse_tools import register_fortran_ddt_name, registered_fortran_ddt_names
+from phase_timer import PhaseTimer
 
 ###############################################################################
 # Set up the command line argument parser and other global variables          #
@@ -35,9 +39,16 @@ parser.add_argument('--config',     action='store', help='path to CCPP prebuild
 parser.add_argument('--clean',      action='store_true', help='remove files created by this script, then exit', default=False)
 parser.add_argument('--verbose',    action='store_true', help='enable verbose output from this script', default=False)
 parser.add_argument('--debug',      action='store_true', help='enable debugging features in auto-generated code', default=False)
+parser.add_argument('--scheme-timers', action='store_true', help='time and count the calls of each group, subcycle and scheme in auto-generated code', default=False)
+parser.add_argument('--zero-copy-deblocking', action='store_true', help='pass the only block of blocked data to schemes without copying it and copy blocked data only as required by the intent in auto-generated code', default=False)
+parser.add_argument('--deblocking-report', action='store', help='write the blocked data converted for scheme calls in the non-run phases to this file', required=False, default=None)
+parser.add_argument('--jobs',       action='store', type=int, help='number of worker processes used to parse the scheme metadata tables', default=1)
+parser.add_argument('--metadata-cache-dir', action='store', help='directory to keep parsed metadata files in for later runs', required=False, default=None)
 parser.add_argument('--suites',     action='store', help='suite definition files to use (comma-separated, without path)', default='')
 parser.add_argument('--builddir',   action='store', help='relative path to CCPP build directory', required=False, default=None)
 parser.add_argument('--namespace',  action='store', help='namespace suffix to be added to the name of static api module', required=False, default='')
+parser.add_argument('--profile',    action='store_true', help='log the wall time, CPU time and peak memory of each prebuild phase; tracing the memory use slows down the run', default=False)
+parser.add_argument('--timing-report', action='store', help='write the wall time, CPU time and peak memory of each prebuild phase to this file (JSON); tracing the memory use slows down the run', required=False, default=None)
 
 # BASEDIR is the current directory where this script is executed
 BASEDIR = os.getcwd()
@@ -60,7 +71,20 @@ def parse_arguments():
         sdfs = None
     builddir = args.builddir
     namespace = args.namespace
-    return (success, configfile, clean, verbose, debug, sdfs, builddir, namespace)
+    profile = args.profile
+    timing_report = args.timing_report
+    scheme_timers = args.scheme_timers
+    zero_copy_deblocking = args.zero_copy_deblocking
+    deblocking_report = args.deblocking_report
+    jobs = args.jobs
+    if jobs < 1:
+        logging.error('Number of jobs must be at least 1, got {}'.format(jobs))
+        success = False
+    metadata_cache_dir = args.metadata_cache_dir
+    if metadata_cache_dir:
+        metadata_cache_dir = os.path.abspath(metadata_cache_dir)
+    return (success, configfile, clean, verbose, debug, sdfs, builddir, namespace, profile, timing_report, scheme_timers,
+            zero_copy_deblocking, deblocking_report, jobs, metadata_cache_dir)
 
 def import_config(configfile, builddir):
     """Import the configuration from a given configuration file"""
@@ -311,8 +335,48 @@ def gather_variable_definitions(variable_definition_files, typedefs_new_metadata
     #
     return (success, metadata_define, dependencies_define)
 
-def collect_physics_subroutines(scheme_files):
-    """Scan all Fortran source files in scheme_files for subroutines with argument tables."""
+def init_scheme_worker(ddt_names, metadata_cache_dir):
+    """Initialize a worker process for parse_scheme_file by registering the
+    DDT names known to the parent process and enabling the metadata cache."""
+    for ddt_name in ddt_names:
+        register_fortran_ddt_name(ddt_name)
+    if metadata_cache_dir:
+        enable_metadata_cache(metadata_cache_dir)
+
+def parse_scheme_file(scheme_file_with_abs_path):
+    """Parse the metadata tables of a scheme file (given with its absolute path).
+    Return the metadata, arguments and dependencies of the file, and the DDT names
+    registered after parsing it."""
+    (scheme_filepath, scheme_filename) = os.path.split(scheme_file_with_abs_path)
+    # Change to directory where scheme_file lives
+    os.chdir(scheme_filepath)
+    (metadata, arguments, dependencies) = parse_scheme_tables(scheme_filepath, scheme_filename)
+    return (metadata, arguments, dependencies, list(registered_fortran_ddt_names()))
+
+def parse_scheme_files_parallel(scheme_files_with_abs_path, jobs, metadata_cache_dir):
+    """Parse the scheme files with jobs worker processes. Return a list with the
+    result of parse_scheme_file for each file, or None for files that failed to parse.
+    A file can fail because it uses a DDT defined in a previous file, which is not
+    known to the worker process; these files are parsed again in order by the caller."""
+    ddt_names = list(registered_fortran_ddt_names())
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=init_scheme_worker,
+                                                initargs=(ddt_names, metadata_cache_dir)) as pool:
+        futures = [pool.submit(parse_scheme_file, x) for x in scheme_files_with_abs_path]
+        for (scheme_file, future) in zip(scheme_files_with_abs_path, futures):
+            if future.exception() is None:
+                results.append(future.result())
+            else:
+                logging.debug('Parsing {} in a worker process failed, parsing it again: {}'.format(
+                                                                   scheme_file, future.exception()))
+                results.append(None)
+    return results
+
+def collect_physics_subroutines(scheme_files, jobs=1, metadata_cache_dir=None):
+    """Scan all Fortran source files in scheme_files for subroutines with argument tables.
+    If jobs is greater than one, the files are parsed by that many worker processes;
+    the results are merged in the order of scheme_files and are identical to parsing
+    the files one at a time."""
     logging.info('Parsing metadata tables in physics scheme files ...')
     success = True
     # Parse all scheme files: record metadata, argument list, dependencies, and which scheme is in which file
@@ -320,12 +384,18 @@ def collect_physics_subroutines(scheme_files):
     arguments_request = collections.OrderedDict()
     dependencies_request = collections.OrderedDict()
     schemes_in_files = collections.OrderedDict()
-    for scheme_file in scheme_files:
-        scheme_file_with_abs_path = os.path.abspath(scheme_file)
-        (scheme_filepath, scheme_filename) = os.path.split(scheme_file_with_abs_path)
-        # Change to directory where scheme_file lives
-        os.chdir(scheme_filepath)
-        (metadata, arguments, dependencies) = parse_scheme_tables(scheme_filepath, scheme_filename)
+    scheme_files_with_abs_path = [os.path.abspath(x) for x in scheme_files]
+    if jobs > 1 and len(scheme_files) > 1:
+        results = parse_scheme_files_parallel(scheme_files_with_abs_path, jobs, metadata_cache_dir)
+    else:
+        results = [None]*len(scheme_files)
+    for (scheme_file_with_abs_path, result) in zip(scheme_files_with_abs_path, results):
+        if result is None:
+            result = parse_scheme_file(scheme_file_with_abs_path)
+        (metadata, arguments, dependencies, ddt_names) = result
+        # Register DDTs defined in this file for the following files
+        for ddt_name in ddt_names:
+            register_fortran_ddt_name(ddt_name)
         # Record which scheme is in which file
         for scheme in arguments.keys():
             schemes_in_files[scheme] = scheme_file_with_abs_path
@@ -519,7 +589,8 @@ def compare_metadata(metadata_define, metadata_request):
     modules = sorted(list(set(modules)))
     return (success, modules, metadata)
 
-def generate_suite_and_group_caps(suites, metadata_request, metadata_define, arguments, caps_dir, debug):
+def generate_suite_and_group_caps(suites, metadata_request, metadata_define, arguments, caps_dir, debug, scheme_timers=False,
+                                  zero_copy_deblocking=False):
     """Generate for the suite and for all groups parsed."""
     logging.info("Generating suite and group caps ...")
     suite_and_group_caps = []
@@ -528,7 +599,7 @@ def generate_suite_and_group_caps(suites, metadata_request, metadata_define, arg
     for suite in suites:
         logging.debug("Generating suite and group caps for suite {0}...".format(suite.name))
         # Write caps for suite and groups in suite
-        suite.write(metadata_request, metadata_define, arguments, debug)
+        suite.write(metadata_request, metadata_define, arguments, debug, scheme_timers, zero_copy_deblocking)
         suite_and_group_caps += suite.caps
     os.chdir(BASEDIR)
     if suite_and_group_caps:
@@ -537,6 +608,26 @@ def generate_suite_and_group_caps(suites, metadata_request, metadata_define, arg
         success = False
     return (success, suite_and_group_caps)
 
+def write_deblocking_report(suites, filename):
+    """Write the blocked data converted for the scheme calls in the group caps
+    of the given suite(s) to filename. Variables copied in and out still need
+    full de-blocking."""
+    success = True
+    rows = [('Suite', 'Group', 'Subroutine', 'Variable', 'Intent', 'Conversion')]
+    for suite in suites:
+        for group in suite.groups:
+            for (ccpp_stage, subroutine_name, standard_name, intent, conversion) in group.deblocked_variables:
+                rows.append((suite.name, group.name, subroutine_name, standard_name, intent, conversion))
+    full = len([row for row in rows[1:] if row[5].endswith('copy in and out')])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0])-1)]
+    with open(filename, 'w') as f:
+        f.write('# Blocked data converted for scheme calls in the non-run phases\n')
+        f.write('# {} of {} conversions still need full de-blocking (copy in and out)\n'.format(full, len(rows)-1))
+        for row in rows:
+            f.write('  '.join([row[i].ljust(widths[i]) for i in range(len(widths))] + [row[-1]]) + '\n')
+    logging.info('Wrote de-blocking report to {}'.format(filename))
+    return success
+
 def generate_static_api(suites, static_api_dir, namespace):
     """Generate static API for given suite(s)"""
     success = True
@@ -709,14 +800,21 @@ def generate_caps_makefile(caps, caps_makefile, caps_cmakefile, caps_sourcefile,
 def main():
     """Main routine that handles the CCPP prebuild for different host models."""
     # Parse command line arguments
-    (success, configfile, clean, verbose, debug, sdfs, builddir, namespace) = parse_arguments()
+    (success, configfile, clean, verbose, debug, sdfs, builddir, namespace, profile, timing_report, scheme_timers,
+     zero_copy_deblocking, deblocking_report, jobs, metadata_cache_dir) = parse_arguments()
     if not success:
         raise Exception('Call to parse_arguments failed.')
 
+    timer = PhaseTimer(enabled=(profile or bool(timing_report)))
+
     success = setup_logging(verbose)
     if not success:
         raise Exception('Call to setup_logging failed.')
 
+    # Keep parsed metadata files for later runs
+    if metadata_cache_dir:
+        enable_metadata_cache(metadata_cache_dir)
+
     (success, config) = import_config(configfile, builddir)
     if not success:
         raise Exception('Call to import_config failed.')
@@ -728,6 +826,7 @@ def main():
         sys.exit(0)
 
     # If no suite definition files were given, get all of them
+    timer.start('suite_parse')
     if not sdfs:
         (success, sdfs) = get_all_suites(config['suites_dir'])
         if not success:
@@ -737,23 +836,32 @@ def main():
     (success, suites) = parse_suites(config['suites_dir'], sdfs)
     if not success:
         raise Exception('Parsing suite definition files failed.')
+    timer.stop()
 
     # Variables defined by the host model
+    timer.start('host_parse')
     (success, metadata_define, dependencies_define) = gather_variable_definitions(config['variable_definition_files'], config['typedefs_new_metadata'])
     if not success:
         raise Exception('Call to gather_variable_definitions failed.')
+    timer.stop()
 
     # Create an HTML table with all variables provided by the model
+    timer.start('documentation')
     success = metadata_to_html(metadata_define, config['host_model'], config['html_vartable_file'])
     if not success:
         raise Exception('Call to metadata_to_html failed.')
+    timer.stop()
 
     # Variables requested by the CCPP physics schemes
-    (success, metadata_request, arguments_request, dependencies_request, schemes_in_files) = collect_physics_subroutines(config['scheme_files'])
+    timer.start('scheme_parse')
+    (success, metadata_request, arguments_request, dependencies_request, schemes_in_files) = collect_physics_subroutines(config['scheme_files'],
+                                                                                                                          jobs, metadata_cache_dir)
     if not success:
         raise Exception('Call to collect_physics_subroutines failed.')
+    timer.stop()
 
     # Check that the schemes requested in the suites exist
+    timer.start('metadata_checks')
     success = check_schemes_in_suites(arguments_request, suites)
     if not success:
         raise Exception('Call to check_schemes_in_suites failed.')
@@ -773,18 +881,24 @@ def main():
                                               schemes_in_files, dependencies_request, dependencies_define)
     if not success:
         raise Exception('Call to generate_list_of_schemes_and_dependencies_to_compile failed.')
+    timer.stop()
 
     # Create a LaTeX table with all variables requested by the pool of physics and/or provided by the host model
+    timer.start('documentation')
     success = metadata_to_latex(metadata_define, metadata_request, config['host_model'], config['latex_vartable_file'])
     if not success:
         raise Exception('Call to metadata_to_latex failed.')
+    timer.stop()
 
     # Check requested against defined arguments to generate metadata (list/dict of variables for CCPP)
+    timer.start('metadata_checks')
     (success, modules, metadata) = compare_metadata(metadata_define, metadata_request)
     if not success:
         raise Exception('Call to compare_metadata failed.')
+    timer.stop()
 
     # Add Fortran module files of typedefs to makefile/cmakefile/shell script
+    timer.start('makefiles')
     success = generate_typedefs_makefile(metadata_define, config['typedefs_makefile'],
                                          config['typedefs_cmakefile'], config['typedefs_sourcefile'])
     if not success:
@@ -796,13 +910,21 @@ def main():
                                         config['schemes_sourcefile'])
     if not success:
         raise Exception('Call to generate_schemes_makefile failed.')
+    timer.stop()
 
     # Static build: generate caps for entire suite and groups in the specified suite; generate API
+    timer.start('code_writing')
     (success, suite_and_group_caps) = generate_suite_and_group_caps(suites, metadata_request, metadata_define,
-                                                                    arguments_request, config['caps_dir'], debug)
+                                                                    arguments_request, config['caps_dir'], debug,
+                                                                    scheme_timers, zero_copy_deblocking)
     if not success:
         raise Exception('Call to generate_suite_and_group_caps failed.')
 
+    if deblocking_report:
+        success = write_deblocking_report(suites, deblocking_report)
+        if not success:
+            raise Exception('Call to write_deblocking_report failed.')
+
     (success, api) = generate_static_api(suites, config['static_api_dir'], namespace)
     if not success:
         raise Exception('Call to generate_static_api failed.')
@@ -814,14 +936,22 @@ def main():
     success = api.write_includefile(config['static_api_cmakefile'], type='cmake')
     if not success:
         raise Exception("Writing API cmakefile {cmakefile} failed".format(cmakefile=config['static_api_cmakefile']))
+    timer.stop()
 
     # Add filenames of caps to makefile/cmakefile/shell script
+    timer.start('makefiles')
     all_caps = suite_and_group_caps
 
     success = generate_caps_makefile(all_caps, config['caps_makefile'], config['caps_cmakefile'],
                                      config['caps_sourcefile'], config['caps_dir'])
     if not success:
         raise Exception('Call to generate_caps_makefile failed.')
+    timer.stop()
+
+    if timing_report:
+        timer.write_report(timing_report)
+    if profile:
+        timer.log_report(logging.getLogger(), level=max(logging.getLogger().getEffectiveLevel(), logging.INFO))
 
     logging.info('CCPP prebuild step completed successfully.')
 
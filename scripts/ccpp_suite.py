@@ -5,6 +5,8 @@
 to implement calls to a set of suites for a given host model."""
 
 # Python library imports
+import concurrent.futures
+import multiprocessing
 import os.path
 import logging
 import xml.etree.ElementTree as ET
@@ -22,6 +24,8 @@ from parse_tools import ParseInternalError, CCPPError
 from parse_tools import read_xml_file, validate_xml_file, find_schema_version
 from parse_tools import init_log, set_log_to_null
 from suite_objects import CallList, Group, Scheme
+from var_props import is_horizontal_dimension
+from scheme_timers import SchemeTimers
 from metavar import CCPP_LOOP_VAR_STDNAMES
 
 # pylint: disable=too-many-lines
@@ -43,6 +47,8 @@ _API_DUMMY_RUN_ENV = CCPPFrameworkEnv(_API_LOGGING,
                                       ndict={'host_files':'',
                                              'scheme_files':'',
                                              'suites':''})
+# Arguments for writing suite caps in a worker process (see API.write)
+_API_WRITE_ARGS = None
 
 # Required variables for inclusion in auto-generated schemes
 CCPP_REQUIRED_VARS = [ccpp_standard_var('ccpp_error_code',
@@ -68,6 +74,11 @@ class Suite(VarDictionary):
 character(len=16) :: {css_var_name} = '{state}'
 '''
 
+    # The thread checks of the Group caps need omp_get_thread_num
+    __omp_use = CodeBlock([('#ifdef _OPENMP', -1),
+                           ('use omp_lib, only: omp_get_thread_num', 0),
+                           ('#endif', -1)])
+
     # Note that these group names need to match CCPP_STATE_MACH
     __initial_group_name = 'initialize'
 
@@ -257,6 +268,11 @@ character(len=16) :: {css_var_name} = '{state}'
         """Get the list of the module generated for this suite."""
         return self.__module
 
+    @property
+    def cap_filename(self):
+        """Get the name of the cap file generated for this suite."""
+        return '{module_name}.F90'.format(module_name=self.module)
+
     @property
     def groups(self):
         """Get the list of groups in this suite."""
@@ -435,9 +451,11 @@ character(len=16) :: {css_var_name} = '{state}'
                 run_env.logger.debug(lmsg.format(item.name,
                                                  [x.name
                                                   for x in item.schemes()]))
-            item.analyze(phase, self, scheme_library, ddt_library,
-                         self.check_suite_state(phase),
-                         self.set_suite_state(phase))
+            with run_env.phase_timer.phase(item.name):
+                item.analyze(phase, self, scheme_library, ddt_library,
+                             self.check_suite_state(phase),
+                             self.set_suite_state(phase))
+            # end with
             # Look for group variables that need to be promoted to the suite
             # We need to promote any variable used later to the suite, however,
             # we do not yet know if it will be used.
@@ -450,6 +468,73 @@ character(len=16) :: {css_var_name} = '{state}'
                 # end if
             # end for
         # end for
+        if run_env.persistent_transform_buffers:
+            self.__add_transform_buffers(run_env)
+        # end if
+
+    def __add_transform_buffers(self, run_env):
+        """Create a suite variable for each run phase variable transform
+        array which is registered for a persistent buffer.
+        The buffers cover the entire horizontal dimension, which is the
+        last dimension of each buffer so that the columns of a group call
+        are a contiguous section. They are allocated by the suite
+        initialize group and deallocated by the suite finalize group."""
+        init_group = self.__suite_init_group
+        for group in self.groups:
+            for var in group.buffered_transform_vars():
+                lname = var.get_prop_value('local_name')
+                dims = list()
+                for dim in var.get_dimensions():
+                    if is_horizontal_dimension(dim):
+                        dims.append('horizontal_dimension')
+                    elif dim.split(':')[0] == 'ccpp_constant_one':
+                        dims.append(dim.split(':')[-1])
+                    else:
+                        dims.append(dim)
+                    # end if
+                # end for
+                # The columns of a group call are a contiguous section
+                dims.remove('horizontal_dimension')
+                dims.append('horizontal_dimension')
+                subst_dict = {'dimensions' : dims}
+                prop_dict = var.copy_prop_dict(subst_dict=subst_dict)
+                for prop in ['intent', 'optional']:
+                    if prop in prop_dict:
+                        del prop_dict[prop]
+                    # end if
+                # end for
+                prop_dict['allocatable'] = True
+                prop_dict['target'] = True
+                prop_dict['persistence'] = 'run'
+                # Groups share a buffer when their arrays match
+                bname = lname + '_buffer'
+                bvar = self.find_local_name(bname, any_scope=False)
+                if bvar is not None:
+                    if ((bvar.get_dimensions() != dims) or
+                        any(bvar.get_prop_value(x) != prop_dict.get(x)
+                            for x in ['type', 'kind'])):
+                        bname = group.name + '_' + bname
+                        bvar = None
+                    # end if
+                # end if
+                if bvar is None:
+                    prop_dict['local_name'] = bname
+                    prop_dict['standard_name'] = 'ccpp_transform_buffer_' + bname
+                    bvar = Var(prop_dict,
+                               ParseSource(API_SOURCE_NAME,
+                                           _API_SUITE_VAR_NAME, var.context),
+                               run_env)
+                    self.add_variable(bvar, run_env)
+                    emsg = init_group.add_variable_dimensions(bvar, [],
+                                                              adjust_intent=True,
+                                                              to_dict=init_group.call_list)
+                    if emsg:
+                        raise CCPPError(emsg)
+                    # end if
+                # end if
+                group.set_transform_buffer(lname, bvar)
+            # end for
+        # end for
 
     def is_run_group(self, group):
         """Method to separate out run-loop groups from special initial
@@ -493,12 +578,19 @@ character(len=16) :: {css_var_name} = '{state}'
         """Create caps for all groups in the suite and for the entire suite
         (calling the group caps one after another)"""
         # Set name of module and filename of cap
-        filename = '{module_name}.F90'.format(module_name=self.module)
+        filename = self.cap_filename
         if run_env.verbose:
             run_env.logger.debug('Writing CCPP suite file, {}'.format(filename))
         # end if
         # Retrieve the name of the constituent module for Group use statements
         const_mod = self.parent.constituent_module_name()
+        # Number the timed groups, subcycles, and scheme calls
+        timers = SchemeTimers(self.name)
+        if run_env.scheme_timers:
+            for group in self.__groups:
+                group.add_timers(timers)
+            # end for
+        # end if
         # Init
         output_file_name = os.path.join(output_dir, filename)
         with FortranWriter(output_file_name, 'w',
@@ -506,6 +598,7 @@ character(len=16) :: {css_var_name} = '{state}'
                            self.module) as outfile:
             # Write module 'use' statements here
             outfile.write('use {}'.format(KINDS_MODULE), 1)
+            Suite.__omp_use.write(outfile, 1, {})
             # Look for any DDT types
             self.__ddt_library.write_ddt_use_statements(self.values(),
                                                         outfile, 1)
@@ -519,9 +612,18 @@ character(len=16) :: {css_var_name} = '{state}'
             var_state = Suite.__state_machine_initial_state
             outfile.write(line.format(css_var_name=var_name,
                                       state=var_state), 1)
+            public_names = list()
             for group in self.__groups:
-                outfile.write('public :: {}'.format(group.name), 1)
+                public_names.append(group.name)
+                if group.chunked_driver_name:
+                    public_names.append(group.chunked_driver_name)
+                # end if
             # end for
+            if timers.num_timers > 0:
+                public_names.extend(timers.public_routines())
+            # end if
+            outfile.write_block(['public :: {}'.format(x)
+                                 for x in public_names], 1)
             # Declare constituent public interfaces
             const_dict.declare_public_interfaces(outfile, 1)
             # Declare constituent private suite interfaces and data
@@ -530,6 +632,10 @@ character(len=16) :: {css_var_name} = '{state}'
             for svar in self.keys():
                 self[svar].write_def(outfile, 1, self, allocatable=True)
             # end for
+            if timers.num_timers > 0:
+                outfile.write('', 0)
+                CodeBlock(timers.data_lines()).write(outfile, 1, {})
+            # end if
             outfile.end_module_header()
             for group in self.__groups:
                 if group.name in self._beg_groups:
@@ -542,12 +648,20 @@ character(len=16) :: {css_var_name} = '{state}'
                     group.write(outfile, self.__host_arg_list_full, 1,
                                 const_mod)
                 # end if
+                if group.chunked_driver_name:
+                    group.write_chunked_driver(outfile, 1)
+                # end if
             # end for
             err_vars = self.find_error_variables(any_scope=True,
                                                  clone_as_out=True)
             # Write the constituent properties interface
             const_dict.write_constituent_routines(outfile, 1,
                                                   self.name, err_vars)
+            # Write the timing table interface
+            if timers.num_timers > 0:
+                outfile.write('', 0)
+                CodeBlock(timers.routine_lines()).write(outfile, 1, {})
+            # end if
         # end with
         return output_file_name
 
@@ -632,9 +746,11 @@ class API(VarDictionary):
         # end for
         # Turn the SDF files into Suites
         for sdf in sdfs:
-            suite = Suite(sdf, self, run_env)
-            suite.analyze(self.host_model, scheme_library,
-                          self.__ddt_lib, run_env)
+            with run_env.phase_timer.phase(os.path.basename(sdf)):
+                suite = Suite(sdf, self, run_env)
+                suite.analyze(self.host_model, scheme_library,
+                              self.__ddt_lib, run_env)
+            # end with
             self.__suites.append(suite)
         # end for
         # We will need the correct names for errmsg and errcode
@@ -683,19 +799,74 @@ class API(VarDictionary):
         # end if
         raise ParseInternalError("Illegal phase, '{}'".format(phase))
 
-    def write(self, output_dir, run_env):
-        """Write CCPP API module"""
+    def write(self, output_dir, run_env, current_caps=None):
+        """Write CCPP API module
+        <current_caps> is an optional dictionary of up-to-date suite cap
+           filenames keyed by suite name. These suites are not written
+           again, their existing cap filename is returned instead."""
         if not self.suites:
             raise CCPPError("No suite specified for generating API")
         # end if
         api_filenames = list()
+        write_suites = list()
         # Write out the suite files
-        for suite in self.suites:
-            out_file_name = suite.write(output_dir, run_env)
+        for index, suite in enumerate(self.suites):
+            if current_caps and (suite.name in current_caps):
+                out_file_name = current_caps[suite.name]
+                if run_env.verbose:
+                    lmsg = 'Skipping up-to-date CCPP suite file, {}'
+                    run_env.logger.debug(lmsg.format(out_file_name))
+                # end if
+            else:
+                out_file_name = None
+                write_suites.append(index)
+            # end if
             api_filenames.append(out_file_name)
         # end for
+        use_fork = 'fork' in multiprocessing.get_all_start_methods()
+        if (run_env.jobs > 1) and (len(write_suites) > 1) and use_fork:
+            # Worker processes are forked so that they share the analyzed
+            #   suites with this process rather than having to pickle them.
+            mp_context = multiprocessing.get_context('fork')
+            num_workers = min(run_env.jobs, len(write_suites))
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=num_workers, mp_context=mp_context,
+                    initializer=API.__init_suite_writer,
+                    initargs=(self, output_dir, run_env)) as pool:
+                out_file_names = list(pool.map(API.write_suite, write_suites))
+            # end with
+        else:
+            out_file_names = [self.suites[x].write(output_dir, run_env)
+                              for x in write_suites]
+        # end if
+        for index, out_file_name in zip(write_suites, out_file_names):
+            api_filenames[index] = out_file_name
+        # end for
         return api_filenames
 
+    @staticmethod
+    def __init_suite_writer(api, output_dir, run_env):
+        """Initialize a worker process to write suite caps from <api>
+        to <output_dir>."""
+        global _API_WRITE_ARGS # pylint: disable=global-statement
+        _API_WRITE_ARGS = (api, output_dir, run_env)
+
+    @staticmethod
+    def write_suite(index):
+        """Write the cap for suite number <index> in a worker process
+        initialized by API.write. Return the cap's filename."""
+        api, output_dir, run_env = _API_WRITE_ARGS
+        return api.suites[index].write(output_dir, run_env)
+
+    @staticmethod
+    def suite_schemes(suite):
+        """Return the set of scheme names called by <suite>"""
+        schemes = set()
+        for part in suite.groups:
+            schemes.update([x.name for x in part.schemes()])
+        # end for
+        return schemes
+
     @classmethod
     def declare_inspection_interfaces(cls, ofile):
         """Declare the API interfaces for the suite inquiry functions"""
@@ -1097,10 +1268,7 @@ class API(VarDictionary):
             oline = "{}if(trim(suite_name) == '{}') then"
             ofile.write(oline.format(else_str, suite.name), 2)
             # Collect the list of schemes in this suite
-            schemes = set()
-            for part in suite.groups:
-                schemes.update([x.name for x in part.schemes()])
-            # end for
+            schemes = self.suite_schemes(suite)
             # Write out the list
             API.write_var_set_loop(ofile, 'scheme_list', schemes, 3)
             else_str = 'else '
@@ -1121,9 +1289,8 @@ class API(VarDictionary):
         oline = "character(len=*), allocatable, intent(out) :: suites(:)"
         ofile.write(oline, 2)
         ofile.write("\nallocate(suites({}))".format(nsuites), 2)
-        for ind, suite in enumerate(self.suites):
-            ofile.write("suites({}) = '{}'".format(ind+1, suite.name), 2)
-        # end for
+        ofile.write_block(["suites({}) = '{}'".format(ind+1, suite.name)
+                           for ind, suite in enumerate(self.suites)], 2)
         ofile.write("end subroutine {}".format(API.__suite_fname), 1)
         # Write out the suite part list subroutine
         self.write_suite_part_list_sub(ofile, errmsg_name, errcode_name)
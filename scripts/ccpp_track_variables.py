@@ -5,6 +5,9 @@ import os
 import argparse
 import logging
 import glob
+import hashlib
+import json
+import tempfile
 
 # CCPP framework imports
 from metadata_table import find_scheme_names, parse_metadata_file
@@ -18,6 +21,11 @@ from framework_env import CCPPFrameworkEnv
 # Set up the command line argument parser and other global variables          #
 ###############################################################################
 
+# Name of the variable index file saved next to the metadata files
+_INDEX_FILENAME = '.ccpp_track_variables_index.json'
+# Version of the variable index layout, update when the layout changes
+_INDEX_FORMAT = 2
+
 ###############################################################################
 # Functions and subroutines                                                   #
 ###############################################################################
@@ -30,12 +38,21 @@ def parse_arguments():
                         help='path to CCPP scheme metadata files', required=True)
     parser.add_argument('-c', '--config',
                         help='path to CCPP prebuild configuration file', required=True)
-    parser.add_argument('-v', '--variable', help='variable to track through CCPP suite',
-                        required=True)
+    parser.add_argument('-v', '--variable', action='append', default=[],
+                        help='variable to track through CCPP suite (may be repeated)')
+    parser.add_argument('--variables-file',
+                        help='file with a variable to track on each line')
+    parser.add_argument('--rebuild-index', action='store_true', default=False,
+                        help='rebuild the saved index of metadata variables')
     parser.add_argument('--debug', action='store_true', help='enable debugging output',
                         default=False)
 
     args = parser.parse_args()
+    if args.variables_file:
+        with open(args.variables_file, 'r') as vfile:
+            args.variable.extend([x.strip() for x in vfile if x.strip()])
+    if not args.variable:
+        parser.error('at least one variable is required (-v or --variables-file)')
 
     return args
 
@@ -83,75 +100,135 @@ def create_metadata_filename_dict(metapath):
     return metadata_dict
 
 
-def create_var_graph(suite, var, config, metapath, run_env):
+def _metadata_file_stamps(metapath):
+    """Return a dictionary with the modification time and size of each .meta
+       file in <metapath>, used to decide whether a saved variable index is current"""
+    stamps = {}
+    for filename in sorted(glob.glob(os.path.join(metapath, "*.meta"))):
+        stat = os.stat(filename)
+        stamps[os.path.basename(filename)] = [stat.st_mtime_ns, stat.st_size]
+    return stamps
+
+def _config_stamp(config):
+    """Return a hash of the variable definition files and the typedefs of the prebuild
+       <config>, used to decide whether a saved variable index is current"""
+    stamp = hashlib.sha256()
+    stamp.update(json.dumps([config['variable_definition_files'],
+                             config['typedefs_new_metadata']],
+                            sort_keys=True, default=str).encode())
+    for filename in config['variable_definition_files']:
+        try:
+            with open(filename, 'rb') as vfile:
+                stamp.update(vfile.read())
+        except OSError:
+            stamp.update(b'missing')
+    return stamp.hexdigest()
+
+def build_variable_index(metapath, config, run_env):
+    """Parse every .meta file in <metapath> once and return an inverted index of the
+       scheme variables for the prebuild <config>. The index is a dictionary with the entries:
+         schemes   : the section titles of each scheme, in table order
+         variables : for each standard name, a dictionary from scheme name to a list of
+                     [section number, position, intent, units, dimensions] entries, one
+                     for each section using the variable, where section number is the
+                     index of the section title in schemes and position is the index of
+                     the variable in its section"""
+    metadata_dict = create_metadata_filename_dict(metapath)
+    schemes = {}
+    variables = {}
+    for scheme_filename in sorted(set(metadata_dict.values())):
+        run_env.logger.debug(f"reading metadata file {scheme_filename}")
+        new_metadata_headers = parse_metadata_file(scheme_filename,
+                                                   known_ddts=registered_fortran_ddt_names(),
+                                                   run_env=run_env)
+        for scheme_metadata in new_metadata_headers:
+            scheme = scheme_metadata.table_name
+            if metadata_dict.get(scheme) != scheme_filename:
+                # Only index the tables of schemes, the same way a suite looks them up
+                continue
+            schemes[scheme] = []
+            for snum, section in enumerate(scheme_metadata.sections()):
+                schemes[scheme].append(section.title)
+                for position, scheme_var in enumerate(section.variable_list()):
+                    stdname = scheme_var.get_prop_value('standard_name')
+                    entry = [snum, position,
+                             scheme_var.get_prop_value('intent'),
+                             scheme_var.get_prop_value('units'),
+                             scheme_var.get_dimensions()]
+                    variables.setdefault(stdname, {}).setdefault(scheme, []).append(entry)
+    return {'format': _INDEX_FORMAT, 'files': _metadata_file_stamps(metapath),
+            'config': _config_stamp(config), 'schemes': schemes, 'variables': variables}
+
+def read_variable_index(metapath, config, run_env):
+    """Return the variable index saved in <metapath> or None if there is no index, if any
+       .meta file in <metapath> was added, removed, or changed since it was saved, or if it
+       was built with different variable definition files or typedefs than <config>"""
+    index_file = os.path.join(metapath, _INDEX_FILENAME)
+    try:
+        with open(index_file, 'r') as ifile:
+            index = json.load(ifile)
+    except (OSError, ValueError):
+        return None
+    if (not isinstance(index, dict)) or (index.get('format') != _INDEX_FORMAT):
+        return None
+    if (index.get('files') != _metadata_file_stamps(metapath)) or \
+       (index.get('config') != _config_stamp(config)):
+        run_env.logger.debug(f"variable index {index_file} is out of date")
+        return None
+    run_env.logger.debug(f"using variable index {index_file}")
+    return index
+
+def write_variable_index(index, metapath, run_env):
+    """Save <index> in <metapath>. The file is replaced atomically so that a concurrent
+       run never reads a partial index. Failure to save the index is not an error."""
+    index_file = os.path.join(metapath, _INDEX_FILENAME)
+    tmp_name = None
+    try:
+        with tempfile.NamedTemporaryFile('w', dir=metapath, suffix='.tmp',
+                                         delete=False) as ifile:
+            tmp_name = ifile.name
+            json.dump(index, ifile)
+        os.replace(tmp_name, index_file)
+    except OSError as err:
+        run_env.logger.warning(f"Unable to save variable index {index_file}: {err}")
+        if tmp_name and os.path.exists(tmp_name):
+            os.remove(tmp_name)
+
+def create_var_graph(suite, var, config, metapath, run_env, index=None):
     """Given a suite, variable name, a 'config' dictionary, and a path to .meta files:
-         1. Creates a dictionary associating schemes with their .meta files
+         1. Reads (or builds) the index of variables in the .meta files
          2. Loops through the call tree of the provided suite by group
-         3. For each scheme, reads .meta file for said scheme, checks for variable within that
-            scheme, and if it exists, adds an entry to a list of tuples for the corresponding
-            group, where each tuple includes the name of the scheme and the intent of the variable
+         3. For each scheme, looks up the variable in the index, and if it exists in the
+            scheme, adds an entry to a list of tuples for the corresponding group, where
+            each tuple includes the name of the scheme and the intent of the variable
             within that scheme"""
 
+    if index is None:
+        index = read_variable_index(metapath, config, run_env)
+        if index is None:
+            run_env.logger.debug(f"reading .meta files in path:\n {metapath}")
+            index = build_variable_index(metapath, config, run_env)
+            write_variable_index(index, metapath, run_env)
+
     # Create a list of tuples for each group that will hold the in/out information for each scheme
     var_graph={}
     var_graph_empty = True
 
-    run_env.logger.debug(f"reading .meta files in path:\n {metapath}")
-    metadata_dict=create_metadata_filename_dict(metapath)
-
-    # Loop through call tree, find matching filename for scheme via dictionary schemes_in_files,
-    # then parse that metadata file to find variable info
-    partial_matches = {}
+    var_schemes = index['variables'].get(var, {})
     for group in suite.call_tree:
         run_env.logger.debug(f"for group {group} ")
         # Create list of tuples that will hold the in/out information for each scheme in this group
         var_graph[group] = []
         for scheme in suite.call_tree[group]:
-            run_env.logger.debug(f"reading meta file for scheme {scheme} ")
-
-            if scheme in metadata_dict:
-                scheme_filename = metadata_dict[scheme]
-            else:
+            if scheme not in index['schemes']:
                 raise Exception(f"Error, scheme '{scheme}' from suite '{suite.sdf_name}' "
                                 f"not found in metadata files in {metapath}")
-
-            run_env.logger.debug(f"reading metadata file {scheme_filename} for scheme {scheme}")
-
-            new_metadata_headers = parse_metadata_file(scheme_filename,
-                                                       known_ddts=registered_fortran_ddt_names(),
-                                                       run_env=run_env)
-            for scheme_metadata in new_metadata_headers:
-                if scheme_metadata.table_name != scheme:
-                    # Some metadata files contain information for multiple schemes,
-                    # need to make sure we only read the relevant section
-                    continue
-                for section in scheme_metadata.sections():
-                    found_var = []
-                    intent = ''
-                    for scheme_var in section.variable_list():
-                        exact_match = False
-                        if var == scheme_var.get_prop_value('standard_name'):
-                            run_env.logger.debug(f"Found variable {var} in scheme {section.title}")
-                            found_var=var
-                            exact_match = True
-                            intent = scheme_var.get_prop_value('intent')
-                            break
-                        scheme_var_standard_name = scheme_var.get_prop_value('standard_name')
-                        if scheme_var_standard_name.find(var) != -1:
-                            run_env.logger.debug(f"{var} matches {scheme_var_standard_name}")
-                            found_var.append(scheme_var_standard_name)
-                    if not found_var:
-                        run_env.logger.debug(f"Did not find variable {var} in scheme {section.title}")
-                    elif exact_match:
-                        run_env.logger.debug(f"Exact match found for variable {var} in scheme "
-                                             f"{section.title}, intent {intent}")
-                        var_graph[group].append((section.title,intent))
-                        var_graph_empty = False
-                    else:
-                        run_env.logger.debug(f"Found inexact matches for variable(s) {var} "
-                                      f"in scheme {section.title}:\n{found_var}")
-                        partial_matches[section.title] = found_var
-
+            titles = index['schemes'][scheme]
+            for entry in var_schemes.get(scheme, []):
+                run_env.logger.debug(f"Exact match found for variable {var} in scheme "
+                                     f"{titles[entry[0]]}, intent {entry[2]}")
+                var_graph[group].append((titles[entry[0]], entry[2]))
+                var_graph_empty = False
 
     if not var_graph_empty:
         success = True
@@ -159,6 +236,7 @@ def create_var_graph(suite, var, config, metapath, run_env):
     else:
         success = False
         run_env.logger.error(f"Variable {var} not found in any suites for sdf {suite.sdf_name}\n")
+        partial_matches = find_partial_matches(suite, var, index)
         if partial_matches:
             print("Did find partial matches that may be of interest:\n")
             for key in partial_matches:
@@ -166,7 +244,25 @@ def create_var_graph(suite, var, config, metapath, run_env):
 
     return (success,var_graph)
 
-def track_variables(sdf,metadata_path,config,variable,debug):
+def find_partial_matches(suite, var, index):
+    """Return a dictionary from section title to the list of standard names in that section
+       which contain <var>, in the order they appear in the section, for the schemes in the
+       call tree of <suite>"""
+    section_matches = {}
+    for stdname in index['variables']:
+        if stdname.find(var) != -1:
+            for scheme, entries in index['variables'][stdname].items():
+                for entry in entries:
+                    section_matches.setdefault((scheme, entry[0]), []).append((entry[1], stdname))
+    partial_matches = {}
+    for group in suite.call_tree:
+        for scheme in suite.call_tree[group]:
+            for snum, title in enumerate(index['schemes'].get(scheme, [])):
+                if (scheme, snum) in section_matches:
+                    partial_matches[title] = [x[1] for x in sorted(section_matches[(scheme, snum)])]
+    return partial_matches
+
+def track_variables(sdf,metadata_path,config,variable,debug,rebuild_index=False):
     """Main routine that traverses a CCPP suite and outputs the list of schemes that use given
        variable, broken down by group
 
@@ -174,8 +270,9 @@ def track_variables(sdf,metadata_path,config,variable,debug):
         sdf           (str) : The full path of the suite definition file to parse
         metadata_path (str) : path to CCPP scheme metadata files
         config        (str) : path to CCPP prebuild configuration file
-        variable      (str) : variable to track through CCPP suite
+        variable (str, list): variable (or list of variables) to track through CCPP suite
         debug        (bool) : Enable extra output for debugging
+        rebuild_index (bool): Rebuild the saved index of metadata variables
 
     Returns:
         None
@@ -192,26 +289,40 @@ def track_variables(sdf,metadata_path,config,variable,debug):
     if not success:
         raise Exception('Call to import_config failed.')
 
-    # Variables defined by the host model; this call is necessary because it converts some old
-    # metadata formats so they can be used later in the script
-    (success, _, _) = gather_variable_definitions(config['variable_definition_files'],
-                                                   config['typedefs_new_metadata'])
-    if not success:
-        raise Exception('Call to gather_variable_definitions failed.')
-
-    (success, var_graph) = create_var_graph(suite, variable, config, metadata_path, run_env)
-    if success:
-        print(f"For suite {suite.sdf_name}, the following schemes (in order for each group) "
-              f"use the variable {variable}:")
-        for group in var_graph:
-            if var_graph[group]:
-                print(f"In group {group}")
-                for entry in var_graph[group]:
-                    print(f"  {entry[0]} (intent {entry[1]})")
+    index = None
+    if not rebuild_index:
+        index = read_variable_index(metadata_path, config, run_env)
+    if index is None:
+        # Variables defined by the host model; this call is necessary because it converts some
+        # old metadata formats so they can be used when parsing the scheme metadata files
+        (success, _, _) = gather_variable_definitions(config['variable_definition_files'],
+                                                       config['typedefs_new_metadata'])
+        if not success:
+            raise Exception('Call to gather_variable_definitions failed.')
+        run_env.logger.debug(f"reading .meta files in path:\n {metadata_path}")
+        index = build_variable_index(metadata_path, config, run_env)
+        write_variable_index(index, metadata_path, run_env)
+
+    if isinstance(variable, str):
+        variable = [variable]
+    for vnum, var in enumerate(variable):
+        if vnum > 0:
+            print()
+        (success, var_graph) = create_var_graph(suite, var, config, metadata_path, run_env,
+                                                index=index)
+        if success:
+            print(f"For suite {suite.sdf_name}, the following schemes (in order for each group) "
+                  f"use the variable {var}:")
+            for group in var_graph:
+                if var_graph[group]:
+                    print(f"In group {group}")
+                    for entry in var_graph[group]:
+                        print(f"  {entry[0]} (intent {entry[1]})")
 
 
 if __name__ == '__main__':
 
     args = parse_arguments()
 
-    track_variables(args.sdf,args.metadata_path,args.config,args.variable,args.debug)
+    track_variables(args.sdf,args.metadata_path,args.config,args.variable,args.debug,
+                    rebuild_index=args.rebuild_index)
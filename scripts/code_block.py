@@ -94,6 +94,7 @@ class CodeBlock(object):
         It is an error for <var_dict> to not contain any variable
         indicated in the code block."""
 
+        statements = list()
         for line in self.__code_block:
             stmt = line[0]
             if indent_level >= 0:
@@ -113,7 +114,8 @@ class CodeBlock(object):
             if errmsg:
                 raise ParseInternalError(errmsg)
             # end if
-            outfile.write(stmt.format(**var_dict), indent)
+            statements.append((stmt.format(**var_dict), indent))
         # end for
+        outfile.write_block(statements, 0)
 
 ###############################################################################
@@ -26,6 +26,11 @@ __all__ = [
     'km_h_minus_1__to__m_s_minus_1',
     'W_m_minus_2__to__erg_cm_minus_2_s_minus_1',
     'erg_cm_minus_2_s_minus_1__to__W_m_minus_2',
+    'UnitConversionError',
+    'UnitRegistry',
+    'UNIT_REGISTRY',
+    'parse_units',
+    'unit_conversion_expr',
     ]
 
 from .unit_conversion import cm__to__m
@@ -52,3 +57,8 @@ from .unit_conversion import m_s_minus_1__to__km_h_minus_1
 from .unit_conversion import km_h_minus_1__to__m_s_minus_1
 from .unit_conversion import W_m_minus_2__to__erg_cm_minus_2_s_minus_1
 from .unit_conversion import erg_cm_minus_2_s_minus_1__to__W_m_minus_2
+from .unit_algebra import UnitConversionError
+from .unit_algebra import UnitRegistry
+from .unit_algebra import UNIT_REGISTRY
+from .unit_algebra import parse_units
+from .unit_algebra import unit_conversion_expr
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+
+"""A unit algebra engine for composing unit conversions.
+A unit string is a space-separated list of factors, each of which is a
+(possibly SI-prefixed) unit symbol followed by an optional integer exponent
+(e.g., 'kg m-2 s-1'). Each unit string is parsed into a scale, an offset,
+a vector of exponents of the base dimensions, and a normalized list of its
+factors. Two units with the same dimensions, which are also built from the
+same base dimensions (so that, e.g., a mass mixing ratio, 'kg kg-1', is not
+confused with a volume mixing ratio, 'mol mol-1'), can be converted into
+each other with a single folded expression,
+value_out = factor * value_in + offset, written in the same
+format as the functions in unit_conversion.py: {var} is substituted by the
+variable to convert and {kind} by either _ followed by the kind of the
+variable, or an empty string.
+The hand-written conversions in unit_conversion.py take precedence over
+derived ones so that established conversions keep their exact form.
+Only units with identical normalized factor lists (e.g., 'm s-1' and
+'s-1 m') are equivalent, units which differ only in their symbols (e.g.,
+'K s-1' and 'C s-1') are not converted.
+Parsed units and conversion expressions are cached in a UnitRegistry.
+"""
+
+# Python library imports
+import keyword
+import re
+
+# CCPP framework imports
+from . import unit_conversion
+
+## Base dimensions, in dimension vector order
+_BASE_DIMENSIONS = ('length', 'mass', 'time', 'temperature', 'amount',
+                    'current', 'angle')
+
+########################################################################
+
+def _dims(**exponents):
+    """Return a dimension vector with the base dimension exponents,
+    <exponents>, (all other exponents are zero)."""
+    return tuple(exponents.get(x, 0) for x in _BASE_DIMENSIONS)
+
+########################################################################
+
+## Known unit symbols: symbol: (scale, offset, dimension vector).
+##   The scale and offset convert a value in the unit to base units.
+_UNITS = {
+    '1' : (1.0, 0.0, _dims()),
+    'm' : (1.0, 0.0, _dims(length=1)),
+    'g' : (1.0E-3, 0.0, _dims(mass=1)),
+    's' : (1.0, 0.0, _dims(time=1)),
+    'min' : (6.0E+1, 0.0, _dims(time=1)),
+    'h' : (3.6E+3, 0.0, _dims(time=1)),
+    'd' : (8.64E+4, 0.0, _dims(time=1)),
+    'K' : (1.0, 0.0, _dims(temperature=1)),
+    'C' : (1.0, 273.15, _dims(temperature=1)),
+    'degC' : (1.0, 273.15, _dims(temperature=1)),
+    'mol' : (1.0, 0.0, _dims(amount=1)),
+    'A' : (1.0, 0.0, _dims(current=1)),
+    'rad' : (1.0, 0.0, _dims(angle=1)),
+    'radian' : (1.0, 0.0, _dims(angle=1)),
+    'degree' : (1.745329251994330E-2, 0.0, _dims(angle=1)),
+    'N' : (1.0, 0.0, _dims(length=1, mass=1, time=-2)),
+    'Pa' : (1.0, 0.0, _dims(length=-1, mass=1, time=-2)),
+    'bar' : (1.0E+5, 0.0, _dims(length=-1, mass=1, time=-2)),
+    'J' : (1.0, 0.0, _dims(length=2, mass=1, time=-2)),
+    'erg' : (1.0E-7, 0.0, _dims(length=2, mass=1, time=-2)),
+    'W' : (1.0, 0.0, _dims(length=2, mass=1, time=-3))
+}
+
+## Unit symbols which may take an SI prefix
+_PREFIXABLE = ('m', 'g', 's', 'K', 'mol', 'A', 'N', 'Pa', 'bar', 'J', 'W')
+
+## SI prefixes (two-character prefixes must be tried first)
+_PREFIXES = {'da' : 1.0E+1, 'h' : 1.0E+2, 'k' : 1.0E+3, 'M' : 1.0E+6,
+             'G' : 1.0E+9, 'T' : 1.0E+12, 'd' : 1.0E-1, 'c' : 1.0E-2,
+             'm' : 1.0E-3, 'u' : 1.0E-6, 'n' : 1.0E-9, 'p' : 1.0E-12}
+
+## A unit factor, a symbol followed by an optional integer exponent
+_FACTOR_RE = re.compile(r"([A-Za-z_]+|1)([+-]?[0-9]+)?$")
+
+########################################################################
+
+class UnitConversionError(ValueError):
+    """Class so that unit parsing and conversion errors can be
+    distinguished from other errors"""
+    pass
+
+########################################################################
+
+class Units:
+    """A parsed unit string: a scale and an offset which convert a value
+    in the units to base units, the exponents of each base dimension,
+    the base dimensions used by any of its factors, and its factors as a
+    sorted tuple of (symbol, exponent) pairs.
+    >>> Units(1.0E+3, 0.0, _dims(length=1)).dims
+    (1, 0, 0, 0, 0, 0, 0)
+    """
+
+    def __init__(self, scale, offset, dims, base_dims=None, factors=None):
+        """Initialize the units"""
+        self.__scale = scale
+        self.__offset = offset
+        self.__dims = dims
+        if base_dims is None:
+            base_dims = frozenset(x for x, y in enumerate(dims) if y != 0)
+        # end if
+        self.__base_dims = base_dims
+        self.__factors = factors
+
+    def compatible(self, other):
+        """Return True if <other> has the same dimensions as these units
+        and is built from the same base dimensions.
+        >>> parse_units('km h-1').compatible(parse_units('m s-1'))
+        True
+        >>> parse_units('kg').compatible(parse_units('kg m-2'))
+        False
+        >>> parse_units('g kg-1').compatible(parse_units('kg kg-1'))
+        True
+        >>> parse_units('mol mol-1').compatible(parse_units('kg kg-1'))
+        False
+        >>> parse_units('1').compatible(parse_units('kg kg-1'))
+        False
+        """
+        return (self.dims == other.dims) and \
+            (self.base_dims == other.base_dims)
+
+    def equivalent(self, other):
+        """Return True if <other> has the same normalized factors as
+        these units (i.e., no conversion is required).
+        >>> parse_units('m s-1').equivalent(parse_units('s-1 m'))
+        True
+        >>> parse_units('m m').equivalent(parse_units('m2'))
+        True
+        >>> parse_units('K s-1').equivalent(parse_units('C s-1'))
+        False
+        """
+        return (self.factors is not None) and (self.factors == other.factors)
+
+    @property
+    def scale(self):
+        """Return the factor which converts a value to base units"""
+        return self.__scale
+
+    @property
+    def offset(self):
+        """Return the offset added to convert a value to base units"""
+        return self.__offset
+
+    @property
+    def dims(self):
+        """Return the exponents of the base dimensions of these units"""
+        return self.__dims
+
+    @property
+    def base_dims(self):
+        """Return the set of base dimensions (as indices into the dimension
+        vector) used by any factor of these units"""
+        return self.__base_dims
+
+    @property
+    def factors(self):
+        """Return the normalized factors of these units, a sorted tuple
+        of (symbol, exponent) pairs, or None if unknown"""
+        return self.__factors
+
+########################################################################
+
+def _parse_symbol(symbol):
+    """Return the (scale, offset, dims) of unit symbol, <symbol>, which may
+    carry an SI prefix. Return None if <symbol> is not a known unit.
+    >>> _parse_symbol('km')
+    (1000.0, 0.0, (1, 0, 0, 0, 0, 0, 0))
+    >>> _parse_symbol('min')
+    (60.0, 0.0, (0, 0, 1, 0, 0, 0, 0))
+    >>> _parse_symbol('none')
+
+    """
+    if symbol in _UNITS:
+        return _UNITS[symbol]
+    # end if
+    for plen in (2, 1):
+        prefix = symbol[0:plen]
+        base = symbol[plen:]
+        if (prefix in _PREFIXES) and (base in _PREFIXABLE):
+            scale, offset, dims = _UNITS[base]
+            return (_PREFIXES[prefix] * scale, offset, dims)
+        # end if
+    # end for
+    return None
+
+########################################################################
+
+def parse_units(units):
+    """Parse unit string, <units>, and return a Units object.
+    An offset (e.g., for temperatures in C) only applies to a unit which
+    appears alone with an exponent of one. In all other cases (e.g.,
+    'C s-1'), the units describe a difference and the offset is dropped.
+    Raise UnitConversionError if <units> cannot be parsed.
+    >>> parse_units('km h-1').scale
+    0.2777777777777778
+    >>> parse_units('g kg-1').dims
+    (0, 0, 0, 0, 0, 0, 0)
+    >>> parse_units('C').offset
+    273.15
+    >>> parse_units('C s-1').offset
+    0.0
+    >>> parse_units('s-1 kg m kg-1').factors
+    (('kg', 0), ('m', 1), ('s', -1))
+    >>> sorted(parse_units('g kg-1').base_dims)
+    [1]
+    >>> parse_units('none') #doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    ...
+    conversion_tools.unit_algebra.UnitConversionError: Unknown unit, 'none', in 'none'
+    >>> parse_units('m s^-1') #doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    ...
+    conversion_tools.unit_algebra.UnitConversionError: Invalid unit factor, 's^-1', in 'm s^-1'
+    """
+    factors = units.split()
+    if not factors:
+        raise UnitConversionError("Empty unit string, '{}'".format(units))
+    # end if
+    scale = 1.0
+    offset = 0.0
+    dims = [0] * len(_BASE_DIMENSIONS)
+    base_dims = set()
+    exponents = {}
+    for factor in factors:
+        match = _FACTOR_RE.match(factor)
+        if not match:
+            emsg = "Invalid unit factor, '{}', in '{}'"
+            raise UnitConversionError(emsg.format(factor, units))
+        # end if
+        symbol, exponent = match.groups()
+        exponent = int(exponent) if exponent else 1
+        unit = _parse_symbol(symbol)
+        if unit is None:
+            emsg = "Unknown unit, '{}', in '{}'"
+            raise UnitConversionError(emsg.format(symbol, units))
+        # end if
+        scale *= unit[0] ** exponent
+        for index, dim in enumerate(unit[2]):
+            dims[index] += dim * exponent
+            if dim != 0:
+                base_dims.add(index)
+            # end if
+        # end for
+        if (len(factors) == 1) and (exponent == 1):
+            offset = unit[1]
+        # end if
+        if symbol != '1':
+            # Keep cancelled symbols (e.g., 'kg kg-1') to tell ratios apart
+            exponents[symbol] = exponents.get(symbol, 0) + exponent
+        # end if
+    # end for
+    return Units(scale, offset, tuple(dims), frozenset(base_dims),
+                 tuple(sorted(exponents.items())))
+
+########################################################################
+
+def _fortran_real(value):
+    """Return <value> as a Fortran real literal (without a kind) in the
+    style of the conversions in unit_conversion.py.
+    >>> _fortran_real(1000.0)
+    '1.0E+3'
+    >>> _fortran_real(1.0E-3)
+    '1.0E-3'
+    >>> _fortran_real(3.6)
+    '3.6E+0'
+    >>> _fortran_real(0.2777777777777778)
+    '2.777777777777778E-1'
+    """
+    mantissa, exponent = "{:.15E}".format(value).split('E')
+    mantissa = mantissa.rstrip('0')
+    if mantissa.endswith('.'):
+        mantissa += '0'
+    # end if
+    return "{}E{:+d}".format(mantissa, int(exponent))
+
+########################################################################
+
+def _scale_term(factor):
+    """Return the expression for multiplying {var} by <factor>.
+    Division is used when the reciprocal of <factor> is shorter to write.
+    >>> _scale_term(1.0E+3)
+    '1.0E+3{kind}*{var}'
+    >>> _scale_term(1.0/6.0E+1)
+    '{var}/6.0E+1{kind}'
+    >>> _scale_term(1.0)
+    '{var}'
+    """
+    mult = _fortran_real(factor)
+    if mult == '1.0E+0':
+        return '{var}'
+    # end if
+    divisor = _fortran_real(1.0 / factor)
+    if len(divisor) < len(mult):
+        return '{var}/' + divisor + '{kind}'
+    # end if
+    return mult + '{kind}*{var}'
+
+########################################################################
+
+def fold_conversion(from_units, to_units):
+    """Return a single expression which converts a value in <from_units>
+    (a Units object) to <to_units> (a Units object).
+    Return None if no conversion is required, i.e., if the units have the
+    same normalized factors.
+    Raise UnitConversionError if the units are not compatible or if they
+    are different units which need no conversion (e.g., 'K s-1' and
+    'C s-1'), as the intent of such a conversion is ambiguous.
+    >>> fold_conversion(parse_units('km h-1'), parse_units('m s-1'))
+    '{var}/3.6E+0{kind}'
+    >>> fold_conversion(parse_units('g kg-1'), parse_units('kg kg-1'))
+    '1.0E-3{kind}*{var}'
+    >>> fold_conversion(parse_units('mm d-1'), parse_units('m s-1'))
+    '{var}/8.64E+7{kind}'
+    >>> fold_conversion(parse_units('K'), parse_units('C'))
+    '{var}-2.7315E+2{kind}'
+    >>> fold_conversion(parse_units('m s-1'), parse_units('s-1 m'))
+
+    >>> fold_conversion(parse_units('mol mol-1'), parse_units('kg kg-1'))
+    Traceback (most recent call last):
+    ...
+    conversion_tools.unit_algebra.UnitConversionError: Incompatible units
+    >>> fold_conversion(parse_units('K s-1'), parse_units('C s-1'))
+    Traceback (most recent call last):
+    ...
+    conversion_tools.unit_algebra.UnitConversionError: Different units with no conversion
+    """
+    if from_units.equivalent(to_units):
+        return None
+    # end if
+    if not from_units.compatible(to_units):
+        raise UnitConversionError("Incompatible units")
+    # end if
+    factor = from_units.scale / to_units.scale
+    offset = (from_units.offset - to_units.offset) / to_units.scale
+    expr = _scale_term(factor)
+    if _fortran_real(abs(offset)) != '0.0E+0':
+        sign = '-' if offset < 0.0 else '+'
+        expr += sign + _fortran_real(abs(offset)) + '{kind}'
+    # end if
+    if expr == '{var}':
+        raise UnitConversionError("Different units with no conversion")
+    # end if
+    return expr
+
+########################################################################
+
+def _units_identifier(units):
+    """Return the name used for <units> by the conversion functions in
+    unit_conversion.py or None if <units> has no legal name.
+    >>> _units_identifier('km h-1')
+    'km_h_minus_1'
+    >>> _units_identifier('1')
+    'one'
+    """
+    string = units.replace(" ", "_").replace(".", "_p_")
+    string = string.replace("-", "_minus_").replace("+", "_plus_")
+    if string == "1":
+        string = "one"
+    # end if
+    if string.isidentifier() and not keyword.iskeyword(string):
+        return string
+    # end if
+    return None
+
+########################################################################
+
+class UnitRegistry:
+    """A cache of parsed units and of conversion expressions.
+    >>> registry = UnitRegistry()
+    >>> registry.conversion('m', 'mm')
+    '1.0E+3{kind}*{var}'
+    >>> registry.conversion('W m-2', 'erg cm-2 s-1')
+    '1.0E+3{kind}*{var}'
+    >>> registry.conversion('kg m-2 s-1', 'g m-2 h-1')
+    '3.6E+6{kind}*{var}'
+    >>> registry.conversion('degree_north', 'radian')
+    '{var}/57.295779513{kind}'
+    >>> registry.conversion('m s-1', 's-1 m')
+
+    >>> registry.conversion('1', 'kg kg-1') #doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    ...
+    conversion_tools.unit_algebra.UnitConversionError: Unsupported unit conversion, '1' to 'kg kg-1'
+    >>> registry.conversion('C', 'm') #doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    ...
+    conversion_tools.unit_algebra.UnitConversionError: Unsupported unit conversion, 'C' to 'm'
+    >>> registry.conversion('degree_east', 'degree_north') #doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    ...
+    conversion_tools.unit_algebra.UnitConversionError: Unsupported unit conversion, 'degree_east' to 'degree_north'
+    >>> len(registry.units_cache), len(registry.conversion_cache)
+    (9, 8)
+    """
+
+    def __init__(self):
+        """Initialize empty caches"""
+        self.__units = {}
+        self.__conversions = {}
+
+    def units(self, units):
+        """Return the (cached) Units object for unit string, <units>.
+        Raise UnitConversionError if <units> cannot be parsed."""
+        if units not in self.__units:
+            try:
+                self.__units[units] = parse_units(units)
+            except UnitConversionError as uerr:
+                self.__units[units] = uerr
+            # end try
+        # end if
+        result = self.__units[units]
+        if isinstance(result, UnitConversionError):
+            raise UnitConversionError(str(result))
+        # end if
+        return result
+
+    def conversion(self, from_units, to_units):
+        """Return the (cached) expression which converts a variable in
+        <from_units> to <to_units>, or None if no conversion is required.
+        Raise UnitConversionError if there is no such conversion."""
+        key = (from_units, to_units)
+        if key not in self.__conversions:
+            self.__conversions[key] = self.__find_conversion(from_units,
+                                                             to_units)
+        # end if
+        result = self.__conversions[key]
+        if isinstance(result, UnitConversionError):
+            raise UnitConversionError(str(result))
+        # end if
+        return result
+
+    def __find_conversion(self, from_units, to_units):
+        """Return the expression which converts a variable in <from_units>
+        to <to_units>, None if no conversion is required, or a
+        UnitConversionError if there is no such conversion."""
+        from_name = _units_identifier(from_units)
+        to_name = _units_identifier(to_units)
+        if from_name and to_name:
+            func_name = "{}__to__{}".format(from_name, to_name)
+            func = getattr(unit_conversion, func_name, None)
+            if func is not None:
+                return func()
+            # end if
+        # end if
+        emsg = "Unsupported unit conversion, '{}' to '{}'"
+        try:
+            return fold_conversion(self.units(from_units),
+                                   self.units(to_units))
+        except UnitConversionError:
+            return UnitConversionError(emsg.format(from_units, to_units))
+        # end try
+
+    @property
+    def units_cache(self):
+        """Return the dictionary of parsed units (or parse errors)"""
+        return self.__units
+
+    @property
+    def conversion_cache(self):
+        """Return the dictionary of conversion expressions (or errors)"""
+        return self.__conversions
+
+########################################################################
+
+## The registry shared by all unit conversion lookups
+UNIT_REGISTRY = UnitRegistry()
+
+########################################################################
+
+def unit_conversion_expr(from_units, to_units):
+    """Return the expression which converts a variable in <from_units> to
+    <to_units>, or None if no conversion is required, using the shared
+    unit registry.
+    Raise UnitConversionError if there is no such conversion."""
+    return UNIT_REGISTRY.conversion(from_units, to_units)
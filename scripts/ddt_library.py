@@ -21,6 +21,8 @@ class VarDDT(Var):
     DDT nesting level).
     """
 
+    __slots__ = ('__field',)
+
     def __init__(self, new_field, var_ref, run_env, recur=False):
         """Initialize a new VarDDT object.
         <new_field> is the DDT component.
@@ -36,7 +38,9 @@ class VarDDT(Var):
         self.__field = None
         # Grab the info from the root of <var_ref>
         source = var_ref.source
-        super().__init__(var_ref, source, run_env, context=source.context)
+        # <var_ref> has already been checked so skip validation
+        super().__init__(var_ref, source, run_env, context=source.context,
+                         validate=False)
         # Find the correct place for <new_field>
         if isinstance(var_ref, Var):
             # We are at a top level DDT var, set our field
@@ -4,7 +4,9 @@
 """Code to write Fortran code
 """
 
+import bisect
 import math
+import re
 
 class FortranWriter:
     """Class to turn output into properly continued and indented Fortran code
@@ -27,6 +29,11 @@ class FortranWriter:
 
     __LINE_MAX = 130      # Max line length
 
+    # Characters which start a character context or where a line can break
+    __BREAK_RE = re.compile(r"['\"!, ]|//")
+
+    __QUOTE_RE = re.compile(r"['\"]")
+
     # CCPP copyright statement to be included in all generated Fortran files
     __COPYRIGHT = '''!
 ! This work (Common Community Physics Package Framework), identified by
@@ -70,17 +77,18 @@ end module {module}'''
     ###########################################################################
 
     def find_best_break(self, choices, last=None):
-        """Find the best line break point given <choices>.
+        """Find the best line break point given <choices>, which must be
+        in increasing order.
         If <last> is present, use it as a target line length."""
         if last is None:
             last = self.__line_fill
         # End if
         # Find largest good break
-        possible = [x for x in choices if 0 < x < last]
-        if not possible:
-            best = self.__line_max + 1
+        index = bisect.bisect_left(choices, last)
+        if (index > 0) and (choices[index - 1] > 0):
+            best = choices[index - 1]
         else:
-            best = max(possible)
+            best = self.__line_max + 1
         # End if
         if (best > self.__line_max) and (last < self.__line_max):
             best = self.find_best_break(choices, last=self.__line_max)
@@ -90,40 +98,102 @@ end module {module}'''
     ###########################################################################
 
     @staticmethod
-    def _in_quote(test_str):
-        """Return True if <test_str> ends in a character context.
-        >>> FortranWriter._in_quote("hi'mom")
-        True
-        >>> FortranWriter._in_quote("hi mom")
-        False
-        >>> FortranWriter._in_quote("'hi mom'")
-        False
-        >>> FortranWriter._in_quote("'hi"" mom'")
-        False
+    def _scan_line(line, start, comment_start, is_comment_stmt):
+        """Scan <line> once for break points and character contexts.
+        Break points are only collected from index <start>, where the
+        scan assumes no character context. If a comment starts at or
+        after <comment_start> and <line> is not a comment statement
+        (<is_comment_stmt> is False), the rest of <line> is not scanned
+        for break points.
+        Return a tuple with:
+          - The indices of spaces (and of the character before a comment)
+          - The indices of commas (and of the second slash of '//')
+          - The boundaries of the character contexts of <line> (scanning
+            from the start of <line>), see FortranWriter._in_quote
+          - '! ' if a comment was found, otherwise an empty string
+        >>> FortranWriter._scan_line("call foo(a, 'b c')", 0, 50, False)
+        ([4, 11], [10], [12, 16], '')
+        >>> FortranWriter._scan_line("x = 'a' // b ! c", 0, 50, False)
+        ([1, 3, 7, 10, 12, 12, 14], [9], [4, 6], '! ')
+        >>> FortranWriter._scan_line("hi'mom", 0, 50, False)[2]
+        [2, 6]
         """
-        in_single_char = False
-        in_double_char = False
-        for char in test_str:
-            if in_single_char:
-                if char == "'":
-                    in_single_char = False
+        spaces = list()
+        commas = list()
+        in_comment = ""
+        sptr = start
+        while True:
+            match = FortranWriter.__BREAK_RE.search(line, sptr)
+            if match is None:
+                break
+            # end if
+            sptr = match.start()
+            token = match.group()
+            if token in ("'", '"'):
+                # Skip to the end of the character context
+                sptr = line.find(token, sptr + 1)
+                if sptr < 0:
+                    break
                 # end if
-            elif in_double_char:
-                if char == '"':
-                    in_double_char = False
+            elif token == '!':
+                # Comment in non-character context
+                spaces.append(sptr-1)
+                in_comment = "! " # No continue for comment
+                if (not is_comment_stmt) and (sptr >= comment_start):
+                    # suck in rest of line
+                    break
                 # end if
-            elif char == "'":
-                in_single_char = True
-            elif char == '"':
-                in_double_char = True
+            elif token == ' ':
+                # Non-quote spaces are where we can break
+                spaces.append(sptr)
+            elif token == ',':
+                # Non-quote commas are where we can break
+                commas.append(sptr)
+            else:
+                # Non-quote concatenation operators are where we can break
+                commas.append(sptr + 1)
             # end if
-        # end for
-        return in_single_char or in_double_char
+            sptr = sptr + 1
+        # end while
+        # Find the character contexts from the start of <line>
+        quote_bounds = list()
+        sptr = 0
+        while True:
+            match = FortranWriter.__QUOTE_RE.search(line, sptr)
+            if match is None:
+                break
+            # end if
+            quote_bounds.append(match.start())
+            sptr = line.find(match.group(), match.start() + 1)
+            if sptr < 0:
+                quote_bounds.append(len(line))
+                break
+            # end if
+            quote_bounds.append(sptr)
+            sptr = sptr + 1
+        # end while
+        return spaces, commas, quote_bounds, in_comment
+
+    ###########################################################################
+
+    @staticmethod
+    def _in_quote(quote_bounds, index):
+        """Return True if the character at <index> of a line ends in a
+        character context. <quote_bounds> are the boundaries of the
+        character contexts of the line (see FortranWriter._scan_line).
+        >>> FortranWriter._in_quote([2, 6], 5)
+        True
+        >>> FortranWriter._in_quote([2, 6], 6)
+        False
+        >>> FortranWriter._in_quote([], 3)
+        False
+        """
+        return bisect.bisect_right(quote_bounds, index) % 2 == 1
 
     ###########################################################################
 
     def write(self, statement, indent_level, continue_line=False):
-        """Write <statement> to the open file, indenting to <indent_level>
+        """Write <statement> to the output buffer, indenting to <indent_level>
         (see self.indent).
         If <continue_line> is True, treat this line as a continuation of
         a previous statement."""
@@ -136,10 +206,47 @@ end module {module}'''
                 self.write(stmt, indent_level, continue_line)
             # End for
         else:
+            self.__write_line(statement, indent_level, continue_line)
+        # End if
+
+    ###########################################################################
+
+    def write_block(self, statements, indent_level):
+        """Write each statement in <statements> to the output buffer.
+        Each element of <statements> is either a statement, which is
+        indented to <indent_level>, or a (statement, indent) tuple,
+        which is indented to <indent_level> plus indent.
+        >>> outfile_name = "__fortran_write_temp.F90"
+        >>> outfile = FortranWriter(outfile_name, 'w', 'test file', 'test_mod')
+        >>> outfile.write_block(["if (x) then", ("y = 1", 1), "end if"], 1)
+        >>> outfile.flush()
+        >>> with open(outfile_name, 'r') as infile:
+        ...     print(infile.read().rstrip())
+           if (x) then
+              y = 1
+           end if
+        >>> outfile.__exit__()
+        False
+        >>> import os
+        >>> os.remove(outfile_name)
+        """
+        for stmt in statements:
+            if isinstance(stmt, tuple):
+                self.write(stmt[0], indent_level + stmt[1])
+            else:
+                self.write(stmt, indent_level)
+            # end if
+        # end for
+
+    ###########################################################################
+
+    def __write_line(self, statement, indent_level, continue_line):
+        """Write <statement>, which contains no newline characters, to the
+        output buffer, breaking it into continuation lines as needed."""
+        while True:
             istr = self.indent(indent_level, continue_line)
             ostmt = statement.strip()
             is_comment_stmt = ostmt and (ostmt[0] == '!')
-            in_comment = ""
             if ostmt and (ostmt[0] != '&'):
                 # Skip indent for continue that is in the middle of a
                 #    token or a quoted region
@@ -148,105 +255,69 @@ end module {module}'''
                 outstr = ostmt
             # end if
             line_len = len(outstr)
-            if line_len > self.__line_fill:
-                # Collect pretty break points
-                spaces = list()
-                commas = list()
-                sptr = len(istr)
-                in_single_char = False
-                in_double_char = False
-                while sptr < line_len:
-                    if in_single_char:
-                        if outstr[sptr] == "'":
-                            in_single_char = False
-                        # End if (no else, just copy stuff in string)
-                    elif in_double_char:
-                        if outstr[sptr] == '"':
-                            in_double_char = False
-                        # End if (no else, just copy stuff in string)
-                    elif outstr[sptr] == "'":
-                        in_single_char = True
-                    elif outstr[sptr] == '"':
-                        in_double_char = True
-                    elif outstr[sptr] == '!':
-                        # Comment in non-character context
-                        spaces.append(sptr-1)
-                        in_comment = "! " # No continue for comment
-                        if ((not is_comment_stmt) and
-                            (sptr >= self.__max_comment_start)):
-                            # suck in rest of line
-                            sptr = line_len - 1
-                        # end if
-                    elif outstr[sptr] == ' ':
-                        # Non-quote spaces are where we can break
-                        spaces.append(sptr)
-                    elif outstr[sptr] == ',':
-                        # Non-quote commas are where we can break
-                        commas.append(sptr)
-                    elif outstr[sptr:sptr+2] == '//':
-                        # Non-quote commas are where we can break
-                        commas.append(sptr + 1)
-                    # End if (no else, other characters will be ignored)
-                    sptr = sptr + 1
-                # End while
-                # Before looking for best space, reject any that are on a
-                #    comment line but before any significant characters
-                if outstr.lstrip().startswith('!'):
-                    first_space = outstr.index('!') + 1
-                    while ((outstr[first_space] == '!' or
-                            outstr[first_space] == ' ') and
-                           (first_space < line_len)):
-                        first_space += 1
-                    # end while
-                    if min(spaces) < first_space:
-                        spaces = [x for x in spaces if x >= first_space]
-                    # end if
-                best = self.find_best_break(spaces)
-                if best >= self.__line_fill:
-                    best = min(best, self.find_best_break(commas))
-                # End if
-                line_continue = False
-                if best >= self.__line_max:
-                    # This is probably a bad situation so we have to break
-                    #   in an ugly spot
-                    best = self.__line_max - 1
-                    if len(outstr) > best:
-                        line_continue = '&'
-                    # end if
+            if line_len <= self.__line_fill:
+                self.__buffer.append(f"{outstr}\n")
+                break
+            # end if
+            # Collect pretty break points
+            scan = self._scan_line(outstr, len(istr),
+                                   self.__max_comment_start, is_comment_stmt)
+            spaces, commas, quote_bounds, in_comment = scan
+            # Before looking for best space, reject any that are on a
+            #    comment line but before any significant characters
+            if outstr.lstrip().startswith('!'):
+                first_space = outstr.index('!') + 1
+                while ((outstr[first_space] == '!' or
+                        outstr[first_space] == ' ') and
+                       (first_space < line_len)):
+                    first_space += 1
+                # end while
+                if min(spaces) < first_space:
+                    spaces = [x for x in spaces if x >= first_space]
                 # end if
+            best = self.find_best_break(spaces)
+            if best >= self.__line_fill:
+                best = min(best, self.find_best_break(commas))
+            # End if
+            line_continue = False
+            if best >= self.__line_max:
+                # This is probably a bad situation so we have to break
+                #   in an ugly spot
+                best = self.__line_max - 1
                 if len(outstr) > best:
-                    if self._in_quote(outstr[0:best+1]):
-                        line_continue = '&'
-                    else:
-                        # If next line is just comment, do not use continue
-                        line_continue = outstr[best+1:].lstrip()[0] != '!'
-                    # end if
-                elif not line_continue:
-                    line_continue = len(outstr) > best
-                # End if
-                if in_comment or is_comment_stmt:
-                    line_continue = False
+                    line_continue = '&'
                 # end if
-                if line_continue:
-                    fill = "{}&".format((self.__line_fill - best)*' ')
+            # end if
+            if len(outstr) > best:
+                if self._in_quote(quote_bounds, best):
+                    line_continue = '&'
                 else:
-                    fill = ""
-                # End if
-                outline = f"{outstr[0:best+1]}{fill}".rstrip()
-                self.__file.write(f"{outline}\n")
-                if best <= 0:
-                    imsg = "Internal ERROR: Unable to break line"
-                    raise ValueError(f"{imsg}, '{statement}'")
-                # end if
-                statement = in_comment + outstr[best+1:]
-                if isinstance(line_continue, str) and statement:
-                    statement = line_continue + statement
+                    # If next line is just comment, do not use continue
+                    line_continue = outstr[best+1:].lstrip()[0] != '!'
                 # end if
-                self.write(statement, indent_level, continue_line=line_continue)
+            elif not line_continue:
+                line_continue = len(outstr) > best
+            # End if
+            if in_comment or is_comment_stmt:
+                line_continue = False
+            # end if
+            if line_continue:
+                fill = "{}&".format((self.__line_fill - best)*' ')
             else:
-                self.__file.write("{}\n".format(outstr))
+                fill = ""
             # End if
-        # End if
+            outline = f"{outstr[0:best+1]}{fill}".rstrip()
+            self.__buffer.append(f"{outline}\n")
+            if best <= 0:
+                imsg = "Internal ERROR: Unable to break line"
+                raise ValueError(f"{imsg}, '{statement}'")
+            # end if
+            statement = in_comment + outstr[best+1:]
+            if isinstance(line_continue, str) and statement:
+                statement = line_continue + statement
+            # end if
+            continue_line = line_continue
+        # end while
 
     ###########################################################################
 
@@ -265,6 +336,8 @@ end module {module}'''
             raise ValueError('Binary mode not allowed in FortranWriter object')
         # End if
         self.__file = open(filename, mode)
+        # Output lines are collected here and written by self.flush
+        self.__buffer = list()
         if indent is None:
             self.__indent = FortranWriter.__INDENT
         else:
@@ -315,11 +388,20 @@ end module {module}'''
 
     def __exit__(self, *args):
         self.write(FortranWriter.__MOD_FOOTER.format(module=self.__module), 0)
+        self.flush()
         self.__file.close()
         return False
 
     ###########################################################################
 
+    def flush(self):
+        """Write the buffered output to the file"""
+        self.__file.write(''.join(self.__buffer))
+        self.__file.flush()
+        self.__buffer = list()
+
+    ###########################################################################
+
     def module_header(self):
         """Return the standard Fortran module header for <filename> and
         <module>"""
@@ -344,9 +426,7 @@ end module {module}'''
     def include(self, filename):
         """Insert the contents of <filename> verbatim."""
         with open(filename, 'r') as infile:
-            for line in infile:
-                self.__file.write(line)
-            # end for
+            self.__buffer.append(infile.read())
         # end with
 
     ###########################################################################
@@ -39,6 +39,9 @@ _CONTAINS_RE = re.compile(r"(?i)\s*contains")
 _CONTINUE_RE = re.compile(r"(?i)&\s*(!.*)?$")
 _FIXED_CONTINUE_RE = re.compile(r"(?i)     [^0 ]")
 _BLANK_RE = re.compile(r"\s+")
+_FREE_SPECIAL_RE = re.compile(r"['\"!&]")
+_SINGLE_CHAR_SPECIAL_RE = re.compile(r"['&]")
+_DOUBLE_CHAR_SPECIAL_RE = re.compile(r'["&]')
 _ARG_TABLE_START_RE = re.compile(r"(?i)\s*![!>]\s*(?:\\section)?\s*arg_table_"+FORTRAN_ID)
 _PREFIX_SPECS = [r"(?:recursive)", r"(?:pure)", r"(?:elemental)"]
 _PREFIX_SPEC = r"(?:{})?\s*".format('|'.join(_PREFIX_SPECS))
@@ -72,6 +75,10 @@ def line_statements(line):
     >>> line_statements("!! ")
     ['!! ']
     """
+    if ';' not in line:
+        # Nothing to break up
+        return [line] if line else list()
+    # end if
     statements = list()
     ind_start = 0
     ind_end = 0
@@ -184,7 +191,7 @@ def scan_fixed_line(line, in_single_char, in_double_char, context):
     last_ind = len(line.rstrip()) - 1
     # Process the line
     while index <= last_ind:
-        blank = _BLANK_RE.match(line[index:])
+        blank = _BLANK_RE.match(line, index)
         if blank is not None:
             index = index + len(blank.group(0)) - 1 # +1 at end of loop
         elif in_single_char:
@@ -282,10 +289,19 @@ def scan_free_line(line, in_continue, in_single_char, in_double_char, context):
         index = continue_in_col + 1
     # Process rest of line
     while index <= last_ind:
-        blank = _BLANK_RE.match(line[index:])
-        if blank is not None:
-            index = index + len(blank.group(0)) - 1 # +1 at end of loop
-        elif in_single_char:
+        # Skip to the next character which may change our context
+        if in_single_char:
+            special = _SINGLE_CHAR_SPECIAL_RE.search(line, index, last_ind+1)
+        elif in_double_char:
+            special = _DOUBLE_CHAR_SPECIAL_RE.search(line, index, last_ind+1)
+        else:
+            special = _FREE_SPECIAL_RE.search(line, index, last_ind+1)
+        # End if
+        if special is None:
+            break
+        # End if
+        index = special.start()
+        if in_single_char:
             if line[index:min(index+1, last_ind)] == "''":
                 # Embedded single quote
                 index = index + 1 # +1 and end of loop
@@ -320,7 +336,7 @@ def scan_free_line(line, in_continue, in_single_char, in_double_char, context):
         elif line[index] == '&':
             # If we got here, we are not in a character context, note continue
             # First make sure this is a valid continue
-            match = _CONTINUE_RE.match(line[index:])
+            match = _CONTINUE_RE.match(line, index)
             if match is not None:
                 continue_out_col = index
             else:
@@ -340,34 +356,63 @@ def scan_free_line(line, in_continue, in_single_char, in_double_char, context):
 
 ########################################################################
 
-def read_file(filename, preproc_defs=None, logger=None):
-    """Read a file into an array of lines.
-    Preprocess lines to consolidate continuation lines.
-    Remove preprocessor directives and code eliminated by #if statements
-    Remvoved code results in blank lines, not removed lines
-    """
+def _source_lines(filename):
+    """Read <filename> one line at a time and yield a tuple for each line
+    with the line (without trailing whitespace) and the line to process.
+    A line ending with a backslash is joined with the following line(s),
+    the line to process is None for each line joined to a previous line."""
+    with open(filename, 'r') as file:
+        group = list()
+        for line in file:
+            line = line.rstrip()
+            group.append(line)
+            if not line.endswith('\\'):
+                yield group[0], ''.join([x[0:len(x)-1] for x in group[0:-1]] +
+                                        [line])
+                for joined in group[1:]:
+                    yield joined, None
+                # end for
+                group = list()
+            # end if
+        # end for
+        if group:
+            # We ran out of lines, just strip the backslash
+            yield group[0], ''.join([x[0:len(x)-1] for x in group])
+            for joined in group[1:]:
+                yield joined, None
+            # end for
+        # end if
+    # end with
+
+########################################################################
+
+def _process_lines(filename, preproc_defs, logger):
+    """Read <filename> and yield its lines with continuation lines
+    consolidated and code eliminated by #if statements removed.
+    This is done in a single pass, a line is only yielded once it
+    can no longer be modified by a following continuation line.
+    Removed and consolidated lines result in blank lines so that line
+    numbers are preserved."""
     preproc_status = PreprocStack()
-    if not os.path.exists(filename):
-        raise IOError("read_file: file, '{}', does not exist".format(filename))
-    # end if
+    context = ParseContext(filename=filename)
     # We need special rules for fixed-form source
     fixed_form = filename[-2:].lower() == '.f'
-    # Read all lines of the file at once
-    with open(filename, 'r') as file:
-        file_lines = file.readlines()
-        for index, line in enumerate(file_lines):
-            file_lines[index] = line.rstrip('\n').rstrip()
-        # End for
-    # End with
-    # create a parse object and context for this file
-    pobj = ParseObject(filename, file_lines)
+    # <buffer> holds the lines which may still be modified, starting
+    #    with line number, <buffer_start>
+    buffer = list()
+    buffer_start = 0
     continue_col = -1 # Active continue column
     in_schar = False # Single quote character context
     in_dchar = False # Double quote character context
     prev_line = None
     prev_line_num = -1
-    curr_line, curr_line_num = pobj.curr_line()
-    while curr_line is not None:
+    for curr_line_num, (line, curr_line) in enumerate(_source_lines(filename)):
+        buffer.append(line)
+        if curr_line is None:
+            # This line was joined to a previous line, keep it unchanged
+            continue
+        # end if
+        context.line_num = curr_line_num
         # Skip empty lines and comment-only lines
         skip_line = False
         if len(curr_line.strip()) == 0:
@@ -378,84 +423,107 @@ def read_file(filename, preproc_defs=None, logger=None):
         elif curr_line.lstrip()[0] == '!':
             skip_line = True
         # End if
-        if skip_line:
-            curr_line, curr_line_num = pobj.next_line()
-            continue
-        # End if
-        # Handle preproc issues
-        if preproc_status.process_line(curr_line, preproc_defs, pobj, logger):
-            pobj.write_line(curr_line_num, "")
-            curr_line, curr_line_num = pobj.next_line()
-            continue
-        # End if
-        if not preproc_status.in_true_region():
-            # Special case to allow CCPP comment statements in False
-            # regions to find DDT and module table code
-            if (curr_line[0:2] != '!!') and (curr_line[0:2] != '!>'):
-                pobj.write_line(curr_line_num, "")
-                curr_line, curr_line_num = pobj.next_line()
-                continue
-            # End if
-        # End if
-        # scan the line for properties
-        if fixed_form:
-            res = scan_fixed_line(curr_line, in_schar, in_dchar, pobj)
-            cont_in_col, in_schar, in_dchar, comment_col = res
-            continue_col = cont_in_col # No warning in fixed form
-            cont_out_col = -1
-            if (comment_col < 0) and (continue_col < 0):
-                # Real statement, grab the line # in case is continued
-                prev_line_num = curr_line_num
-                prev_line = None
+        if not skip_line:
+            # Handle preproc issues
+            if preproc_status.process_line(curr_line, preproc_defs,
+                                           context, logger):
+                buffer[-1] = ""
+                skip_line = True
+            elif not preproc_status.in_true_region():
+                # Special case to allow CCPP comment statements in False
+                # regions to find DDT and module table code
+                if (curr_line[0:2] != '!!') and (curr_line[0:2] != '!>'):
+                    buffer[-1] = ""
+                    skip_line = True
+                # End if
             # End if
-        else:
-            res = scan_free_line(curr_line, (continue_col >= 0),
-                                 in_schar, in_dchar, pobj)
-            cont_in_col, cont_out_col, in_schar, in_dchar, comment_col = res
         # End if
-        # If in a continuation context, move this line to previous
-        if continue_col >= 0:
-            if fixed_form and (prev_line is None):
-                prev_line = pobj.peek_line(prev_line_num)[0:72]
-            # End if
-            if prev_line is None:
-                raise ParseInternalError("No prev_line to continue",
-                                         context=pobj)
-            # End if
-            sindex = max(cont_in_col+1, 0)
+        if not skip_line:
+            # scan the line for properties
             if fixed_form:
-                sindex = 6
-                eindex = 72
-            elif cont_out_col > 0:
-                eindex = cont_out_col
+                res = scan_fixed_line(curr_line, in_schar, in_dchar, context)
+                cont_in_col, in_schar, in_dchar, comment_col = res
+                continue_col = cont_in_col # No warning in fixed form
+                cont_out_col = -1
+                if (comment_col < 0) and (continue_col < 0):
+                    # Real statement, grab the line # in case is continued
+                    prev_line_num = curr_line_num
+                    prev_line = None
+                # End if
             else:
-                eindex = len(curr_line)
+                res = scan_free_line(curr_line, (continue_col >= 0),
+                                     in_schar, in_dchar, context)
+                cont_in_col, cont_out_col, in_schar, in_dchar, comment_col = res
             # End if
-            prev_line = prev_line + curr_line[sindex:eindex]
-            if fixed_form:
-                prev_line = prev_line.rstrip()
+            # If in a continuation context, move this line to previous
+            if continue_col >= 0:
+                if fixed_form and (prev_line is None) and (prev_line_num >= 0):
+                    prev_line = buffer[prev_line_num - buffer_start][0:72]
+                # End if
+                if prev_line is None:
+                    raise ParseInternalError("No prev_line to continue",
+                                             context=context)
+                # End if
+                sindex = max(cont_in_col+1, 0)
+                if fixed_form:
+                    sindex = 6
+                    eindex = 72
+                elif cont_out_col > 0:
+                    eindex = cont_out_col
+                else:
+                    eindex = len(curr_line)
+                # End if
+                prev_line = prev_line + curr_line[sindex:eindex]
+                if fixed_form:
+                    prev_line = prev_line.rstrip()
+                # End if
+                # Rewrite the consolidated lines
+                buffer[prev_line_num - buffer_start] = prev_line
+                buffer[-1] = ""
+                if (not fixed_form) and (cont_out_col < 0):
+                    # We are done with this line, reset prev_line
+                    prev_line = None
+                    prev_line_num = -1
+                # End if
             # End if
-            # Rewrite the file's lines
-            pobj.write_line(prev_line_num, prev_line)
-            pobj.write_line(curr_line_num, "")
-            if (not fixed_form) and (cont_out_col < 0):
-                # We are done with this line, reset prev_line
-                prev_line = None
-                prev_line_num = -1
+            continue_col = cont_out_col
+            if (continue_col >= 0) and (prev_line is None):
+                # We need to set up prev_line as it is continued
+                prev_line = curr_line[0:continue_col]
+                if not (in_schar or in_dchar):
+                    prev_line = prev_line.rstrip()
+                # End if
+                prev_line_num = curr_line_num
             # End if
         # End if
-        continue_col = cont_out_col
-        if (continue_col >= 0) and (prev_line is None):
-            # We need to set up prev_line as it is continued
-            prev_line = curr_line[0:continue_col]
-            if not (in_schar or in_dchar):
-                prev_line = prev_line.rstrip()
-            # End if
-            prev_line_num = curr_line_num
+        # Yield the lines which can no longer be modified
+        if (prev_line_num >= 0) and (fixed_form or (prev_line is not None)):
+            keep_start = prev_line_num
+        else:
+            keep_start = curr_line_num + 1
         # End if
-        curr_line, curr_line_num = pobj.next_line()
-    # End while
-    return pobj
+        while buffer_start < keep_start:
+            yield buffer.pop(0)
+            buffer_start += 1
+        # End while
+    # End for
+    for line in buffer:
+        yield line
+    # End for
+
+########################################################################
+
+def read_file(filename, preproc_defs=None, logger=None):
+    """Return a ParseObject which reads the lines of <filename> as they
+    are needed.
+    Preprocess lines to consolidate continuation lines.
+    Remove preprocessor directives and code eliminated by #if statements
+    Remvoved code results in blank lines, not removed lines
+    """
+    if not os.path.exists(filename):
+        raise IOError("read_file: file, '{}', does not exist".format(filename))
+    # end if
+    return ParseObject(filename, _process_lines(filename, preproc_defs, logger))
 
 ########################################################################
 
@@ -882,9 +950,12 @@ def parse_program(pobj, statements, run_env):
 
 ########################################################################
 
-def parse_module(pobj, statements, run_env):
+def parse_module(pobj, statements, run_env, table_names=None):
     """Parse a Fortran MODULE and return any leftover statements
-    and metadata tables encountered in the MODULE."""
+    and metadata tables encountered in the MODULE.
+    If <table_names> is not None, stop parsing (returning None for the
+    leftover statements) once a table section has been found for each
+    name in <table_names>."""
     # The first statement should be a module statement, grab the name
     pmatch = _MODULE_RE.match(statements[0])
     if pmatch is None:
@@ -906,6 +977,10 @@ def parse_module(pobj, statements, run_env):
     active_table = None
     while inmodule and (statements is not None):
         while statements:
+            if (active_table is None) and _found_tables(mtables, table_names):
+                # We have everything we need, stop parsing
+                return None, mtables
+            # end if
             statement = statements.pop(0)
             # End module
             pmatch = _ENDMODULE_RE.match(statement)
@@ -949,8 +1024,42 @@ def parse_module(pobj, statements, run_env):
 
 ########################################################################
 
-def parse_fortran_file(filename, run_env):
-    """Parse a Fortran file and return all metadata tables found."""
+def _table_titles(mtables):
+    """Return the set of the titles of all the sections of <mtables>"""
+    return set([x.title for tbl in mtables for x in tbl.sections()])
+
+########################################################################
+
+def _found_tables(mtables, table_names):
+    """Return True if <table_names> is not None and every name in
+    <table_names> is the title of a section of one of <mtables>."""
+    if table_names is None:
+        return False
+    # end if
+    found = _table_titles(mtables)
+    return all([x in found for x in table_names])
+
+########################################################################
+
+def _arg_table_after(filename, line_num):
+    """Return True if any line of <filename>, starting with <line_num>,
+    may start a metadata table. This is a quick check of the raw lines."""
+    with open(filename, 'r') as file:
+        for index, line in enumerate(file):
+            if (index >= line_num) and _ARG_TABLE_START_RE.search(line):
+                return True
+            # end if
+        # end for
+    # end with
+    return False
+
+########################################################################
+
+def parse_fortran_file(filename, run_env, table_names=None):
+    """Parse a Fortran file and return all metadata tables found.
+    If <table_names> is not None, stop parsing once a table section has
+    been found for each name in <table_names>, unless the rest of the
+    file may contain more metadata tables."""
     mtables = list()
     pobj = read_file(filename, preproc_defs=run_env.preproc_defs,
                      logger=run_env.logger)
@@ -970,9 +1079,23 @@ def parse_fortran_file(filename, run_env):
         elif _MODULE_RE.match(statement) is not None:
             # push statement back so parse_module can use it
             statements.insert(0, statement)
-            statements, ptables = parse_module(pobj, statements, run_env)
+            if table_names is None:
+                needed = None
+            else:
+                found = _table_titles(mtables)
+                needed = [x for x in table_names if x not in found]
+            # end if
+            statements, ptables = parse_module(pobj, statements, run_env,
+                                               table_names=needed)
             mtables.extend(ptables)
         # End if
+        if _found_tables(mtables, table_names):
+            # Stop here unless there might be more tables to check
+            if _arg_table_after(filename, pobj.line_num):
+                return parse_fortran_file(filename, run_env)
+            # end if
+            break
+        # End if
         if (statements is not None) and (len(statements) == 0):
             statements = read_statements(pobj)
         # End if
@@ -11,6 +11,7 @@ Framework runtime information and parameter values.
 import argparse
 import os
 from parse_tools import verbose
+from phase_timer import PhaseTimer
 
 _EPILOG = '''
 '''
@@ -26,7 +27,11 @@ class CCPPFrameworkEnv:
                  preproc_directives=[], generate_docfiles=False, host_name='',
                  kind_types=[], use_error_obj=False, force_overwrite=False,
                  output_root=os.getcwd(), ccpp_datafile="datatable.xml",
-                 debug=False):
+                 debug=False, metadata_cache_dir=None, incremental=False,
+                 jobs=1, profile=False, timing_report=None,
+                 datatable_database=None, fuse_var_transforms=False,
+                 persistent_transform_buffers=False, scheme_timers=False,
+                 run_chunk_size=0, array_arg_report=False):
         """Initialize a new CCPPFrameworkEnv object from the input arguments.
         <ndict> is a dict with the parsed command-line arguments (or a
            dictionary created with the necessary arguments).
@@ -199,6 +204,20 @@ class CCPPFrameworkEnv:
             self.__datatable_file = os.path.join(self.output_dir,
                                                  self.datatable_file)
         # end if
+        # Optional SQLite copy of the datatable (None for no database)
+        if ndict and ('datatable_database' in ndict):
+            self.__datatable_database = ndict['datatable_database']
+            del ndict['datatable_database']
+        else:
+            self.__datatable_database = datatable_database
+        # end if
+        if self.__datatable_database:
+            self.__datatable_database = os.path.normpath(self.__datatable_database)
+            if not os.path.isabs(self.__datatable_database):
+                self.__datatable_database = os.path.join(self.output_dir,
+                                                         self.__datatable_database)
+            # end if
+        # end if
         # Enable or disable variable allocation checks
         if ndict and ('debug' in ndict):
             self.__debug = ndict['debug']
@@ -206,6 +225,89 @@ class CCPPFrameworkEnv:
         else:
             self.__debug = debug
         # end if
+        # Fuse the variable transforms for each scheme call into loop nests?
+        if ndict and ('fuse_var_transforms' in ndict):
+            self.__fuse_var_transforms = ndict['fuse_var_transforms']
+            del ndict['fuse_var_transforms']
+        else:
+            self.__fuse_var_transforms = fuse_var_transforms
+        # end if
+        # Keep the run phase variable transform arrays for the entire run?
+        if ndict and ('persistent_transform_buffers' in ndict):
+            self.__persistent_transform_buffers = ndict['persistent_transform_buffers']
+            del ndict['persistent_transform_buffers']
+        else:
+            self.__persistent_transform_buffers = persistent_transform_buffers
+        # end if
+        # Write a report of the array arguments of the generated calls?
+        if ndict and ('array_arg_report' in ndict):
+            self.__array_arg_report = ndict['array_arg_report']
+            del ndict['array_arg_report']
+        else:
+            self.__array_arg_report = array_arg_report
+        # end if
+        # Add timers and call counters to the generated suite caps?
+        if ndict and ('scheme_timers' in ndict):
+            self.__scheme_timers = ndict['scheme_timers']
+            del ndict['scheme_timers']
+        else:
+            self.__scheme_timers = scheme_timers
+        # end if
+        # Column block size for the threaded run group drivers (0 for none)
+        if ndict and ('run_chunk_size' in ndict):
+            self.__run_chunk_size = ndict['run_chunk_size']
+            del ndict['run_chunk_size']
+        else:
+            self.__run_chunk_size = run_chunk_size
+        # end if
+        if self.__run_chunk_size < 0:
+            emsg += esep + "Error: 'run_chunk_size' cannot be negative"
+            esep = '\n'
+        # end if
+        # Directory for cached parsed metadata (None disables the cache)
+        if ndict and ('metadata_cache_dir' in ndict):
+            self.__metadata_cache_dir = ndict['metadata_cache_dir']
+            del ndict['metadata_cache_dir']
+        else:
+            self.__metadata_cache_dir = metadata_cache_dir
+        # end if
+        if self.__metadata_cache_dir:
+            self.__metadata_cache_dir = os.path.abspath(self.__metadata_cache_dir)
+        # end if
+        # Only regenerate files whose inputs have changed?
+        if ndict and ('incremental' in ndict):
+            self.__incremental = ndict['incremental']
+            del ndict['incremental']
+        else:
+            self.__incremental = incremental
+        # end if
+        # Number of worker processes to use for parallel tasks
+        if ndict and ('jobs' in ndict):
+            self.__jobs = ndict['jobs']
+            del ndict['jobs']
+        else:
+            self.__jobs = jobs
+        # end if
+        if self.__jobs < 1:
+            emsg += esep + "Error: 'jobs' must be at least one"
+            esep = '\n'
+        # end if
+        # Log a timing summary at the end of the run?
+        if ndict and ('profile' in ndict):
+            self.__profile = ndict['profile']
+            del ndict['profile']
+        else:
+            self.__profile = profile
+        # end if
+        # File for a JSON timing report (None for no report)
+        if ndict and ('timing_report' in ndict):
+            self.__timing_report = ndict['timing_report']
+            del ndict['timing_report']
+        else:
+            self.__timing_report = timing_report
+        # end if
+        self.__phase_timer = PhaseTimer(enabled=(self.__profile or
+                                                 bool(self.__timing_report)))
         self.__logger = logger
         ## Check to see if anything is left in dictionary
         if ndict:
@@ -319,12 +421,81 @@ CCPPFrameworkEnv object."""
         CCPPFrameworkEnv object."""
         return self.__datatable_file
 
+    @property
+    def datatable_database(self):
+        """Return the <datatable_database> property for this
+        CCPPFrameworkEnv object."""
+        return self.__datatable_database
+
     @property
     def debug(self):
         """Return the <debug> property for this
         CCPPFrameworkEnv object."""
         return self.__debug
 
+    @property
+    def fuse_var_transforms(self):
+        """Return the <fuse_var_transforms> property for this
+        CCPPFrameworkEnv object."""
+        return self.__fuse_var_transforms
+
+    @property
+    def persistent_transform_buffers(self):
+        """Return the <persistent_transform_buffers> property for this
+        CCPPFrameworkEnv object."""
+        return self.__persistent_transform_buffers
+
+    @property
+    def array_arg_report(self):
+        """Return the <array_arg_report> property for this
+        CCPPFrameworkEnv object."""
+        return self.__array_arg_report
+
+    @property
+    def scheme_timers(self):
+        """Return the <scheme_timers> property for this
+        CCPPFrameworkEnv object."""
+        return self.__scheme_timers
+
+    @property
+    def run_chunk_size(self):
+        """Return the <run_chunk_size> property for this
+        CCPPFrameworkEnv object."""
+        return self.__run_chunk_size
+
+    @property
+    def metadata_cache_dir(self):
+        """Return the <metadata_cache_dir> property for this
+        CCPPFrameworkEnv object."""
+        return self.__metadata_cache_dir
+
+    @property
+    def incremental(self):
+        """Return the <incremental> property for this
+        CCPPFrameworkEnv object."""
+        return self.__incremental
+
+    @property
+    def jobs(self):
+        """Return the <jobs> property for this CCPPFrameworkEnv object."""
+        return self.__jobs
+
+    @property
+    def profile(self):
+        """Return the <profile> property for this CCPPFrameworkEnv object."""
+        return self.__profile
+
+    @property
+    def timing_report(self):
+        """Return the <timing_report> property for this
+        CCPPFrameworkEnv object."""
+        return self.__timing_report
+
+    @property
+    def phase_timer(self):
+        """Return the PhaseTimer object for this CCPPFrameworkEnv object."""
+        return self.__phase_timer
+
     @property
     def logger(self):
         """Return the <logger> property for this CCPPFrameworkEnv object."""
@@ -368,6 +539,11 @@ Other filenames are treated as containing a list of .xml filenames""")
                         default="datatable.xml",
                         help="Filename for information on content generated by the CCPP Framework")
 
+    parser.add_argument("--datatable-database", type=str, default=None,
+                        metavar='<data table database filename>',
+                        help="""Also write the data table to this SQLite
+database file, which ccpp_datafile.py reports can read directly""")
+
     parser.add_argument("--output-root", type=str,
                         metavar='<directory for generated files>',
                         default=os.getcwd(),
@@ -403,6 +579,59 @@ if unmodified""")
     parser.add_argument("--debug", action='store_true', default=False,
                         help="Add variable allocation checks to assist debugging")
 
+    parser.add_argument("--fuse-var-transforms", action='store_true',
+                        default=False,
+                        help="""Compute the unit and kind transforms of the
+array variables of each scheme call in a single loop nest""")
+
+    parser.add_argument("--persistent-transform-buffers", action='store_true',
+                        default=False,
+                        help="""Allocate the arrays used by run phase variable
+transforms once, when the suite is initialized, and free them when the
+suite is finalized. The horizontal dimension of each buffer is its last
+dimension so that the columns used by a group call are contiguous""")
+
+    parser.add_argument("--array-arg-report", action='store_true',
+                        default=False,
+                        help="""Write a report for each suite which classifies
+the array arguments of the generated calls as contiguous, strided, or
+requiring a temporary copy""")
+
+    parser.add_argument("--scheme-timers", action='store_true', default=False,
+                        help="""Time and count the calls of each group,
+subcycle and scheme in the generated suite caps. Each suite cap gets
+routines to return, print, or reset its timing table""")
+
+    parser.add_argument("--run-chunk-size", type=int, default=0, metavar='N',
+                        help="""Add a driver for each run phase group which
+calls the group over blocks of up to N columns in an OpenMP parallel loop.
+The generated host cap calls these drivers with a block size of N.
+The default (0) does not create the drivers""")
+
+    parser.add_argument("--metadata-cache-dir", type=str, default=None,
+                        metavar='<metadata cache directory>',
+                        help="""Directory for storing parsed metadata files.
+Unchanged metadata files are restored from this cache instead of
+being parsed again""")
+
+    parser.add_argument("--incremental", action='store_true', default=False,
+                        help="""Skip regenerating files whose inputs have
+not changed since the last run""")
+
+    parser.add_argument("--jobs", type=int, default=1, metavar='N',
+                        help="""Number of worker processes to use for parsing
+and writing caps""")
+
+    parser.add_argument("--profile", action='store_true', default=False,
+                        help="""Log the wall time, CPU time, and peak memory
+of each phase of the run. Tracing the memory use slows down the run.""")
+
+    parser.add_argument("--timing-report", type=str, default=None,
+                        metavar='<timing report filename>',
+                        help="""Write the wall time, CPU time, and peak
+memory of each phase of the run to this file (JSON format). Tracing the
+memory use slows down the run.""")
+
     parser.add_argument("--verbose", action='count', default=0,
                         help="Log more activity, repeat for increased output")
 
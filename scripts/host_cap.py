@@ -8,6 +8,8 @@ Parse a host-model registry XML file and return the captured variables.
 import logging
 import os
 # CCPP framework imports
+from array_contiguity import ArrayArgReport, subscript_kind
+from array_contiguity import combine_contiguity, CONTIGUOUS
 from ccpp_suite import API, API_SOURCE_NAME
 from ccpp_state_machine import CCPP_STATE_MACH
 from constituents import ConstituentVarDict, CONST_DDT_NAME, CONST_DDT_MOD
@@ -21,6 +23,7 @@ from metavar import CCPP_LOOP_VAR_STDNAMES
 from fortran_tools import FortranWriter
 from parse_tools import CCPPError
 from parse_tools import ParseObject, ParseSource, ParseContext
+from var_props import CCPP_LOOP_DIM_SUBSTS
 
 ###############################################################################
 _HEADER = "cap for {host_model} calls to CCPP API"
@@ -376,10 +379,43 @@ def add_constituent_vars(cap, host_model, suite_list, run_env):
     return const_dict
 
 ###############################################################################
-def suite_part_call_list(host_model, const_dict, suite_part, subst_loop_vars):
+def host_subscript_kinds(hvar, loop_vars):
+###############################################################################
+    """Return the kinds of the subscripts (see array_contiguity) of the
+    actual argument for the host variable, <hvar> (see Var.call_string).
+    <loop_vars> is the host model dictionary used for loop substitutions
+    or None."""
+    dims = hvar.get_dimensions()
+    aref = hvar.array_ref()
+    if aref is not None:
+        subscripts = [x.strip() for x in aref.group(2).split(',')]
+    else:
+        subscripts = [':']*len(dims)
+    # end if
+    kinds = list()
+    dims = iter(dims)
+    for subscript in subscripts:
+        if subscript == ':':
+            dim = next(dims)
+            if loop_vars and (loop_vars.find_loop_dim_match(dim) is not None):
+                subscript = CCPP_LOOP_DIM_SUBSTS[dim]
+            # end if
+            kinds.append(subscript_kind(subscript, dim))
+        else:
+            kinds.append(subscript_kind(subscript, None))
+        # end if
+    # end for
+    return kinds
+
+###############################################################################
+def suite_part_call_list(host_model, const_dict, suite_part, subst_loop_vars,
+                         array_args=None):
 ###############################################################################
     """Return the <host_model> controlled call list for <suite_part>.
-    <const_dict> is the constituent dictionary"""
+    <const_dict> is the constituent dictionary
+    If <array_args> is a list, append a tuple, (standard name, dummy name,
+    actual argument, class of the actual argument), for each array
+    argument (see array_contiguity)."""
     spart_args = suite_part.call_list.variable_list(loop_vars=subst_loop_vars)
     hmvars = list() # Host model to spart dummy args
     if subst_loop_vars:
@@ -406,10 +442,54 @@ def suite_part_call_list(host_model, const_dict, suite_part, subst_loop_vars):
         if stdname not in CCPP_CONSTANT_VARS:
             lname = var_dict.var_call_string(hvar, loop_vars=loop_vars)
             hmvars.append("{}={}".format(sp_lname, lname))
+            if (array_args is not None) and sp_var.get_dimensions():
+                # Host model variables are contiguous arrays
+                kinds = host_subscript_kinds(hvar, loop_vars)
+                array_args.append((stdname, sp_lname, lname,
+                                   combine_contiguity(CONTIGUOUS, kinds)))
+            # end if
         # End if
     # End for
     return ', '.join(hmvars)
 
+###############################################################################
+def add_array_args(report, caller, suite_part, host_args):
+###############################################################################
+    """Add the array arguments of the call of <suite_part> by <caller>,
+    <host_args> (see suite_part_call_list), and of the calls made by
+    <suite_part> to <report>."""
+    # Group dummy arguments are assumed-shape
+    callee = spart_call_name(suite_part)
+    dummy_contiguity = dict()
+    for stdname, dummy, actual, contiguity in host_args:
+        report.add_argument(caller, callee, dummy, actual, contiguity, True)
+        dummy_contiguity[stdname] = contiguity
+    # end for
+    if suite_part.chunked_driver_name:
+        chunk_args = suite_part.chunked_array_args(dummy_contiguity)
+        for stdname, dummy, actual, contiguity in chunk_args:
+            report.add_argument(callee, suite_part.name, dummy, actual,
+                                contiguity, True)
+            dummy_contiguity[stdname] = contiguity
+        # end for
+    # end if
+    # Scheme dummy arguments may have explicit shape
+    for subname, dummy, actual, contiguity, assumed_shape in \
+        suite_part.array_args(suite_part, dummy_contiguity):
+        report.add_argument(suite_part.name, subname, dummy, actual,
+                            contiguity, assumed_shape)
+    # end for
+
+###############################################################################
+def spart_call_name(suite_part):
+###############################################################################
+    """Return the name of the routine which the host cap calls for
+    <suite_part>, its threaded driver if it has one."""
+    if suite_part.chunked_driver_name:
+        return suite_part.chunked_driver_name
+    # end if
+    return suite_part.name
+
 ###############################################################################
 def write_host_cap(host_model, api, module_name, output_dir, run_env):
 ###############################################################################
@@ -475,6 +555,11 @@ def write_host_cap(host_model, api, module_name, output_dir, run_env):
         cap.write("! Private module variables", 1)
         const_dict = add_constituent_vars(cap, host_model, api.suites, run_env)
         cap.end_module_header()
+        if run_env.array_arg_report:
+            reports = {x.name : ArrayArgReport(x.name) for x in api.suites}
+        else:
+            reports = None
+        # end if
         for stage in CCPP_STATE_MACH.transitions():
             # Create a dict of local variables for stage
             host_local_vars = VarDictionary(f"{host_model.name}_{stage}",
@@ -523,6 +608,7 @@ def write_host_cap(host_model, api, module_name, output_dir, run_env):
             # End for
             lnames = [x.get_prop_value('local_name') for x in apivars + hdvars]
             api_vlist = ", ".join(lnames)
+            subname = f"{host_model.name}_ccpp_physics_{stage}"
             cap.write(_SUBHEAD.format(api_vars=api_vlist,
                                       host_model=host_model.name,
                                       stage=stage), 1)
@@ -532,7 +618,8 @@ def write_host_cap(host_model, api, module_name, output_dir, run_env):
                 spart_list = suite_part_list(suite, stage)
                 for spart in spart_list:
                     stmt = "use {}, {}only: {}"
-                    cap.write(stmt.format(suite.module, mspc, spart.name), 2)
+                    cap.write(stmt.format(suite.module, mspc,
+                                          spart_call_name(spart)), 2)
                 # End for
             # End for
             # Write out any host model DDT input var use statements
@@ -567,9 +654,20 @@ def write_host_cap(host_model, api, module_name, output_dir, run_env):
                         pname = spart.name[len(suite.name)+1:]
                         stmt = "{}if (trim(suite_part) == '{}') then"
                         cap.write(stmt.format(el2_str, pname), 3)
+                        host_args = list() if reports else None
                         call_str = suite_part_call_list(host_model, const_dict,
-                                                        spart, True)
-                        cap.write("call {}({})".format(spart.name, call_str), 4)
+                                                        spart, True,
+                                                        array_args=host_args)
+                        if reports:
+                            add_array_args(reports[suite.name], subname,
+                                           spart, host_args)
+                        # end if
+                        if spart.chunked_driver_name:
+                            call_str = "chunk_size={}, {}".format(run_env.run_chunk_size,
+                                                                 call_str)
+                        # end if
+                        cap.write("call {}({})".format(spart_call_name(spart),
+                                                       call_str), 4)
                         el2_str = 'else '
                     # End for
                     cap.write("else", 3)
@@ -582,8 +680,14 @@ def write_host_cap(host_model, api, module_name, output_dir, run_env):
                     cap.write("end if", 3)
                 else:
                     spart = suite.phase_group(stage)
+                    host_args = list() if reports else None
                     call_str = suite_part_call_list(host_model, const_dict,
-                                                    spart, False)
+                                                    spart, False,
+                                                    array_args=host_args)
+                    if reports:
+                        add_array_args(reports[suite.name], subname,
+                                       spart, host_args)
+                    # end if
                     stmt = "call {}_{}({})"
                     cap.write(stmt.format(suite.name, stage, call_str), 3)
                 # End if
@@ -619,6 +723,17 @@ def write_host_cap(host_model, api, module_name, output_dir, run_env):
                                                const_index_func,
                                                api.suites, err_vars)
     # End with
+    if reports:
+        for suite_name, report in reports.items():
+            report_filename = os.path.join(output_dir,
+                                           f"{suite_name}_array_args.txt")
+            report.write(report_filename)
+            if run_env.logger is not None:
+                msg = 'Writing array argument report for {} to {}'
+                run_env.logger.info(msg.format(suite_name, report_filename))
+            # End if
+        # End for
+    # End if
     return cap_filename
 
 ###############################################################################
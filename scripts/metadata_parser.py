@@ -68,6 +68,18 @@ NEW_METADATA_SAVE = {}
 
 ###############################################################################
 
+def enable_metadata_cache(cache_dir):
+    """Save the parsed metadata files in cache_dir so that later runs can reuse
+    them as long as the files do not change (see metadata_table.parse_metadata_file).
+    This extends NEW_METADATA_SAVE, which is only kept for the current process."""
+    global _DUMMY_RUN_ENV
+    _DUMMY_RUN_ENV = CCPPFrameworkEnv(_API_LOGGING, ndict={'host_files':'',
+                                                           'scheme_files':'',
+                                                           'suites':'',
+                                                           'metadata_cache_dir':cache_dir})
+
+###############################################################################
+
 def merge_dictionaries(x, y):
     """Merges two metadata dictionaries. For each list of elements
     (variables = class Var in mkcap.py) in one dictionary, we know
@@ -125,9 +125,14 @@ Notes on the input format:
 
 # Python library imports
 import difflib
+import glob
+import hashlib
+import json
 import logging
+import os
 import os.path
 import re
+import tempfile
 # CCPP framework imports
 from ccpp_state_machine  import CCPP_STATE_MACH
 from metavar     import Var, VarDictionary, CCPP_CONSTANT_VARS
@@ -148,6 +153,11 @@ UNKNOWN_PROCESS_TYPE = 'UNKNOWN'
 
 _BLANK_LINE = re.compile(r"\s*[#;]")
 
+# Version of the metadata cache file layout, update when the layout changes
+_METADATA_CACHE_FORMAT = 1
+# Digest of the framework source which determines metadata parsing results
+_FRAMEWORK_SIGNATURE = None
+
 def blank_metadata_line(line):
     """Return True if <line> is a valid config format blank or comment
     line. Also return True if we have reached the end of the file
@@ -179,8 +189,148 @@ def _parse_config_line(line, context):
 
 ########################################################################
 
+def _framework_signature():
+    """Return a digest of the CCPP Framework source files which are used
+    to parse metadata files. Any change to these files invalidates all
+    cached metadata."""
+    global _FRAMEWORK_SIGNATURE
+    if _FRAMEWORK_SIGNATURE is None:
+        scripts_dir = os.path.dirname(os.path.abspath(__file__))
+        src_files = [os.path.join(scripts_dir, x) for x in
+                     ['metadata_table.py', 'metavar.py', 'var_props.py',
+                      'ccpp_state_machine.py', 'state_machine.py']]
+        src_files.extend(sorted(glob.glob(os.path.join(scripts_dir,
+                                                       'parse_tools', '*.py'))))
+        hasher = hashlib.sha256()
+        hasher.update(str(_METADATA_CACHE_FORMAT).encode('utf-8'))
+        for src_file in src_files:
+            with open(src_file, 'rb') as sfile:
+                hasher.update(sfile.read())
+            # end with
+        # end for
+        _FRAMEWORK_SIGNATURE = hasher.hexdigest()
+    # end if
+    return _FRAMEWORK_SIGNATURE
+
+########################################################################
+
+def _metadata_cache_file(filename, run_env):
+    """Return the name of the metadata cache file for <filename>.
+    The name is a digest of the contents of <filename>, the framework
+    source, and the <run_env> settings which affect parsing."""
+    hasher = hashlib.sha256()
+    hasher.update(_framework_signature().encode('utf-8'))
+    kinds = sorted((x, run_env.kind_spec(x)) for x in run_env.kind_types())
+    pdefs = sorted(run_env.preproc_defs.items())
+    hasher.update(repr((kinds, pdefs)).encode('utf-8'))
+    with open(filename, 'rb') as infile:
+        hasher.update(infile.read())
+    # end with
+    return os.path.join(run_env.metadata_cache_dir,
+                        hasher.hexdigest() + '.json')
+
+########################################################################
+
+def _read_metadata_cache(cache_file, filename, known_ddts, run_env):
+    """Return the list of metadata tables stored in <cache_file> or None if
+    there is no usable cache entry.
+    The entry is only usable if every DDT type which it uses but does not
+    define is in <known_ddts>."""
+    try:
+        with open(cache_file, 'r') as cfile:
+            cache_data = json.load(cfile)
+        # end with
+    except (OSError, ValueError):
+        return None
+    # end try
+    if any(x not in known_ddts for x in cache_data['external_ddts']):
+        return None
+    # end if
+    if run_env.verbose:
+        run_env.logger.info(f"Using cached metadata for {filename}")
+    # end if
+    return restore_metadata_tables(filename, cache_data['tables'],
+                                   known_ddts, run_env)
+
+########################################################################
+
+def restore_metadata_tables(filename, tables_data, known_ddts, run_env):
+    """Return the list of metadata tables described by <tables_data>, a
+    list of dictionaries created by MetadataTable.cache_data for the
+    tables parsed from <filename>.
+    <known_ddts> is updated as if <filename> was parsed."""
+    meta_tables = []
+    for tdata in tables_data:
+        tdata['filename'] = filename
+        new_table = MetadataTable(run_env, known_ddts=known_ddts,
+                                  cache_data=tdata)
+        meta_tables.append(new_table)
+        if new_table.table_type == 'ddt':
+            known_ddts.append(new_table.table_name)
+        # end if
+    # end for
+    return meta_tables
+
+########################################################################
+
+def _write_metadata_cache(cache_file, meta_tables, run_env):
+    """Store <meta_tables> in <cache_file>.
+    The file is written in place atomically so that concurrent runs never
+    see a partial entry."""
+    external_ddts = []
+    file_ddts = set()
+    for table in meta_tables:
+        for section in table.sections():
+            for var in section.variable_list():
+                vtype = var.get_prop_value('type')
+                if var.is_ddt() and (vtype not in file_ddts):
+                    if vtype not in external_ddts:
+                        external_ddts.append(vtype)
+                    # end if
+                # end if
+            # end for
+            if section.header_type == 'ddt':
+                file_ddts.add(section.title)
+            # end if
+        # end for
+        if table.table_type == 'ddt':
+            file_ddts.add(table.table_name)
+        # end if
+    # end for
+    cache_data = {'external_ddts' : external_ddts,
+                  'tables' : [x.cache_data() for x in meta_tables]}
+    cache_dir = os.path.dirname(cache_file)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', dir=cache_dir, suffix='.tmp',
+                                         delete=False) as cfile:
+            json.dump(cache_data, cfile, separators=(',', ':'))
+        # end with
+        os.replace(cfile.name, cache_file)
+    except OSError as oerr:
+        # A failure to cache is not fatal
+        if run_env.logger is not None:
+            run_env.logger.warning(f"Unable to write {cache_file}: {oerr}")
+        # end if
+    # end try
+
+########################################################################
+
 def parse_metadata_file(filename, known_ddts, run_env):
-    """Parse <filename> and return list of parsed metadata tables"""
+    """Parse <filename> and return list of parsed metadata tables
+    If <run_env> has a metadata cache directory, the tables are restored
+    from the cache if <filename> has not changed since it was last parsed.
+    """
+    if run_env.metadata_cache_dir:
+        cache_file = _metadata_cache_file(filename, run_env)
+        meta_tables = _read_metadata_cache(cache_file, filename,
+                                           known_ddts, run_env)
+        if meta_tables is not None:
+            return meta_tables
+        # end if
+    else:
+        cache_file = None
+    # end if
     # Read all lines of the file at once
     meta_tables = []
     table_titles = [] # Keep track of names in file
@@ -217,6 +367,9 @@ def parse_metadata_file(filename, known_ddts, run_env):
                                    context=parse_obj)
         # end if
     # end while
+    if cache_file:
+        _write_metadata_cache(cache_file, meta_tables, run_env)
+    # end if
     return meta_tables
 
 ########################################################################
@@ -271,21 +424,29 @@ class MetadataTable():
 
     def __init__(self, run_env, table_name_in=None, table_type_in=None,
                  dependencies=None, relative_path=None, known_ddts=None,
-                 var_dict=None, module=None, parse_object=None):
+                 var_dict=None, module=None, parse_object=None,
+                 cache_data=None):
         """Initialize a MetadataTable, either with a name, <table_name_in>, and
-        type, <table_type_in>, or with information from a file (<parse_object>).
+        type, <table_type_in>, with information from a file (<parse_object>),
+        or with information from a previously parsed file (<cache_data>).
         if <parse_object> is None, <dependencies> and <relative_path> are
           also stored.
         If <var_dict> and / or module are passed (not allowed with
           <parse_object), then a single MetadataSection is added with
           that information.
+        <cache_data> is a dictionary created by the cache_data method.
         """
         self.__pobj = parse_object
         self.__dependencies = dependencies
         self.__relative_path = relative_path
         self.__sections = []
         self.__run_env = run_env
-        if parse_object is None:
+        if cache_data is not None:
+            if known_ddts is None:
+                known_ddts = []
+            # end if
+            self.__init_from_cache(cache_data, known_ddts, run_env)
+        elif parse_object is None:
             if table_name_in is not None:
                 self.__table_name = table_name_in
             else:
@@ -443,6 +604,36 @@ class MetadataTable():
             self.__dependencies = []
         # end if
 
+    def __init_from_cache(self, cache_data, known_ddts, run_env):
+        """Restore this table from <cache_data> without reparsing or
+        rechecking its contents."""
+        filename = cache_data['filename']
+        self.__table_name = cache_data['name']
+        self.__table_type = cache_data['type']
+        self.__dependencies = cache_data['dependencies']
+        self.__relative_path = cache_data['relative_path']
+        self.__start_context = ParseContext(linenum=cache_data['line'],
+                                            filename=filename)
+        for sdata in cache_data['sections']:
+            sdata['filename'] = filename
+            section = MetadataSection(self.table_name, self.table_type,
+                                      run_env, known_ddts=known_ddts,
+                                      cache_data=sdata)
+            self.__sections.append(section)
+        # end for
+        if self.table_type == "ddt":
+            known_ddts.append(self.table_name)
+        # end if
+
+    def cache_data(self):
+        """Return a dictionary with the information needed to restore
+        this table (see __init_from_cache)."""
+        return {'name' : self.table_name, 'type' : self.table_type,
+                'dependencies' : self.dependencies,
+                'relative_path' : self.relative_path,
+                'line' : self.__start_context.line_num,
+                'sections' : [x.cache_data() for x in self.__sections]}
+
     def start_context(self, with_comma=True, nodir=True):
         """Return a context string for the beginning of the table"""
         return context_string(self.__start_context,
@@ -623,13 +814,15 @@ class MetadataSection(ParseSource):
 
     def __init__(self, table_name, table_type, run_env, parse_object=None,
                  title=None, type_in=None, module=None, process_type=None,
-                 var_dict=None, known_ddts=None):
+                 var_dict=None, known_ddts=None, cache_data=None):
         """Initialize a new MetadataSection object.
         If <parse_object> is not None, initialize from the current file and
         location in <parse_object>.
-        If <parse_object> is None, initialize from <title>, <type>, <module>,
-        and <var_dict>. Note that if <parse_object> is not None, <title>,
-        <type>, <module>, and <var_dict> are ignored.
+        If <cache_data> is not None, initialize from a section previously
+        parsed from a file (see the cache_data method).
+        If <parse_object> and <cache_data> are None, initialize from <title>,
+        <type>, <module>, and <var_dict>. Note that if <parse_object> is not
+        None, <title>, <type>, <module>, and <var_dict> are ignored.
         <table_name> and <table_type> are the name and type of the
         metadata header of which this section is a part. They must match
         the type and name of this section (once the name action has been
@@ -643,7 +836,14 @@ class MetadataSection(ParseSource):
         self.__process_type = UNKNOWN_PROCESS_TYPE
         self.__section_valid = True
         self.__run_env = run_env
-        if parse_object is None:
+        # Dummy arrays declared assumed-shape in the Fortran routine
+        self.__assumed_shape_args = set()
+        if cache_data is not None:
+            if known_ddts is None:
+                known_ddts = []
+            # end if
+            self.__init_from_cache(cache_data, known_ddts, run_env)
+        elif parse_object is None:
             if title is not None:
                 self.__section_title = title
             else:
@@ -828,6 +1028,40 @@ class MetadataSection(ParseSource):
             # end if
         # end while
 
+    def __init_from_cache(self, cache_data, known_ddts, run_env):
+        """Restore this section from <cache_data>. The variable properties
+        were checked when the section was parsed so they are not checked
+        again."""
+        filename = cache_data['filename']
+        self.__section_title = cache_data['title']
+        self.__header_type = cache_data['type']
+        self.__module_name = cache_data['module']
+        self.__process_type = cache_data['process']
+        self.__start_context = ParseContext(linenum=cache_data['line'],
+                                            filename=filename)
+        if self.header_type == "ddt":
+            known_ddts.append(self.title)
+        # end if
+        #  Initialize our ParseSource parent
+        super().__init__(self.title, self.header_type, self.__start_context)
+        self.__variables = VarDictionary(self.title, run_env)
+        for linenum, var_props in cache_data['variables']:
+            context = ParseContext(linenum=linenum, filename=filename)
+            newvar = Var(var_props, self, run_env, context=context,
+                         validate=False)
+            self.__variables.add_variable(newvar, run_env)
+        # end for
+
+    def cache_data(self):
+        """Return a dictionary with the information needed to restore
+        this section (see __init_from_cache)."""
+        variables = [[x.context.line_num, x.copy_prop_dict()]
+                     for x in self.variable_list()]
+        return {'title' : self.title, 'type' : self.header_type,
+                'module' : self.module, 'process' : self.process_type,
+                'line' : self.__start_context.line_num,
+                'variables' : variables}
+
     def parse_variable(self, curr_line, known_ddts):
         """Parse a new metadata variable beginning on <curr_line>.
         The header line has the format [ <valid_fortran_symbol> ].
@@ -1282,6 +1516,23 @@ class MetadataSection(ParseSource):
         """Convenience function for finding empty headers"""
         return self.__variables
 
+    def add_assumed_shape_arg(self, local_name):
+        """Record that dummy argument, <local_name>, is declared as an
+        assumed-shape array in the Fortran routine of this section"""
+        self.__assumed_shape_args.add(local_name.lower())
+
+    def is_assumed_shape_arg(self, local_name):
+        """Return True if dummy argument, <local_name>, is known to be
+        declared as an assumed-shape array in the Fortran routine of this
+        section (see add_assumed_shape_arg)"""
+        return local_name.lower() in self.__assumed_shape_args
+
+    @property
+    def assumed_shape_args(self):
+        """Return a sorted list of the dummy arguments recorded as
+        assumed-shape arrays (see add_assumed_shape_arg)"""
+        return sorted(self.__assumed_shape_args)
+
     @property
     def run_env(self):
         """Return this section's CCPPFrameworkEnv object"""
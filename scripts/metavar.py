@@ -12,6 +12,7 @@ VarDictionary: Class to hold all CCPP variables of a CCPP unit (e.g., suite,
 
 # Python library imports
 import re
+import sys
 from collections import OrderedDict
 # CCPP framework imports
 from framework_env import CCPPFrameworkEnv
@@ -259,8 +260,17 @@ class Var:
     __var_propdict.update({p.name : p for p in __constituent_props})
     # All constituent props are optional so no check
 
+    # Canonical (shared) string object for each property name
+    __prop_keys = {sys.intern(p) : sys.intern(p) for p in __var_propdict}
+    __prop_keys['ddt_type'] = sys.intern('ddt_type')
+
+    # Var objects are numerous so avoid a per-instance __dict__
+    __slots__ = ('__parent_var', '__children', '__clone_source', '__run_env',
+                 '__required_props', '__source', '_context', '__intrinsic',
+                 '__is_constituent', '_prop_dict')
+
     def __init__(self, prop_dict, source, run_env, context=None,
-                 clone_source=None):
+                 clone_source=None, validate=True):
         """Initialize a new Var object.
         If <prop_dict> is really a Var object, use that object's prop_dict.
         If this Var object is a clone, record the original Var object
@@ -270,6 +280,9 @@ class Var:
         <context> is a ParseContext object
         <clone_source> is a Var object. If provided, it is used as the original
             source of a cloned variable.
+        If <validate> is False, <prop_dict> is trusted to contain a complete
+            and valid set of properties (e.g., from a previously checked Var)
+            so the property checks are skipped.
         """
         self.__parent_var = None # for array references
         self.__children = list() # This Var's array references
@@ -277,6 +290,11 @@ class Var:
         self.__run_env = run_env
         if isinstance(prop_dict, Var):
             prop_dict = prop_dict.copy_prop_dict()
+        elif clone_source is None:
+            # Share property name strings between all Var objects
+            prop_keys = Var.__prop_keys
+            prop_dict = {prop_keys.get(key, key) : val
+                         for key, val in prop_dict.items()}
         # end if
         if source.ptype == 'scheme':
             self.__required_props = Var.__required_var_props
@@ -313,27 +331,8 @@ class Var:
         else:
             self.__intrinsic = True
         # end if
-        for key in prop_dict:
-            if Var.get_prop(key) is None:
-                raise ParseSyntaxError("Invalid metadata variable property, '{}'".format(key), context=self.context)
-            # end if
-        # end for
-        # Make sure required properties are present
-        for propname in self.__required_props:
-            if propname not in prop_dict:
-                emsg = "Required property, '{}', missing"
-                raise ParseSyntaxError(emsg.format(propname),
-                                       context=self.context)
-            # end if
-        # end for
-        # Check for any mismatch
-        if ('protected' in prop_dict) and ('intent' in prop_dict):
-            if (prop_dict['intent'].lower() != 'in') and prop_dict['protected']:
-                emsg = "{} is marked protected but is intent {}"
-                raise ParseSyntaxError(emsg.format(prop_dict['local_name'],
-                                                   prop_dict['intent']),
-                                       context=self.context)
-            # end if
+        if validate:
+            self.__check_prop_dict(prop_dict)
         # end if
         # Look for any constituent properties
         self.__is_constituent = False
@@ -359,10 +358,43 @@ class Var:
 #        # end for
 # XXgoldyXX: ^ don't fill in default properties?
         # Make sure all the variable values are valid
+        if validate:
+            self.__check_prop_values(self._prop_dict)
+        # end if
+
+    def __check_prop_dict(self, prop_dict):
+        """Check that the property names in <prop_dict> are valid, that all
+        required properties are present, and that the properties are
+        consistent with each other."""
+        for key in prop_dict:
+            if Var.get_prop(key) is None:
+                raise ParseSyntaxError("Invalid metadata variable property, '{}'".format(key), context=self.context)
+            # end if
+        # end for
+        # Make sure required properties are present
+        for propname in self.__required_props:
+            if propname not in prop_dict:
+                emsg = "Required property, '{}', missing"
+                raise ParseSyntaxError(emsg.format(propname),
+                                       context=self.context)
+            # end if
+        # end for
+        # Check for any mismatch
+        if ('protected' in prop_dict) and ('intent' in prop_dict):
+            if (prop_dict['intent'].lower() != 'in') and prop_dict['protected']:
+                emsg = "{} is marked protected but is intent {}"
+                raise ParseSyntaxError(emsg.format(prop_dict['local_name'],
+                                                   prop_dict['intent']),
+                                       context=self.context)
+            # end if
+        # end if
+
+    def __check_prop_values(self, prop_names):
+        """Check that the value of each property in <prop_names> is valid."""
         try:
-            for prop_name, prop_val in self.var_properties():
+            for prop_name in prop_names:
                 prop = Var.get_prop(prop_name)
-                _ = prop.valid_value(prop_val,
+                _ = prop.valid_value(self._prop_dict[prop_name],
                                      prop_dict=self._prop_dict, error=True)
             # end for
         except CCPPError as cperr:
@@ -503,8 +535,14 @@ class Var:
             context = self._context
         # end if
         psource = ParseSource(source_name, source_type, context)
-
-        return Var(cprop_dict, psource, self.run_env, clone_source=self)
+        # This Var's properties have already been checked so only the
+        #   substituted properties and the property set need to be checked.
+        clone = Var(cprop_dict, psource, self.run_env, clone_source=self,
+                    validate=False)
+        clone.__check_prop_dict(clone._prop_dict)
+        clone.__check_prop_values([x for x in subst_dict
+                                   if x in clone._prop_dict])
+        return clone
 
     def get_prop_value(self, name):
         """Return the value of key, <name> if <name> is in this variable's
@@ -1028,13 +1066,16 @@ class Var:
         return (conditional, vars_needed)
 
     def write_def(self, outfile, indent, wdict, allocatable=False, target=False,
-                  dummy=False, add_intent=None, extra_space=0, public=False):
+                  dummy=False, add_intent=None, extra_space=0, public=False,
+                  pointer=False):
         """Write the definition line for the variable to <outfile>.
         If <dummy> is True, include the variable's intent.
         If <dummy> is True but the variable has no intent, add the
         intent indicated by <add_intent>. This is intended for host model
         variables and it is an error to not pass <add_intent> if <dummy>
-        is True and the variable has no intent property."""
+        is True and the variable has no intent property.
+        If <pointer> is True, declare an array variable as a pointer
+        (without initialization)."""
         stdname = self.get_prop_value('standard_name')
         if stdname in CCPP_CONSTANT_VARS:
             # There is no declaration line for a constant
@@ -1053,7 +1094,7 @@ class Var:
         # end if
         dims = self.get_dimensions()
         if dims:
-            if allocatable or dummy:
+            if allocatable or dummy or pointer:
                 dimstr = '(:' + ',:'*(len(dims) - 1) + ')'
             else:
                 dimstr = self.call_dimstring(var_dicts=[wdict])
@@ -1082,6 +1123,8 @@ class Var:
         optional = self.get_prop_value('optional')
         if protected and dummy:
             intent_str = 'intent(in)   '
+        elif pointer and dimstr:
+            intent_str = 'pointer             '
         elif allocatable:
             if dimstr or polymorphic:
                 intent_str = 'allocatable         '
@@ -1111,7 +1154,7 @@ class Var:
         else:
             comma = ' '
         # end if
-        if self.get_prop_value('target'):
+        if self.get_prop_value('target') and not (pointer and dimstr):
             targ = ", target"
         else:
             targ = ""
@@ -1139,20 +1182,32 @@ class Var:
                                   name=name, dims=dimstr, cspace=cspace,
                                   sname=stdname), indent)
 
-    def write_ptr_def(self, outfile, indent, name, kind, dimstr, vtype, extra_space=0):
-        """Write the definition line for local null pointer declaration to <outfile>."""
+    def write_ptr_def(self, outfile, indent, name, kind, dimstr, vtype, extra_space=0,
+                      initialize=True):
+        """Write the definition line for local null pointer declaration to <outfile>.
+        If <initialize> is False, do not initialize the pointer to null().
+        An initialized local pointer is implicitly saved so it is shared by
+        all threads calling the routine."""
         comma = ', '
+        if initialize:
+            init = ' => null()'
+        else:
+            init = ''
+        # end if
         if kind:
-            dstr = "{type}({kind}){cspace}pointer          :: {name}{dims}{cspace2} => null()"
+            dstr = "{type}({kind}){cspace}pointer          :: {name}{dims}{cspace2}{init}"
             cspace = comma + ' '*(extra_space + 20 - len(vtype) - len(kind))
             cspace2 = ' '*(20 -len(name) - len(dimstr))
         else:
-            dstr = "{type}{cspace}pointer          :: {name}{dims}{cspace2} => null()"
+            dstr = "{type}{cspace}pointer          :: {name}{dims}{cspace2}{init}"
             cspace = comma + ' '*(extra_space + 22 - len(vtype))
             cspace2 = ' '*(20 -len(name) - len(dimstr))
         # end if
+        if not initialize:
+            cspace2 = ''
+        # end if
         outfile.write(dstr.format(type=vtype, kind=kind, name=name, dims=dimstr,
-                                  cspace=cspace, cspace2=cspace2), indent)
+                                  cspace=cspace, cspace2=cspace2, init=init), indent)
 
     def is_ddt(self):
         """Return True iff <self> is a DDT type."""
@@ -1194,6 +1249,8 @@ class FortranVar(Var):
     __fortran_props = [VariableProperty('optional', bool,
                                         optional_in=True, default_in=False)]
 
+    __slots__ = ()
+
     def __init__(self, prop_dict, source, run_env, context=None,
                  clone_source=None):
         """Initialize a FortranVar object.
@@ -1521,6 +1578,9 @@ class VarDictionary(OrderedDict):
     ParseSyntaxError: Invalid Duplicate standard name, 'hi_mom', at <standard input>:
     """
 
+    # Scope lookup cache statistics (see find_variable_stats)
+    __find_stats = {'hits' : 0, 'misses' : 0}
+
     def __init__(self, name, run_env, variables=None,
                  parent_dict=None):
         """Unlike dict, VarDictionary only takes a Var or Var list"""
@@ -1533,6 +1593,15 @@ class VarDictionary(OrderedDict):
         # end if
         self.__sub_dicts = list()
         self.__local_names = {} # local names in use
+        # Successful parent scope lookups (see find_parent_variable)
+        self.__find_cache = {}
+        # Number of times __find_cache has been cleared
+        self.__find_cache_epoch = 0
+        # Dictionaries whose parent scope lookups go through this dictionary
+        self.__find_dependents = list()
+        if parent_dict is not None:
+            parent_dict.__find_dependents.append(self)
+        # end if
         if isinstance(variables, Var):
             self.add_variable(variables, run_env)
         elif isinstance(variables, list):
@@ -1694,6 +1763,7 @@ class VarDictionary(OrderedDict):
         # If we make it to here without an exception, add the variable
         if standard_name not in self:
             self[standard_name] = newvar
+            self.clear_sub_scope_caches()
         # end if
         lname = lname.lower()
         if lname not in self.__local_names:
@@ -1706,6 +1776,7 @@ class VarDictionary(OrderedDict):
         """
         if standard_name in self:
             del self[standard_name]
+            self.clear_sub_scope_caches()
         # end if
 
     def add_variable_dimensions(self, var, ignore_sources, to_dict=None,
@@ -1794,12 +1865,11 @@ class VarDictionary(OrderedDict):
             var = self[standard_name]
         elif any_scope and (self.__parent_dict is not None):
             src_clist = search_call_list
-            var = self.__parent_dict.find_variable(standard_name=standard_name,
-                                                   source_var=source_var,
-                                                   any_scope=any_scope,
-                                                   clone=clone,
-                                                   search_call_list=src_clist,
-                                                   loop_subst=loop_subst)
+            var = self.find_parent_variable(standard_name,
+                                            source_var=source_var,
+                                            clone=clone,
+                                            search_call_list=src_clist,
+                                            loop_subst=loop_subst)
         else:
             var = None
         # end if
@@ -1863,6 +1933,79 @@ class VarDictionary(OrderedDict):
         # end if
         return err_vars
 
+    def find_parent_variable(self, standard_name, source_var=None,
+                             clone=None, search_call_list=False,
+                             loop_subst=False):
+        """Return the variable matching <standard_name> from the parent
+        scope of this dictionary (and any of its parent scopes), or None.
+        The other arguments are passed to the parent's find_variable.
+        Successful lookups with no <clone> are cached, keyed by
+        <standard_name>, <search_call_list>, and <loop_subst>, so the cache
+        holds at most a few entries per standard name looked up from this
+        dictionary. The cache is cleared when a variable is added to or
+        removed from any dictionary in the parent scope chain (see
+        clear_sub_scope_caches). Unsuccessful lookups are not cached as a
+        parent may provide the variable later (e.g., by promoting or
+        creating it). Side effects of a parent's find_variable (e.g.,
+        recording a used variable) only happen on the first lookup.
+        """
+        parent = self.parent
+        if parent is None:
+            return None
+        # end if
+        key = (standard_name, search_call_list, loop_subst)
+        if clone is None:
+            var = self.__find_cache.get(key, None)
+            if var is not None:
+                VarDictionary.__find_stats['hits'] += 1
+                return var
+            # end if
+            VarDictionary.__find_stats['misses'] += 1
+        # end if
+        epoch = self.__find_cache_epoch
+        var = parent.find_variable(standard_name=standard_name,
+                                   source_var=source_var, any_scope=True,
+                                   clone=clone,
+                                   search_call_list=search_call_list,
+                                   loop_subst=loop_subst)
+        # Do not cache a result if the lookup itself changed the scope chain
+        if ((var is not None) and (clone is None) and
+            (epoch == self.__find_cache_epoch)):
+            self.__find_cache[key] = var
+        # end if
+        return var
+
+    def clear_sub_scope_caches(self):
+        """Clear the cached parent scope lookups of every dictionary whose
+        parent scope chain includes this dictionary."""
+        for sub_dict in self.__find_dependents:
+            sub_dict.__find_cache.clear()
+            sub_dict.__find_cache_epoch += 1
+            sub_dict.clear_sub_scope_caches()
+        # end for
+
+    def reset_parent_scope(self, new_parent):
+        """Parent scope lookups of this dictionary now go to <new_parent>
+        (e.g., for a SuiteObject which has been moved). Clear the cached
+        parent scope lookups of this dictionary and its sub scopes and make
+        sure that changes to <new_parent> clear them from now on."""
+        # Compare identities, VarDictionary equality compares contents
+        if not any(x is self for x in new_parent.__find_dependents):
+            new_parent.__find_dependents.append(self)
+        # end if
+        self.__find_cache.clear()
+        self.__find_cache_epoch += 1
+        self.clear_sub_scope_caches()
+
+    @classmethod
+    def find_variable_stats(cls):
+        """Return the number of parent scope lookups which were found in
+        (hits) or added to (misses) a lookup cache.
+        >>> sorted(VarDictionary.find_variable_stats().keys())
+        ['hits', 'misses']
+        """
+        return dict(cls.__find_stats)
+
     def add_sub_scope(self, sub_dict):
         """Add a child dictionary to enable traversal"""
         self.__sub_dicts.append(sub_dict)
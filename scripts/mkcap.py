@@ -14,8 +14,8 @@ import xml.etree.ElementTree as ET
 
 from common import CCPP_INTERNAL_VARIABLES
 from common import STANDARD_VARIABLE_TYPES, STANDARD_CHARACTER_TYPE
-from common import isstring, string_to_python_identifier
-from conversion_tools import unit_conversion
+from common import isstring
+from conversion_tools import unit_conversion_expr, UnitConversionError
 
 ###############################################################################
 
@@ -34,6 +34,8 @@ class Var(object):
         self._active        = None
         self._optional      = None
         self._pointer       = False
+        self._local_pointer = False
+        self._is_target     = False
         self._target        = None
         self._actions       = { 'in' : None, 'out' : None }
         for key, value in kwargs.items():
@@ -160,6 +162,32 @@ class Var(object):
             raise ValueError('Invalid value {0} for variable property pointer, must be a logical'.format(value))
         self._pointer = value
 
+    # Local_pointer and is_target are not set by parsing metadata attributes,
+    # but by mkstatic for pointer views of blocked data.
+    @property
+    def local_pointer(self):
+        '''Get the local_pointer attribute of the variable (declare a local
+        array as a pointer instead of an allocatable array).'''
+        return self._local_pointer
+
+    @local_pointer.setter
+    def local_pointer(self, value):
+        if not isinstance(value, bool):
+            raise ValueError('Invalid value {0} for variable property local_pointer, must be a logical'.format(value))
+        self._local_pointer = value
+
+    @property
+    def is_target(self):
+        '''Get the is_target attribute of the variable (add the target
+        attribute to the declaration of a dummy argument).'''
+        return self._is_target
+
+    @is_target.setter
+    def is_target(self, value):
+        if not isinstance(value, bool):
+            raise ValueError('Invalid value {0} for variable property is_target, must be a logical'.format(value))
+        self._is_target = value
+
     @property
     def target(self):
         '''Get the target of the variable.'''
@@ -214,25 +242,23 @@ class Var(object):
 
     def convert_to(self, units):
         """Generate action to convert data in the variable's units to other units"""
-        function_name = '{0}__to__{1}'.format(string_to_python_identifier(self.units), string_to_python_identifier(units))
         try:
-            function = getattr(unit_conversion, function_name)
-            logging.info('Automatic unit conversion from {0} to {1} for {2} after returning from {3}'.format(self.units, units, self.standard_name, self.container))
-        except AttributeError:
+            conversion = unit_conversion_expr(self.units, units)
+            if conversion is not None:
+                logging.info('Automatic unit conversion from {0} to {1} for {2} after returning from {3}'.format(self.units, units, self.standard_name, self.container))
+        except UnitConversionError:
             raise Exception('Error, automatic unit conversion from {0} to {1} for {2} in {3} not implemented'.format(self.units, units, self.standard_name, self.container))
-        conversion = function()
-        self._actions['out'] = function()
+        self._actions['out'] = conversion
 
     def convert_from(self, units):
         """Generate action to convert data in other units to the variable's units"""
-        function_name = '{1}__to__{0}'.format(string_to_python_identifier(self.units), string_to_python_identifier(units))
         try:
-            function = getattr(unit_conversion, function_name)
-            logging.info('Automatic unit conversion from {0} to {1} for {2} before entering {3}'.format(self.units, units, self.standard_name, self.container))
-        except AttributeError:
+            conversion = unit_conversion_expr(units, self.units)
+            if conversion is not None:
+                logging.info('Automatic unit conversion from {0} to {1} for {2} before entering {3}'.format(self.units, units, self.standard_name, self.container))
+        except UnitConversionError:
             raise Exception('Error, automatic unit conversion from {1} to {0} for {2} in {3} not implemented'.format(self.units, units, self.standard_name, self.container))
-        conversion = function()
-        self._actions['in'] = function()
+        self._actions['in'] = conversion
 
     def dimstring_local_names(self, metadata, assume_shape = False):
         '''Create the dimension string for assumed shape or explicit arrays
@@ -304,6 +330,8 @@ class Var(object):
         # If the host variable is potentially unallocated, add optional and target to variable declaration
         elif not self.active == 'T':
             optional = ', optional, target'
+        elif self.is_target:
+            optional = ', target'
         else:
             optional = ''
         #
@@ -357,19 +385,21 @@ class Var(object):
         else:
             # If the host variable is potentially unallocated, the active attribute is
             # also set accordingly for the local variable; add target to variable declaration
-            if self.optional == 'T':
+            if self.local_pointer:
+                target = ''
+            elif self.optional == 'T':
                 target = ', target'
             else:
                 target = ''
             if self.type in STANDARD_VARIABLE_TYPES:
                 if self.kind:
                     if self.rank:
-                        str = "{s.type}({s._kind}), dimension{s.rank}, allocatable{target} :: {s.local_name}"
+                        str = "{s.type}({s._kind}), dimension{s.rank}, {allocatable}{target} :: {s.local_name}"
                     else:
                         str = "{s.type}({s._kind}){target} :: {s.local_name}"
                 else:
                     if self.rank:
-                        str = "{s.type}, dimension{s.rank}, allocatable{target} :: {s.local_name}"
+                        str = "{s.type}, dimension{s.rank}, {allocatable}{target} :: {s.local_name}"
                     else:
                         str = "{s.type}{target} :: {s.local_name}"
             else:
@@ -379,10 +409,14 @@ class Var(object):
                     raise Exception(error_message)
                 else:
                     if self.rank:
-                        str = "type({s.type}), dimension{s.rank}, allocatable{target} :: {s.local_name}"
+                        str = "type({s.type}), dimension{s.rank}, {allocatable}{target} :: {s.local_name}"
                     else:
                         str = "type({s.type}){target} :: {s.local_name}"
-            return str.format(s=self, target=target)
+            if self.local_pointer:
+                allocatable = 'pointer'
+            else:
+                allocatable = 'allocatable'
+            return str.format(s=self, target=target, allocatable=allocatable)
 
     def print_debug(self):
         '''Print the data retrieval line for the variable.'''
@@ -5,10 +5,12 @@ import collections
 import copy
 import getopt
 import filecmp
+import functools
 import logging
 import os
 import re
 import sys
+import textwrap
 import types
 import xml.etree.ElementTree as ET
 
@@ -23,6 +25,7 @@ from common import CCPP_TYPE, STANDARD_VARIABLE_TYPES, STANDARD_CHARACTER_TYPE
 from common import CCPP_STATIC_API_MODULE, CCPP_STATIC_SUBROUTINE_NAME
 from metadata_parser import CCPP_MANDATORY_VARIABLES
 from mkcap import Var
+from scheme_timers import SchemeTimers
 
 ###############################################################################
 
@@ -65,6 +68,19 @@ TMPPTR_ARR_TYPE_DECLARATION = '''type :: {pointer_type_name}
       end type {pointer_type_name}'''
 TMPPTR_ARR_DECLARATION = '''type({pointer_type_name}), dimension({dims}) :: {localname}_array'''
 
+# Fortran fragments that are repeated for many variables and scheme calls in the group caps
+CONDITIONAL_BLOCK = '''
+      if ({conditional}) then
+{actions}
+      end if
+'''
+ERROR_CHECK = '''if ({target_name_flag}/=0) then
+        {target_name_msg} = "An error occured in {subroutine_name}: " // trim({target_name_msg})
+        ierr={target_name_flag}
+        return
+      end if
+'''
+
 ###############################################################################
 
 def extract_parents_and_indices_from_local_name(local_name):
@@ -148,6 +164,40 @@ def extract_dimensions_from_local_name(local_name):
         dim_string = ''
     return (dimensions, dim_string)
 
+@functools.lru_cache(maxsize=None)
+def conditional_block(conditional, actions):
+    """Return the Fortran block that executes actions if conditional is true.
+    Blocks are cached, since many variables share the same (or no) actions."""
+    return CONDITIONAL_BLOCK.format(conditional=conditional, actions=actions.rstrip('\n'))
+
+@functools.lru_cache(maxsize=None)
+def error_check(target_name_flag, target_name_msg, subroutine_name):
+    """Return the Fortran code that checks the error flag after calling subroutine_name"""
+    return ERROR_CHECK.format(target_name_flag=target_name_flag, target_name_msg=target_name_msg,
+                              subroutine_name=subroutine_name)
+
+@functools.lru_cache(maxsize=None)
+def thread_pointer(tmpptr_name):
+    """Return the reference to the temporary pointer tmpptr_name of the current thread"""
+    return f"{tmpptr_name}_array({CCPP_INTERNAL_VARIABLES[CCPP_THREAD_NUMBER]})%p"
+
+@functools.lru_cache(maxsize=None)
+def pointer_association(pointer, target):
+    """Return the Fortran statement that points pointer to target"""
+    return f'        {pointer} => {target}\n'
+
+@functools.lru_cache(maxsize=None)
+def pointer_nullification(pointer):
+    """Return the Fortran statement that nullifies pointer"""
+    return f'        nullify({pointer})\n'
+
+@functools.lru_cache(maxsize=None)
+def unit_conversion(target, conversion, var, kind, dim_string=''):
+    """Return the Fortran statement that assigns the unit conversion of var to target.
+    conversion is the conversion action (with placeholders for var and kind) and
+    dim_string is appended to the converted variable."""
+    return '        {t} = {c}{d}\n'.format(t=target, c=conversion.format(var=var, kind=kind), d=dim_string)
+
 def create_argument_list_wrapped(arguments):
     """Create a wrapped argument list, remove trailing ',' """
     argument_list = ''
@@ -626,6 +676,18 @@ module {module}
    end function {subroutine}
 '''
 
+    timer_sub = '''
+   subroutine {subroutine}({arguments})
+
+      implicit none
+
+      {var_defs}
+
+{body}
+
+   end subroutine {subroutine}
+'''
+
     footer = '''
 end module {module}
 '''
@@ -819,10 +881,13 @@ end module {module}
     def arguments(self, value):
         self._arguments = value
 
-    def write(self, metadata_request, metadata_define, arguments, debug):
+    def write(self, metadata_request, metadata_define, arguments, debug,
+              scheme_timers=False, zero_copy_deblocking=False):
         """Create caps for all groups in the suite and for the entire suite
         (calling the group caps one after another). Add additional code for
-        debugging if debug flag is True."""
+        debugging if debug flag is True. Add timers and call counters to the
+        group caps if scheme_timers is True. Avoid copies of blocked data in
+        the group caps if zero_copy_deblocking is True (see Group.write)."""
         # Set name of module and filename of cap
         self._module = 'ccpp_{suite_name}_cap'.format(suite_name=self._name)
         self.filename = '{module_name}.F90'.format(module_name=self._module)
@@ -833,9 +898,12 @@ end module {module}
         # require adjusting the intent of the variables.
         module_use = ''
         for group in self._groups:
-            group.write(metadata_request, metadata_define, arguments, debug)
+            group.write(metadata_request, metadata_define, arguments, debug, scheme_timers,
+                        zero_copy_deblocking)
             for subroutine in group.subroutines:
                 module_use += '   use {m}, only: {s}\n'.format(m=group.module, s=subroutine)
+            for subroutine in group.timer_routines:
+                module_use += '   use {m}, only: {s}\n'.format(m=group.module, s=subroutine)
             for ccpp_stage in CCPP_STAGES.keys():
                 for parent_standard_name in group.parents[ccpp_stage].keys():
                     if parent_standard_name in self.parents[ccpp_stage]:
@@ -879,6 +947,28 @@ end module {module}
                                      var_defs='\n      '.join(sub_var_defs),
                                      body=body)
 
+        # Print or reset the timing tables of all groups
+        timer_subroutines = []
+        if any([group.timer_routines for group in self._groups]):
+            print_subroutine = '{name}_print_timing_table'.format(name=self._name)
+            reset_subroutine = '{name}_reset_timers'.format(name=self._name)
+            print_body = ''
+            reset_body = ''
+            for group in self._groups:
+                if group.timer_routines:
+                    (dummy, print_timers, reset_timers) = group.timer_routines
+                    print_body += '      call {}(unit)\n'.format(print_timers)
+                    reset_body += '      call {}()\n'.format(reset_timers)
+            subs += Suite.timer_sub.format(subroutine=print_subroutine,
+                                           arguments='unit',
+                                           var_defs='integer, optional, intent(in) :: unit',
+                                           body=print_body.rstrip('\n'))
+            subs += Suite.timer_sub.format(subroutine=reset_subroutine,
+                                           arguments='',
+                                           var_defs='',
+                                           body=reset_body.rstrip('\n'))
+            timer_subroutines = [print_subroutine, reset_subroutine]
+
         # Write cap to stdout or file
         if (self.filename is not sys.stdout):
             filepath = os.path.split(self.filename)[0]
@@ -904,7 +994,7 @@ end module {module}
             f = sys.stdout
         f.write(Suite.header.format(module=self._module,
                                     module_use=module_use,
-                                    subroutines=', &\n             '.join(self._subroutines)))
+                                    subroutines=', &\n             '.join(self._subroutines + timer_subroutines)))
         f.write(subs)
         f.write(Suite.footer.format(module=self._module))
         if (f is not sys.stdout):
@@ -963,7 +1053,7 @@ module {module}
    public :: {subroutines}
 
    logical, dimension({num_instances}), save :: initialized = .false.
-
+{timer_data}
    contains
 '''
 
@@ -1036,6 +1126,81 @@ end module {module}
 ''',
     }
 
+    subroutine_call = '''
+{actions_before}
+{timer_start}
+      call {subroutine_name}({args})
+{timer_stop}
+{actions_after}
+'''
+
+    scheme_call = '''
+      {subroutine_call}
+      {error_check}
+    '''
+
+    size_check = '''        ! Check if variable {var_name} is associated/allocated and has the correct size
+        if (size({var_name}{dim_string})/={var_size_expected}) then
+          write({ccpp_errmsg}, '(2(a,i8))') 'Detected size mismatch for variable {var_name}{dim_string} in group {group_name} before {subroutine_name}, expected ', &
+                                           {var_size_expected}, ' but got ', size({var_name}{dim_string})
+          ierr = 1
+          return
+        end if
+'''
+
+    deblock_allocate = '''        ! Allocate local variable to copy blocked data {var} into a contiguous array
+        allocate({tmpvar}({dims}))
+'''
+
+    deblock_copy_in = '''        ib = 1
+        do nb=1,{block_count}
+          {tmpvar}({dimpad_before}ib:ib+{block_size}-1{dimpad_after}) = {var}
+          ib = ib+{block_size}
+        end do
+'''
+
+    deblock_copy_out = '''        ib = 1
+        do nb=1,{block_count}
+          {var} = {tmpvar}({dimpad_before}ib:ib+{block_size}-1{dimpad_after})
+          ib = ib+{block_size}
+        end do
+        deallocate({tmpvar})
+'''
+
+    deblock_deallocate = '''        deallocate({tmpvar})
+'''
+
+    single_block_in = '''        if ({block_count} == 1) then
+          ! Point local variable to the only block of blocked data {var}
+          {tmpvar}({lbounds}) => {var}
+        else
+{actions_in}        end if
+'''
+
+    single_block_out = '''        if ({block_count} == 1) then
+          nullify({tmpvar})
+        else
+{actions_out}        end if
+'''
+
+    subcycle_start = '''
+      ! Start of next subcycle
+'''
+
+    loop_extent = '''
+      ! Set loop extent variable for the following subcycle
+      {loop_extent_var_name} = {loop_cnt_max}
+'''
+
+    subcycle_loop_start = '''
+      associate(cnt => {loop_var_name})
+      do cnt=1,{loop_cnt_max}\n\n'''
+
+    subcycle_loop_end = '''
+      end do
+      end associate
+'''
+
     def __init__(self, **kwargs):
         self._name = ''
         self._suite = None
@@ -1048,12 +1213,18 @@ end module {module}
         self._parents = { ccpp_stage : collections.OrderedDict() for ccpp_stage in CCPP_STAGES }
         self._arguments = { ccpp_stage : [] for ccpp_stage in CCPP_STAGES }
         self._update_cap = True
+        self._timer_routines = []
+        self._deblocked_variables = []
         for key, value in kwargs.items():
             setattr(self, "_"+key, value)
 
-    def write(self, metadata_request, metadata_define, arguments, debug):
+    def write(self, metadata_request, metadata_define, arguments, debug,
+              scheme_timers=False, zero_copy_deblocking=False):
         """Create caps for all stages of this group. Add additional code for
-        debugging if debug flag is True."""
+        debugging if debug flag is True. Time and count the calls of this group,
+        its subcycles and its schemes if scheme_timers is True. If zero_copy_deblocking
+        is True, pass the only block of blocked data to schemes without copying it
+        and copy blocked data only in the directions required by the intent."""
 
         # Create an inverse lookup table of local variable names defined (by the host model) and standard names
         standard_name_by_local_name_define = collections.OrderedDict()
@@ -1068,12 +1239,15 @@ end module {module}
         # Then, identify the variable name of the mandatory ccpp_t variable defined by the host model
         ccpp_var = metadata_define[CCPP_T_INSTANCE_VARIABLE][0]
 
-        # Init
-        module_use = ''
+        # Init. The cap is assembled from lists of fragments, which are joined once.
+        module_use = []
         self._module = 'ccpp_{suite}_{name}_cap'.format(name=self._name, suite=self._suite)
         self._filename = '{module_name}.F90'.format(module_name=self._module)
         self._subroutines = []
-        local_subs = ''
+        self._deblocked_variables = []
+        local_subs = []
+        # Timers for the group, subcycles and schemes of each stage
+        timers = SchemeTimers('{suite}_{name}'.format(name=self._name, suite=self._suite))
         #
         for ccpp_stage in CCPP_STAGES.keys():
             # The special init and finalize routines are only run in that stage
@@ -1090,23 +1264,27 @@ end module {module}
             tmpptr_cnt = 0
             tmpptrs    = collections.OrderedDict()
             #
-            body = ''
+            body = []
             # Variable definitions automatically added for subroutines
             var_defs = ''
             # List of manual variable definitions, for example for handling blocked data structures
             var_defs_manual = []
             # Conditionals for variables (used or allocated only under certain conditions)
             conditionals = {}
+            # Timer for this stage of the group, added with the first scheme called
+            group_timer = None
             #
-            for subcycle in self._subcycles:
-                subcycle_body = ''
+            for subcycle_index, subcycle in enumerate(self._subcycles):
+                subcycle_body = []
+                subcycle_loop = subcycle.loop > 1 and ccpp_stage == 'run'
+                subcycle_timer = None
                 # Call all schemes
                 for scheme_name in subcycle.schemes:
                     # actions_before and actions_after capture operations such
                     # as unit conversions, transformations that have to happen
                     # before and/or after the call to the subroutine (scheme)
-                    actions_before = ''
-                    actions_after  = ''
+                    actions_before = []
+                    actions_after  = []
                     #
                     module_name = scheme_name
                     subroutine_name = scheme_name + '_' + ccpp_stage
@@ -1114,8 +1292,22 @@ end module {module}
                     # Skip entirely empty routines or non-existent routines
                     if not subroutine_name in arguments[scheme_name].keys() or not arguments[scheme_name][subroutine_name]:
                         continue
-                    error_check = ''
-                    args = ''
+                    # Add the timers for this scheme call and the enclosing subcycle and group
+                    timer_start = ''
+                    timer_stop = ''
+                    if scheme_timers:
+                        if group_timer is None:
+                            group_timer = timers.add_timer(self._name, ccpp_stage)
+                        timer_depth = 2
+                        if subcycle_loop:
+                            if subcycle_timer is None:
+                                subcycle_timer = timers.add_timer('{}/subcycle{}'.format(self._name, subcycle_index + 1),
+                                                                  ccpp_stage)
+                            timer_depth = 3
+                        scheme_timer = timers.add_timer('{}/{}'.format(self._name, subroutine_name), ccpp_stage)
+                        timer_start = '      ' + SchemeTimers.start_stmt(timer_depth)
+                        timer_stop = '      ' + SchemeTimers.stop_stmt(scheme_timer, timer_depth)
+                    args = []
                     length = 0
 
                     # First, add a few mandatory variables to the list of required
@@ -1508,14 +1700,7 @@ end module {module}
                             # 0x5b6fdd gimplify_expr(tree_node**, gimple**, gimple**, bool (*)(tree_node*), int)
                             #   /tmp/role.apps/spack-stage/spack-stage-gcc-9.2.0-ku6r4f5qa5obpfnqpa6pezhogxq6sp7h/spack-src/gcc/gimplify.c:13477
                             elif var.rank and not var.type == 'character':
-                                assign_test = '''        ! Check if variable {var_name} is associated/allocated and has the correct size
-        if (size({var_name}{dim_string})/={var_size_expected}) then
-          write({ccpp_errmsg}, '(2(a,i8))') 'Detected size mismatch for variable {var_name}{dim_string} in group {group_name} before {subroutine_name}, expected ', &
-                                           {var_size_expected}, ' but got ', size({var_name}{dim_string})
-          ierr = 1
-          return
-        end if
-'''.format(var_name=local_vars[var_standard_name]['name'].replace(dim_string_target_name, ''),
+                                assign_test = Group.size_check.format(var_name=local_vars[var_standard_name]['name'].replace(dim_string_target_name, ''),
            dim_string=dim_string,
            var_size_expected=var_size_expected,
            ccpp_errmsg=CCPP_INTERNAL_VARIABLES[CCPP_ERROR_MSG_VARIABLE], group_name = self.name,
@@ -1553,6 +1738,28 @@ end module {module}
                                 tmpvar_cnt += 1
                                 tmpvar = copy.deepcopy(var)
                                 tmpvar.local_name = '{0}_{1}_local'.format(var.local_name, tmpvar_cnt)
+                                # The local array can be allocated or point to the only block
+                                tmpvar.local_pointer = zero_copy_deblocking
+
+                            # Data in a single block can be passed to the scheme directly, unless
+                            # it needs a unit conversion. Copy data in and out only if required.
+                            view_single_block = zero_copy_deblocking and not var.actions['in'] and not var.actions['out']
+                            copy_in = not zero_copy_deblocking or var.intent in [ 'in', 'inout' ]
+                            copy_out = var.intent in [ 'inout', 'out' ]
+                            if view_single_block:
+                                self.parents[ccpp_stage][local_vars[var_standard_name]['parent_standard_name']].is_target = True
+                            if copy_in and copy_out:
+                                conversion = 'copy in and out'
+                            elif copy_in:
+                                conversion = 'copy in'
+                            elif copy_out:
+                                conversion = 'copy out'
+                            else:
+                                conversion = 'allocate'
+                            if view_single_block:
+                                conversion = 'pointer to single block, else ' + conversion
+                            self._deblocked_variables.append((ccpp_stage, subroutine_name, var_standard_name,
+                                                              var.intent, conversion))
 
                             # Create string for allocating the temporary array by converting the dimensions
                             # (in standard_name format) to local names as known to the host model
@@ -1594,44 +1801,43 @@ end module {module}
                                 # Add necessary local variables for looping over blocks
                                 var_defs_manual.append('integer :: ib, nb')
 
-                                # Define actions before. Always copy data in, independent of intent.
+                                # Define actions before. Copy data in, independent of intent, unless
+                                # zero_copy_deblocking is True.
                                 # We intentionally omit the dim string for the assignment on the right hand side,
                                 # since it worked without until now, since coding this up together with chunked array
                                 # logic is tricky, and since all this logic will go away after the models transitioned
                                 # to chunked arrays.
-                                actions_in = '''        ! Allocate local variable to copy blocked data {var} into a contiguous array
-        allocate({tmpvar}({dims}))
-        ib = 1
-        do nb=1,{block_count}
-          {tmpvar}({dimpad_before}ib:ib+{block_size}-1{dimpad_after}) = {var}
-          ib = ib+{block_size}
-        end do
-'''.format(tmpvar=tmpvar.local_name,
-           block_count=metadata_define[CCPP_BLOCK_COUNT][0].local_name.replace(CCPP_INTERNAL_VARIABLES[CCPP_BLOCK_NUMBER],'nb'),
+                                block_count = metadata_define[CCPP_BLOCK_COUNT][0].local_name.replace(CCPP_INTERNAL_VARIABLES[CCPP_BLOCK_NUMBER],'nb')
+                                deblock_args = dict(tmpvar=tmpvar.local_name,
+           block_count=block_count,
            block_size=metadata_define[CCPP_HORIZONTAL_LOOP_EXTENT][0].local_name.replace(CCPP_INTERNAL_VARIABLES[CCPP_BLOCK_NUMBER],'nb'),
            var=tmpvar.target.replace(CCPP_INTERNAL_VARIABLES[CCPP_BLOCK_NUMBER],'nb'),
            dims=','.join(alloc_dimensions),
            dimpad_before=dimpad_before,
            dimpad_after=dimpad_after,
            )
+                                actions_in = Group.deblock_allocate.format(**deblock_args)
+                                if copy_in:
+                                    actions_in += Group.deblock_copy_in.format(**deblock_args)
                                 # Define actions after, depending on intent.
-                                if var.intent in [ 'inout', 'out' ]:
-                                    actions_out = '''        ib = 1
-        do nb=1,{block_count}
-          {var} = {tmpvar}({dimpad_before}ib:ib+{block_size}-1{dimpad_after})
-          ib = ib+{block_size}
-        end do
-        deallocate({tmpvar})
-'''.format(tmpvar=tmpvar.local_name,
-           block_count=metadata_define[CCPP_BLOCK_COUNT][0].local_name.replace(CCPP_INTERNAL_VARIABLES[CCPP_BLOCK_NUMBER],'nb'),
-           block_size=metadata_define[CCPP_HORIZONTAL_LOOP_EXTENT][0].local_name.replace(CCPP_INTERNAL_VARIABLES[CCPP_BLOCK_NUMBER],'nb'),
-           var=tmpvar.target.replace(CCPP_INTERNAL_VARIABLES[CCPP_BLOCK_NUMBER],'nb'),
-           dimpad_before=dimpad_before,
-           dimpad_after=dimpad_after,
-           )
+                                if copy_out:
+                                    actions_out = Group.deblock_copy_out.format(**deblock_args)
                                 else:
-                                    actions_out = '''        deallocate({tmpvar})
-'''.format(tmpvar=tmpvar.local_name)
+                                    actions_out = Group.deblock_deallocate.format(**deblock_args)
+
+                                # Point to the only block instead of copying it, keeping the lower bounds
+                                # of the contiguous array
+                                if view_single_block:
+                                    actions_in = Group.single_block_in.format(tmpvar=tmpvar.local_name,
+           block_count=block_count,
+           var=tmpvar.target.replace(CCPP_INTERNAL_VARIABLES[CCPP_BLOCK_NUMBER],'1'),
+           lbounds=','.join(['{}:'.format(x.split(':')[0]) for x in alloc_dimensions]),
+           actions_in=textwrap.indent(actions_in, '  '),
+           )
+                                    actions_out = Group.single_block_out.format(tmpvar=tmpvar.local_name,
+           block_count=block_count,
+           actions_out=textwrap.indent(actions_out, '  '),
+           )
 
                                 # Set/update actions for this temporary variable
                                 tmpvar.actions = {'in' : actions_in, 'out' : actions_out}
@@ -1641,49 +1847,36 @@ end module {module}
                             if var.actions['in']:
                                 # Add unit conversion before entering the subroutine, after allocating the temporary
                                 # array holding the non-blocked data and copying the blocked data to it
-                                actions_in = actions_in + \
-                                                 '        {t} = {c}\n'.format(t=tmpvar.local_name,
-                                                                            c=var.actions['in'].format(var=tmpvar.local_name,
-                                                                                                    kind=kind_string))
+                                actions_in = actions_in + unit_conversion(tmpvar.local_name, var.actions['in'],
+                                                                          tmpvar.local_name, kind_string)
 
                             # If the variable is conditionally allocated, assign pointer
                             if not conditional == '.true.':
                                 # We don't want the dimstring here - this can lead to dimension mismatches.
                                 # We know for sure that we need to reference the entire de-blocked array anyway.
-                                actions_in += '        {p} => {t}\n'.format(p=f"{tmpptr.local_name}_array({CCPP_INTERNAL_VARIABLES[CCPP_THREAD_NUMBER]})%p",
-                                                                            t=tmpvar.local_name, d=dim_string)
+                                actions_in += pointer_association(thread_pointer(tmpptr.local_name), tmpvar.local_name)
 
                             if var.actions['out']:
                                 # Add unit conversion after returning from the subroutine, before copying the non-blocked
                                 # data back to the blocked data and deallocating the temporary array
-                                actions_out  = '        {t} = {c}\n'.format(t=tmpvar.local_name,
-                                                                            c=var.actions['out'].format(var=tmpvar.local_name,
-                                                                                                        kind=kind_string)) + \
-                                                 actions_out
+                                actions_out = unit_conversion(tmpvar.local_name, var.actions['out'],
+                                                              tmpvar.local_name, kind_string) + actions_out
 
                             # If the variable is conditionally allocated, nullify pointer
                             if not conditional == '.true.':
-                                actions_out += '        nullify({p})\n'.format(p=f"{tmpptr.local_name}_array({CCPP_INTERNAL_VARIABLES[CCPP_THREAD_NUMBER]})%p")
+                                actions_out += pointer_nullification(thread_pointer(tmpptr.local_name))
 
                             # Add the conditionals for the "before" operations
-                            actions_before += '''
-      if ({conditional}) then
-{actions_in}
-      end if
-'''.format(conditional=conditional, actions_in=actions_in.rstrip('\n'))
+                            actions_before.append(conditional_block(conditional, actions_in))
                             # Add the conditionals for the "after" operations
-                            actions_after += '''
-      if ({conditional}) then
-{actions_out}
-      end if
-'''.format(conditional=conditional, actions_out=actions_out.rstrip('\n'))
+                            actions_after.append(conditional_block(conditional, actions_out))
 
                             # Add to argument list
                             if conditional == '.true.':
                                 arg = '{local_name}={var_name},'.format(local_name=var.local_name, var_name=tmpvar.local_name)
                             else:
                                 arg = '{local_name}={ptr_name},'.format(local_name=var.local_name,
-                                                                        ptr_name=f"{tmpptr.local_name}_array({CCPP_INTERNAL_VARIABLES[CCPP_THREAD_NUMBER]})%p")
+                                                                        ptr_name=thread_pointer(tmpptr.local_name))
 
                         # Variables stored in blocked data structures but without horizontal dimension not supported at this time (doesn't make sense anyway)
                         elif ccpp_stage in ['init', 'timestep_init', 'timestep_finalize', 'finalize'] and \
@@ -1720,40 +1913,29 @@ end module {module}
                                 actions_in += f'        allocate({tmpvar.local_name}{dim_string})\n'
                             if var.actions['in']:
                                 # Add unit conversion before entering the subroutine
-                                actions_in += '        {t} = {c}{d}\n'.format(t=tmpvar.local_name,
-                                                                              c=var.actions['in'].format(var=tmpvar.target.replace(dim_string_target_name, ''),
-                                                                                                         kind=kind_string),
-                                                                              d=dim_string)
+                                actions_in += unit_conversion(tmpvar.local_name, var.actions['in'],
+                                                              tmpvar.target.replace(dim_string_target_name, ''),
+                                                              kind_string, dim_string)
                                 # If the variable is conditionally allocated, assign pointer
                                 if not conditional == '.true.':
-                                    actions_in += '        {p} => {t}{d}\n'.format(p=f"{tmpptr.local_name}_array({CCPP_INTERNAL_VARIABLES[CCPP_THREAD_NUMBER]})%p",
-                                                                                   t=tmpvar.local_name, d=dim_string)
+                                    actions_in += pointer_association(thread_pointer(tmpptr.local_name),
+                                                                      tmpvar.local_name + dim_string)
                             if var.actions['out']:
                                 # Add unit conversion after returning from the subroutine
-                                actions_out  += '        {v}{d} = {c}\n'.format(v=tmpvar.target.replace(dim_string_target_name, ''),
-                                                                                d=dim_string,
-                                                                                c=var.actions['out'].format(var=tmpvar.local_name,
-                                                                                                            kind=kind_string))
+                                actions_out += unit_conversion(tmpvar.target.replace(dim_string_target_name, '') + dim_string,
+                                                               var.actions['out'], tmpvar.local_name, kind_string)
                                 # If the variable is conditionally allocated, nullify pointer
                                 if not conditional == '.true.':
-                                    actions_out += '        nullify({p})\n'.format(p=f"{tmpptr.local_name}_array({CCPP_INTERNAL_VARIABLES[CCPP_THREAD_NUMBER]})%p")
+                                    actions_out += pointer_nullification(thread_pointer(tmpptr.local_name))
 
                             if tmpvar.rank:
                                 # Add deallocate statement if the variable has a rank > 0
                                 actions_out += '        deallocate({t})\n'.format(t=tmpvar.local_name)
 
                             # Add the conditionals for the "before" operations
-                            actions_before += '''
-      if ({conditional}) then
-{actions_in}
-      end if
-'''.format(conditional=conditional, actions_in=actions_in.rstrip('\n'))
+                            actions_before.append(conditional_block(conditional, actions_in))
                             # Add the conditionals for the "after" operations
-                            actions_after += '''
-      if ({conditional}) then
-{actions_out}
-      end if
-'''.format(conditional=conditional, actions_out=actions_out.rstrip('\n'))
+                            actions_after.append(conditional_block(conditional, actions_out))
 
                             # Add to argument list
                             if conditional == '.true.':
@@ -1761,7 +1943,7 @@ end module {module}
                                     var_name=tmpvar.local_name.replace(dim_string_target_name, ''), dim_string=dim_string)
                             else:
                                 arg = '{local_name}={ptr_name},'.format(local_name=var.local_name,
-                                                                        ptr_name=f"{tmpptr.local_name}_array({CCPP_INTERNAL_VARIABLES[CCPP_THREAD_NUMBER]})%p")
+                                                                        ptr_name=thread_pointer(tmpptr.local_name))
 
                         # Ordinary variables, no blocked data or unit conversions
                         elif var_standard_name in arguments[scheme_name][subroutine_name]:
@@ -1772,27 +1954,18 @@ end module {module}
                             actions_out = ''
                             # If the variable is conditionally allocated, assign pointer
                             if not conditional == '.true.':
-                                actions_in += '        {p} => {t}{d}\n'.format(p=f"{tmpptr.local_name}_array({CCPP_INTERNAL_VARIABLES[CCPP_THREAD_NUMBER]})%p",
-                                                                               t=var.target.replace(dim_string_target_name, ''),
-                                                                               d=dim_string)
+                                actions_in += pointer_association(thread_pointer(tmpptr.local_name),
+                                                                  var.target.replace(dim_string_target_name, '') + dim_string)
                             # If the variable is conditionally allocated, nullify pointer
                             if not conditional == '.true.':
-                                actions_out += '        nullify({p})\n'.format(p=f"{tmpptr.local_name}_array({CCPP_INTERNAL_VARIABLES[CCPP_THREAD_NUMBER]})%p")
+                                actions_out += pointer_nullification(thread_pointer(tmpptr.local_name))
 
                             if actions_in:
                                 # Add the conditionals for the "before" operations
-                                actions_before += '''
-      if ({conditional}) then
-{actions_in}
-      end if
-'''.format(conditional=conditional, actions_in=actions_in.rstrip('\n'))
+                                actions_before.append(conditional_block(conditional, actions_in))
                             if actions_out:
                                 # Add the conditionals for the "after" operations
-                                actions_after += '''
-      if ({conditional}) then
-{actions_out}
-      end if
-'''.format(conditional=conditional, actions_out=actions_out.rstrip('\n'))
+                                actions_after.append(conditional_block(conditional, actions_out))
 
                             # Add to argument list
                             if conditional == '.true.':
@@ -1800,74 +1973,62 @@ end module {module}
                                     var_name=local_vars[var_standard_name]['name'].replace(dim_string_target_name, ''), dim_string=dim_string)
                             else:
                                 arg = '{local_name}={ptr_name},'.format(local_name=var.local_name,
-                                                                        ptr_name=f"{tmpptr.local_name}_array({CCPP_INTERNAL_VARIABLES[CCPP_THREAD_NUMBER]})%p")
+                                                                        ptr_name=thread_pointer(tmpptr.local_name))
 
                         else:
                             arg = ''
-                        args += arg
+                        args.append(arg)
                         length += len(arg)
                         # Split args so that lines don't get too long
                         if length > 70 and not var_standard_name == arguments[scheme_name][subroutine_name][-1]:
-                            args += ' &\n                  '
+                            args.append(' &\n                  ')
                             length = 0
-                    args = args.rstrip(',')
-                    subroutine_call = '''
-{actions_before}
-
-      call {subroutine_name}({args})
-
-{actions_after}
-'''.format(subroutine_name=subroutine_name, args=args, actions_before=actions_before.rstrip('\n'), actions_after=actions_after.rstrip('\n'))
-                    error_check = '''if ({target_name_flag}/=0) then
-        {target_name_msg} = "An error occured in {subroutine_name}: " // trim({target_name_msg})
-        ierr={target_name_flag}
-        return
-      end if
-'''.format(target_name_flag=ccpp_error_code_target_name, target_name_msg=ccpp_error_msg_target_name, subroutine_name=subroutine_name)
-                    subcycle_body += '''
-      {subroutine_call}
-      {error_check}
-    '''.format(subroutine_call=subroutine_call, error_check=error_check)
-
-                    module_use += '   use {m}, only: {s}\n'.format(m=module_name, s=subroutine_name)
+                    subroutine_call = Group.subroutine_call.format(subroutine_name=subroutine_name,
+                                                                   args=''.join(args).rstrip(','),
+                                                                   actions_before=''.join(actions_before).rstrip('\n'),
+                                                                   actions_after=''.join(actions_after).rstrip('\n'),
+                                                                   timer_start=timer_start, timer_stop=timer_stop)
+                    subcycle_body.append(Group.scheme_call.format(subroutine_call=subroutine_call,
+                                                                  error_check=error_check(ccpp_error_code_target_name,
+                                                                                          ccpp_error_msg_target_name,
+                                                                                          subroutine_name)))
+
+                    module_use.append('   use {m}, only: {s}\n'.format(m=module_name, s=subroutine_name))
 
                 # If this subcycle calls any schemes, i.e. has any variables registered
                 # that need to be passed to the group for this stage, then handle the
                 # subcycle loops by prepending/appending the necessary code to subcycle_body
-                subcycle_body_prefix = '''
-      ! Start of next subcycle
-'''
-                subcycle_body_suffix = ''
+                subcycle_body_prefix = [Group.subcycle_start]
+                subcycle_body_suffix = []
                 if self.parents[ccpp_stage]:
                     # Set subcycle loop extent
                     if ccpp_stage == 'run':
-                        subcycle_body_prefix += '''
-      ! Set loop extent variable for the following subcycle
-      {loop_extent_var_name} = {loop_cnt_max}
-'''.format(loop_extent_var_name=ccpp_loop_extent_target_name,
-                                  loop_cnt_max=subcycle.loop)
+                        loop_cnt_max = subcycle.loop
                     else:
-                        subcycle_body_prefix += '''
-      ! Set loop extent variable for the following subcycle
-      {loop_extent_var_name} = 1
-'''.format(loop_extent_var_name=ccpp_loop_extent_target_name)
+                        loop_cnt_max = 1
+                    subcycle_body_prefix.append(Group.loop_extent.format(loop_extent_var_name=ccpp_loop_extent_target_name,
+                                                                         loop_cnt_max=loop_cnt_max))
                     # Create subcycle (Fortran do loop) if needed
-                    if subcycle.loop > 1 and ccpp_stage == 'run':
-                        subcycle_body_prefix += '''
-      associate(cnt => {loop_var_name})
-      do cnt=1,{loop_cnt_max}\n\n'''.format(loop_var_name=ccpp_loop_counter_target_name,
-                                                        loop_cnt_max=subcycle.loop)
-                        subcycle_body_suffix += '''
-      end do
-      end associate
-'''
+                    if subcycle_loop:
+                        if subcycle_timer is not None:
+                            subcycle_body_prefix.append('\n      ' + SchemeTimers.start_stmt(2))
+                        subcycle_body_prefix.append(Group.subcycle_loop_start.format(loop_var_name=ccpp_loop_counter_target_name,
+                                                                                     loop_cnt_max=subcycle.loop))
+                        subcycle_body_suffix.append(Group.subcycle_loop_end)
+                        if subcycle_timer is not None:
+                            subcycle_body_suffix.append('      ' + SchemeTimers.stop_stmt(subcycle_timer, 2) + '\n')
                     else:
-                        subcycle_body_prefix += '''
-      {loop_var_name} = 1\n'''.format(loop_var_name=ccpp_loop_counter_target_name)
+                        subcycle_body_prefix.append('\n      {loop_var_name} = 1\n'.format(loop_var_name=ccpp_loop_counter_target_name))
 
                 # Add this subcycle's Fortran body to the group body
                 if subcycle_body:
-                    body += subcycle_body_prefix + subcycle_body + subcycle_body_suffix
+                    body.extend(subcycle_body_prefix + subcycle_body + subcycle_body_suffix)
+
+            # Time all scheme calls of this stage of the group
+            if group_timer is not None:
+                body.insert(0, '\n      ' + SchemeTimers.start_stmt(1) + '\n')
+                body.append('\n      ' + SchemeTimers.stop_stmt(group_timer, 1) + '\n')
+                var_defs_manual.append(SchemeTimers.start_declaration(3))
 
             #For the init stage, for the case when the suite doesn't have any schemes with init phases,
             #we still need to add the host-supplied ccpp_t variable to the init group caps so that it is
@@ -1906,13 +2067,13 @@ end module {module}
                                         target_name_msg=ccpp_error_msg_target_name,
                                         name=self._name)
             # Create subroutine
-            local_subs += Group.sub.format(subroutine=subroutine,
-                                           argument_list=sub_argument_list,
-                                           module_use='\n      '.join(sub_module_use),
-                                           initialized_test_block=initialized_test_block,
-                                           initialized_set_block=initialized_set_block,
-                                           var_defs='\n      '.join(sub_var_defs + var_defs_manual),
-                                           body=body)
+            local_subs.append(Group.sub.format(subroutine=subroutine,
+                                               argument_list=sub_argument_list,
+                                               module_use='\n      '.join(sub_module_use),
+                                               initialized_test_block=initialized_test_block,
+                                               initialized_set_block=initialized_set_block,
+                                               var_defs='\n      '.join(sub_var_defs + var_defs_manual),
+                                               body=''.join(body)))
 
         # Write output to stdout or file
         if (self.filename is not sys.stdout):
@@ -1934,13 +2095,21 @@ end module {module}
                 f = open(self.filename, 'w')
         else:
             f = sys.stdout
-        f.write(Group.header.format(group=self._name,
-                                    module=self._module,
-                                    module_use=module_use,
-                                    subroutines=', &\n             '.join(self._subroutines),
-                                    num_instances=CCPP_NUM_INSTANCES))
-        f.write(local_subs)
-        f.write(Group.footer.format(module=self._module))
+        # Add the timer data and the timing table routines
+        if timers.num_timers > 0:
+            self._timer_routines = timers.public_routines()
+            timer_data = '\n' + SchemeTimers.format_lines(timers.data_lines(), 1)
+            local_subs.append('\n' + SchemeTimers.format_lines(timers.routine_lines(), 1))
+        else:
+            self._timer_routines = []
+            timer_data = ''
+        header = Group.header.format(group=self._name,
+                                     module=self._module,
+                                     module_use=''.join(module_use),
+                                     subroutines=', &\n             '.join(self._subroutines + self._timer_routines),
+                                     num_instances=CCPP_NUM_INSTANCES,
+                                     timer_data=timer_data)
+        f.write(''.join([header] + local_subs + [Group.footer.format(module=self._module)]))
         if (f is not sys.stdout):
             f.close()
             # See comment above on updating the group cap or not
@@ -2020,6 +2189,17 @@ end module {module}
         '''Get the module name.'''
         return self._module
 
+    @property
+    def timer_routines(self):
+        '''Get the public timing table routines of the group cap.'''
+        return self._timer_routines
+
+    @property
+    def deblocked_variables(self):
+        '''Get the blocked data converted for scheme calls of the group cap as a list
+        of (stage, subroutine name, standard name, intent, conversion) tuples.'''
+        return self._deblocked_variables
+
     @property
     def subcycles(self):
         '''Get the subcycles.'''
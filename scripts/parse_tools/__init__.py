@@ -20,6 +20,7 @@ from parse_checkers import check_diagnostic_id, check_diagnostic_fixed
 from parse_checkers import check_fortran_type, check_balanced_paren
 from parse_checkers import fortran_list_match
 from parse_checkers import registered_fortran_ddt_name
+from parse_checkers import registered_fortran_ddt_names
 from parse_checkers import register_fortran_ddt_name
 from parse_checkers import check_units, check_dimensions, check_cf_standard_name
 from parse_checkers import check_default_value, check_valid_values, check_molar_mass
@@ -68,6 +69,7 @@ __all__ = [
     'register_fortran_ddt_name',
     'read_xml_file',
     'registered_fortran_ddt_name',
+    'registered_fortran_ddt_names',
     'reset_standard_name_counter',
     'set_log_level',
     'set_log_to_file',
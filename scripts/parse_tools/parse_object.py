@@ -29,13 +29,27 @@ class ParseObject(ParseContext):
     ('## hi there mom', 0)
     >>> ParseObject('foobar.F90', ["!! line1","!! hi mom"], line_start=1).next_line()
     ('!! hi mom', 1)
+    >>> ParseObject('foobar.F90', (x for x in ["first line","## hi mom"]), line_start=1).curr_line()
+    ('## hi mom', 1)
+    >>> ParseObject('foobar.F90', iter(["## hi \\\\","mom"]), line_start=0).next_line()
+    ('## hi mom', 0)
+    >>> ParseObject('foobar.F90', iter(["## hi mom"])).peek_line(1) is None
+    True
     """
 
     _max_errors = 32
 
     def __init__(self, filename, lines_in, line_start=0):
-        """Initialize this ParseObject"""
-        self.__lines = lines_in
+        """Initialize this ParseObject.
+        <lines_in> is either a list of lines or an iterator which produces
+        lines. Lines from an iterator are only read as they are needed."""
+        if isinstance(lines_in, list):
+            self.__lines = lines_in
+            self.__line_source = None
+        else:
+            self.__lines = list()
+            self.__line_source = iter(lines_in)
+        # end if
         self.__line_start = line_start
         self.__line_end = line_start
         self.__line_next = line_start
@@ -54,8 +68,23 @@ class ParseObject(ParseContext):
         """Return the last line parsed"""
         return self.__line_end
 
+    def __read_to(self, line_num):
+        """Read lines from our line source (if any) until line, <line_num>,
+        is available or the line source is exhausted."""
+        while (line_num >= self.__num_lines) and (self.__line_source is not None):
+            try:
+                self.__lines.append(next(self.__line_source))
+                self.__num_lines += 1
+            except StopIteration:
+                self.__line_source = None
+            # end try
+        # end while
+
     def valid_line(self):
         """Return True if the current line is valid"""
+        if self.line_num >= self.__num_lines:
+            self.__read_to(self.line_num)
+        # end if
         return (self.line_num >= 0) and (self.line_num < self.__num_lines)
 
     @property
@@ -101,7 +130,8 @@ class ParseObject(ParseContext):
     def peek_line(self, line_num):
         """Return the text of <line_num> without advancing to that line.
         if <line_num> is out of bounds, return None."""
-        if (line_num >= 0) and (line_num < len(self.__lines)):
+        self.__read_to(line_num)
+        if (line_num >= 0) and (line_num < self.__num_lines):
             return self.__lines[line_num]
         # end if
         return None
@@ -112,6 +142,7 @@ class ParseObject(ParseContext):
         if self.__error_message:
             if self.__num_errors == self._max_errors:
                 self.__error_message += '\nMaximum number of errors exceeded'
+                self.__line_source = None # Stop reading new lines
                 self.line_num = self.__num_lines # Intentionally walk off end
                 self.__line_next = self.line_num
             elif self.__num_errors > self._max_errors:
@@ -138,6 +169,7 @@ class ParseObject(ParseContext):
     def reset_pos(self, line_start=0):
         """Attempt to set the current file position to <line_start>.
         If <line_start> is out of bounds, raise an exception."""
+        self.__read_to(line_start)
         if (line_start < 0) or (line_start >= self.__num_lines):
             emsg = 'Attempt to reset_pos to non-existent line, {}'
             raise CCPPError(emsg.format(line_start))
@@ -148,7 +180,8 @@ class ParseObject(ParseContext):
     def write_line(self, line_num, line):
         """Overwrite line, <line_num> with <line>.
         If <line_start> is out of bounds, raise an exception."""
-        if (line_num < 0) or (line_num >= len(self.__lines)):
+        self.__read_to(line_num)
+        if (line_num < 0) or (line_num >= self.__num_lines):
             emsg = 'Attempt to write non-existent line, {}'
             raise CCPPError(emsg.format(line_num))
         # end if
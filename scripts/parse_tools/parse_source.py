@@ -6,7 +6,6 @@
 # Python library imports
 from collections.abc import Iterable
 # end if
-import copy
 import sys
 import os.path
 import logging
@@ -156,7 +155,7 @@ class ParseInternalError(Exception):
 
 class ParseContextError(CCPPError):
     """Exception for errors using ParseContext"""
-    def __init__(self, errmsg, context):
+    def __init__(self, errmsg, context=None):
         """Initialize this exception"""
         logging.shutdown()
         message = "{}{}".format(errmsg, context_string(context))
@@ -165,36 +164,78 @@ class ParseContextError(CCPPError):
 ########################################################################
 
 class ContextRegion(Iterable):
-    """Class to imitate the LIFO nature of program language blocks"""
+    """Class to imitate the LIFO nature of program language blocks
+    The stack is stored as a chain of immutable (type, name, next) nodes
+    so that a copy can share its regions with the original stack.
+    >>> regions = ContextRegion()
+    >>> regions.push('MODULE', 'foo')
+    >>> regions.push('SUBROUTINE', 'bar')
+    >>> regions_copy = ContextRegion(regions)
+    >>> regions.pop()
+    ['SUBROUTINE', 'bar']
+    >>> regions.type_list(), regions_copy.type_list()
+    (['MODULE'], ['MODULE', 'SUBROUTINE'])
+    >>> len(regions_copy), regions_copy[0], regions_copy[-1]
+    (2, ['MODULE', 'foo'], ['SUBROUTINE', 'bar'])
+    """
 
-    def __init__(self):
-        """Initialize this ContextRegion"""
-        self._lifo = list()
+    __slots__ = ('_top', '_depth')
+
+    def __init__(self, regions=None):
+        """Initialize this ContextRegion, as a copy of <regions> if present"""
+        if regions is None:
+            self._top = None
+            self._depth = 0
+        else:
+            self._top = regions._top
+            self._depth = regions._depth
+        # end if
 
     def push(self, rtype, rname):
         """Push a new region onto the stack"""
-        self._lifo.append([rtype, rname])
+        self._top = (rtype, rname, self._top)
+        self._depth += 1
 
     def pop(self):
         """Remove the top item from the stack"""
-        return self._lifo.pop()
+        if self._top is None:
+            raise IndexError("pop from empty ContextRegion")
+        # end if
+        rtype, rname, self._top = self._top
+        self._depth -= 1
+        return [rtype, rname]
+
+    def _items(self):
+        """Return the stack as a list of [type, name] items, outermost
+        region first"""
+        items = list()
+        node = self._top
+        while node is not None:
+            items.append([node[0], node[1]])
+            node = node[2]
+        # end while
+        items.reverse()
+        return items
 
     def type_list(self):
         """Return just the types in the list"""
-        return [x[0] for x in self._lifo]
+        return [x[0] for x in self._items()]
 
     def __iter__(self):
         """Local version of iterator"""
-        for item in self._lifo:
+        for item in self._items():
             yield item[0]
 
     def __len__(self):
         """Local implementation of len builtin"""
-        return len(self._lifo)
+        return self._depth
 
     def __getitem__(self, index):
         """Special item getter for a ContextRegion"""
-        return self._lifo[index]
+        if (index == -1) and (self._top is not None):
+            return [self._top[0], self._top[1]]
+        # end if
+        return self._items()[index]
 
 ########################################################################
 
@@ -216,11 +257,14 @@ class ParseContext():
 
     """
 
+    __slots__ = ('__linenum', '__filename', '__regions')
+
     def __init__(self, linenum=None, filename=None, context=None):
         """Initialize this ParseContext"""
         # Set regions first in case of exception
         if context is not None:
-            self.__regions = copy.deepcopy(context.regions)
+            # The region chain is immutable so it can be shared
+            self.__regions = ContextRegion(context.regions)
         else:
             self.__regions = ContextRegion()
         # End if
@@ -240,7 +284,8 @@ class ParseContext():
             filename = "<standard input>"
         elif not isinstance(filename, str):
             raise CCPPError('ParseContext filename must be a string')
-        # No else, everything is okay
+        else:
+            filename = sys.intern(filename)
         # End if
         self.__linenum = linenum
         self.__filename = filename
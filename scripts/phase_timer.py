@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+
+"""
+Define the PhaseTimer object
+A PhaseTimer records the wall time, CPU time, and peak memory use of
+each phase of a CCPP Framework run so that a timing report can be
+written for performance tracking.
+The peak memory of a phase is measured with tracemalloc, which is only
+running while a phase is timed. It counts the memory allocated by Python
+during the phase, above the memory in use when the phase started.
+Tracing slows down the timed phases, so only compare the times in a
+report with the times in other reports.
+"""
+
+# Python library imports
+import contextlib
+import json
+import logging
+import sys
+import time
+import tracemalloc
+try:
+    import resource
+except ImportError:
+    resource = None # Peak memory is not available on this platform
+# end try
+
+## Version of the timing report layout, update when the layout changes
+_REPORT_FORMAT = 2
+
+## tracemalloc.reset_peak is needed to measure the peak of each phase
+_TRACE_PEAKS = hasattr(tracemalloc, 'reset_peak')
+
+###############################################################################
+def max_rss():
+###############################################################################
+    """Return the peak resident memory (high-water mark) of this process
+    in KiB or None if it cannot be determined."""
+    if resource is None:
+        return None
+    # end if
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        # macOS reports bytes rather than KiB
+        peak = peak // 1024
+    # end if
+    return peak
+
+###############################################################################
+class PhaseTimer:
+###############################################################################
+    """Object to record timing information for (possibly nested) phases.
+    A nested phase is recorded with its full name, e.g., 'outer/inner'.
+    Timing a phase more than once accumulates its times.
+    >>> timer = PhaseTimer()
+    >>> with timer.phase('outer'):
+    ...     with timer.phase('inner'):
+    ...         pass
+    >>> [x['name'] for x in timer.report()['phases']]
+    ['outer', 'outer/inner']
+    >>> timer.report()['phases'][1]['calls']
+    1
+    >>> with timer.phase('alloc'):
+    ...     data = [0] * 1000000
+    ...     del data
+    >>> timer.report()['phases'][2]['peak_memory_kib'] >= 7800
+    True
+    >>> timer.report()['phases'][0]['peak_memory_kib'] < 100
+    True
+    >>> disabled = PhaseTimer(enabled=False)
+    >>> with disabled.phase('outer'):
+    ...     pass
+    >>> disabled.report()['phases']
+    []
+    """
+
+    def __init__(self, enabled=True):
+        """Initialize a PhaseTimer object. If <enabled> is False, no
+        timing information is recorded."""
+        self.__enabled = enabled
+        self.__phases = {}
+        self.__stack = list()
+        # True if this timer started tracemalloc
+        self.__tracing = False
+
+    def __update_peaks(self):
+        """Record the peak traced memory since the last update in each
+        running phase and reset the peak for the next update."""
+        if _TRACE_PEAKS and tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1]
+            for entry in self.__stack:
+                entry[4] = max(entry[4], peak)
+            # end for
+            tracemalloc.reset_peak()
+        # end if
+
+    def start(self, name):
+        """Start timing phase, <name>, nested inside any running phase."""
+        if self.__enabled:
+            if _TRACE_PEAKS and (not tracemalloc.is_tracing()):
+                tracemalloc.start()
+                self.__tracing = True
+            # end if
+            self.__update_peaks()
+            mem_start = 0
+            if _TRACE_PEAKS and tracemalloc.is_tracing():
+                mem_start = tracemalloc.get_traced_memory()[0]
+            # end if
+            self.__stack.append([name, time.perf_counter(),
+                                 time.process_time(), mem_start, mem_start])
+        # end if
+
+    def stop(self):
+        """Stop timing the innermost running phase."""
+        if self.__enabled:
+            wall_end = time.perf_counter()
+            cpu_end = time.process_time()
+            self.__update_peaks()
+            full_name = '/'.join([x[0] for x in self.__stack])
+            _, wall_start, cpu_start, mem_start, mem_peak = self.__stack.pop()
+            if self.__tracing and (not self.__stack):
+                tracemalloc.stop()
+                self.__tracing = False
+            # end if
+            if full_name not in self.__phases:
+                self.__phases[full_name] = {'name' : full_name, 'calls' : 0,
+                                            'wall_time' : 0.0,
+                                            'cpu_time' : 0.0,
+                                            'peak_memory_kib' : None}
+            # end if
+            pdata = self.__phases[full_name]
+            pdata['calls'] += 1
+            pdata['wall_time'] += wall_end - wall_start
+            pdata['cpu_time'] += cpu_end - cpu_start
+            if _TRACE_PEAKS:
+                peak = (mem_peak - mem_start) // 1024
+                if pdata['peak_memory_kib'] is not None:
+                    peak = max(peak, pdata['peak_memory_kib'])
+                # end if
+                pdata['peak_memory_kib'] = peak
+            # end if
+        # end if
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Context manager to time phase, <name>."""
+        self.start(name)
+        try:
+            yield self
+        finally:
+            self.stop()
+        # end try
+
+    def report(self):
+        """Return a dictionary with the timing information for each phase
+        with each phase listed before its nested phases.
+        The peak memory of a phase (None if it cannot be measured) is the
+        largest peak of any call. The process high-water mark is reported
+        separately as 'max_rss_kib'."""
+        order = {x : i for i, x in enumerate(self.__phases)}
+        phases = sorted(self.__phases.values(),
+                        key=lambda x: self.__sort_key(x['name'], order))
+        return {'format' : _REPORT_FORMAT, 'phases' : phases,
+                'max_rss_kib' : max_rss()}
+
+    @staticmethod
+    def __sort_key(name, order):
+        """Return a key to sort phase, <name>, after its parent phase.
+        <order> is a dictionary with the completion order of each phase."""
+        parts = name.split('/')
+        return [order.get('/'.join(parts[0:x+1]), -1)
+                for x in range(len(parts))]
+
+    def write_report(self, filename):
+        """Write the timing report to <filename> in JSON format."""
+        with open(filename, 'w') as rfile:
+            json.dump(self.report(), rfile, indent=1)
+        # end with
+
+    def log_report(self, logger, level=logging.INFO):
+        """Write a summary of the timing report to <logger> at <level>."""
+        report = self.report()
+        logger.log(level, "{:<60} {:>6} {:>10} {:>10} {:>12}".format(
+            "Phase", "Calls", "Wall (s)", "CPU (s)", "Peak (KiB)"))
+        for pdata in report['phases']:
+            peak = pdata['peak_memory_kib']
+            logger.log(level, "{:<60} {:>6} {:>10.3f} {:>10.3f} {:>12}".format(
+                pdata['name'], pdata['calls'], pdata['wall_time'],
+                pdata['cpu_time'], peak if peak is not None else '-'))
+        # end for
+        max_kib = report['max_rss_kib']
+        logger.log(level, "{:<60} {:>41}".format(
+            "Process high-water mark (KiB)",
+            max_kib if max_kib is not None else '-'))
+
+    @property
+    def enabled(self):
+        """Return True if this timer records timing information"""
+        return self.__enabled
+
+###############################################################################
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
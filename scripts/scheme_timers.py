@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+#
+
+"""Fortran code for the optional scheme timers and call counters of
+generated caps. Capgen adds the timers to each suite cap module while
+ccpp_prebuild adds them to each group cap module."""
+
+# Name of the local array which holds the start times of open timers
+_TIMER_START = "ccpp_timer_start"
+
+class SchemeTimers:
+    """Class to collect the timed regions (e.g., groups, subcycles,
+    scheme calls) of a cap module and to create the Fortran code which
+    times them and reports the timing table.
+    >>> timers = SchemeTimers('my_suite')
+    >>> timers.add_timer('my_suite_physics', 'run')
+    1
+    >>> timers.add_timer('my_suite_physics/my_scheme_run', 'run')
+    2
+    >>> timers.num_timers
+    2
+    >>> SchemeTimers.start_stmt(2)
+    'call system_clock(ccpp_timer_start(2))'
+    >>> SchemeTimers.stop_stmt(1, 2)
+    'call ccpp_timer_stop(1, ccpp_timer_start(2))'
+    >>> SchemeTimers.start_declaration(2)
+    'integer(kind=8) :: ccpp_timer_start(2)'
+    >>> timers.public_routines()
+    ['my_suite_timing_table', 'my_suite_print_timing_table', 'my_suite_reset_timers']
+    >>> [x for x in timers.data_lines() if x[0].startswith('data')][2:]
+    [("data ccpp_timer_names(2) / 'my_suite_physics/my_scheme_run' /", 0), ("data ccpp_timer_phases(2) / 'run' /", 0)]
+    >>> SchemeTimers('my_suite').data_lines()
+    []
+    """
+
+    def __init__(self, prefix):
+        """Initialize the timers for a cap module. <prefix> is used to
+        create the names of the public timing table routines."""
+        self.__prefix = prefix
+        self.__timers = list()
+
+    def add_timer(self, name, phase):
+        """Add a timer for the region, <name>, which belongs to <phase>.
+        Return the index of the new timer."""
+        self.__timers.append((name, phase))
+        return len(self.__timers)
+
+    @property
+    def num_timers(self):
+        """Return the number of timers added to this object"""
+        return len(self.__timers)
+
+    @staticmethod
+    def start_stmt(depth):
+        """Return the Fortran statement which starts a timer nested
+        <depth> levels deep."""
+        return "call system_clock({}({}))".format(_TIMER_START, depth)
+
+    @staticmethod
+    def stop_stmt(index, depth):
+        """Return the Fortran statement which stops timer <index> which
+        was started by start_stmt(<depth>)."""
+        return "call ccpp_timer_stop({}, {}({}))".format(index, _TIMER_START,
+                                                         depth)
+
+    @staticmethod
+    def start_declaration(max_depth):
+        """Return the declaration of the start times of timers which are
+        nested at most <max_depth> levels deep."""
+        return "integer(kind=8) :: {}({})".format(_TIMER_START, max_depth)
+
+    def public_routines(self):
+        """Return the names of the public timing table routines"""
+        return ["{}_{}".format(self.__prefix, x)
+                for x in ["timing_table", "print_timing_table",
+                          "reset_timers"]]
+
+    def data_lines(self):
+        """Return the private module data of the timers as a list of
+        (statement, relative indent) pairs (see code_block.CodeBlock)."""
+        if not self.__timers:
+            return list()
+        # end if
+        nlen = max(len(x[0]) for x in self.__timers)
+        plen = max(len(x[1]) for x in self.__timers)
+        lines = [("! Scheme timers and call counters", 0),
+                 ("integer, parameter :: ccpp_num_timers = {}".format(self.num_timers), 0),
+                 ("character(len={}) :: ccpp_timer_names(ccpp_num_timers)".format(nlen), 0),
+                 ("character(len={}) :: ccpp_timer_phases(ccpp_num_timers)".format(plen), 0),
+                 ("integer(kind=8) :: ccpp_timer_calls(ccpp_num_timers) = 0", 0),
+                 ("integer(kind=8) :: ccpp_timer_ticks(ccpp_num_timers) = 0", 0)]
+        for index, (name, phase) in enumerate(self.__timers):
+            lines.append(("data ccpp_timer_names({}) / '{}' /".format(index + 1,
+                                                                    name), 0))
+            lines.append(("data ccpp_timer_phases({}) / '{}' /".format(index + 1,
+                                                                     phase), 0))
+        # end for
+        return lines
+
+    def routine_lines(self):
+        """Return the timer module procedures as a list of
+        (statement, relative indent) pairs (see code_block.CodeBlock)."""
+        if not self.__timers:
+            return list()
+        # end if
+        nlen = max(len(x[0]) for x in self.__timers)
+        plen = max(len(x[1]) for x in self.__timers)
+        table_name, print_name, reset_name = self.public_routines()
+        head_fmt = "'(a,t{},a,t{},a12,1x,a14)'".format(nlen + 2,
+                                                        nlen + plen + 3)
+        row_fmt = "'(a{},1x,a{},1x,i12,1x,f14.6)'".format(nlen, plen)
+        fmt_decl = "character(len=*), parameter :: {} = {}"
+        return [("subroutine ccpp_timer_stop(tindex, start)", 0),
+                ("! Add the time since <start> to timer <tindex> and count the call", 1),
+                ("integer,         intent(in) :: tindex", 1),
+                ("integer(kind=8), intent(in) :: start", 1),
+                ("integer(kind=8) :: clock", 1),
+                ("call system_clock(clock)", 1),
+                ("!$omp atomic", -1),
+                ("ccpp_timer_ticks(tindex) = ccpp_timer_ticks(tindex) + (clock - start)", 1),
+                ("!$omp atomic", -1),
+                ("ccpp_timer_calls(tindex) = ccpp_timer_calls(tindex) + 1", 1),
+                ("end subroutine ccpp_timer_stop", 0),
+                ("", 0),
+                ("subroutine {}(names, phases, calls, seconds)".format(table_name), 0),
+                ("! Return the name, phase, number of calls and total time of each timer", 1),
+                ("character(len=:), allocatable, intent(out) :: names(:)", 1),
+                ("character(len=:), allocatable, intent(out) :: phases(:)", 1),
+                ("integer(kind=8),  allocatable, intent(out) :: calls(:)", 1),
+                ("real(kind=8),     allocatable, intent(out) :: seconds(:)", 1),
+                ("integer(kind=8) :: rate", 1),
+                ("call system_clock(count_rate=rate)", 1),
+                ("names = ccpp_timer_names", 1),
+                ("phases = ccpp_timer_phases", 1),
+                ("calls = ccpp_timer_calls", 1),
+                ("seconds = real(ccpp_timer_ticks, 8) / real(rate, 8)", 1),
+                ("end subroutine {}".format(table_name), 0),
+                ("", 0),
+                ("subroutine {}(unit)".format(print_name), 0),
+                ("! Write the timing table to <unit> (default is standard output)", 1),
+                ("use iso_fortran_env, only: output_unit", 1),
+                ("integer, optional, intent(in) :: unit", 1),
+                (fmt_decl.format("head_fmt", head_fmt), 1),
+                (fmt_decl.format("row_fmt", row_fmt), 1),
+                ("integer         :: outunit", 1),
+                ("integer         :: tindex", 1),
+                ("integer(kind=8) :: rate", 1),
+                ("real(kind=8)    :: seconds", 1),
+                ("if (present(unit)) then", 1),
+                ("outunit = unit", 2),
+                ("else", 1),
+                ("outunit = output_unit", 2),
+                ("end if", 1),
+                ("call system_clock(count_rate=rate)", 1),
+                ("write(outunit, head_fmt) 'Name', 'Phase', 'Calls', 'Seconds'", 1),
+                ("do tindex = 1, ccpp_num_timers", 1),
+                ("seconds = real(ccpp_timer_ticks(tindex), 8) / real(rate, 8)", 2),
+                ("write(outunit, row_fmt) ccpp_timer_names(tindex), ccpp_timer_phases(tindex), &", 2),
+                ("ccpp_timer_calls(tindex), seconds", 3),
+                ("end do", 1),
+                ("end subroutine {}".format(print_name), 0),
+                ("", 0),
+                ("subroutine {}()".format(reset_name), 0),
+                ("! Set all timers and call counters to zero", 1),
+                ("ccpp_timer_calls = 0", 1),
+                ("ccpp_timer_ticks = 0", 1),
+                ("end subroutine {}".format(reset_name), 0)]
+
+    @staticmethod
+    def format_lines(lines, indent, spaces=3):
+        """Return <lines>, a list of (statement, relative indent) pairs,
+        as a block of text indented by <indent> levels of <spaces>.
+        Negative indents are not indented (see code_block.CodeBlock).
+        >>> SchemeTimers.format_lines([('do i = 1, 2', 0), ('!$omp atomic', -1), ('x = x + 1', 1), ('end do', 0)], 1)
+        '   do i = 1, 2\\n!$omp atomic\\n      x = x + 1\\n   end do\\n'
+        """
+        text = ''
+        for stmt, rindent in lines:
+            if stmt and (rindent >= 0):
+                text += ' '*(spaces*(indent + rindent)) + stmt + '\n'
+            else:
+                text += stmt + '\n'
+            # end if
+        # end for
+        return text
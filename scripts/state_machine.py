@@ -51,6 +51,14 @@ class StateMachine:
 
     >>> StateMachine([('ab','a','b','a'),('cd','c','d','c')]).transition_match('c')
     'cd'
+    >>> StateMachine([('ab','a','b','a'),('cd','c','d','c')]).transition_match('c', transition='ab')
+
+    >>> StateMachine([('ab','a','b','a'),('cd','c','d','c')]).function_match('foo_c', transition='ab')
+    (None, None, None)
+    >>> StateMachine([('ab','a','b','a'),('cd','c','d','a_c')]).function_match('foo_a_c')
+    ('foo', 'a_c', 'cd')
+    >>> StateMachine([('ab','a','b','a'),('cd','c','d','c')]).function_match('foo_c_a')
+    ('foo_c', 'a', 'ab')
     >>> StateMachine((('ab','a','b','a'),)).add_transition('ab','c','d','c') #doctest: +IGNORE_EXCEPTION_DETAIL
     Traceback (most recent call last):
     ValueError: ERROR: transition, 'ab', already exists
@@ -71,6 +79,9 @@ class StateMachine:
         """
         # Implement the State Transition Table as a tuple and use accessors
         self.__stt__ = OrderedDict()
+        # Results of transition_match and function_match by argument
+        self.__transition_cache = {}
+        self.__function_cache = {}
         if initial_data is not None:
             # Note that we need to add states with longer regular expressions
             # before short ones so that we match correctly.
@@ -109,7 +120,14 @@ class StateMachine:
 
     def transition_match(self, test_str, transition=None):
         """Return the matched transition, if found.
+        Results are cached by (<test_str>, <transition>) until the
+        transitions change. The cache is not bounded, it grows by one entry
+        for each distinct pair looked up.
         """
+        key = (test_str, transition)
+        if key in self.__transition_cache:
+            return self.__transition_cache[key]
+        # end if
         match_trans = None
         if transition is None:
             trans_list = self.transitions()
@@ -124,6 +142,7 @@ class StateMachine:
                 break
             # end if
         # end for
+        self.__transition_cache[key] = match_trans
         return match_trans
 
     def function_match(self, test_str, transition=None):
@@ -131,7 +150,15 @@ class StateMachine:
         transition if found.
         If <transition> is None, look for a match in any transition,
         otherwise, only look for a specific match to that transition.
+        Results are cached by (<test_str>, <transition>) until the
+        transitions change. The cache is not bounded, it grows by one entry
+        for each distinct pair looked up, i.e., for each scheme subroutine
+        name (and transition) looked up.
         """
+        key = (test_str, transition)
+        if key in self.__function_cache:
+            return self.__function_cache[key]
+        # end if
         if transition is None:
             trans_list = self.transitions()
         else:
@@ -150,8 +177,14 @@ class StateMachine:
                 break
             # end if
         # end for
+        self.__function_cache[key] = (func_id, trans_id, match_trans)
         return func_id, trans_id, match_trans
 
+    def __clear_match_caches(self):
+        """Discard the cached matches after a change to the transitions."""
+        self.__transition_cache = {}
+        self.__function_cache = {}
+
     def __getitem__(self, key):
         return self.__stt__[key]
 
@@ -165,9 +198,11 @@ class StateMachine:
         regex = re.compile(value[2] + r"$", flags=re.IGNORECASE)
         function = re.compile(FORTRAN_ID + r"_(" + value[2] + r")$", flags=re.IGNORECASE)
         self.__stt__[key] = (value[0], value[1], regex, function)
+        self.__clear_match_caches()
 
     def __delitem__(self, key):
         del self.__stt__[key]
+        self.__clear_match_caches()
 
     def __iter__(self):
         return iter(self.__stt__)
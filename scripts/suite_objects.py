@@ -20,7 +20,10 @@ from parse_tools import ParseInternalError, CCPPError
 from parse_tools import init_log, set_log_to_null
 from var_props import is_horizontal_dimension, find_horizontal_dimension
 from var_props import find_vertical_dimension
-from var_props import VarCompatObj
+from var_props import VarCompatObj, CCPP_LOOP_DIM_SUBSTS
+from array_contiguity import subscript_kind, combine_contiguity
+from array_contiguity import section_contiguity, CONTIGUOUS
+from scheme_timers import SchemeTimers
 
 # pylint: disable=too-many-lines
 
@@ -42,6 +45,8 @@ _API_LOCAL_VAR_TYPES = [_API_LOCAL_VAR_NAME, _API_SUITE_VAR_NAME]
 _API_CONTEXT = ParseContext(filename="ccpp_suite.py")
 _API_SOURCE = ParseSource(_API_SOURCE_NAME, _API_SCHEME_VAR_NAME, _API_CONTEXT)
 _API_LOCAL = ParseSource(_API_SOURCE_NAME, _API_LOCAL_VAR_NAME, _API_CONTEXT)
+# Loop index names for fused variable transforms (one per dimension)
+_API_TRANSFORM_INDEX = "ccpp_transform_index{}"
 _API_TIMESPLIT_TAG = 'time_split'
 _API_PROCESSSPLIT_TAG = 'process_split'
 _API_LOGGING = init_log('ccpp_suite')
@@ -104,16 +109,27 @@ class CallList(VarDictionary):
                                   source_type=_API_GROUP_VAR_NAME,
                                   context=oldvar.context)
         # end if
+        new_stdname = newvar.get_prop_value('standard_name') not in self
         super().add_variable(newvar, run_env, exists_ok=exists_ok,
                              gen_unique=gen_unique, adjust_intent=adjust_intent)
+        if new_stdname and (self.__routine is not None):
+            # Parent scope lookups below <routine> may search this call list
+            self.__routine.clear_sub_scope_caches()
+        # end if
 
-    def call_string(self, cldicts=None, is_func_call=False, subname=None):
+    def call_string(self, cldicts=None, is_func_call=False, subname=None,
+                    array_args=None):
         """Return a dummy argument string for this call list.
         <cldict> may be a list of VarDictionary objects to search for
         local_names (default is to use self).
         <is_func_call> should be set to True to construct a call statement.
         If <is_func_call> is False, construct a subroutine dummy argument
         list.
+        If <array_args> is a list, append a tuple for each array argument
+        of a call statement with <cldicts>. The tuple is (dummy name,
+        actual argument, local variable, dictionary of the local variable,
+        subscript kinds of the actual argument (see
+        array_contiguity.subscript_kind)).
         """
         arg_str = ""
         arg_sep = ""
@@ -172,6 +188,15 @@ class CallList(VarDictionary):
                     if _BLANK_DIMS_RE.match(vdims) is None:
                         lname = lname + vdims
                     # end if
+                    if (array_args is not None) and (cldicts is not None):
+                        kinds = CallList.__subscript_kinds(var, dvar,
+                                                           need_dims,
+                                                           run_phase)
+                        if kinds:
+                            array_args.append((dummy, lname, dvar, cldict,
+                                               kinds))
+                        # end if
+                    # end if
                 # end if
                 if is_func_call:
                     arg_str += "{}{}={}".format(arg_sep, dummy, lname)
@@ -183,6 +208,30 @@ class CallList(VarDictionary):
         # end for
         return arg_str
 
+    @staticmethod
+    def __subscript_kinds(var, dvar, explicit_dims, loop_subst):
+        """Return the kinds of the subscripts of the actual argument, <dvar>,
+        passed to the dummy argument, <var> (see call_dimstring).
+        Return an empty list if <var> is not an array."""
+        dims = var.get_dimensions()
+        ddims = dvar.get_dimensions()
+        if len(dims) != len(ddims):
+            # Array reference, assume that it selects whole dimensions
+            return [subscript_kind(':', x) for x in dims]
+        # end if
+        kinds = list()
+        for dim, ddim in zip(dims, ddims):
+            if explicit_dims or (':' not in dim):
+                if loop_subst and (dim in CCPP_LOOP_DIM_SUBSTS):
+                    dim = CCPP_LOOP_DIM_SUBSTS[dim]
+                # end if
+                kinds.append(subscript_kind(dim, ddim))
+            else:
+                kinds.append(subscript_kind(':', ddim))
+            # end if
+        # end for
+        return kinds
+
     @property
     def routine(self):
         """Return the routine for this call list (or None)"""
@@ -217,6 +266,7 @@ class SuiteObject(VarDictionary):
         self.__needs_vertical = None
         self.__needs_horizontal = None
         self.__phase_type = phase_type
+        self.__timer = None
         # Initialize our dictionary
         super().__init__(self.name, run_env,
                          variables=variables, parent_dict=parent)
@@ -345,6 +395,7 @@ class SuiteObject(VarDictionary):
     def reset_parent(self, new_parent):
         """Reset the parent of this SuiteObject (which has been moved)"""
         self.__parent = new_parent
+        self.reset_parent_scope(new_parent)
 
     def phase(self):
         """Return the CCPP state phase_type for this SuiteObject"""
@@ -813,9 +864,8 @@ class SuiteObject(VarDictionary):
         # end if
         if (found_var is None) and any_scope and (self.parent is not None):
             # We do not have the variable, look to parents.
-            found_var = self.parent.find_variable(standard_name=stdname,
+            found_var = self.find_parent_variable(stdname,
                                                   source_var=source_var,
-                                                  any_scope=True,
                                                   clone=clone,
                                                   search_call_list=scl,
                                                   loop_subst=loop_subst)
@@ -997,6 +1047,42 @@ class SuiteObject(VarDictionary):
         processing of the return value"""
         return self.__parts[:]
 
+    @property
+    def timer(self):
+        """Return the (index, depth) of this SuiteObject's timer or None"""
+        return self.__timer
+
+    @timer.setter
+    def timer(self, value):
+        """Set the (index, depth) of this SuiteObject's timer"""
+        self.__timer = value
+
+    def add_timers(self, timers, group, depth):
+        """Add a timer to <timers> (a SchemeTimers object) for each timed
+        part of this SuiteObject. <group> is the Group which contains this
+        SuiteObject and <depth> is the nesting depth of the enclosing timer.
+        Return the maximum nesting depth of the added timers."""
+        max_depth = depth
+        for item in self.parts:
+            max_depth = max(max_depth, item.add_timers(timers, group, depth))
+        # end for
+        return max_depth
+
+    def array_args(self, group, dummy_contiguity):
+        """Return a list of the array arguments of the scheme calls in this
+        SuiteObject. Each item is a tuple, (scheme subroutine name,
+        dummy name, actual argument, class of the actual argument (see
+        array_contiguity), True if the dummy argument is declared
+        assumed-shape). <group> is the Group which contains this
+        SuiteObject. <dummy_contiguity> is a dictionary with the class of
+        the actual arguments passed to <group>'s dummy arrays (keyed by
+        standard name)."""
+        args = list()
+        for item in self.parts:
+            args.extend(item.array_args(group, dummy_contiguity))
+        # end for
+        return args
+
     @property
     def needs_vertical(self):
         """Return the vertical dimension this SuiteObject is missing or None"""
@@ -1090,6 +1176,7 @@ class Scheme(SuiteObject):
         """Initialize this physics Scheme"""
         name = scheme_xml.text
         self.__subroutine_name = None
+        self.__header = None
         self.__context = context
         self.__version = scheme_xml.get('version', None)
         self.__lib = scheme_xml.get('lib', None)
@@ -1144,6 +1231,7 @@ class Scheme(SuiteObject):
             if phase in func:
                 my_header = func[phase]
                 self.__subroutine_name = my_header.title
+                self.__header = my_header
             else:
                 self._has_run_phase = False
                 return set()
@@ -1592,6 +1680,20 @@ class Scheme(SuiteObject):
         # Add dummy variable (<var>_local) needed for transformation.
         dummy = var.clone(var.get_prop_value('local_name')+'_local')
         self.__group.manage_variable(dummy)
+        if self.run_env.persistent_transform_buffers:
+            self.__group.add_transform_buffer(dummy)
+        # end if
+
+        # Add the loop indices needed to fuse array transforms.
+        if self.run_env.fuse_var_transforms:
+            for index in range(var.get_rank()):
+                lname = _API_TRANSFORM_INDEX.format(index + 1)
+                ivar = Var({'local_name':lname, 'standard_name':lname,
+                            'type':'integer', 'units':'count',
+                            'dimensions':'()'}, _API_LOCAL, self.run_env)
+                self.__group.manage_variable(ivar)
+            # end for
+        # end if
 
         # Create indices (default) for transform.
         lindices   = [':']*var.get_rank()
@@ -1677,6 +1779,97 @@ class Scheme(SuiteObject):
         # end if
         outfile.write(stmt, indent)
 
+    def fused_transform_indices(self, var, dummy, rindices, lindices):
+        """Return the loop bounds and the loop indices needed to compute the
+        transform between <var> and <dummy> in a fused loop nest.
+        <rindices> are the array indices of <var> and <lindices> are the
+        array indices of <dummy> (see add_var_transform).
+        The loop bounds are a tuple with the (lower, upper) bounds of the
+        loop for each dimension of <dummy>. The loop indices are a tuple of
+        <var> indices and a tuple of <dummy> indices.
+        Return None if the transform cannot be computed in a loop nest."""
+        gvar = self.__group.find_local_name(dummy)
+        if (gvar is None) or (not lindices):
+            return None
+        # end if
+        # Array indices are only known for dummy arguments (lower bound one)
+        if self.__group.call_list.find_local_name(var) is None:
+            return None
+        # end if
+        dims = self.__group.allocate_dim_str(gvar.get_dimensions(),
+                                             gvar.context).split(', ')
+        bounds = list()
+        var_indices = list()
+        dummy_indices = list()
+        for dnum, (dim, vindex, dindex) in enumerate(zip(dims, rindices,
+                                                         lindices)):
+            loop_index = _API_TRANSFORM_INDEX.format(dnum + 1)
+            if dindex == ':':
+                lower, _, upper = dim.rpartition(':')
+                lower = lower if lower else '1'
+            else:
+                lower, _, upper = dindex.partition(':')
+            # end if
+            if (vindex == dindex) and (dindex != ':'):
+                var_indices.append(loop_index)
+            elif vindex == ':':
+                if lower == '1':
+                    var_indices.append(loop_index)
+                else:
+                    var_indices.append(f"{loop_index}-{lower}+1")
+                # end if
+            elif vindex == f"{upper}:{lower}:-1":
+                # Vertical flip
+                var_indices.append(f"{upper}-{loop_index}+{lower}")
+            else:
+                return None
+            # end if
+            bounds.append((lower, upper))
+            dummy_indices.append(loop_index)
+        # end for
+        return tuple(bounds), tuple(var_indices), tuple(dummy_indices)
+
+    def write_var_transforms(self, transforms, outfile, indent, forward):
+        """Write the variable transformations in <transforms> to <outfile>.
+        <transforms> is a list of (var, dummy, rindices, lindices, compat_obj)
+           with the arguments of write_var_transform.
+        If variable transforms are fused, all array transforms with the same
+           loop bounds are computed in a single loop nest."""
+        loop_nests = {}
+        for (var, dummy, rindices, lindices, compat_obj) in transforms:
+            fused = None
+            if self.run_env.fuse_var_transforms:
+                fused = self.fused_transform_indices(var, dummy,
+                                                     rindices, lindices)
+            # end if
+            if fused is None:
+                self.write_var_transform(var, dummy, rindices, lindices,
+                                         compat_obj, outfile, indent, forward)
+            else:
+                bounds, var_indices, dummy_indices = fused
+                loop_nests.setdefault(bounds, list()).append((var, dummy,
+                                                              var_indices,
+                                                              dummy_indices,
+                                                              compat_obj))
+            # end if
+        # end for
+        for bounds, nest in loop_nests.items():
+            # The first index varies fastest, make it the innermost loop
+            for level, (lower, upper) in enumerate(reversed(bounds)):
+                loop_index = _API_TRANSFORM_INDEX.format(len(bounds) - level)
+                outfile.write(f"do {loop_index} = {lower}, {upper}",
+                              indent+level)
+            # end for
+            for (var, dummy, rindices, lindices, compat_obj) in nest:
+                self.write_var_transform(var, dummy, rindices, lindices,
+                                         compat_obj, outfile,
+                                         indent+len(bounds), forward)
+            # end for
+            for level in reversed(range(len(bounds))):
+                outfile.write("end do", indent+level)
+            # end for
+        # end for
+
     def write(self, outfile, errcode, errmsg, indent):
         # Unused arguments are for consistent write interface
         # pylint: disable=unused-argument
@@ -1715,9 +1908,10 @@ class Scheme(SuiteObject):
         if len(self.__reverse_transforms) > 0:
             outfile.comment('Compute reverse (pre-scheme) transforms', indent+1)
         # end if
-        for (dummy, var, rindices, lindices, compat_obj) in self.__reverse_transforms:
-            tstmt = self.write_var_transform(var, dummy, rindices, lindices, compat_obj, outfile, indent+1, False)
-        # end for
+        self.write_var_transforms([(var, dummy, rindices, lindices, compat_obj)
+                                   for (dummy, var, rindices, lindices, compat_obj)
+                                   in self.__reverse_transforms],
+                                  outfile, indent+1, False)
         outfile.write('',indent+1)
         #
         # Associate any conditionally allocated variables.
@@ -1735,7 +1929,13 @@ class Scheme(SuiteObject):
             stmt = 'call {}({})'
             outfile.write('',indent+1)
             outfile.write('! Call scheme', indent+1)
+            if self.timer:
+                outfile.write(SchemeTimers.start_stmt(self.timer[1]), indent+1)
+            # end if
             outfile.write(stmt.format(self.subroutine_name, my_args), indent+1)
+            if self.timer:
+                outfile.write(SchemeTimers.stop_stmt(*self.timer), indent+1)
+            # end if
             outfile.write('',indent+1)
         # end if
         #
@@ -1756,12 +1956,52 @@ class Scheme(SuiteObject):
         if len(self.__forward_transforms) > 0:
             outfile.comment('Compute forward (post-scheme) transforms', indent+1)
         # end if
-        for (var, dummy, lindices, rindices, compat_obj) in self.__forward_transforms:
-            tstmt = self.write_var_transform(var, dummy, rindices, lindices, compat_obj, outfile, indent+1, True)
-        # end for
+        self.write_var_transforms([(var, dummy, rindices, lindices, compat_obj)
+                                   for (var, dummy, lindices, rindices, compat_obj)
+                                   in self.__forward_transforms],
+                                  outfile, indent+1, True)
         outfile.write('', indent)
         outfile.write('end if', indent)
 
+    def array_args(self, group, dummy_contiguity):
+        """Return a list of the array arguments of the call of this Scheme
+        (see SuiteObject.array_args)"""
+        if not self._has_run_phase:
+            return list()
+        # end if
+        cldicts = [self.__group, self.__group.call_list]
+        cldicts.extend(self.__group.suite_dicts())
+        call_args = list()
+        self.call_list.call_string(cldicts=cldicts, is_func_call=True,
+                                   subname=self.subroutine_name,
+                                   array_args=call_args)
+        args = list()
+        for dummy, actual, dvar, cldict, kinds in call_args:
+            lname = dvar.get_prop_value('local_name')
+            if cldict is self.__group.call_list:
+                stdname = dvar.get_prop_value('standard_name')
+                base = dummy_contiguity.get(stdname, CONTIGUOUS)
+            elif cldict is self.__group:
+                base = self.__group.local_contiguity(lname)
+            else:
+                # Suite variables are allocatable
+                base = CONTIGUOUS
+            # end if
+            assumed_shape = self.__header.is_assumed_shape_arg(dummy)
+            args.append((self.subroutine_name, dummy, actual,
+                         combine_contiguity(base, kinds), assumed_shape))
+        # end for
+        return args
+
+    def add_timers(self, timers, group, depth):
+        """Add a timer for the call of this Scheme to <timers>"""
+        if not self._has_run_phase:
+            return depth
+        # end if
+        name = "{}/{}".format(group.name, self.subroutine_name)
+        self.timer = (timers.add_timer(name, group.phase()), depth + 1)
+        return depth + 1
+
     def schemes(self):
         """Return self as a list for consistency with subcycle"""
         return [self]
@@ -1887,7 +2127,7 @@ class VerticalLoop(SuiteObject):
         for item in self.parts:
             item.write(outfile, errcode, errmsg, indent+1)
         # end for
-        outfile.write('end do', 2)
+        outfile.write('end do', indent)
 
     @property
     def dimension_name(self):
@@ -1908,11 +2148,12 @@ class Subcycle(SuiteObject):
             self._loop = loop_extent
             self._loop_var_int = True
         except ValueError:
+            self._loop = loop_extent
             self._loop_var_int = False
-            lvar = parent.find_variable(standard_name=self.loop, any_scope=True)
+            lvar = parent.find_variable(standard_name=self._loop, any_scope=True)
             if lvar is None:
                 emsg = "Subcycle, {}, specifies {} iterations but {} not found"
-                raise CCPPError(emsg.format(name, self.loop, self.loop))
+                raise CCPPError(emsg.format(name, self._loop, self._loop))
             # end if
             parent.add_call_list_variable(lvar)
         # end try
@@ -1928,11 +2169,11 @@ class Subcycle(SuiteObject):
             self.name = "subcycle_index{}".format(level)
         # end if
         # Create a variable for the loop index
-        self.add_variable(Var({'local_name':self.name,
-                               'standard_name':'loop_variable',
-                               'type':'integer', 'units':'count',
-                               'dimensions':'()'}, _API_SOURCE, self.run_env),
-                          self.run_env)
+        newvar = Var({'local_name':self.name, 'standard_name':self.name,
+                      'type':'integer', 'units':'count', 'dimensions':'()'},
+                     _API_LOCAL, self.run_env)
+        # The Group will manage this variable
+        group.manage_variable(newvar)
         # Handle all the suite objects inside of this subcycle
         scheme_mods = set()
         for item in self.parts:
@@ -1944,22 +2185,37 @@ class Subcycle(SuiteObject):
         # end for
         return scheme_mods
 
+    def add_timers(self, timers, group, depth):
+        """Add a timer for this Subcycle loop and its parts to <timers>"""
+        name = "{}/{}".format(group.name, self.name)
+        self.timer = (timers.add_timer(name, group.phase()), depth + 1)
+        return super().add_timers(timers, group, depth + 1)
+
     def write(self, outfile, errcode, errmsg, indent):
         """Write code for the subcycle loop, including contents, to <outfile>"""
+        if self.timer:
+            outfile.write(SchemeTimers.start_stmt(self.timer[1]), indent)
+        # end if
         outfile.write('do {} = 1, {}'.format(self.name, self.loop), indent)
         # Note that 'scheme' may be a sybcycle or other construct
         for item in self.parts:
             item.write(outfile, errcode, errmsg, indent+1)
         # end for
-        outfile.write('end do', 2)
+        outfile.write('end do', indent)
+        if self.timer:
+            outfile.write(SchemeTimers.stop_stmt(*self.timer), indent)
+        # end if
 
     @property
     def loop(self):
         """Return the loop value or variable local_name"""
-        lvar = self.find_variable(standard_name=self.loop, any_scope=True)
+        if self._loop_var_int:
+            return self._loop
+        # end if
+        lvar = self.find_variable(standard_name=self._loop, any_scope=True)
         if lvar is None:
             emsg = "Subcycle, {}, specifies {} iterations but {} not found"
-            raise CCPPError(emsg.format(self.name, self.loop, self.loop))
+            raise CCPPError(emsg.format(self.name, self._loop, self._loop))
         # end if
         lname = lvar.get_prop_value('local_name')
         return lname
@@ -2059,6 +2315,8 @@ class Group(SuiteObject):
                                 ('end if', 1),
                                 ('#endif', -1)])
 
+    __chunked_suffix = '_chunked'
+
     __process_types = [_API_TIMESPLIT_TAG, _API_PROCESSSPLIT_TAG]
 
     __process_xml = {}
@@ -2103,13 +2361,16 @@ class Group(SuiteObject):
         self._phase_check_stmts = list()
         self._set_state = None
         self._ddt_library = None
+        self.__buffered_transform_vars = {}
+        self.__transform_buffers = {}
+        self.__timer_depth = 0
 
     def phase_match(self, scheme_name):
         """If scheme_name matches the group phase, return the group and
             function ID. Otherwise, return None
         """
-        fid, tid, _ = CCPP_STATE_MACH.transition_match(scheme_name,
-                                                       transition=self.phase())
+        fid, tid, _ = CCPP_STATE_MACH.function_match(scheme_name,
+                                                     transition=self.phase())
         if tid is not None:
             return self, fid
         # end if
@@ -2204,6 +2465,298 @@ class Group(SuiteObject):
             raise CCPPError(emsg)
         # end if
 
+    def add_timers(self, timers, group=None, depth=0):
+        """Add a timer for this Group and its parts to <timers>"""
+        name = self.name
+        self.timer = (timers.add_timer(name, self.phase()), depth + 1)
+        self.__timer_depth = super().add_timers(timers, self, depth + 1)
+        return self.__timer_depth
+
+    def add_transform_buffer(self, var):
+        """Request a persistent suite buffer for the variable transform
+        array, <var>, instead of allocating it on every call of this Group.
+        Only run phase arrays with a horizontal dimension are buffered so
+        that concurrent calls for different columns use disjoint sections
+        of the buffer."""
+        if self.run_phase() and var.has_horizontal_dimension():
+            lname = var.get_prop_value('local_name')
+            self.__buffered_transform_vars[lname] = var
+        # end if
+
+    def buffered_transform_vars(self):
+        """Return a list of the variables registered with
+        add_transform_buffer"""
+        return list(self.__buffered_transform_vars.values())
+
+    def set_transform_buffer(self, lname, buffer_var):
+        """Point the variable transform array, <lname>, to the
+        suite variable, <buffer_var>, when this Group is called"""
+        self.__transform_buffers[lname] = buffer_var
+
+    def local_contiguity(self, lname):
+        """Return the class (see array_contiguity) of this Group's local
+        array, <lname>. Transform arrays which point to the columns of a
+        persistent buffer are contiguous because the buffer has its
+        horizontal dimension last."""
+        if lname in self.__transform_buffers:
+            bvar = self.__transform_buffers[lname]
+            hsection = 'horizontal_loop_begin:horizontal_loop_end'
+            kinds = [subscript_kind(hsection if is_horizontal_dimension(x)
+                                    else ':', x)
+                     for x in bvar.get_dimensions()]
+            return section_contiguity(kinds)
+        # end if
+        return CONTIGUOUS
+
+    def __write_buffer_remap(self, outfile, indent, lname, var):
+        """Write the pointer assignment of the transform array, <lname>,
+        to the columns of its suite buffer used by this Group call.
+        The buffer has its horizontal dimension last so its section is
+        contiguous and <lname> is remapped to it with explicit bounds."""
+        bvar = self.__transform_buffers[lname]
+        lbounds = list()
+        sections = list()
+        hsection = None
+        for dim in var.get_dimensions():
+            dim_str = self.allocate_dim_str([dim], var.context)
+            if is_horizontal_dimension(dim):
+                hsection = dim_str
+            else:
+                sections.append(':')
+            # end if
+            if ':' not in dim_str:
+                dim_str = '1:' + dim_str
+            # end if
+            lbounds.append(dim_str)
+        # end for
+        sections.append(hsection)
+        outfile.write("{}({}) => {}({})".format(lname, ','.join(lbounds),
+                                                bvar.get_prop_value('local_name'),
+                                                ','.join(sections)), indent)
+
+    @property
+    def chunked_driver_name(self):
+        """Return the name of the threaded driver for this Group or None
+        if this Group does not have one (see write_chunked_driver).
+        Only run phase Groups with a horizontal loop get a driver."""
+        if self.run_env.run_chunk_size < 1:
+            return None
+        # end if
+        if not self.run_phase():
+            return None
+        # end if
+        for stdname in ['horizontal_loop_begin', 'horizontal_loop_end']:
+            if self.call_list.find_variable(standard_name=stdname,
+                                            any_scope=False) is None:
+                return None
+            # end if
+        # end for
+        return self.name + Group.__chunked_suffix
+
+    def chunked_array_args(self, dummy_contiguity):
+        """Return a list of the horizontal array arguments passed by the
+        threaded driver of this Group to the Group (see write_chunked_driver).
+        Each item is a tuple, (standard name, dummy name, actual argument,
+        class of the actual argument (see array_contiguity)).
+        <dummy_contiguity> is a dictionary with the class of the actual
+        arguments passed to the driver (keyed by standard name)."""
+        args = list()
+        for var in self.call_list.variable_list():
+            dims = var.get_dimensions()
+            _, hindex = find_horizontal_dimension(dims)
+            if hindex < 0:
+                continue
+            # end if
+            stdname = var.get_prop_value('standard_name')
+            lname = var.get_prop_value('local_name')
+            sections = [':']*len(dims)
+            sections[hindex] = 'ccpp_chunk_first:ccpp_chunk_last'
+            kinds = [subscript_kind(x, y) for x, y in zip(sections, dims)]
+            base = dummy_contiguity.get(stdname, CONTIGUOUS)
+            args.append((stdname, lname,
+                         '{}({})'.format(lname, ','.join(sections)),
+                         combine_contiguity(base, kinds)))
+        # end for
+        return args
+
+    def write_chunked_driver(self, outfile, indent):
+        """Write a driver for this Group to <outfile>. The driver has the
+        same arguments as the Group plus the number of columns in each
+        block (chunk_size). The columns from horizontal_loop_begin to
+        horizontal_loop_end are split into blocks and the Group is called
+        for each block from an OpenMP parallel loop.
+        Each thread has its own error variables. If any call fails, the
+        error from the first failing block is returned.
+        Other non-array outputs are private to each thread and hold the
+        values from the last block on return."""
+        subname = self.chunked_driver_name
+        call_vars = self.call_list.variable_list()
+        lnames = dict()
+        for stdname in ['horizontal_loop_begin', 'horizontal_loop_end',
+                        'ccpp_error_code', 'ccpp_error_message']:
+            var = self.call_list.find_variable(standard_name=stdname,
+                                               any_scope=False)
+            if var is None:
+                emsg = "No {} variable for group, {}"
+                raise CCPPError(emsg.format(stdname, self.name))
+            # end if
+            lnames[stdname] = var.get_prop_value('local_name')
+        # end for
+        col_start = lnames['horizontal_loop_begin']
+        col_end = lnames['horizontal_loop_end']
+        errcode = lnames['ccpp_error_code']
+        errmsg = lnames['ccpp_error_message']
+        chunk_vars = {'begin' : 'ccpp_chunk_begin', 'end' : 'ccpp_chunk_end',
+                      'first' : 'ccpp_chunk_first', 'last' : 'ccpp_chunk_last'}
+        # Sort the call list into the Group call arguments and the
+        #    variables which need an OpenMP data-sharing clause
+        call_args = list()
+        chunk_ptrs = list()
+        last_vars = list()
+        for var in call_vars:
+            stdname = var.get_prop_value('standard_name')
+            lname = var.get_prop_value('local_name')
+            dims = var.get_dimensions()
+            _, hindex = find_horizontal_dimension(dims)
+            if stdname == 'horizontal_loop_begin':
+                arg = chunk_vars['begin']
+            elif stdname == 'horizontal_loop_end':
+                arg = chunk_vars['end']
+            elif stdname == 'ccpp_error_code':
+                arg = 'ccpp_chunk_errflg'
+            elif stdname == 'ccpp_error_message':
+                arg = 'ccpp_chunk_errmsg'
+            elif hindex >= 0:
+                sections = [':']*len(dims)
+                sections[hindex] = '{first}:{last}'.format(**chunk_vars)
+                arg = '{}({})'.format(lname, ','.join(sections))
+                if var.get_prop_value('optional'):
+                    # An absent optional array cannot be sectioned,
+                    #    pass a (possibly null) pointer to the section instead
+                    chunk_ptrs.append((var, lname + '_chunk', arg))
+                    arg = lname + '_chunk'
+                # end if
+            else:
+                arg = lname
+                if var.get_prop_value('intent') != 'in':
+                    if var.get_prop_value('optional'):
+                        emsg = "Cannot write threaded driver for {}, "
+                        emsg += "optional output variable, {}, has no "
+                        emsg += "horizontal dimension"
+                        raise CCPPError(emsg.format(self.name, lname))
+                    # end if
+                    last_vars.append(lname)
+                # end if
+            # end if
+            if stdname not in CCPP_CONSTANT_VARS:
+                call_args.append('{}={}'.format(lname, arg))
+            # end if
+        # end for
+        # Write the subroutine header and declarations
+        chunk_size = Var({'local_name':'chunk_size',
+                          'standard_name':'ccpp_chunk_size',
+                          'type':'integer', 'units':'count',
+                          'dimensions':'()', 'intent':'in'},
+                         _API_LOCAL, self.run_env)
+        args = self.call_list.call_string()
+        outfile.write(Group.__subhead.format(subname=subname,
+                                             args='chunk_size, ' + args),
+                      indent)
+        self._ddt_library.write_ddt_use_statements(call_vars, outfile,
+                                                   indent+1)
+        outfile.write('', 0)
+        outfile.write('! Dummy arguments', indent+1)
+        chunk_size.write_def(outfile, indent+1, self.call_list, dummy=True)
+        self.call_list.declare_variables(outfile, indent+1, dummy=True)
+        outfile.write('\n! Local Variables', indent+1)
+        local_ints = ['ccpp_num_chunks', 'ccpp_chunk', 'ccpp_error_chunk']
+        local_ints.extend(chunk_vars.values())
+        local_ints.append('ccpp_chunk_errflg')
+        for lname in local_ints:
+            lvar = chunk_size.clone(lname, remove_intent=True)
+            lvar.write_def(outfile, indent+1, self.call_list)
+        # end for
+        verrmsg = self.call_list.find_variable(standard_name='ccpp_error_message',
+                                               any_scope=False)
+        lvar = verrmsg.clone('ccpp_chunk_errmsg', remove_intent=True)
+        lvar.write_def(outfile, indent+1, self.call_list)
+        for var, pname, _ in chunk_ptrs:
+            if var.is_ddt():
+                vtype = 'type'
+            else:
+                vtype = var.get_prop_value('type')
+            # end if
+            dimstr = '(:' + ',:'*(var.get_rank() - 1) + ')'
+            var.write_ptr_def(outfile, indent+1, pname,
+                              var.get_prop_value('kind'), dimstr, vtype,
+                              initialize=False)
+        # end for
+        outfile.write('', 0)
+        # Check the block size
+        outfile.write('{} = 0'.format(errcode), indent+1)
+        outfile.write("{} = ''".format(errmsg), indent+1)
+        outfile.write('if (chunk_size < 1) then', indent+1)
+        outfile.write('{} = 1'.format(errcode), indent+2)
+        emsg = "write({}, '(a,i0)') 'Invalid chunk_size in {}, ', chunk_size"
+        outfile.write(emsg.format(errmsg, subname), indent+2)
+        outfile.write('return', indent+2)
+        outfile.write('end if', indent+1)
+        stmt = 'ccpp_num_chunks = ({} - {} + chunk_size) / chunk_size'
+        outfile.write(stmt.format(col_end, col_start), indent+1)
+        outfile.write('ccpp_error_chunk = ccpp_num_chunks + 1', indent+1)
+        # The parallel loop over the blocks
+        outfile.write('!$omp parallel do default(shared) schedule(dynamic) &',
+                      indent+1)
+        private_lists = [list(chunk_vars.values()),
+                         ['ccpp_chunk_errflg', 'ccpp_chunk_errmsg']]
+        for _, pname, _ in chunk_ptrs:
+            if len(', '.join(private_lists[-1] + [pname])) > 60:
+                private_lists.append(list())
+            # end if
+            private_lists[-1].append(pname)
+        # end for
+        clauses = ['private({})'.format(', '.join(x)) for x in private_lists]
+        clauses.extend(['firstprivate({0}) lastprivate({0})'.format(x)
+                        for x in last_vars])
+        for index, clause in enumerate(clauses):
+            cont = ' &' if index < len(clauses) - 1 else ''
+            outfile.write('!$omp {}{}'.format(clause, cont), indent+1)
+        # end for
+        outfile.write('do ccpp_chunk = 1, ccpp_num_chunks', indent+1)
+        stmt = '{} = {} + (ccpp_chunk - 1) * chunk_size'
+        outfile.write(stmt.format(chunk_vars['begin'], col_start), indent+2)
+        stmt = '{} = min({} + chunk_size - 1, {})'
+        outfile.write(stmt.format(chunk_vars['end'], chunk_vars['begin'],
+                                  col_end), indent+2)
+        # Array sections are relative to the first column of the dummy arrays
+        outfile.write('{} = {} - {} + 1'.format(chunk_vars['first'],
+                                                chunk_vars['begin'], col_start),
+                      indent+2)
+        outfile.write('{} = {} - {} + 1'.format(chunk_vars['last'],
+                                                chunk_vars['end'], col_start),
+                      indent+2)
+        for var, pname, section in chunk_ptrs:
+            outfile.write('nullify({})'.format(pname), indent+2)
+            lname = var.get_prop_value('local_name')
+            outfile.write('if (present({})) then'.format(lname), indent+2)
+            outfile.write('{} => {}'.format(pname, section), indent+3)
+            outfile.write('end if', indent+2)
+        # end for
+        outfile.write('call {}({})'.format(self.name, ', '.join(call_args)),
+                      indent+2)
+        outfile.write('if (ccpp_chunk_errflg /= 0) then', indent+2)
+        outfile.write('!$omp critical ({})'.format(subname), indent+3)
+        outfile.write('if (ccpp_chunk < ccpp_error_chunk) then', indent+3)
+        outfile.write('ccpp_error_chunk = ccpp_chunk', indent+4)
+        outfile.write('{} = ccpp_chunk_errflg'.format(errcode), indent+4)
+        outfile.write('{} = ccpp_chunk_errmsg'.format(errmsg), indent+4)
+        outfile.write('end if', indent+3)
+        outfile.write('!$omp end critical ({})'.format(subname), indent+3)
+        outfile.write('end if', indent+2)
+        outfile.write('end do', indent+1)
+        outfile.write('!$omp end parallel do', indent+1)
+        outfile.write(Group.__subend.format(subname=subname), indent)
+
     def analyze(self, phase, suite_vars, scheme_library, ddt_library,
                 check_suite_state, set_suite_state):
         """Analyze the Group's interface to prepare for writing"""
@@ -2425,7 +2978,8 @@ class Group(SuiteObject):
             target = subpart_allocate_vars[key][2]
             var.write_def(outfile, indent+1, spdict,
                           allocatable=(key in allocatable_var_set),
-                          target=target)
+                          target=target,
+                          pointer=(key in self.__transform_buffers))
         # end for
         # Target arrays.
         for key in subpart_optional_vars:
@@ -2434,12 +2988,22 @@ class Group(SuiteObject):
             target = subpart_optional_vars[key][2]
             var.write_def(outfile, indent+1, spdict,
                           allocatable=(key in optional_var_set),
-                          target=target)
+                          target=target,
+                          pointer=(key in self.__transform_buffers))
         # end for
         # Pointer variables
+        # A Group called by its threaded driver cannot initialize its local
+        #    pointers in their declarations (that would save them).
+        threaded = self.chunked_driver_name is not None
         for (name, kind, dim, vtype) in pointer_var_set:
-            var.write_ptr_def(outfile, indent+1, name,  kind, dim, vtype)
+            var.write_ptr_def(outfile, indent+1, name,  kind, dim, vtype,
+                              initialize=not threaded)
         # end for
+        # Timer start times
+        if self.timer:
+            outfile.write(SchemeTimers.start_declaration(self.__timer_depth),
+                          indent+1)
+        # end if
         outfile.write('', 0)
         # Get error variable names
         if self.run_env.use_error_obj:
@@ -2465,6 +3029,13 @@ class Group(SuiteObject):
             outfile.write("{} = ''".format(errmsg), 2)
             outfile.write("",2)
         # end if
+        if threaded and pointer_var_set:
+            outfile.write("! Nullify local pointers", indent+1)
+            for (name, _, _, _) in pointer_var_set:
+                outfile.write('nullify({})'.format(name), indent+1)
+            # end for
+            outfile.write("", 0)
+        # end if
         # Output threaded region check (except for run phase)
         if not self.run_phase():
             outfile.write("! Output threaded region check ",indent+1)
@@ -2482,12 +3053,20 @@ class Group(SuiteObject):
         alloc_stmt = "allocate({}({}))"
         for lname in allocatable_var_set:
             var = subpart_allocate_vars[lname][0]
+            if lname in self.__transform_buffers:
+                self.__write_buffer_remap(outfile, indent+1, lname, var)
+                continue
+            # end if
             dims = var.get_dimensions()
             alloc_str = self.allocate_dim_str(dims, var.context)
             outfile.write(alloc_stmt.format(lname, alloc_str), indent+1)
         # end for
         for lname in optional_var_set:
             var = subpart_optional_vars[lname][0]
+            if lname in self.__transform_buffers:
+                self.__write_buffer_remap(outfile, indent+1, lname, var)
+                continue
+            # end if
             dims = var.get_dimensions()
             alloc_str = self.allocate_dim_str(dims, var.context)
             outfile.write(alloc_stmt.format(lname, alloc_str), indent+1)
@@ -2516,17 +3095,31 @@ class Group(SuiteObject):
             # end if
         # end for
         # Write the scheme and subcycle calls
+        if self.timer:
+            outfile.write(SchemeTimers.start_stmt(self.timer[1]), indent+1)
+        # end if
         for item in self.parts:
             item.write(outfile, errcode, errmsg, indent + 1)
         # end for
+        if self.timer:
+            outfile.write(SchemeTimers.stop_stmt(*self.timer), indent+1)
+        # end if
         # Deallocate local arrays
         if allocatable_var_set:
             outfile.write('\n! Deallocate local arrays', indent+1)
         # end if
         for lname in allocatable_var_set:
+            if lname in self.__transform_buffers:
+                outfile.write('nullify({})'.format(lname), indent+1)
+                continue
+            # end if
             outfile.write('if (allocated({})) {} deallocate({})'.format(lname,' '*(20-len(lname)),lname), indent+1)
         # end for
         for lname in optional_var_set:
+            if lname in self.__transform_buffers:
+                outfile.write('nullify({})'.format(lname), indent+1)
+                continue
+            # end if
             outfile.write('if (allocated({})) {} deallocate({})'.format(lname,' '*(20-len(lname)),lname), indent+1)
         # end for
         # Nullify local pointers
@@ -11,7 +11,7 @@ VarCompatObj
 import keyword
 import re
 # CCPP framework imports
-from conversion_tools import unit_conversion
+from conversion_tools import unit_conversion_expr, UnitConversionError
 from framework_env import CCPPFrameworkEnv
 from parse_tools import check_local_name, check_fortran_type, context_string
 from parse_tools import check_molar_mass
@@ -852,8 +852,26 @@ class VarCompatObj:
                      "var_stdname", "real", "kind_phys", "km",['horizontal_dimension', 'vertical_layer_dimension'], "var2_lname", True, \
                      _DOCTEST_RUNENV).reverse_transform("var1_lname", "var2_lname", ('i','k'), ('i','nk-k+1'))
     'var1_lname(i,nk-k+1) = 1.0E+3_kind_phys*var2_lname(i,k)'
+
+    # Test that an identical check is reused from the cache
+    >>> VarCompatObj.clear_cache()
+    >>> _ = VarCompatObj("var_stdname", "real", "kind_phys", "m", [], "var1_lname", False, \
+                         "var_stdname", "real", "kind_phys", "km", [], "var2_lname", False, \
+                         _DOCTEST_RUNENV)
+    >>> VarCompatObj("var_stdname2", "real", "kind_phys", "m", [], "var3_lname", False, \
+                     "var_stdname2", "real", "kind_phys", "km", [], "var4_lname", False, \
+                     _DOCTEST_RUNENV).forward_transform("var3_lname", "var4_lname", [], [])
+    'var3_lname = 1.0E-3_kind_phys*var4_lname'
+    >>> VarCompatObj.cache_statistics()
+    (1, 2)
     """
 
+    # Results of previous checks, see __cache_key
+    __compat_cache = {}
+    # Number of checks made and number of checks reused from __compat_cache
+    __num_checks = 0
+    __num_reused = 0
+
     def __init__(self, var1_stdname, var1_type, var1_kind, var1_units,
                  var1_dims, var1_lname, var1_top, var2_stdname, var2_type, var2_kind,
                  var2_units, var2_dims, var2_lname, var2_top, run_env, v1_context=None,
@@ -874,6 +892,22 @@ class VarCompatObj:
         self.__v2_context = v2_context
         self.__v1_kind = var1_kind
         self.__v2_kind = var2_kind
+        # Reuse the result of an identical check, if possible
+        cache_key = None
+        if var1_stdname == var2_stdname:
+            cache_key = (var1_type, var1_kind, var1_units, tuple(var1_dims),
+                         var1_top, var2_type, var2_kind, var2_units,
+                         tuple(var2_dims), var2_top, run_env)
+        # end if
+        VarCompatObj.__num_checks += 1
+        if cache_key in VarCompatObj.__compat_cache:
+            VarCompatObj.__num_reused += 1
+            (self.__equiv, self.__compat, self.__v1_kind, self.__v2_kind,
+             self.__dim_transforms, self.__kind_transforms,
+             self.__unit_transforms, self.has_vert_transforms,
+             self.__incompat_reason) = VarCompatObj.__compat_cache[cache_key]
+            return
+        # end if
         # Default (null) transform information
         self.__dim_transforms = None
         self.__kind_transforms = None
@@ -902,6 +936,7 @@ class VarCompatObj:
                     emsg += "in {}{}"
                     incompat_reason.append(emsg.format(var1_kind,
                                                        var1_lname, ctx))
+                    cache_key = None # Reason is specific to this variable
                 # end if
                 self.__v1_kind = None
                 v2_kind = self.char_kind_check(var2_kind)
@@ -911,6 +946,7 @@ class VarCompatObj:
                     emsg += "in {}{}"
                     incompat_reason.append(emsg.format(var2_kind,
                                                        var2_lname, ctx))
+                    cache_key = None # Reason is specific to this variable
                 # end if
                 self.__v2_kind = None
                 # Character types have to 'match' or the variables are
@@ -966,6 +1002,31 @@ class VarCompatObj:
             # end if
         # end if
         self.__incompat_reason = " and ".join([x for x in incompat_reason if x])
+        if cache_key is not None:
+            VarCompatObj.__compat_cache[cache_key] = (self.__equiv,
+                                                      self.__compat,
+                                                      self.__v1_kind,
+                                                      self.__v2_kind,
+                                                      self.__dim_transforms,
+                                                      self.__kind_transforms,
+                                                      self.__unit_transforms,
+                                                      self.has_vert_transforms,
+                                                      self.__incompat_reason)
+        # end if
+
+    @classmethod
+    def cache_statistics(cls):
+        """Return the number of compatibility checks reused from the cache
+        of previous results and the total number of checks made."""
+        return cls.__num_reused, cls.__num_checks
+
+    @classmethod
+    def clear_cache(cls):
+        """Remove all cached compatibility results and reset the cache
+        statistics."""
+        cls.__compat_cache.clear()
+        cls.__num_checks = 0
+        cls.__num_reused = 0
 
     def forward_transform(self, lvar_lname, rvar_lname, rvar_indices, lvar_indices,
                           adjust_hdim=None, flip_vdim=None):
@@ -1117,6 +1178,9 @@ class VarCompatObj:
         """Attempt to retrieve the forward and reverse unit transformations
         for transforming a variable in <var1_units> to / from a variable in
         <var2_units>.
+        Hand-written conversions are used where they exist, otherwise the
+        conversion is derived from the unit algebra in conversion_tools.
+        Return None if the units are equivalent.
 
         # Initial setup
         >>> from parse_tools import init_log, set_log_to_null
@@ -1146,6 +1210,16 @@ class VarCompatObj:
         >>> _DOCTEST_VCOMPAT._get_unit_convstrs('C', 'K')
         ('{var}+273.15{kind}', '{var}-273.15{kind}')
 
+        # Try some derived (compound) unit transforms
+        >>> _DOCTEST_VCOMPAT._get_unit_convstrs('mm h-1', 'm s-1')
+        ('{var}/3.6E+6{kind}', '3.6E+6{kind}*{var}')
+        >>> _DOCTEST_VCOMPAT._get_unit_convstrs('g m-2', 'kg m-2')
+        ('1.0E-3{kind}*{var}', '1.0E+3{kind}*{var}')
+
+        # Try equivalent units (no transform required)
+        >>> _DOCTEST_VCOMPAT._get_unit_convstrs('m s-1', 's-1 m')
+
+
         # Try an invalid conversion
         >>> _DOCTEST_VCOMPAT._get_unit_convstrs('1', 'none') #doctest: +ELLIPSIS
         Traceback (most recent call last):
@@ -1158,25 +1232,28 @@ class VarCompatObj:
         ...
         parse_source.ParseSyntaxError: Unsupported unit conversion, 'C' to 'm' for 'var_stdname'
         """
-        u1_str = self.units_to_string(var1_units, self.__v1_context)
-        u2_str = self.units_to_string(var2_units, self.__v2_context)
-        unit_conv_str = "{0}__to__{1}".format(u1_str, u2_str)
+        # Check that the units entries are legal
+        self.units_to_string(var1_units, self.__v1_context)
+        self.units_to_string(var2_units, self.__v2_context)
         try:
-            forward_transform = getattr(unit_conversion, unit_conv_str)()
-        except AttributeError:
+            forward_transform = unit_conversion_expr(var1_units, var2_units)
+        except UnitConversionError:
             emsg = "Unsupported unit conversion, '{}' to '{}' for '{}'"
             raise ParseSyntaxError(emsg.format(var1_units, var2_units,
                                                self.__stdname,
                                                context=self.__v2_context))
-        # end if
-        unit_conv_str = "{0}__to__{1}".format(u2_str, u1_str)
+        # end try
         try:
-            reverse_transform = getattr(unit_conversion, unit_conv_str)()
-        except AttributeError:
+            reverse_transform = unit_conversion_expr(var2_units, var1_units)
+        except UnitConversionError:
             emsg = "Unsupported unit conversion, '{}' to '{}' for '{}'"
             raise ParseSyntaxError(emsg.format(var2_units, var1_units,
                                                self.__stdname,
                                                context=self.__v1_context))
+        # end try
+        if (forward_transform is None) and (reverse_transform is None):
+            # The units are equivalent (e.g., 'm s-1' and 's-1 m')
+            return None
         # end if
         return (forward_transform, reverse_transform)
 
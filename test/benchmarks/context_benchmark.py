@@ -0,0 +1,106 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Benchmark the time and memory used to parse a large,
+               synthetic host model metadata file and to clone its
+               variables. Most of this cost is in creating the
+               ParseContext object which is attached to every variable.
+
+ Assumptions:
+
+ Command line arguments: --modules N    Number of host modules
+                         --variables N  Number of variables per module
+                         --repeat N     Number of timing repetitions
+
+ Usage: python3 context_benchmark.py [--modules N] [--variables N]
+-----------------------------------------------------------------------
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.abspath(os.path.join(TEST_DIR, os.pardir, os.pardir, "scripts"))
+
+if not os.path.exists(SCRIPTS_DIR):
+    raise ImportError("Cannot find scripts directory")
+
+sys.path.append(SCRIPTS_DIR)
+
+# pylint: disable=wrong-import-position
+from framework_env import CCPPFrameworkEnv
+from metadata_table import parse_metadata_file
+# pylint: enable=wrong-import-position
+
+_MODULE_HEADER = """[ccpp-table-properties]
+  name = {mod}
+  type = module
+[ccpp-arg-table]
+  name = {mod}
+  type = module
+"""
+
+_VARIABLE_ENTRY = """[ {lname} ]
+  standard_name = {stdname}
+  type = real | kind = kind_phys
+  units = m s-1
+  dimensions = (horizontal_dimension, vertical_layer_dimension)
+"""
+
+def write_host_metadata(filename, num_modules, num_vars):
+    """Write a host metadata file with <num_modules> module tables,
+    each with <num_vars> variables, to <filename>."""
+    with open(filename, 'w') as mfile:
+        for mindex in range(num_modules):
+            mod = "bench_mod{}".format(mindex)
+            mfile.write(_MODULE_HEADER.format(mod=mod))
+            for vindex in range(num_vars):
+                lname = "var{}_{}".format(mindex, vindex)
+                mfile.write(_VARIABLE_ENTRY.format(lname=lname,
+                                                   stdname="bench_" + lname))
+
+def time_and_peak(func, repeat):
+    """Return the best time and the peak memory for calling <func>"""
+    times = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak, result
+
+def main():
+    """Parse the command line and run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument("--modules", type=int, default=20)
+    parser.add_argument("--variables", type=int, default=250)
+    parser.add_argument("--repeat", type=int, default=3)
+    pargs = parser.parse_args()
+    logger = logging.getLogger("context_benchmark")
+    run_env = CCPPFrameworkEnv(logger, ndict={'host_files':'',
+                                              'scheme_files':'',
+                                              'suites':''})
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, "bench_host.meta")
+        write_host_metadata(filename, pargs.modules, pargs.variables)
+        parse = lambda: parse_metadata_file(filename, list(), run_env)
+        ptime, ppeak, tables = time_and_peak(parse, pargs.repeat)
+    variables = [var for table in tables for sect in table.sections()
+                 for var in sect.variable_list()]
+    clone = lambda: [var.clone({'intent' : 'out'}) for var in variables]
+    ctime, cpeak, _ = time_and_peak(clone, pargs.repeat)
+    print("{} variables".format(len(variables)))
+    print("parse: {:8.3f} s, peak memory {:8.2f} MiB".format(ptime,
+                                                             ppeak / 2**20))
+    print("clone: {:8.3f} s, peak memory {:8.2f} MiB".format(ctime,
+                                                             cpeak / 2**20))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Benchmark the CCPP Framework on synthetic inputs at
+               several scales (see synthetic_inputs.py). For each scale,
+               time metadata parsing (parse_metadata_file), Fortran
+               parsing (parse_fortran_file), suite analysis (Suite.analyze),
+               suite cap writing (API.write), and datatable generation
+               (generate_ccpp_datatable) in capgen, and cap generation
+               (mkstatic) in ccpp_prebuild.
+               Results can be compared against a saved baseline to catch
+               scaling regressions.
+
+ Assumptions:
+
+ Command line arguments: --scales LIST     Comma-separated list of scales
+                         --repeat N        Number of timing repetitions
+                         --output FILE     Write the results to FILE (JSON)
+                         --baseline FILE   Compare against results in FILE
+                         --tolerance X     Allowed slowdown vs. baseline
+                         --min-time T      Ignore timings below T seconds
+
+ Usage: python3 framework_benchmark.py [--scales small,medium]
+                                       [--output results.json]
+                                       [--baseline results.json]
+-----------------------------------------------------------------------
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.abspath(os.path.join(TEST_DIR, os.pardir, os.pardir, "scripts"))
+
+if not os.path.exists(SCRIPTS_DIR):
+    raise ImportError("Cannot find scripts directory")
+
+sys.path.append(SCRIPTS_DIR)
+
+# pylint: disable=wrong-import-position
+from framework_env import CCPPFrameworkEnv
+from fortran_tools import parse_fortran_file
+from metadata_table import parse_metadata_file
+from synthetic_inputs import SCALES, HOST_NAME, write_case
+# pylint: enable=wrong-import-position
+
+## Timings reported for each scale, in report order
+_TIMINGS = ['parse_metadata_file', 'parse_fortran_file', 'suite_analyze',
+            'api_write', 'datatable', 'mkstatic_caps']
+
+## Phases of the capgen and ccpp_prebuild timing reports for each timing
+_CAPGEN_PHASES = {'suite_analyze' : 'suite_analysis',
+                  'api_write' : 'code_writing',
+                  'datatable' : 'datatable'}
+_PREBUILD_PHASES = {'mkstatic_caps' : 'code_writing'}
+
+def best_time(func, repeat):
+    """Return the best time for calling <func> <repeat> times"""
+    times = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def parse_case(files, run_env):
+    """Parse all the metadata files of a synthetic case, then all the
+    associated Fortran files. Return the metadata and Fortran parse times."""
+    known_ddts = list()
+    start = time.perf_counter()
+    for filename in files['host_files'] + files['scheme_files']:
+        for table in parse_metadata_file(filename, known_ddts, run_env):
+            if table.table_type == 'ddt':
+                known_ddts.append(table.table_name)
+    meta_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for filename in files['host_files'] + files['scheme_files']:
+        parse_fortran_file(os.path.splitext(filename)[0] + ".F90", run_env)
+    return meta_time, time.perf_counter() - start
+
+def run_tool(command, cwd, report_file, phases):
+    """Run <command> in <cwd> and return the wall times of <phases>
+    (a dictionary of timing name to phase name) from its timing report,
+    <report_file>."""
+    env = dict(os.environ)
+    # Make the generated code (and so the work done) reproducible
+    env['PYTHONHASHSEED'] = '0'
+    subprocess.run(command + ["--timing-report", report_file], cwd=cwd,
+                   env=env, check=True, stdout=subprocess.DEVNULL,
+                   stderr=subprocess.PIPE)
+    with open(report_file, 'r') as rfile:
+        report = json.load(rfile)
+    wall_times = {x['name'] : x['wall_time'] for x in report['phases']}
+    return {x : wall_times[y] for x, y in phases.items()}
+
+def run_capgen(casedir, files):
+    """Run capgen on the synthetic case in <casedir> and return its
+    phase timings"""
+    command = [sys.executable, os.path.join(SCRIPTS_DIR, "ccpp_capgen.py"),
+               "--host-files", ",".join(files['host_files']),
+               "--scheme-files", ",".join(files['scheme_files']),
+               "--suites", ",".join(files['suites']),
+               "--host-name", HOST_NAME,
+               "--output-root", os.path.join(casedir, "capgen_out")]
+    return run_tool(command, casedir, os.path.join(casedir, "capgen.json"),
+                    _CAPGEN_PHASES)
+
+def run_prebuild(casedir):
+    """Run ccpp_prebuild on the synthetic case in <casedir> and return
+    its phase timings"""
+    command = [sys.executable, os.path.join(SCRIPTS_DIR, "ccpp_prebuild.py"),
+               "--config=ccpp_prebuild_config.py", "--builddir=build"]
+    return run_tool(command, casedir, os.path.join(casedir, "prebuild.json"),
+                    _PREBUILD_PHASES)
+
+def run_scale(name, repeat, run_env):
+    """Generate the synthetic cases for scale, <name>, and return a
+    dictionary with the size of the case and the best timings."""
+    scale = SCALES[name]
+    timings = {x : None for x in _TIMINGS}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        capgen_dir = os.path.join(tmpdir, "capgen")
+        files = write_case(capgen_dir, scale)
+        prebuild_dir = os.path.join(tmpdir, "prebuild")
+        write_case(prebuild_dir, scale, prebuild=True)
+        for _ in range(repeat):
+            meta_time, fort_time = parse_case(files, run_env)
+            results = run_capgen(capgen_dir, files)
+            results.update(run_prebuild(prebuild_dir))
+            results['parse_metadata_file'] = meta_time
+            results['parse_fortran_file'] = fort_time
+            for key, value in results.items():
+                if (timings[key] is None) or (value < timings[key]):
+                    timings[key] = value
+    num_vars = scale['ddts'] * scale['fields'] + scale['module_vars']
+    return {'host_variables' : num_vars, 'schemes' : scale['schemes'],
+            'suites' : scale['suites'], 'timings' : timings}
+
+def compare_results(results, baseline, tolerance, min_time):
+    """Return a list of regressions of <results> relative to <baseline>.
+    A timing regresses if it is more than <tolerance> times its baseline
+    value and longer than <min_time> seconds."""
+    regressions = list()
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for key, value in result['timings'].items():
+            base = baseline[name]['timings'].get(key)
+            if (base is not None) and (value > min_time) and \
+               (value > base * tolerance):
+                regressions.append("{} {}: {:.3f} s (baseline {:.3f} s)".format(name, key, value, base))
+    return regressions
+
+def main():
+    """Parse the command line and run the benchmarks"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument("--scales", type=str, default="small,medium")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", type=str, default=None)
+    parser.add_argument("--baseline", type=str, default=None)
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    parser.add_argument("--min-time", type=float, default=0.1)
+    pargs = parser.parse_args()
+    scales = [x.strip() for x in pargs.scales.split(',') if x.strip()]
+    for name in scales:
+        if name not in SCALES:
+            parser.error("Unknown scale, '{}', must be one of {}".format(name, ', '.join(sorted(SCALES))))
+    logger = logging.getLogger("framework_benchmark")
+    run_env = CCPPFrameworkEnv(logger, ndict={'host_files':'',
+                                              'scheme_files':'',
+                                              'suites':''})
+    results = dict()
+    print("{:<8} {:>9} {:>8} ".format("Scale", "Host vars", "Schemes") +
+          " ".join(["{:>20}".format(x) for x in _TIMINGS]))
+    for name in scales:
+        results[name] = run_scale(name, pargs.repeat, run_env)
+        timings = results[name]['timings']
+        print("{:<8} {:>9} {:>8} ".format(name, results[name]['host_variables'],
+                                          results[name]['schemes']) +
+              " ".join(["{:>20.3f}".format(timings[x]) for x in _TIMINGS]))
+    if pargs.output:
+        with open(pargs.output, 'w') as ofile:
+            json.dump(results, ofile, indent=1)
+    if pargs.baseline:
+        with open(pargs.baseline, 'r') as bfile:
+            baseline = json.load(bfile)
+        regressions = compare_results(results, baseline, pargs.tolerance,
+                                      pargs.min_time)
+        for regression in regressions:
+            print("REGRESSION: {}".format(regression))
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
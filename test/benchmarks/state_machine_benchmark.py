@@ -0,0 +1,121 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Benchmark the lookup of subroutine names in the CCPP state
+               machine (StateMachine.function_match and
+               StateMachine.transition_match) for many synthetic scheme
+               subroutine names. The first lookup of each name (which
+               tries the regular expression of each transition in turn)
+               is compared with a repeated, cached, lookup.
+
+ Assumptions:
+
+ Command line arguments: --names N      Number of scheme names
+                         --repeat N     Number of timing repetitions
+
+ Usage: python3 state_machine_benchmark.py [--names N] [--repeat N]
+-----------------------------------------------------------------------
+"""
+import argparse
+import os
+import sys
+import time
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.abspath(os.path.join(TEST_DIR, os.pardir, os.pardir, "scripts"))
+
+if not os.path.exists(SCRIPTS_DIR):
+    raise ImportError("Cannot find scripts directory")
+
+sys.path.append(SCRIPTS_DIR)
+
+# pylint: disable=wrong-import-position
+from ccpp_state_machine import CCPP_STATE_MACH
+from state_machine import StateMachine
+# pylint: enable=wrong-import-position
+
+## Subroutine name suffixes, including some which match no transition
+_SUFFIXES = ['init', 'initialize', 'timestep_init', 'timestep_initialize',
+             'run', 'timestep_final', 'timestep_finalize', 'final',
+             'finalize', 'RUN', 'initial_state', 'run_2', 'finalizer']
+
+def subroutine_names(num_names):
+    """Return the subroutine names of <num_names> synthetic schemes"""
+    return ["scheme_{}_{}".format(index, suffix)
+            for index in range(num_names) for suffix in _SUFFIXES]
+
+def loop_function_match(state_machine, test_str):
+    """Return the result of <state_machine>.function_match for <test_str>
+    by trying the function regular expression of each transition in turn."""
+    for trans in state_machine.transitions():
+        match = state_machine.function_regex(trans).match(test_str)
+        if match is not None:
+            return match.group(1), match.group(2), trans
+        # end if
+    # end for
+    return None, None, None
+
+def loop_transition_match(state_machine, test_str):
+    """Return the result of <state_machine>.transition_match for <test_str>
+    by trying the regular expression of each transition in turn."""
+    for trans in state_machine.transitions():
+        if state_machine.transition_regex(trans).match(test_str) is not None:
+            return trans
+        # end if
+    # end for
+    return None
+
+def new_state_machine():
+    """Return a copy of the CCPP state machine with no cached matches"""
+    return StateMachine([(x, CCPP_STATE_MACH.initial_state(x),
+                          CCPP_STATE_MACH.final_state(x),
+                          CCPP_STATE_MACH.transition_regex(x).pattern[:-1])
+                         for x in CCPP_STATE_MACH.transitions()])
+
+def best_time(func, repeat):
+    """Return the best time for calling <func> <repeat> times"""
+    times = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    """Parse the command line and run the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument("--names", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    pargs = parser.parse_args()
+    names = subroutine_names(pargs.names)
+    suffixes = [x.split('_', 2)[2] for x in names]
+    state_machine = new_state_machine()
+    # Check that the cached lookups find the same transitions
+    for name, suffix in zip(names, suffixes):
+        if ((state_machine.function_match(name) !=
+             loop_function_match(state_machine, name)) or
+            (state_machine.transition_match(suffix) !=
+             loop_transition_match(state_machine, suffix))):
+            raise ValueError("Lookup mismatch for '{}'".format(name))
+        # end if
+    # end for
+    timings = dict()
+    timings['loop'] = best_time(lambda: [loop_function_match(state_machine, x)
+                                         for x in names] +
+                                [loop_transition_match(state_machine, x)
+                                 for x in suffixes], pargs.repeat)
+    def uncached():
+        machine = new_state_machine()
+        return ([machine.function_match(x) for x in names] +
+                [machine.transition_match(x) for x in suffixes])
+    timings['first'] = best_time(uncached, pargs.repeat)
+    timings['cached'] = best_time(lambda: [state_machine.function_match(x)
+                                           for x in names] +
+                                  [state_machine.transition_match(x)
+                                   for x in suffixes], pargs.repeat)
+    print("{} subroutine names".format(len(names)))
+    for key, value in timings.items():
+        print("{:<9} {:8.3f} s".format(key + ':', value))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,436 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Generators for synthetic, large CCPP inputs used by the
+               framework benchmarks. A synthetic case consists of a host
+               model with many DDTs and module variables, many schemes
+               (each with init, run, and finalize metadata tables), and
+               suite definition files with nested subcycles.
+               Inputs can be written for either capgen or ccpp_prebuild.
+
+ Assumptions:
+
+ Command line arguments: --scale NAME  Size of the synthetic case
+                         --prebuild    Write ccpp_prebuild inputs
+                         output_dir    Directory for the synthetic case
+
+ Usage: python3 synthetic_inputs.py [--scale NAME] [--prebuild] output_dir
+-----------------------------------------------------------------------
+"""
+import argparse
+import os
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.abspath(os.path.join(TEST_DIR, os.pardir, os.pardir, "src"))
+
+## Sizes of the synthetic cases:
+##   ddts:            Number of host DDTs
+##   fields:          Number of fields in each host DDT
+##   module_vars:     Number of host module variables (outside of DDTs)
+##   schemes:         Number of schemes
+##   suites:          Number of suite definition files
+##   groups:          Number of groups in each suite
+##   vars_per_scheme: Number of host variables used by each scheme run phase
+SCALES = {'small'  : {'ddts' : 5, 'fields' : 20, 'module_vars' : 100,
+                      'schemes' : 20, 'suites' : 2, 'groups' : 2,
+                      'vars_per_scheme' : 4},
+          'medium' : {'ddts' : 20, 'fields' : 50, 'module_vars' : 1000,
+                      'schemes' : 100, 'suites' : 4, 'groups' : 3,
+                      'vars_per_scheme' : 6},
+          'large'  : {'ddts' : 50, 'fields' : 60, 'module_vars' : 3000,
+                      'schemes' : 300, 'suites' : 8, 'groups' : 4,
+                      'vars_per_scheme' : 8}}
+
+## Name of the synthetic host model
+HOST_NAME = "bench_host"
+
+_TABLE_HEADER = """[ccpp-table-properties]
+  name = {name}
+  type = {ttype}
+[ccpp-arg-table]
+  name = {name}
+  type = {ttype}
+"""
+
+_SECTION_HEADER = """[ccpp-arg-table]
+  name = {name}
+  type = {ttype}
+"""
+
+_FIELD_ENTRY = """[ {lname} ]
+  standard_name = {stdname}
+  units = K
+  dimensions = ({hdim}, vertical_layer_dimension)
+  type = real | kind = kind_phys
+"""
+
+_INTEGER_ENTRY = """[ {lname} ]
+  standard_name = {stdname}
+  units = {units}
+  dimensions = ({dims})
+  type = integer
+"""
+
+_DDT_INSTANCE_ENTRY = """[ {lname} ]
+  standard_name = {stdname}
+  units = DDT
+  dimensions = ()
+  type = {ddt}
+"""
+
+_ERROR_ENTRIES = """[ errmsg ]
+  standard_name = ccpp_error_message
+  long_name = Error message for error handling in CCPP
+  units = none
+  dimensions = ()
+  type = character
+  kind = len={length}{intent}
+[ errflg ]
+  standard_name = ccpp_error_code
+  long_name = Error flag for error handling in CCPP
+  units = 1
+  dimensions = ()
+  type = integer{intent}
+"""
+
+_SCHEME_VAR_ENTRY = """[ {lname} ]
+  standard_name = {stdname}
+  units = K
+  dimensions = (horizontal_loop_extent, vertical_layer_dimension)
+  type = real | kind = kind_phys
+  intent = {intent}
+"""
+
+_PREBUILD_CONFIG = """# Synthetic ccpp_prebuild configuration for the framework benchmarks
+HOST_MODEL_IDENTIFIER = "FV3"
+VARIABLE_DEFINITION_FILES = {vardefs}
+TYPEDEFS_NEW_METADATA = {typedefs}
+SCHEME_FILES = {schemes}
+DEFAULT_BUILD_DIR = 'build'
+TYPEDEFS_MAKEFILE   = '{{build_dir}}/CCPP_TYPEDEFS.mk'
+TYPEDEFS_CMAKEFILE  = '{{build_dir}}/CCPP_TYPEDEFS.cmake'
+TYPEDEFS_SOURCEFILE = '{{build_dir}}/CCPP_TYPEDEFS.sh'
+SCHEMES_MAKEFILE   = '{{build_dir}}/CCPP_SCHEMES.mk'
+SCHEMES_CMAKEFILE  = '{{build_dir}}/CCPP_SCHEMES.cmake'
+SCHEMES_SOURCEFILE = '{{build_dir}}/CCPP_SCHEMES.sh'
+CAPS_MAKEFILE   = '{{build_dir}}/CCPP_CAPS.mk'
+CAPS_CMAKEFILE  = '{{build_dir}}/CCPP_CAPS.cmake'
+CAPS_SOURCEFILE = '{{build_dir}}/CCPP_CAPS.sh'
+CAPS_DIR = '{{build_dir}}'
+SUITES_DIR = '.'
+OPTIONAL_ARGUMENTS = {{}}
+STATIC_API_DIR = '{{build_dir}}'
+STATIC_API_CMAKEFILE  = '{{build_dir}}/CCPP_API.cmake'
+STATIC_API_SOURCEFILE = '{{build_dir}}/CCPP_API.sh'
+METADATA_HTML_OUTPUT_DIR = '{{build_dir}}'
+HTML_VARTABLE_FILE = '{{build_dir}}/CCPP_VARIABLES_BENCH.html'
+LATEX_VARTABLE_FILE = '{{build_dir}}/CCPP_VARIABLES_BENCH.tex'
+"""
+
+def ddt_name(dindex):
+    """Return the type name of host DDT number <dindex>"""
+    return "bench_ddt{}".format(dindex)
+
+def field_name(dindex, findex):
+    """Return the local name of field number <findex> of host DDT number
+    <dindex>. Field names are unique across all host DDTs."""
+    return "d{}f{}".format(dindex, findex)
+
+def host_variables(scale):
+    """Return a list of (local name, standard name) for all the real
+    host variables of <scale>. DDT fields are referenced through the
+    DDT instance."""
+    hvars = list()
+    for dindex in range(scale['ddts']):
+        for findex in range(scale['fields']):
+            hvars.append(("{}_inst%{}".format(ddt_name(dindex),
+                                                field_name(dindex, findex)),
+                          "bench_ddt{}_field{}".format(dindex, findex)))
+    for vindex in range(scale['module_vars']):
+        hvars.append(("mvar{}".format(vindex),
+                      "bench_module_var{}".format(vindex)))
+    return hvars
+
+def _write_data_files(dirname, scale, hdim):
+    """Write the host DDT definition module, bench_host_data, to
+    <dirname>. <hdim> is the horizontal dimension specification.
+    Return the list of files written."""
+    meta = os.path.join(dirname, "bench_host_data.meta")
+    fort = os.path.join(dirname, "bench_host_data.F90")
+    with open(meta, 'w') as mfile, open(fort, 'w') as ffile:
+        ffile.write("module bench_host_data\n\n")
+        ffile.write("  use ccpp_kinds, only: kind_phys\n\n")
+        ffile.write("  implicit none\n  public\n\n")
+        for dindex in range(scale['ddts']):
+            ddt = ddt_name(dindex)
+            mfile.write(_TABLE_HEADER.format(name=ddt, ttype='ddt'))
+            ffile.write("  !> \\section arg_table_{}  Argument Table\n".format(ddt))
+            ffile.write("  !! \\htmlinclude arg_table_{}.html\n  !!\n".format(ddt))
+            ffile.write("  type {}\n".format(ddt))
+            for findex in range(scale['fields']):
+                fname = field_name(dindex, findex)
+                mfile.write(_FIELD_ENTRY.format(lname=fname,
+                                                stdname="bench_ddt{}_field{}".format(dindex, findex),
+                                                hdim=hdim))
+                ffile.write("     real(kind_phys), allocatable :: {}(:,:)\n".format(fname))
+            mfile.write("\n")
+            ffile.write("  end type {}\n\n".format(ddt))
+        ffile.write("end module bench_host_data\n")
+    return [meta, fort]
+
+def _write_module_files(dirname, scale, hdim, prebuild):
+    """Write the host module, bench_host_mod, with the dimensions, the DDT
+    instances, and the host module variables to <dirname>.
+    If <prebuild> is True, also add the ccpp_prebuild chunk variables.
+    Return the list of files written."""
+    meta = os.path.join(dirname, "bench_host_mod.meta")
+    fort = os.path.join(dirname, "bench_host_mod.F90")
+    with open(meta, 'w') as mfile, open(fort, 'w') as ffile:
+        mfile.write(_TABLE_HEADER.format(name="bench_host_mod",
+                                         ttype='module'))
+        ffile.write("module bench_host_mod\n\n")
+        ffile.write("  use ccpp_kinds, only: kind_phys\n")
+        if prebuild:
+            ffile.write("  use ccpp_types, only: ccpp_t\n")
+        ddt_list = ", ".join([ddt_name(x) for x in range(scale['ddts'])])
+        ffile.write("  use bench_host_data, only: {}\n\n".format(ddt_list))
+        ffile.write("  implicit none\n  public\n\n")
+        ffile.write("  !> \\section arg_table_bench_host_mod  Argument Table\n")
+        ffile.write("  !! \\htmlinclude arg_table_bench_host_mod.html\n  !!\n")
+        ffile.write("  integer, parameter :: ncols = 16\n")
+        ffile.write("  integer, parameter :: pver = 8\n")
+        mfile.write(_INTEGER_ENTRY.format(lname="ncols", units="count",
+                                          stdname="horizontal_dimension",
+                                          dims=""))
+        mfile.write(_INTEGER_ENTRY.format(lname="pver", units="count",
+                                          stdname="vertical_layer_dimension",
+                                          dims=""))
+        if prebuild:
+            mfile.write(_DDT_INSTANCE_ENTRY.format(lname="cdata",
+                                                   stdname="ccpp_t_instance",
+                                                   ddt="ccpp_t"))
+            ffile.write("  type(ccpp_t), target :: cdata\n")
+            ffile.write("  integer, parameter :: nchunks = 2\n")
+            ffile.write("  integer, parameter, dimension(nchunks) :: chunk_begin = (/1,9/)\n")
+            ffile.write("  integer, parameter, dimension(nchunks) :: chunk_end = (/8,16/)\n")
+            ffile.write("  integer, parameter, dimension(nchunks) :: chunk_size = (/8,8/)\n")
+            mfile.write(_INTEGER_ENTRY.format(lname="nchunks", units="count",
+                                              stdname="ccpp_chunk_extent",
+                                              dims=""))
+            for bound in ('begin', 'end'):
+                lname = "chunk_{}".format(bound)
+                stdname = "horizontal_loop_{}".format(bound)
+                mfile.write(_INTEGER_ENTRY.format(lname=lname, units="index",
+                                                  stdname=stdname + "_all_chunks",
+                                                  dims="ccpp_chunk_extent"))
+                mfile.write(_INTEGER_ENTRY.format(lname=lname + "(ccpp_chunk_number)",
+                                                  units="index", stdname=stdname,
+                                                  dims=""))
+            mfile.write(_INTEGER_ENTRY.format(lname="chunk_size", units="count",
+                                              stdname="ccpp_chunk_sizes",
+                                              dims="ccpp_chunk_extent"))
+            mfile.write(_INTEGER_ENTRY.format(lname="chunk_size(ccpp_chunk_number)",
+                                              units="count",
+                                              stdname="horizontal_loop_extent",
+                                              dims=""))
+        for dindex in range(scale['ddts']):
+            ddt = ddt_name(dindex)
+            if prebuild:
+                # ccpp_prebuild needs a variable for the DDT type itself
+                mfile.write(_DDT_INSTANCE_ENTRY.format(lname=ddt, stdname=ddt,
+                                                       ddt=ddt))
+            mfile.write(_DDT_INSTANCE_ENTRY.format(lname=ddt + "_inst",
+                                                   stdname=ddt + "_instance",
+                                                   ddt=ddt))
+            ffile.write("  type({}) :: {}_inst\n".format(ddt, ddt))
+        for vindex in range(scale['module_vars']):
+            mfile.write(_FIELD_ENTRY.format(lname="mvar{}".format(vindex),
+                                            stdname="bench_module_var{}".format(vindex),
+                                            hdim=hdim))
+            ffile.write("  real(kind_phys), allocatable :: mvar{}(:,:)\n".format(vindex))
+        ffile.write("\nend module bench_host_mod\n")
+    return [meta, fort]
+
+def _write_host_files(dirname):
+    """Write the capgen host table, bench_host, to <dirname>.
+    Return the list of files written."""
+    meta = os.path.join(dirname, "bench_host.meta")
+    fort = os.path.join(dirname, "bench_host.F90")
+    with open(meta, 'w') as mfile:
+        mfile.write(_TABLE_HEADER.format(name=HOST_NAME, ttype='host'))
+        mfile.write(_INTEGER_ENTRY.format(lname="col_start", units="count",
+                                          stdname="horizontal_loop_begin",
+                                          dims=""))
+        mfile.write(_INTEGER_ENTRY.format(lname="col_end", units="count",
+                                          stdname="horizontal_loop_end",
+                                          dims=""))
+        mfile.write(_ERROR_ENTRIES.format(length=512, intent=""))
+    with open(fort, 'w') as ffile:
+        ffile.write("module bench_prog\n\n  implicit none\n  private\n\n")
+        ffile.write("  public :: {}\n\ncontains\n\n".format(HOST_NAME))
+        ffile.write("  !> \\section arg_table_{}  Argument Table\n".format(HOST_NAME))
+        ffile.write("  !! \\htmlinclude arg_table_{}.html\n  !!\n".format(HOST_NAME))
+        ffile.write("  subroutine {}()\n".format(HOST_NAME))
+        ffile.write("    integer            :: col_start\n")
+        ffile.write("    integer            :: col_end\n")
+        ffile.write("    character(len=512) :: errmsg\n")
+        ffile.write("    integer            :: errflg\n")
+        ffile.write("  end subroutine {}\n\n".format(HOST_NAME))
+        ffile.write("end module bench_prog\n")
+    return [meta, fort]
+
+def _write_scheme_files(dirname, scale, index, hvars):
+    """Write the metadata and Fortran files for scheme number <index> to
+    <dirname>. The run phase of the scheme uses host variables from
+    <hvars>. Return the list of files written."""
+    scheme = "bench_scheme{}".format(index)
+    meta = os.path.join(dirname, scheme + ".meta")
+    fort = os.path.join(dirname, scheme + ".F90")
+    nvars = scale['vars_per_scheme']
+    svars = [hvars[(index * nvars + x) % len(hvars)] for x in range(nvars)]
+    intents = ['inout'] + ['in'] * (nvars - 1)
+    err_args = "errmsg, errflg"
+    err_decls = ("    character(len=*), intent(out) :: errmsg\n" +
+                 "    integer,          intent(out) :: errflg\n")
+    err_body = "    errmsg = ''\n    errflg = 0\n"
+    with open(meta, 'w') as mfile, open(fort, 'w') as ffile:
+        mfile.write("[ccpp-table-properties]\n  name = {}\n".format(scheme))
+        mfile.write("  type = scheme\n")
+        ffile.write("!> \\file {}.F90\n".format(scheme))
+        ffile.write("!! Synthetic benchmark scheme\n\n")
+        ffile.write("module {}\n\n".format(scheme))
+        ffile.write("  use ccpp_kinds, only: kind_phys\n\n")
+        ffile.write("  implicit none\n  private\n\n")
+        ffile.write("  public :: {0}_init, {0}_run, {0}_finalize\n\n".format(scheme))
+        ffile.write("contains\n\n")
+        for phase in ('init', 'run', 'finalize'):
+            sub = "{}_{}".format(scheme, phase)
+            mfile.write(_SECTION_HEADER.format(name=sub, ttype='scheme'))
+            ffile.write("  !> \\section arg_table_{} Argument Table\n".format(sub))
+            ffile.write("  !! \\htmlinclude {}.html\n  !!\n".format(sub))
+            if phase == 'run':
+                # Use the host names so that each standard name has a
+                # single local name across all the schemes
+                lnames = [x[0].split('%')[-1] for x in svars]
+                mfile.write(_INTEGER_ENTRY.format(lname="ncol",
+                                                  stdname="horizontal_loop_extent",
+                                                  units="count",
+                                                  dims="").rstrip('\n') +
+                            "\n  intent = in\n")
+                for lname, (_, stdname), intent in zip(lnames, svars, intents):
+                    mfile.write(_SCHEME_VAR_ENTRY.format(lname=lname,
+                                                         stdname=stdname,
+                                                         intent=intent))
+                args = ", ".join(["ncol"] + lnames + [err_args])
+                ffile.write("  subroutine {}({})\n".format(sub, args))
+                ffile.write("    integer,          intent(in)    :: ncol\n")
+                for lname, intent in zip(lnames, intents):
+                    ffile.write("    real(kind_phys),  intent({:<5}) :: {}(:,:)\n".format(intent, lname))
+                ffile.write(err_decls + err_body)
+                ffile.write("    {0} = {0} + 1.0_kind_phys\n".format(lnames[0]))
+            else:
+                ffile.write("  subroutine {}({})\n".format(sub, err_args))
+                ffile.write(err_decls + err_body)
+            mfile.write(_ERROR_ENTRIES.format(length='*',
+                                              intent="\n  intent = out"))
+            ffile.write("  end subroutine {}\n\n".format(sub))
+        ffile.write("end module {}\n".format(scheme))
+    return [meta, fort]
+
+def _write_suite_file(filename, suite, scale, sindex, prebuild):
+    """Write suite definition file <filename> for suite, <suite>.
+    Suite number <sindex> contains every scheme whose index is congruent
+    to <sindex> modulo the number of suites, spread over the groups of
+    the suite. For capgen, the second half of each group is inside two
+    nested subcycles (ccpp_prebuild only supports one subcycle level)."""
+    schemes = ["bench_scheme{}".format(x)
+               for x in range(sindex, scale['schemes'], scale['suites'])]
+    ngroups = scale['groups']
+    with open(filename, 'w') as sfile:
+        sfile.write('<?xml version="1.0" encoding="UTF-8"?>\n\n')
+        sfile.write('<suite name="{}" version="1.0">\n'.format(suite))
+        for gindex in range(ngroups):
+            group = schemes[gindex::ngroups]
+            half = len(group) // 2
+            sfile.write('  <group name="group{}">\n'.format(gindex))
+            if prebuild:
+                sfile.write('    <subcycle loop="1">\n')
+            for scheme in group[0:half]:
+                sfile.write('      <scheme>{}</scheme>\n'.format(scheme))
+            if prebuild:
+                sfile.write('    </subcycle>\n    <subcycle loop="2">\n')
+            else:
+                sfile.write('    <subcycle loop="2">\n')
+                sfile.write('      <subcycle loop="2">\n')
+            for scheme in group[half:]:
+                sfile.write('        <scheme>{}</scheme>\n'.format(scheme))
+            if not prebuild:
+                sfile.write('      </subcycle>\n')
+            sfile.write('    </subcycle>\n  </group>\n')
+        sfile.write('</suite>\n')
+
+def write_case(dirname, scale, prebuild=False):
+    """Write a synthetic case of size, <scale> (a dictionary, see SCALES),
+    to <dirname>. If <prebuild> is True, write the inputs for
+    ccpp_prebuild (including the configuration file, ccpp_prebuild_config.py),
+    otherwise write the inputs for capgen.
+    Return a dictionary with the lists of host files ('host_files'),
+    scheme files ('scheme_files'), and suite files ('suites')."""
+    if not os.path.exists(dirname):
+        os.makedirs(dirname)
+    if prebuild:
+        hdim = "ccpp_constant_one:horizontal_dimension"
+    else:
+        hdim = "horizontal_dimension"
+    host_files = _write_data_files(dirname, scale, hdim)
+    host_files.extend(_write_module_files(dirname, scale, hdim, prebuild))
+    if not prebuild:
+        host_files.extend(_write_host_files(dirname))
+    hvars = host_variables(scale)
+    scheme_files = list()
+    for index in range(scale['schemes']):
+        scheme_files.extend(_write_scheme_files(dirname, scale, index, hvars))
+    suites = list()
+    for sindex in range(scale['suites']):
+        suite = "bench_suite{}".format(sindex)
+        if prebuild:
+            filename = os.path.join(dirname, "suite_{}.xml".format(suite))
+        else:
+            filename = os.path.join(dirname, "{}.xml".format(suite))
+        _write_suite_file(filename, suite, scale, sindex, prebuild)
+        suites.append(filename)
+    if prebuild:
+        vardefs = [os.path.join(SRC_DIR, "ccpp_types.F90"),
+                   "bench_host_data.F90", "bench_host_mod.F90"]
+        typedefs = {'ccpp_types' : {'ccpp_t' : 'cdata', 'ccpp_types' : ''},
+                    'bench_host_data' : {'bench_host_data' : ''},
+                    'bench_host_mod' : {'bench_host_mod' : ''}}
+        for dindex in range(scale['ddts']):
+            ddt = ddt_name(dindex)
+            typedefs['bench_host_data'][ddt] = ddt + "_inst"
+        fort_schemes = [os.path.basename(x) for x in scheme_files
+                        if x.endswith(".F90")]
+        config = os.path.join(dirname, "ccpp_prebuild_config.py")
+        with open(config, 'w') as cfile:
+            cfile.write(_PREBUILD_CONFIG.format(vardefs=vardefs,
+                                                typedefs=typedefs,
+                                                schemes=fort_schemes))
+    return {'host_files' : [x for x in host_files if x.endswith(".meta")],
+            'scheme_files' : [x for x in scheme_files if x.endswith(".meta")],
+            'suites' : suites}
+
+def main():
+    """Parse the command line and write a synthetic case"""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[2])
+    parser.add_argument("--scale", choices=sorted(SCALES), default='small')
+    parser.add_argument("--prebuild", action='store_true', default=False)
+    parser.add_argument("output_dir")
+    pargs = parser.parse_args()
+    files = write_case(pargs.output_dir, SCALES[pargs.scale],
+                       prebuild=pargs.prebuild)
+    print("Wrote {} host files, {} scheme files, and {} suites to {}".format(
+        len(files['host_files']), len(files['scheme_files']),
+        len(files['suites']), pargs.output_dir))
+
+if __name__ == "__main__":
+    main()
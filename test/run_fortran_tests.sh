@@ -1,5 +1,7 @@
 #! /bin/bash
 
+# Any arguments (e.g., --openmp, --capgen-args "<args>") are passed
+#   to the run_test script of each test
 root=$( dirname $( cd $( dirname ${0}); pwd -P ) )
 test_dir=${root}/test
 
@@ -22,7 +24,7 @@ perr $? "Cannot cd to test directory, '${test_dir}'"
 errcnt=0
 
 # Run capgen test
-./capgen_test/run_test
+./capgen_test/run_test "$@"
 res=$?
 errcnt=$((errcnt + res))
 if [ $res -ne 0 ]; then
@@ -30,7 +32,7 @@ if [ $res -ne 0 ]; then
 fi
 
 # Run advection test
-./advection_test/run_test
+./advection_test/run_test "$@"
 res=$?
 errcnt=$((errcnt + res))
 if [ $res -ne 0 ]; then
@@ -38,7 +40,7 @@ if [ $res -ne 0 ]; then
 fi
 
 # Run var_compatibility test
- ./var_compatibility_test/run_test
+ ./var_compatibility_test/run_test "$@"
  res=$?
  errcnt=$((errcnt + res))
  if [ $res -ne 0 ]; then
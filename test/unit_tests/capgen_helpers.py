@@ -0,0 +1,89 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Contains helpers shared by the unit tests which run
+               scripts file ccpp_capgen.py on the var_compatibility_test
+               or capgen_test files
+
+ Assumptions:
+
+ Command line arguments: none
+
+ Usage: from capgen_helpers import CapgenTestCase
+-----------------------------------------------------------------------
+"""
+import sys
+import os
+import subprocess
+import tempfile
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.abspath(os.path.join(TEST_DIR, os.pardir, os.pardir, "scripts"))
+VAR_COMPAT_DIR = os.path.abspath(os.path.join(TEST_DIR, os.pardir,
+                                              "var_compatibility_test"))
+CAPGEN_TEST_DIR = os.path.abspath(os.path.join(TEST_DIR, os.pardir,
+                                               "capgen_test"))
+
+if not os.path.exists(SCRIPTS_DIR):
+    raise ImportError("Cannot find scripts directory")
+
+def var_compat_args():
+    """Return the capgen arguments for the var_compatibility test"""
+    meta_files = [os.path.join(VAR_COMPAT_DIR, x + ".meta")
+                  for x in ["test_host_data", "test_host_mod", "test_host"]]
+    return ["--host-files", ",".join(meta_files),
+            "--scheme-files", os.path.join(VAR_COMPAT_DIR, "effr_calc.meta"),
+            "--suites", os.path.join(VAR_COMPAT_DIR,
+                                     "var_compatibility_suite.xml"),
+            "--host-name", "test_host"]
+
+def capgen_test_args(scheme_files, suites):
+    """Return the capgen arguments for the capgen test with
+    <scheme_files> and <suites>. Capgen must be run in CAPGEN_TEST_DIR."""
+    return ["--host-files",
+            "test_host_data.meta,test_host_mod.meta,test_host.meta",
+            "--scheme-files", scheme_files, "--suites", suites,
+            "--host-name", "test_host"]
+
+class CapgenTestCase(unittest.TestCase):
+
+    """Base class for tests which run capgen with output to a temporary
+    directory."""
+
+    def setUp(self):
+        """Create an output directory"""
+        self._tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove the output directory"""
+        self._tmpdir.cleanup()
+
+    def run_capgen(self, name, args, cwd=None, env=None):
+        """Run capgen with <args> in <cwd> with environment <env> and with
+        output to directory <name> in the temporary directory.
+        Return the output directory and the subprocess.CompletedProcess
+        object of the run (with the standard error output)."""
+        # Run capgen in its own process, it registers global DDT names
+        output_dir = os.path.join(self._tmpdir.name, name)
+        command = [sys.executable, os.path.join(SCRIPTS_DIR, "ccpp_capgen.py")]
+        command.extend(args)
+        command.extend(["--output-root", output_dir])
+        result = subprocess.run(command, cwd=cwd, env=env, check=False,
+                                stdout=subprocess.DEVNULL,
+                                stderr=subprocess.PIPE)
+        return output_dir, result
+
+    def run_capgen_ok(self, name, args, cwd=None, env=None):
+        """Run capgen (see run_capgen), check that it succeeds, and return
+        the output directory."""
+        output_dir, result = self.run_capgen(name, args, cwd=cwd, env=env)
+        self.assertEqual(result.returncode, 0, msg=result.stderr.decode())
+        return output_dir
+
+    @staticmethod
+    def read_lines(output_dir, filename):
+        """Return the stripped lines of <filename> in <output_dir>"""
+        with open(os.path.join(output_dir, filename), 'r') as ofile:
+            return [x.strip() for x in ofile.readlines()]
+        # end with
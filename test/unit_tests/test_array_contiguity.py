@@ -0,0 +1,113 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Contains unit tests for the array argument report and the
+               contiguous transform buffers written by scripts files
+               array_contiguity.py, host_cap.py, suite_objects.py, and
+               ccpp_suite.py
+
+ Assumptions:
+
+ Command line arguments: none
+
+ Usage: python3 test_array_contiguity.py         # run the unit tests
+-----------------------------------------------------------------------
+"""
+import sys
+import os
+import unittest
+
+from capgen_helpers import CapgenTestCase, CAPGEN_TEST_DIR, SCRIPTS_DIR
+from capgen_helpers import capgen_test_args, var_compat_args
+
+sys.path.append(SCRIPTS_DIR)
+
+# pylint: disable=wrong-import-position
+from array_contiguity import ArrayArgReport, CONTIGUOUS, STRIDED, TEMPORARY
+from array_contiguity import combine_contiguity, subscript_kind
+# pylint: enable=wrong-import-position
+
+_SUITE_CAP = "ccpp_var_compatibility_suite_cap.F90"
+_REPORT = "var_compatibility_suite_array_args.txt"
+_TEMP_REPORT = "temp_suite_array_args.txt"
+_HDIM = "ccpp_constant_one:horizontal_dimension"
+_VDIM = "ccpp_constant_one:vertical_layer_dimension"
+_COLS = "horizontal_loop_begin:horizontal_loop_end"
+
+class ArrayContiguityTestCase(CapgenTestCase):
+
+    """Tests for the --array-arg-report capgen option and the layout of
+    persistent transform buffers."""
+
+    def _run_capgen(self, name, options):
+        """Run capgen on the var_compatibility test and return the output
+        directory."""
+        return self.run_capgen_ok(name, var_compat_args() + options)
+
+    def _read_report(self, output_dir, report=_REPORT):
+        """Return the rows of <report> in <output_dir> as a dictionary
+        of the class of each argument keyed by (callee, dummy)."""
+        with open(os.path.join(output_dir, report), 'r') as rfile:
+            lines = [x.split() for x in rfile.readlines()
+                     if not x.startswith('#')]
+        return {(x[1], x[2]) : x[-1] for x in lines[1:]}
+
+    def test_classification(self):
+        """Test the classification of array sections"""
+        self.assertEqual(subscript_kind(_COLS, _HDIM), 'partial')
+        self.assertEqual(subscript_kind(':', _VDIM), 'full')
+        kinds = [subscript_kind(_COLS, _HDIM), subscript_kind(':', _VDIM)]
+        self.assertEqual(combine_contiguity(CONTIGUOUS, kinds), STRIDED)
+        self.assertEqual(combine_contiguity(CONTIGUOUS, kinds[::-1]),
+                         CONTIGUOUS)
+        report = ArrayArgReport('suite')
+        self.assertEqual(report.add_argument('suite_physics', 'scheme_run',
+                                             'arr', 'arr', STRIDED, False),
+                         TEMPORARY)
+
+    def test_array_arg_report(self):
+        """Test the report for the default transform arrays"""
+        output_dir = self._run_capgen("report", [])
+        self.assertFalse(os.path.exists(os.path.join(output_dir, _REPORT)))
+        output_dir = self._run_capgen("report2", ["--array-arg-report"])
+        args = self._read_report(output_dir)
+        # The host passes a column section of a 2D array
+        self.assertEqual(args[("var_compatibility_suite_radiation",
+                               "ncg_in")], STRIDED)
+        # Which is passed on to an assumed-shape scheme dummy argument
+        self.assertEqual(args[("effr_calc_run", "ncg_in")], STRIDED)
+        # But transform arrays are allocated
+        self.assertEqual(args[("effr_calc_run", "effrr_in")], CONTIGUOUS)
+
+    def test_contiguous_transform_buffers(self):
+        """Test that transform arrays point to contiguous buffer sections"""
+        output_dir = self._run_capgen("buffers",
+                                      ["--persistent-transform-buffers",
+                                       "--array-arg-report"])
+        args = self._read_report(output_dir)
+        for dummy in ["effrr_in", "effrl_inout", "effrs_inout"]:
+            self.assertEqual(args[("effr_calc_run", dummy)], CONTIGUOUS)
+        # end for
+        lines = self.read_lines(output_dir, _SUITE_CAP)
+        self.assertIn("allocate(effrr_in_local_buffer(pver, ncols))", lines)
+        self.assertIn("effrr_in_local(col_start:col_end,1:nlev) => " +
+                      "effrr_in_local_buffer(:,col_start:col_end)", lines)
+
+    def test_assumed_shape_dummies(self):
+        """Test that strided arrays passed to assumed-shape scheme dummy
+        arguments are not reported as temporaries"""
+        output_dir = self.run_capgen_ok("capgen_test",
+                                        capgen_test_args("temp_scheme_files.txt",
+                                                         "temp_suite.xml") +
+                                        ["--array-arg-report"],
+                                        cwd=CAPGEN_TEST_DIR)
+        args = self._read_report(output_dir, report=_TEMP_REPORT)
+        # temp_set_run declares temp_level(:,:) and temp(:,:)
+        self.assertEqual(args[("temp_set_run", "temp_level")], STRIDED)
+        self.assertEqual(args[("temp_set_run", "temp")], STRIDED)
+        # temp_adjust_run declares qv(:) but temp_layer(foo)
+        self.assertEqual(args[("temp_adjust_run", "qv")], STRIDED)
+        self.assertEqual(args[("temp_adjust_run", "temp_layer")], TEMPORARY)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Contains unit tests for running capgen with more than one
+               job (the --jobs option of scripts file ccpp_capgen.py)
+
+ Assumptions:
+
+ Command line arguments: none
+
+ Usage: python3 test_capgen_jobs.py         # run the unit tests
+-----------------------------------------------------------------------
+"""
+import os
+import unittest
+
+from capgen_helpers import CapgenTestCase, CAPGEN_TEST_DIR, capgen_test_args
+
+class CapgenJobsTestCase(CapgenTestCase):
+
+    """Tests that capgen writes the same files with and without --jobs."""
+
+    def _run_capgen(self, name, scheme_files, suites, options):
+        """Run capgen on the capgen_test files and return a dictionary of
+        the contents of each output file keyed by its relative path."""
+        # Some use statements are written in set order so every run
+        #   needs the same string hashes to produce the same caps
+        env = dict(os.environ, PYTHONHASHSEED="0")
+        output_dir = self.run_capgen_ok(name,
+                                        capgen_test_args(scheme_files, suites) +
+                                        ["--array-arg-report"] + options,
+                                        cwd=CAPGEN_TEST_DIR, env=env)
+        outputs = {}
+        for root, _, files in os.walk(output_dir):
+            for fname in files:
+                path = os.path.join(root, fname)
+                with open(path, 'rb') as ofile:
+                    # The datatable records the output paths
+                    contents = ofile.read().replace(output_dir.encode(),
+                                                    b"<output_dir>")
+                outputs[os.path.relpath(path, output_dir)] = contents
+        return outputs
+
+    def test_parallel_parse(self):
+        """Test that parsing the scheme files with worker processes
+        produces the same files as a serial run"""
+        scheme_files = "temp_scheme_files.txt,ddt_suite_files.txt"
+        serial = self._run_capgen("serial", scheme_files, "temp_suite.xml",
+                                  [])
+        self.assertIn("ccpp_temp_suite_cap.F90", serial)
+        self.assertIn("temp_suite_array_args.txt", serial)
+        parallel = self._run_capgen("parallel", scheme_files,
+                                    "temp_suite.xml", ["--jobs=2"])
+        self.assertEqual(sorted(parallel.keys()), sorted(serial.keys()))
+        for fname, contents in serial.items():
+            self.assertEqual(parallel[fname], contents, msg=fname)
+
+    def test_parallel_suite_caps(self):
+        """Test that writing the suite caps with worker processes
+        produces the same files as a serial run"""
+        scheme_files = "temp_scheme_files.txt,ddt_suite_files.txt"
+        suites = "ddt_suite.xml,temp_suite.xml"
+        serial = self._run_capgen("serial", scheme_files, suites, [])
+        self.assertIn("ccpp_ddt_suite_cap.F90", serial)
+        self.assertIn("ccpp_temp_suite_cap.F90", serial)
+        parallel = self._run_capgen("parallel", scheme_files, suites,
+                                    ["--jobs=3"])
+        self.assertEqual(sorted(parallel.keys()), sorted(serial.keys()))
+        for fname, contents in serial.items():
+            self.assertEqual(parallel[fname], contents, msg=fname)
+
+if __name__ == "__main__":
+    unittest.main()
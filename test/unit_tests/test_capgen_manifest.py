@@ -0,0 +1,96 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Contains unit tests for the CapgenManifest object
+               in scripts file capgen_manifest.py
+
+ Assumptions:
+
+ Command line arguments: none
+
+ Usage: python3 test_capgen_manifest.py         # run the unit tests
+-----------------------------------------------------------------------
+"""
+import sys
+import os
+import tempfile
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.abspath(os.path.join(TEST_DIR, os.pardir, os.pardir, "scripts"))
+
+if not os.path.exists(SCRIPTS_DIR):
+    raise ImportError("Cannot find scripts directory")
+
+sys.path.append(SCRIPTS_DIR)
+
+# pylint: disable=wrong-import-position
+from capgen_manifest import CapgenManifest
+# pylint: enable=wrong-import-position
+
+class CapgenManifestTestCase(unittest.TestCase):
+
+    """Tests for `CapgenManifest`."""
+
+    _SETTINGS = {'kind_types' : {'kind_phys' : 'REAL64'}}
+
+    def setUp(self):
+        """Create a set of input and output files"""
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self._mfile = os.path.join(self._tmpdir.name, 'manifest.json')
+        self._files = {}
+        for name in ['in1.meta', 'in2.meta', 'out1.F90', 'out2.F90']:
+            self._files[name] = os.path.join(self._tmpdir.name, name)
+            self._write(name, name)
+
+    def tearDown(self):
+        """Remove the test files"""
+        self._tmpdir.cleanup()
+
+    def _write(self, name, contents):
+        """Write <contents> to test file, <name>"""
+        with open(self._files[name], 'w') as tfile:
+            tfile.write(contents)
+
+    def _record(self):
+        """Write a manifest for the test files"""
+        manifest = CapgenManifest(self._mfile, self._SETTINGS)
+        manifest.add_output(self._files['out1.F90'], [self._files['in1.meta']])
+        manifest.add_output(self._files['out2.F90'], [self._files['in1.meta'],
+                                                      self._files['in2.meta']])
+        manifest.write()
+
+    def test_unchanged_inputs(self):
+        """Test that all files are current if nothing changed"""
+        self._record()
+        manifest = CapgenManifest(self._mfile, self._SETTINGS)
+        inputs = [self._files['in1.meta'], self._files['in2.meta']]
+        self.assertTrue(manifest.all_current(inputs))
+        self.assertFalse(manifest.all_current(inputs[0:1]))
+
+    def test_changed_input(self):
+        """Test that only outputs of a modified input are out of date"""
+        self._record()
+        self._write('in2.meta', 'modified')
+        manifest = CapgenManifest(self._mfile, self._SETTINGS)
+        inputs = [self._files['in1.meta'], self._files['in2.meta']]
+        self.assertFalse(manifest.all_current(inputs))
+        self.assertTrue(manifest.is_current(self._files['out1.F90'],
+                                            inputs[0:1]))
+        self.assertFalse(manifest.is_current(self._files['out2.F90'], inputs))
+
+    def test_changed_output_or_settings(self):
+        """Test that a modified output or new settings are out of date"""
+        self._record()
+        self._write('out1.F90', 'modified')
+        manifest = CapgenManifest(self._mfile, self._SETTINGS)
+        self.assertFalse(manifest.is_current(self._files['out1.F90'],
+                                             [self._files['in1.meta']]))
+        manifest = CapgenManifest(self._mfile,
+                                  {'kind_types' : {'kind_phys' : 'REAL32'}})
+        self.assertFalse(manifest.is_current(self._files['out2.F90'],
+                                             [self._files['in1.meta'],
+                                              self._files['in2.meta']]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Contains unit tests for the datatable reports in
+               scripts file ccpp_datafile.py
+
+ Assumptions:
+
+ Command line arguments: none
+
+ Usage: python3 test_ccpp_datafile.py         # run the unit tests
+-----------------------------------------------------------------------
+"""
+import sys
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.abspath(os.path.join(TEST_DIR, os.pardir, os.pardir, "scripts"))
+
+if not os.path.exists(SCRIPTS_DIR):
+    raise ImportError("Cannot find scripts directory")
+
+sys.path.append(SCRIPTS_DIR)
+
+# pylint: disable=wrong-import-position
+from ccpp_datafile import datatable_report, datatable_index, DatatableReport
+from ccpp_datafile import CCPPDatatableError, run_batch, serve_datatable
+from ccpp_datafile import query_datatable_server, write_datatable_database
+from ccpp_datafile import datatable_pretty_print, is_datatable_database
+from ccpp_datafile import sqlite3
+# pylint: enable=wrong-import-position
+
+_DATATABLE = """<ccpp_datatable version="1.0">
+  <ccpp_files>
+    <utilities>
+      <file>ccpp_kinds.F90</file>
+    </utilities>
+    <host_files>
+      <file>host_ccpp_cap.F90</file>
+    </host_files>
+    <suite_files>
+      <file>ccpp_my_suite_cap.F90</file>
+    </suite_files>
+  </ccpp_files>
+  <schemes>
+    <scheme name="my_scheme" process="physics">
+      <my_group name="my_scheme" module="my_scheme_mod" />
+    </scheme>
+  </schemes>
+  <api>
+    <suites>
+      <suite name="my_suite">
+        <group name="my_group" />
+      </suite>
+    </suites>
+  </api>
+  <var_dictionaries>
+    <var_dictionary name="host" type="host">
+      <variables>
+        <var name="pressure" protected="True" />
+        <var name="temperature" />
+      </variables>
+    </var_dictionary>
+    <var_dictionary name="my_suite" type="suite" parent="host" />
+    <var_dictionary name="my_group_call_list" type="group_call_list" parent="my_suite">
+      <variables>
+        <var name="pressure" intent="in" />
+        <var name="temperature" intent="inout" />
+        <var name="tendency" intent="out" protected="True" />
+      </variables>
+    </var_dictionary>
+  </var_dictionaries>
+  <dependencies>
+    <dependency>my_dep.F90</dependency>
+  </dependencies>
+</ccpp_datatable>
+"""
+
+class CCPPDatafileTestCase(unittest.TestCase):
+
+    """Tests for datatable reports, batch mode, server mode, and datatable
+    databases."""
+
+    def setUp(self):
+        """Write a datatable file"""
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self._datatable = os.path.join(self._tmpdir.name, "datatable.xml")
+        with open(self._datatable, 'w') as dfile:
+            dfile.write(_DATATABLE)
+
+    def tearDown(self):
+        """Remove the datatable file"""
+        self._tmpdir.cleanup()
+
+    def test_variable_reports(self):
+        """Test the variable reports, with and without protected variables"""
+        def report(action, value=True, excl_prot=False):
+            return datatable_report(self._datatable,
+                                    DatatableReport(action, value), ',',
+                                    excl_prot=excl_prot)
+        self.assertEqual(report("required_variables", "my_suite"),
+                         "pressure,temperature,tendency")
+        self.assertEqual(report("required_variables", "my_suite",
+                                excl_prot=True), "temperature")
+        self.assertEqual(report("input_variables", "my_suite"),
+                         "pressure,temperature")
+        self.assertEqual(report("output_variables", "my_suite"),
+                         "temperature,tendency")
+        self.assertEqual(report("host_variables", excl_prot=True),
+                         "temperature")
+        self.assertEqual(report("process_list"), "physics=my_scheme")
+        self.assertEqual(report("module_list"), "my_scheme_mod")
+
+    def test_index_reuse(self):
+        """Test that the datatable index is reused until the file changes"""
+        dtable = datatable_index(self._datatable)
+        self.assertIs(datatable_index(self._datatable), dtable)
+        with open(self._datatable, 'w') as dfile:
+            dfile.write(_DATATABLE.replace("my_suite", "new_suite"))
+        self.assertIsNot(datatable_index(self._datatable), dtable)
+        self.assertEqual(datatable_report(self._datatable,
+                                          DatatableReport("suite_list"), ','),
+                         "new_suite")
+
+    def test_batch(self):
+        """Test that a batch file returns one report per request"""
+        batch_file = os.path.join(self._tmpdir.name, "requests.txt")
+        with open(batch_file, 'w') as bfile:
+            bfile.write("# Requests\n--suite-list\n\n")
+            bfile.write("--required-variables my_suite --separator ';'\n")
+        self.assertEqual(run_batch(self._datatable, batch_file),
+                         ["my_suite", "pressure;temperature;tendency"])
+        with open(batch_file, 'w') as bfile:
+            bfile.write("--no-such-report\n")
+        with self.assertRaises(CCPPDatatableError):
+            run_batch(self._datatable, batch_file)
+
+    @unittest.skipIf(sqlite3 is None, "requires the sqlite3 module")
+    def test_database_reports(self):
+        """Test that every report on a datatable database matches the same
+        report on the datatable XML file"""
+        database = os.path.join(self._tmpdir.name, "datatable.db")
+        dtable = datatable_index(self._datatable)
+        write_datatable_database(dtable.table, database)
+        self.assertTrue(is_datatable_database(database))
+        self.assertFalse(is_datatable_database(self._datatable))
+        reports = [(x, True) for x in ["host_files", "suite_files",
+                                       "utility_files", "ccpp_files",
+                                       "process_list", "module_list",
+                                       "dependencies", "suite_list",
+                                       "host_variables"]]
+        reports.extend([(x, y) for x in ["required_variables",
+                                         "input_variables",
+                                         "output_variables"]
+                        for y in ["my_suite", "no_suite"]])
+        for action, value in reports:
+            for excl_prot in [False, True]:
+                report = DatatableReport(action, value)
+                self.assertEqual(datatable_report(database, report, ',',
+                                                  excl_prot=excl_prot),
+                                 datatable_report(self._datatable, report,
+                                                  ',', excl_prot=excl_prot))
+        self.assertEqual(datatable_pretty_print(database, 0, -1),
+                         datatable_pretty_print(self._datatable, 0, -1))
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "requires UNIX sockets")
+    def test_server(self):
+        """Test report requests sent to a datatable server"""
+        socket_path = os.path.join(self._tmpdir.name, "datatable.sock")
+        server = threading.Thread(target=serve_datatable,
+                                  args=(socket_path, self._datatable))
+        server.start()
+        try:
+            for _ in range(100):
+                if os.path.exists(socket_path):
+                    break
+                threading.Event().wait(0.05)
+            self.assertEqual(query_datatable_server(socket_path,
+                                                    ["--dependencies"]),
+                             "my_dep.F90")
+            self.assertEqual(query_datatable_server(socket_path,
+                                                    ["--input-variables",
+                                                     "my_suite",
+                                                     "--exclude-protected"],
+                                                    datatable=self._datatable),
+                             "temperature")
+            with self.assertRaises(CCPPDatatableError):
+                query_datatable_server(socket_path, ["--separator", ";"])
+        finally:
+            query_datatable_server(socket_path, None, shutdown=True)
+            server.join()
+        self.assertFalse(os.path.exists(socket_path))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Contains unit tests for the threaded run group drivers
+               written by scripts files suite_objects.py, ccpp_suite.py,
+               and host_cap.py
+
+ Assumptions:
+
+ Command line arguments: none
+
+ Usage: python3 test_chunked_run_driver.py         # run the unit tests
+-----------------------------------------------------------------------
+"""
+import unittest
+
+from capgen_helpers import CapgenTestCase, var_compat_args
+
+_SUITE_CAP = "ccpp_var_compatibility_suite_cap.F90"
+_HOST_CAP = "test_host_ccpp_cap.F90"
+
+class ChunkedRunDriverTestCase(CapgenTestCase):
+
+    """Tests for the --run-chunk-size capgen option."""
+
+    def _run_capgen(self, name, options):
+        """Run capgen on the var_compatibility test and return the lines
+        of its suite cap and host cap."""
+        output_dir = self.run_capgen_ok(name, var_compat_args() + options)
+        return [self.read_lines(output_dir, x) for x in [_SUITE_CAP, _HOST_CAP]]
+
+    def test_no_driver(self):
+        """Test that there is no driver by default"""
+        suite_lines, host_lines = self._run_capgen("default", [])
+        self.assertFalse([x for x in suite_lines + host_lines
+                          if "_chunked" in x])
+        self.assertIn("real(kind_phys),        pointer          :: " +
+                      "effrg_in_ptr(:,:)    => null()", suite_lines)
+
+    def test_chunked_run_driver(self):
+        """Test the driver of the run group and its call from the host cap"""
+        suite_lines, host_lines = self._run_capgen("chunked",
+                                                   ["--run-chunk-size", "8"])
+        self.assertIn("public :: var_compatibility_suite_radiation_chunked",
+                      suite_lines)
+        # Only the run group has a driver
+        self.assertEqual(len([x for x in suite_lines
+                              if x.startswith("public ::") and
+                              x.endswith("_chunked")]), 1)
+        # Each thread has its own error variables
+        self.assertTrue([x for x in suite_lines
+                         if x.startswith("!$omp private(ccpp_chunk_errflg, " +
+                                         "ccpp_chunk_errmsg")])
+        # Non-array outputs are private to each thread
+        self.assertIn("!$omp firstprivate(scalar_var) lastprivate(scalar_var)",
+                      suite_lines)
+        # Absent optional arrays are passed as null pointers
+        self.assertIn("effrg_in_chunk => " +
+                      "effrg_in(ccpp_chunk_first:ccpp_chunk_last,:)",
+                      suite_lines)
+        self.assertIn("!$omp critical " +
+                      "(var_compatibility_suite_radiation_chunked)",
+                      suite_lines)
+        # The group's local pointers are not saved
+        self.assertIn("real(kind_phys),        pointer          :: " +
+                      "effrg_in_ptr(:,:)", suite_lines)
+        self.assertIn("nullify(effrg_in_ptr)", suite_lines)
+        self.assertTrue([x for x in host_lines
+                         if x.startswith("call var_compatibility_suite_" +
+                                         "radiation_chunked(chunk_size=8,")])
+
+    def test_negative_chunk_size(self):
+        """Test that a negative chunk size is an error"""
+        _, result = self.run_capgen("negative", var_compat_args() +
+                                    ["--run-chunk-size", "-1"])
+        self.assertNotEqual(result.returncode, 0)
+
+if __name__ == "__main__":
+    unittest.main()
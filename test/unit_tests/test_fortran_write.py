@@ -122,6 +122,32 @@ class MetadataTableTestCase(unittest.TestCase):
         amsg = f"{generate} does not match {compare}"
         self.assertTrue(filecmp.cmp(generate, compare, shallow=False), msg=amsg)
 
+    def test_write_block(self):
+        """Test that write_block writes the same code as write"""
+        # Setup
+        testname = "write_block_test"
+        generate = os.path.join(_TMP_DIR, f"{testname}.F90")
+        compare = os.path.join(_TMP_DIR, f"{testname}_compare.F90")
+        data_items = ', '.join([f"name{x:03}" for x in range(40)])
+        statements = [f"character(len=7) :: data = (/ {data_items} /)",
+                      ("call endrun('Cannot read columns_on_task from file'//"
+                       "', columns_on_task has no horizontal dimension; "
+                       "columns_on_task is a protected variable')", 1),
+                      f"integer :: baz ! {'y'*130}"]
+        # Exercise
+        header = "Test of block writing for FortranWriter"
+        with FortranWriter(generate, 'w', header, f"{testname}") as gen:
+            gen.write_block(statements, 1)
+        # end with
+        with FortranWriter(compare, 'w', header, f"{testname}") as gen:
+            gen.write(statements[0], 1)
+            gen.write(statements[1][0], 2)
+            gen.write(statements[2], 1)
+        # end with
+        # Check that the files are identical
+        amsg = f"{generate} does not match {compare}"
+        self.assertTrue(filecmp.cmp(generate, compare, shallow=False), msg=amsg)
+
 if __name__ == "__main__":
     unittest.main()
 
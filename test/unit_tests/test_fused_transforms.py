@@ -0,0 +1,67 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Contains unit tests for the fused variable transforms
+               and persistent transform buffers written by scripts
+               files suite_objects.py and ccpp_suite.py
+
+ Assumptions:
+
+ Command line arguments: none
+
+ Usage: python3 test_fused_transforms.py         # run the unit tests
+-----------------------------------------------------------------------
+"""
+import unittest
+
+from capgen_helpers import CapgenTestCase, var_compat_args
+
+_SUITE_CAP = "ccpp_var_compatibility_suite_cap.F90"
+
+class FusedTransformsTestCase(CapgenTestCase):
+
+    """Tests for the --fuse-var-transforms and
+    --persistent-transform-buffers capgen options."""
+
+    def _run_capgen(self, name, options):
+        """Run capgen on the var_compatibility test and return the lines
+        of its suite cap."""
+        output_dir = self.run_capgen_ok(name, var_compat_args() + options)
+        return self.read_lines(output_dir, _SUITE_CAP)
+
+    def test_fused_transforms(self):
+        """Test that the array transforms of a scheme call are computed in
+        one loop nest before and one loop nest after the call"""
+        lines = self._run_capgen("default", [])
+        self.assertNotIn("do ccpp_transform_index2 = 1, nlev", lines)
+        self.assertIn("effrr_in_local(:,1:nlev) = " +
+                      "1.0E+6_kind_phys*effrr_in(:,nlev:1:-1)", lines)
+        lines = self._run_capgen("fused", ["--fuse-var-transforms"])
+        self.assertEqual(lines.count("do ccpp_transform_index2 = 1, nlev"), 2)
+        self.assertEqual(lines.count("do ccpp_transform_index1 = col_start, col_end"), 2)
+        self.assertEqual(lines.count("end do"), 4)
+        self.assertFalse([x for x in lines if "(:,1:nlev)" in x])
+        # Scalar transforms are not in a loop
+        self.assertIn("scalar_var_local = 1.0E-3_kind_phys*scalar_var", lines)
+    def test_persistent_transform_buffers(self):
+        """Test that run phase transform arrays point to suite buffers which
+        are allocated at initialize and deallocated at finalize"""
+        lines = self._run_capgen("default", [])
+        self.assertIn("allocate(effrr_in_local(col_start:col_end, 1:nlev))",
+                      lines)
+        self.assertFalse([x for x in lines if "_buffer" in x])
+        lines = self._run_capgen("buffers", ["--persistent-transform-buffers"])
+        self.assertFalse([x for x in lines
+                          if x.startswith("allocate(effrr_in_local(")])
+        # The horizontal dimension of a buffer is last
+        self.assertIn("allocate(effrr_in_local_buffer(pver, ncols))", lines)
+        self.assertIn("deallocate(effrr_in_local_buffer)", lines)
+        self.assertIn("effrr_in_local(col_start:col_end,1:nlev) => " +
+                      "effrr_in_local_buffer(:,col_start:col_end)", lines)
+        self.assertIn("nullify(effrr_in_local)", lines)
+        # Scalar transforms are not buffered
+        self.assertIn("real(kind_phys)                          :: " +
+                      "scalar_var_local", lines)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,6 +13,7 @@
 """
 import sys
 import os
+import tempfile
 import unittest
 
 TEST_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -394,6 +395,34 @@ class MetadataTableTestCase(unittest.TestCase):
         emsg = "Invalid metadata table type, 'banana', at "
         self.assertTrue(emsg in str(context.exception))
 
+    def test_metadata_cache(self):
+        """Test that tables restored from the metadata cache match the
+        tables parsed from the file"""
+        filename = os.path.join(SAMPLE_FILES_DIR,
+                                "test_multi_ccpp_arg_tables.meta")
+        with tempfile.TemporaryDirectory() as cache_dir:
+            run_env = CCPPFrameworkEnv(None, ndict={'host_files':'',
+                                                    'scheme_files':'',
+                                                    'suites':'',
+                                                    'metadata_cache_dir':cache_dir})
+            parse_ddts = list()
+            parsed = parse_metadata_file(filename, parse_ddts, run_env)
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            cache_ddts = list()
+            cached = parse_metadata_file(filename, cache_ddts, run_env)
+        #Verify that the tables, sections, variables, and known DDTs match
+        self.assertEqual(cache_ddts, parse_ddts)
+        self.assertEqual([x.cache_data() for x in cached],
+                         [x.cache_data() for x in parsed])
+        for ctable, ptable in zip(cached, parsed):
+            for csect, psect in zip(ctable.sections(), ptable.sections()):
+                self.assertEqual(csect.start_context(), psect.start_context())
+                for cvar, pvar in zip(csect.variable_list(),
+                                      psect.variable_list()):
+                    self.assertIs(cvar.source, csect)
+                    self.assertEqual(str(cvar.context), str(pvar.context))
+                    self.assertEqual(cvar.is_ddt(), pvar.is_ddt())
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -0,0 +1,136 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Contains unit tests for reading and parsing Fortran files
+               in scripts file fortran_tools/parse_fortran_file.py
+
+ Assumptions:
+
+ Command line arguments: none
+
+ Usage: python3 test_parse_fortran_file.py         # run the unit tests
+-----------------------------------------------------------------------
+"""
+import sys
+import os
+import logging
+import tempfile
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.abspath(os.path.join(TEST_DIR, os.pardir, os.pardir, "scripts"))
+
+if not os.path.exists(SCRIPTS_DIR):
+    raise ImportError("Cannot find scripts directory")
+
+sys.path.append(SCRIPTS_DIR)
+
+# pylint: disable=wrong-import-position
+from framework_env import CCPPFrameworkEnv
+from fortran_tools import parse_fortran_file
+from fortran_tools.parse_fortran_file import read_file
+from parse_tools import ParseSyntaxError
+# pylint: enable=wrong-import-position
+
+_CONTINUED_SOURCE = """module cont_mod
+  integer :: a, &  ! first line
+       b, &
+
+       c
+#ifdef CCPP_TEST
+  integer :: in_true_region
+#else
+  integer :: in_false_region
+#endif
+end module cont_mod
+"""
+
+_SCHEME_SOURCE = """module scheme_mod
+  implicit none
+contains
+  !> \\section arg_table_scheme_mod_init  Argument Table
+  !! \\htmlinclude scheme_mod_init.html
+  !!
+  subroutine scheme_mod_init(errmsg, errflg)
+    character(len=*), intent(out) :: errmsg
+    integer,          intent(out) :: errflg
+  end subroutine scheme_mod_init
+{extra}
+end module scheme_mod
+"""
+
+_EXTRA_TABLE = """  !> \\section arg_table_scheme_mod_run  Argument Table
+  !! \\htmlinclude scheme_mod_run.html
+  !!
+  subroutine scheme_mod_run(errflg)
+    integer,          intent(out) :: errflg
+  end subroutine scheme_mod_run
+"""
+
+# The invalid continuation line would be a parse error if it were read
+_EXTRA_ROUTINE = """  subroutine helper(x)
+    integer, intent(inout) :: x
+    x = x & + 1
+  end subroutine helper
+"""
+
+def _titles(tables):
+    """Return the titles of all the sections of <tables>"""
+    return [x.title for table in tables for x in table.sections()]
+
+class ParseFortranFileTestCase(unittest.TestCase):
+
+    """Tests for `read_file` and `parse_fortran_file`."""
+
+    def setUp(self):
+        """Create a run environment and a directory for Fortran sources"""
+        logger = logging.getLogger(self.__class__.__name__)
+        self._run_env = CCPPFrameworkEnv(logger, ndict={'host_files':'',
+                                                        'scheme_files':'',
+                                                        'suites':''})
+        self._tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Remove the Fortran sources"""
+        self._tmpdir.cleanup()
+
+    def _write_source(self, name, source):
+        """Write <source> to file, <name>, and return its pathname"""
+        filename = os.path.join(self._tmpdir.name, name)
+        with open(filename, 'w') as ffile:
+            ffile.write(source)
+        return filename
+
+    def test_read_file_consolidates_lines(self):
+        """Test that continuation lines are joined and preprocessor
+        regions are removed without changing line numbers"""
+        filename = self._write_source("cont_mod.F90", _CONTINUED_SOURCE)
+        pobj = read_file(filename, preproc_defs={'CCPP_TEST':1})
+        lines = list()
+        while pobj.peek_line(len(lines)) is not None:
+            lines.append(pobj.peek_line(len(lines)))
+        self.assertEqual(len(lines), len(_CONTINUED_SOURCE.splitlines()))
+        self.assertEqual(lines[1], "  integer :: a,       b,        c")
+        self.assertEqual(lines[2:5], ["", "", ""])
+        self.assertEqual(lines[6], "  integer :: in_true_region")
+        self.assertEqual(lines[7:10], ["", "", ""])
+
+    def test_early_stop(self):
+        """Test that parsing stops once the requested tables are found
+        unless more tables follow"""
+        filename = self._write_source("scheme_mod.F90",
+                                      _SCHEME_SOURCE.format(extra=_EXTRA_ROUTINE))
+        with self.assertRaises(ParseSyntaxError):
+            parse_fortran_file(filename, self._run_env)
+        tables = parse_fortran_file(filename, self._run_env,
+                                    table_names=['scheme_mod_init'])
+        self.assertEqual(_titles(tables), ['scheme_mod_init'])
+        # A table after the requested tables must still be found
+        filename = self._write_source("scheme_mod.F90",
+                                      _SCHEME_SOURCE.format(extra=_EXTRA_TABLE))
+        tables = parse_fortran_file(filename, self._run_env,
+                                    table_names=['scheme_mod_init'])
+        self.assertEqual(_titles(tables), ['scheme_mod_init', 'scheme_mod_run'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Contains unit tests for the scheme timers written by
+               scripts files suite_objects.py and ccpp_suite.py
+
+ Assumptions:
+
+ Command line arguments: none
+
+ Usage: python3 test_scheme_timers.py         # run the unit tests
+-----------------------------------------------------------------------
+"""
+import unittest
+
+from capgen_helpers import CapgenTestCase, var_compat_args
+
+_SUITE_CAP = "ccpp_var_compatibility_suite_cap.F90"
+
+class SchemeTimersTestCase(CapgenTestCase):
+
+    """Tests for the --scheme-timers capgen option."""
+
+    def _run_capgen(self, name, options):
+        """Run capgen on the var_compatibility test and return the lines
+        of its suite cap."""
+        output_dir = self.run_capgen_ok(name, var_compat_args() + options)
+        return self.read_lines(output_dir, _SUITE_CAP)
+
+    def test_scheme_timers(self):
+        """Test that the groups and scheme calls are timed and that the
+        suite cap has a timing table interface"""
+        lines = self._run_capgen("default", [])
+        self.assertFalse([x for x in lines if "timer" in x])
+        lines = self._run_capgen("timers", ["--scheme-timers"])
+        self.assertIn("integer, parameter :: ccpp_num_timers = 6", lines)
+        self.assertIn("data ccpp_timer_names(4) / " +
+                      "'var_compatibility_suite_radiation/effr_calc_run' /",
+                      lines)
+        self.assertIn("data ccpp_timer_phases(4) / 'run' /", lines)
+        for routine in ["timing_table", "print_timing_table", "reset_timers"]:
+            self.assertIn("public :: var_compatibility_suite_" + routine,
+                          lines)
+        # The scheme call is nested inside of the group timer
+        call = [x for x in lines if x.startswith("call effr_calc_run(")][0]
+        index = lines.index(call)
+        self.assertEqual(lines[index - 1],
+                         "call system_clock(ccpp_timer_start(2))")
+        stops = [x for x in lines[index:] if "ccpp_timer_stop(" in x]
+        self.assertEqual(stops[0],
+                         "call ccpp_timer_stop(4, ccpp_timer_start(2))")
+        self.assertEqual(lines.count("call system_clock(ccpp_timer_start(1))"),
+                         5)
+        self.assertIn("integer(kind=8) :: ccpp_timer_start(2)", lines)
+
+if __name__ == "__main__":
+    unittest.main()
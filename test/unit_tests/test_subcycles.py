@@ -0,0 +1,64 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Contains unit tests for the subcycle loops written by
+               scripts file suite_objects.py
+
+ Assumptions:
+
+ Command line arguments: none
+
+ Usage: python3 test_subcycles.py         # run the unit tests
+-----------------------------------------------------------------------
+"""
+import os
+import unittest
+
+from capgen_helpers import CapgenTestCase, CAPGEN_TEST_DIR, TEST_DIR
+from capgen_helpers import capgen_test_args
+
+SAMPLE_FILES_DIR = os.path.join(TEST_DIR, "sample_files")
+
+_SUITE = "nested_subcycle_suite"
+
+class SubcycleTestCase(CapgenTestCase):
+
+    """Tests for suites containing (nested) subcycles."""
+
+    def test_nested_subcycles(self):
+        """Test that nested subcycles have their own loop index and that
+        each loop is closed at its own indentation"""
+        suite_file = os.path.join(SAMPLE_FILES_DIR, _SUITE + ".xml")
+        output_dir = self.run_capgen_ok("subcycles",
+                                        capgen_test_args("temp_scheme_files.txt",
+                                                         suite_file),
+                                        cwd=CAPGEN_TEST_DIR)
+        cap_file = os.path.join(output_dir, "ccpp_{}_cap.F90".format(_SUITE))
+        with open(cap_file, 'r') as cfile:
+            lines = cfile.readlines()
+        # Each loop index is a local variable of the group subroutine
+        decls = [x.split('::')[-1].strip() for x in lines
+                 if x.strip().startswith('integer') and '::' in x]
+        self.assertIn("subcycle_index2", decls)
+        self.assertIn("subcycle_index3", decls)
+        # Find the loops and match each 'end do' to its 'do'
+        loops = []
+        open_loops = []
+        for line in lines:
+            stmt = line.strip()
+            indent = len(line) - len(line.lstrip())
+            if stmt.startswith('do '):
+                open_loops.append((stmt, indent))
+            elif stmt == 'end do':
+                self.assertTrue(open_loops)
+                stmt, do_indent = open_loops.pop()
+                self.assertEqual(indent, do_indent, msg=stmt)
+                loops.append((stmt, len(open_loops)))
+            # end if
+        # end for
+        self.assertFalse(open_loops)
+        self.assertIn(("do subcycle_index2 = 1, 2", 0), loops)
+        self.assertIn(("do subcycle_index3 = 1, 3", 1), loops)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Contains unit tests for the capgen timing report written
+               by scripts file phase_timer.py
+
+ Assumptions:
+
+ Command line arguments: none
+
+ Usage: python3 test_timing_report.py         # run the unit tests
+-----------------------------------------------------------------------
+"""
+import json
+import os
+import unittest
+
+from capgen_helpers import CapgenTestCase, CAPGEN_TEST_DIR, capgen_test_args
+
+_TOP_PHASES = ["file_lists", "host_parse", "scheme_parse", "suite_analysis",
+               "code_writing", "file_moving", "datatable"]
+
+class TimingReportTestCase(CapgenTestCase):
+
+    """Tests for the --timing-report capgen option."""
+
+    def test_timing_report(self):
+        """Test the phases and fields of a capgen timing report"""
+        report_file = os.path.join(self._tmpdir.name, "timing.json")
+        self.run_capgen_ok("report",
+                           capgen_test_args("temp_scheme_files.txt",
+                                            "temp_suite.xml") +
+                           ["--timing-report", report_file],
+                           cwd=CAPGEN_TEST_DIR)
+        with open(report_file, 'r') as rfile:
+            report = json.load(rfile)
+        # end with
+        self.assertEqual(report['format'], 2)
+        phases = {x['name'] : x for x in report['phases']}
+        # Each phase is listed after its parent phase
+        names = [x['name'] for x in report['phases']]
+        self.assertEqual([x for x in names if '/' not in x], _TOP_PHASES)
+        for name in names:
+            if '/' in name:
+                parent = name.rsplit('/', 1)[0]
+                self.assertLess(names.index(parent), names.index(name))
+            # end if
+        # end for
+        # The four scheme files and the constituent properties DDT
+        self.assertEqual(phases['scheme_parse/metadata_parse']['calls'], 5)
+        self.assertEqual(phases['scheme_parse/fortran_check']['calls'], 5)
+        self.assertIn('suite_analysis/temp_suite.xml/temp_suite_physics2',
+                      phases)
+        for pdata in report['phases']:
+            self.assertEqual(sorted(pdata.keys()),
+                             ['calls', 'cpu_time', 'name', 'peak_memory_kib',
+                              'wall_time'])
+            self.assertGreaterEqual(pdata['wall_time'], 0.0)
+            self.assertGreaterEqual(pdata['cpu_time'], 0.0)
+            self.assertGreaterEqual(pdata['peak_memory_kib'], 0)
+        # end for
+        # The peak of a phase includes the peaks of its nested phases
+        for name, pdata in phases.items():
+            if '/' in name:
+                parent = phases[name.rsplit('/', 1)[0]]
+                self.assertGreaterEqual(parent['peak_memory_kib'],
+                                        pdata['peak_memory_kib'])
+            # end if
+        # end for
+        # The peak of a phase is not the process high-water mark
+        self.assertLess(phases['file_lists']['peak_memory_kib'],
+                        phases['datatable']['peak_memory_kib'])
+        self.assertGreater(report['max_rss_kib'],
+                           max(x['peak_memory_kib']
+                               for x in report['phases']))
+
+if __name__ == "__main__":
+    unittest.main()
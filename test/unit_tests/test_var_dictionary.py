@@ -0,0 +1,146 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Contains unit tests for variable lookup in the
+               VarDictionary object in scripts file metavar.py
+
+ Assumptions:
+
+ Command line arguments: none
+
+ Usage: python3 test_var_dictionary.py         # run the unit tests
+-----------------------------------------------------------------------
+"""
+import sys
+import os
+import json
+import logging
+import subprocess
+import tempfile
+import unittest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.abspath(os.path.join(TEST_DIR, os.pardir, os.pardir, "scripts"))
+CAPGEN_TEST_DIR = os.path.abspath(os.path.join(TEST_DIR, os.pardir,
+                                               "capgen_test"))
+
+if not os.path.exists(SCRIPTS_DIR):
+    raise ImportError("Cannot find scripts directory")
+
+sys.path.append(SCRIPTS_DIR)
+
+# pylint: disable=wrong-import-position
+from framework_env import CCPPFrameworkEnv
+from metavar import Var, VarDictionary
+from parse_tools import ParseContext, ParseSource
+# pylint: enable=wrong-import-position
+
+## Run capgen on the capgen test suites and print the lookup cache stats
+_CAPGEN_STATS_SCRIPT = """
+import json, logging, sys
+sys.path.append({scripts_dir!r})
+from ccpp_capgen import capgen
+from framework_env import parse_command_line
+from metavar import VarDictionary
+run_env = parse_command_line([
+    "--host-files", "test_host_data.meta,test_host_mod.meta,test_host.meta",
+    "--scheme-files", "temp_scheme_files.txt,ddt_suite_files.txt",
+    "--suites", "ddt_suite.xml,temp_suite.xml", "--host-name", "test_host",
+    "--output-root", {output_dir!r}], "capgen",
+    logger=logging.getLogger("capgen"))
+capgen(run_env)
+print(json.dumps(VarDictionary.find_variable_stats()))
+"""
+
+class _RecordingDictionary(VarDictionary):
+    """VarDictionary whose find_variable override records each lookup"""
+
+    def __init__(self, name, run_env, parent_dict=None):
+        self.lookups = list()
+        super().__init__(name, run_env, parent_dict=parent_dict)
+
+    def find_variable(self, standard_name=None, source_var=None,
+                      any_scope=True, clone=None,
+                      search_call_list=False, loop_subst=False):
+        self.lookups.append(standard_name)
+        return super().find_variable(standard_name=standard_name,
+                                     source_var=source_var,
+                                     any_scope=any_scope, clone=clone,
+                                     search_call_list=search_call_list,
+                                     loop_subst=loop_subst)
+
+class VarDictionaryTestCase(unittest.TestCase):
+
+    """Tests for `VarDictionary.find_variable`."""
+
+    def setUp(self):
+        """Create a run environment and a variable source"""
+        logger = logging.getLogger(self.__class__.__name__)
+        self._run_env = CCPPFrameworkEnv(logger, ndict={'host_files':'',
+                                                        'scheme_files':'',
+                                                        'suites':''})
+        self._source = ParseSource('vname', 'scheme', ParseContext())
+
+    def _new_var(self, name):
+        """Return a new scalar Var with local and standard name, <name>"""
+        return Var({'local_name' : name, 'standard_name' : name,
+                    'units' : 'm', 'dimensions' : '()', 'type' : 'real',
+                    'intent' : 'in'}, self._source, self._run_env)
+
+    def test_cached_lookup_invalidation(self):
+        """Test that cached parent lookups follow dictionary changes"""
+        top = VarDictionary('top', self._run_env)
+        mid = VarDictionary('mid', self._run_env, parent_dict=top)
+        bot = VarDictionary('bot', self._run_env, parent_dict=mid)
+        self.assertIsNone(bot.find_variable(standard_name='foo'))
+        top.add_variable(self._new_var('foo'), self._run_env)
+        self.assertIs(bot.find_variable(standard_name='foo'), top['foo'])
+        stats = VarDictionary.find_variable_stats()
+        self.assertIs(bot.find_variable(standard_name='foo'), top['foo'])
+        self.assertEqual(VarDictionary.find_variable_stats()['hits'],
+                         stats['hits'] + 1)
+        mid.add_variable(self._new_var('foo'), self._run_env)
+        self.assertIs(bot.find_variable(standard_name='foo'), mid['foo'])
+        mid.remove_variable('foo')
+        self.assertIs(bot.find_variable(standard_name='foo'), top['foo'])
+        top.remove_variable('foo')
+        self.assertIsNone(bot.find_variable(standard_name='foo'))
+
+    def test_override_lookups_cached(self):
+        """Test that lookups through a parent which overrides find_variable
+        are cached, but unsuccessful lookups and lookups with a clone
+        are not"""
+        top = _RecordingDictionary('top', self._run_env)
+        bot = VarDictionary('bot', self._run_env, parent_dict=top)
+        for _ in range(2):
+            self.assertIsNone(bot.find_variable(standard_name='foo'))
+        # end for
+        top.add_variable(self._new_var('foo'), self._run_env)
+        top.lookups.clear()
+        for _ in range(3):
+            self.assertIs(bot.find_variable(standard_name='foo'), top['foo'])
+        # end for
+        self.assertIs(bot.find_variable(standard_name='foo',
+                                        clone=self._new_var('bar')),
+                      top['foo'])
+        self.assertEqual(top.lookups, ['foo'] * 2)
+
+    def test_capgen_lookup_cache(self):
+        """Test that parent scope lookups are cached when capgen processes
+        the capgen test suites (through the SuiteObject, Suite, and
+        HostModel overrides of find_variable)"""
+        # Run capgen in its own process, it registers global DDT names
+        with tempfile.TemporaryDirectory() as tmpdir:
+            script = _CAPGEN_STATS_SCRIPT.format(scripts_dir=SCRIPTS_DIR,
+                                                 output_dir=tmpdir)
+            result = subprocess.run([sys.executable, "-c", script],
+                                    cwd=CAPGEN_TEST_DIR, check=True,
+                                    stdout=subprocess.PIPE,
+                                    stderr=subprocess.DEVNULL)
+        # end with
+        stats = json.loads(result.stdout.decode().splitlines()[-1])
+        self.assertGreater(stats['misses'], 0)
+        self.assertGreater(stats['hits'], 0)
+
+if __name__ == "__main__":
+    unittest.main()
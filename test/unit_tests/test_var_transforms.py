@@ -157,11 +157,33 @@ class VarCompatTestCase(unittest.TestCase):
         self.assertFalse(compat.has_dim_transforms)
         self.assertTrue(compat.has_unit_transforms)
 
+    def test_derived_unit_change(self):
+        """Test that unit changes without a hand-written conversion are
+        derived from the unit algebra"""
+        real_scalar1 = self._new_var('real_stdname1', 'mm d-1', [],
+                                     'real', vkind='kind_phys')
+        real_scalar2 = self._new_var('real_stdname1', 'm s-1', [],
+                                     'real', vkind='kind_phys')
+        compat = real_scalar1.compatible(real_scalar2, self.__run_env)
+        self.assertTrue(compat.compat)
+        self.assertTrue(compat.has_unit_transforms)
+        rkind = real_scalar1.get_prop_value('kind')
+        self.assertEqual(compat.forward_transform('v2', 'v1', [], []),
+                         f"v2 = v1/8.64E+7_{rkind}")
+        self.assertEqual(compat.reverse_transform('v1', 'v2', [], []),
+                         f"v1 = 8.64E+7_{rkind}*v2")
+        # Equivalent units do not need a transform
+        real_scalar3 = self._new_var('real_stdname1', 's-1 m', [],
+                                     'real', vkind='kind_phys')
+        compat = real_scalar2.compatible(real_scalar3, self.__run_env)
+        self.assertTrue(compat.compat)
+        self.assertFalse(compat.has_unit_transforms)
+
     def test_unsupported_unit_change(self):
         """Test that unsupported unit changes are detected"""
         real_scalar1 = self._new_var('real_stdname1', 'min', [],
                                      'real', vkind='kind_phys')
-        real_scalar2 = self._new_var('real_stdname1', 'd', [],
+        real_scalar2 = self._new_var('real_stdname1', 'm', [],
                                      'real', vkind='kind_phys')
         char_nounit1 = self._new_var('char_stdname1', 'none', [],
                                      'character', vkind='len=256')
@@ -170,9 +192,9 @@ class VarCompatTestCase(unittest.TestCase):
         with self.assertRaises(ParseSyntaxError) as context:
             compat = real_scalar1.compatible(real_scalar2, self.__run_env)
         # end with
-        #Test bad conversion for real time variables
+        #Test bad conversion for dimensionally inconsistent variables
         #Verify correct error message returned
-        emsg = "Unsupported unit conversion, 'min' to 'd' for 'real_stdname1'"
+        emsg = "Unsupported unit conversion, 'min' to 'm' for 'real_stdname1'"
         self.assertTrue(emsg in str(context.exception))
         #Test bad conversion for unitless variables
         with self.assertRaises(ParseSyntaxError) as context:
@@ -182,6 +204,22 @@ class VarCompatTestCase(unittest.TestCase):
         emsg = "Unsupported unit conversion, 'none' to '1' for 'char_stdname1'"
         self.assertTrue(emsg in str(context.exception))
 
+    def test_ambiguous_unit_change(self):
+        """Test that units with the same dimensions but different base
+        units or symbols are not treated as equivalent"""
+        for units1, units2 in [('mol mol-1', 'kg kg-1'), ('1', 'kg kg-1'),
+                               ('K s-1', 'C s-1')]:
+            real_scalar1 = self._new_var('q', units1, [],
+                                         'real', vkind='kind_phys')
+            real_scalar2 = self._new_var('q', units2, [],
+                                         'real', vkind='kind_phys')
+            with self.assertRaises(ParseSyntaxError) as context:
+                compat = real_scalar1.compatible(real_scalar2, self.__run_env)
+            # end with
+            emsg = f"Unsupported unit conversion, '{units1}' to '{units2}' for 'q'"
+            self.assertTrue(emsg in str(context.exception))
+        # end for
+
     def test_valid_kind_change(self):
         """Test that valid kind changes are detected"""
         real_scalar1 = self._new_var('real_stdname1', 'mm', [],
@@ -407,6 +445,68 @@ class VarCompatTestCase(unittest.TestCase):
         expected = f"{v5_lname}({lind_str}) = {v4_lname}({rind_str})"
         self.assertEqual(rev_stmt, expected)
 
+    def test_compat_cache(self):
+        """Test that identical compatibility checks are reused from the
+        VarCompatObj cache and that variable-specific errors are not"""
+        VarCompatObj.clear_cache()
+        self.assertEqual(VarCompatObj.cache_statistics(), (0, 0))
+        real_array1 = self._new_var('real_stdname1', 'm', ['hdim', 'vdim'],
+                                    'real', vkind='kind_phys')
+        real_array2 = self._new_var('real_stdname1', 'km', ['hdim', 'vdim'],
+                                    'real', vkind='kind_dyn')
+        real_array3 = self._new_var('real_stdname1', 'm', ['hdim', 'vdim'],
+                                    'real', vkind='kind_phys')
+        real_array4 = self._new_var('real_stdname1', 'km', ['hdim', 'vdim'],
+                                    'real', vkind='kind_dyn')
+        # A reused check returns the same transforms
+        compat1 = real_array1.compatible(real_array2, self.__run_env)
+        self.assertEqual(VarCompatObj.cache_statistics(), (0, 1))
+        compat2 = real_array3.compatible(real_array4, self.__run_env)
+        self.assertEqual(VarCompatObj.cache_statistics(), (1, 2))
+        self.assertIsInstance(compat2, VarCompatObj,
+                              msg=self.__inst_emsg.format(type(compat2)))
+        self.assertFalse(compat2.equiv)
+        self.assertTrue(compat2.has_unit_transforms)
+        self.assertTrue(compat2.has_kind_transforms)
+        indices = ('i', 'k')
+        self.assertEqual(compat2.forward_transform("v1", "v2",
+                                                   indices, indices),
+                         compat1.forward_transform("v1", "v2",
+                                                   indices, indices))
+        self.assertEqual(compat2.reverse_transform("v1", "v2",
+                                                   indices, indices),
+                         compat1.reverse_transform("v1", "v2",
+                                                   indices, indices))
+        # A character kind error names the variable so it is not cached
+        char_var1 = self._new_var('char_stdname1', 'none', [],
+                                  'character', vkind='kind=1')
+        char_var2 = self._new_var('char_stdname1', 'none', [],
+                                  'character', vkind='len=256')
+        char_var3 = self._new_var('char_stdname1', 'none', [],
+                                  'character', vkind='kind=1')
+        compat3 = char_var1.compatible(char_var2, self.__run_env)
+        compat4 = char_var3.compatible(char_var2, self.__run_env)
+        self.assertFalse(compat3)
+        self.assertFalse(compat4)
+        self.assertIn(char_var1.get_prop_value('local_name'),
+                      compat3.incompat_reason)
+        self.assertIn(char_var3.get_prop_value('local_name'),
+                      compat4.incompat_reason)
+        self.assertNotIn(char_var1.get_prop_value('local_name'),
+                         compat4.incompat_reason)
+        self.assertEqual(VarCompatObj.cache_statistics(), (1, 4))
+        # The statistics count again from zero after the cache is cleared
+        VarCompatObj.clear_cache()
+        self.assertEqual(VarCompatObj.cache_statistics(), (0, 0))
+        compat5 = real_array1.compatible(real_array2, self.__run_env)
+        self.assertEqual(VarCompatObj.cache_statistics(), (0, 1))
+        compat6 = real_array3.compatible(real_array4, self.__run_env)
+        self.assertEqual(VarCompatObj.cache_statistics(), (1, 2))
+        self.assertEqual(compat6.forward_transform("v1", "v2",
+                                                   indices, indices),
+                         compat5.forward_transform("v1", "v2",
+                                                   indices, indices))
+
 if __name__ == "__main__":
     unittest.main()
 
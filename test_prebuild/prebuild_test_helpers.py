@@ -0,0 +1,33 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Contains helper functions shared by the pytest tests which
+               run ccpp_prebuild.py on the test_blocked_data files
+
+ Assumptions:  Assumes user has correct environment for running ccpp_prebuild.py script.
+
+ Command line arguments: none
+
+ Usage: from prebuild_test_helpers import run_prebuild
+-----------------------------------------------------------------------
+"""
+import sys
+import os
+import subprocess
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.abspath(os.path.join(TEST_DIR, os.pardir, "scripts"))
+SAMPLE_FILES_DIR = os.path.join(TEST_DIR, "test_blocked_data")
+GROUP_CAP = "ccpp_blocked_data_suite_blocked_data_group_cap.F90"
+if not os.path.exists(SCRIPTS_DIR):
+    raise ImportError(f"Cannot find scripts directory {SCRIPTS_DIR}")
+
+def run_prebuild(builddir, options):
+    """Run ccpp_prebuild.py for the blocked data test with <options> and
+       return the contents of the group cap"""
+    command = [sys.executable, os.path.join(SCRIPTS_DIR, "ccpp_prebuild.py"),
+               "--config=ccpp_prebuild_config.py", f"--builddir={builddir}"] + options
+    subprocess.run(command, cwd=SAMPLE_FILES_DIR, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    with open(os.path.join(builddir, GROUP_CAP), 'r') as cap:
+        return cap.read()
@@ -0,0 +1,47 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Contains unit tests for the conversion of blocked data in
+               the group caps written by ccpp_prebuild.py
+
+ Assumptions:  Assumes user has correct environment for running ccpp_prebuild.py script.
+               This script should not be run directly, but rather invoked with pytest.
+
+ Command line arguments: none
+
+ Usage: pytest test_deblocking.py         # run the unit tests
+-----------------------------------------------------------------------
+"""
+import os
+
+from prebuild_test_helpers import run_prebuild
+
+def group_cap_lines(builddir, options):
+    """Run ccpp_prebuild.py for the blocked data test with <options> and
+       return the stripped lines of the group cap"""
+    return [line.strip() for line in run_prebuild(builddir, options).splitlines()]
+
+def test_copy_deblocking(tmp_path):
+    """Tests that blocked data is copied into an allocated array by default"""
+    lines = group_cap_lines(str(tmp_path), [])
+    assert "integer, dimension(:), allocatable :: data_array_1_local" in lines
+    assert not [line for line in lines if "=> blocked_data_instance" in line]
+
+def test_zero_copy_deblocking(tmp_path):
+    """Tests that a single block is passed without a copy and that intent(in)
+       data is not copied back, and the de-blocking report"""
+    report = os.path.join(str(tmp_path), "deblocking.txt")
+    lines = group_cap_lines(str(tmp_path), ["--zero-copy-deblocking",
+                                            f"--deblocking-report={report}"])
+    assert "integer, dimension(:), pointer :: data_array_1_local" in lines
+    assert "type(blocked_data_type), intent(in), target :: blocked_data_instance(one:)" in lines
+    assert "data_array_1_local(one:) => blocked_data_instance(1)%array_data" in lines
+    assert "nullify(data_array_1_local)" in lines
+    # The intent(in) data is copied in, but not out
+    assert "data_array_1_local(ib:ib+blksz(nb)-1) = blocked_data_instance(nb)%array_data" in lines
+    assert "blocked_data_instance(nb)%array_data = data_array_1_local(ib:ib+blksz(nb)-1)" not in lines
+    with open(report, 'r') as rfile:
+        rlines = rfile.readlines()
+    assert rlines[1].startswith("# 0 of 4 conversions still need full de-blocking")
+    assert rlines[3].split()[2:] == ["blocked_data_scheme_timestep_init", "blocked_data_array", "in",
+                                     "pointer", "to", "single", "block,", "else", "copy", "in"]
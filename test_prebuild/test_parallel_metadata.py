@@ -0,0 +1,68 @@
+#! /usr/bin/env python3
+"""
+-----------------------------------------------------------------------
+ Description:  Contains unit tests for parsing the scheme metadata in
+               parallel and for the metadata cache of ccpp_prebuild.py
+
+ Assumptions:  Assumes user has correct environment for running ccpp_prebuild.py script.
+               This script should not be run directly, but rather invoked with pytest.
+
+ Command line arguments: none
+
+ Usage: pytest test_parallel_metadata.py         # run the unit tests
+-----------------------------------------------------------------------
+"""
+import sys
+import os
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.abspath(os.path.join(TEST_DIR, os.pardir, "scripts"))
+SCHEME_FILES = [os.path.join(TEST_DIR, "test_blocked_data", "blocked_data_scheme.F90"),
+                os.path.join(TEST_DIR, "test_chunked_data", "chunked_data_scheme.F90"),
+                os.path.join(TEST_DIR, "test_opt_arg", "opt_arg_scheme.F90")]
+if not os.path.exists(SCRIPTS_DIR):
+    raise ImportError(f"Cannot find scripts directory {SCRIPTS_DIR}")
+
+sys.path.append(SCRIPTS_DIR)
+
+# pylint: disable=wrong-import-position
+from ccpp_prebuild import collect_physics_subroutines
+from prebuild_test_helpers import run_prebuild
+# pylint: enable=wrong-import-position
+
+def metadata_properties(metadata):
+    """Return the properties of the variables in <metadata> by standard name"""
+    return {name : [sorted(vars(var).items()) for var in variables]
+            for (name, variables) in metadata.items()}
+
+def test_parallel_collect_physics_subroutines():
+    """Tests that parsing scheme files in parallel gives the same result,
+       in the same order, as parsing them one at a time"""
+    serial = collect_physics_subroutines(SCHEME_FILES)
+    parallel = collect_physics_subroutines(SCHEME_FILES, jobs=3)
+    assert serial[0] and parallel[0]
+    assert list(parallel[1].keys()) == list(serial[1].keys())
+    assert metadata_properties(parallel[1]) == metadata_properties(serial[1])
+    assert list(parallel[2].items()) == list(serial[2].items())
+    assert list(parallel[3].items()) == list(serial[3].items())
+    assert list(parallel[4].items()) == list(serial[4].items())
+    assert list(parallel[4].keys()) == ["blocked_data_scheme", "chunked_data_scheme",
+                                        "opt_arg_scheme"]
+
+def test_metadata_cache(tmp_path):
+    """Tests that the group cap does not change with a metadata cache
+       and that the cache is reused by the next run"""
+    cache_dir = os.path.join(str(tmp_path), "cache")
+    reference = run_prebuild(os.path.join(str(tmp_path), "serial"), [])
+    cached = run_prebuild(os.path.join(str(tmp_path), "cached"),
+                          ["--jobs=2", f"--metadata-cache-dir={cache_dir}"])
+    assert cached == reference
+    cache_files = sorted(os.listdir(cache_dir))
+    assert cache_files
+    assert all(x.endswith(".json") for x in cache_files)
+    mtimes = [os.path.getmtime(os.path.join(cache_dir, x)) for x in cache_files]
+    cached = run_prebuild(os.path.join(str(tmp_path), "cached2"),
+                          [f"--metadata-cache-dir={cache_dir}"])
+    assert cached == reference
+    assert sorted(os.listdir(cache_dir)) == cache_files
+    assert [os.path.getmtime(os.path.join(cache_dir, x)) for x in cache_files] == mtimes
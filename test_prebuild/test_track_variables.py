@@ -13,6 +13,9 @@
 """
 import sys
 import os
+import glob
+import json
+import shutil
 import pytest
 
 TEST_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -28,7 +31,17 @@ sys.path.append(SCRIPTS_DIR)
 
 from ccpp_track_variables import track_variables
 
-def test_successful_match(capsys):
+INDEX_FILENAME = '.ccpp_track_variables_index.json'
+
+@pytest.fixture
+def metadata_path(tmp_path):
+    """Return a copy of the sample metadata files, so that the index of metadata
+       variables saved by each test is not seen by the other tests"""
+    for filename in glob.glob(os.path.join(SAMPLE_FILES_DIR, "*.meta")):
+        shutil.copy(filename, str(tmp_path))
+    return str(tmp_path)
+
+def test_successful_match(capsys, metadata_path):
     """Tests whether test_track_variables.py produces expected output from sample suite and
        metadata files for a case with a successful match (user provided a variable that exists
        within the schemes specified by the test suite)"""
@@ -36,14 +49,14 @@ def test_successful_match(capsys):
 In group group1
   scheme_1_run (intent in)
   scheme_1_run (intent in)"""
-    track_variables(SMALL_SUITE_FILE,SAMPLE_FILES_DIR,CONFIG_FILE,'air_pressure',False)
+    track_variables(SMALL_SUITE_FILE,metadata_path,CONFIG_FILE,'air_pressure',False)
     streams = capsys.readouterr()
     expected_output_list = expected_output.splitlines()
     streams_err_list = streams.err.splitlines()
     for (err, expected) in zip(streams_err_list, expected_output_list):
         assert err.strip() == expected.strip()
 
-def test_successful_match_with_subcycles(capsys):
+def test_successful_match_with_subcycles(capsys, metadata_path):
     """Tests whether test_track_variables.py produces expected output from sample suite and
        metadata files for a case with a successful match (user provided a variable that exists
        within the schemes specified by the test suite). In this case, the test suite file
@@ -63,7 +76,7 @@ In group group2
   scheme_4_run (intent in)
   scheme_4_run (intent in)
   scheme_4_run (intent in)"""
-    track_variables(SUITE_FILE,SAMPLE_FILES_DIR,CONFIG_FILE,'surface_air_pressure',False)
+    track_variables(SUITE_FILE,metadata_path,CONFIG_FILE,'surface_air_pressure',False)
     streams = capsys.readouterr()
     expected_output_list = expected_output.splitlines()
     streams_err_list = streams.err.splitlines()
@@ -71,7 +84,7 @@ In group group2
         assert err.strip() == expected.strip()
 
 
-def test_partial_match(capsys):
+def test_partial_match(capsys, metadata_path):
     """Tests whether test_track_variables.py produces expected output from sample suite and
        metadata files for a case with a partial match: user provided a variable that does not
        exist in the test suite, but is a substring of one or more other variables that do
@@ -92,7 +105,7 @@ In scheme_3_timestep_finalize found variable(s) ['surface_air_pressure']
 In scheme_4_run found variable(s) ['surface_air_pressure']
 In scheme_B_run found variable(s) ['flag_nonzero_wet_surface_fraction', 'sea_surface_temperature', 'surface_skin_temperature_after_iteration_over_water']
 """
-    track_variables(SUITE_FILE,SAMPLE_FILES_DIR,CONFIG_FILE,'surface',False)
+    track_variables(SUITE_FILE,metadata_path,CONFIG_FILE,'surface',False)
     streams = capsys.readouterr()
     expected_output_list = expected_output.splitlines()
     streams_err_list = streams.err.splitlines()
@@ -100,7 +113,7 @@ In scheme_B_run found variable(s) ['flag_nonzero_wet_surface_fraction', 'sea_sur
         assert err.strip() == expected.strip()
 
 
-def test_no_match(capsys):
+def test_no_match(capsys, metadata_path):
     """Tests whether test_track_variables.py produces expected output from sample suite and
        metadata files for a case with no match (user provided a variable that does not exist
        within the schemes specified by the test suite)"""
@@ -108,7 +121,7 @@ def test_no_match(capsys):
     expected_output = """Variable abc not found in any suites for sdf test_track_variables/suite_TEST_SUITE.xml
 
 ERROR:ccpp_track_variables:Variable abc not found in any suites for sdf test_track_variables/suite_TEST_SUITE.xml"""
-    track_variables(SUITE_FILE,SAMPLE_FILES_DIR,CONFIG_FILE,'abc',False)
+    track_variables(SUITE_FILE,metadata_path,CONFIG_FILE,'abc',False)
     streams = capsys.readouterr()
     expected_output_list = expected_output.splitlines()
     streams_err_list = streams.err.splitlines()
@@ -116,11 +129,57 @@ ERROR:ccpp_track_variables:Variable abc not found in any suites for sdf test_tra
         assert err.strip() == expected.strip()
 
 
-def test_bad_config(capsys):
+def test_multiple_variables(capsys, metadata_path):
+    """Tests whether test_track_variables.py produces expected output for each variable when
+       tracking several variables in one run, and saves the index of metadata variables
+       next to the metadata files"""
+
+    expected_output = """For suite test_track_variables/suite_small_suite.xml, the following schemes (in order for each group) use the variable air_pressure:
+In group group1
+  scheme_1_run (intent in)
+
+For suite test_track_variables/suite_small_suite.xml, the following schemes (in order for each group) use the variable surface_air_pressure:
+In group group2
+  scheme_4_run (intent in)"""
+    track_variables(SMALL_SUITE_FILE,metadata_path,CONFIG_FILE,
+                    ['air_pressure', 'surface_air_pressure'],False)
+    streams = capsys.readouterr()
+    assert streams.out.strip().splitlines() == expected_output.splitlines()
+    assert os.path.exists(os.path.join(metadata_path, INDEX_FILENAME))
+    assert not os.path.exists(os.path.join(SAMPLE_FILES_DIR, INDEX_FILENAME))
+
+
+def test_index_config_change(capsys, metadata_path, tmp_path):
+    """Tests that the saved index of metadata variables is reused with the same prebuild
+       configuration and rebuilt when the typedefs of the configuration change"""
+    index_file = os.path.join(metadata_path, INDEX_FILENAME)
+    track_variables(SMALL_SUITE_FILE,metadata_path,CONFIG_FILE,'air_pressure',False)
+    with open(index_file, 'r') as ifile:
+        index = json.load(ifile)
+    mtime = os.path.getmtime(index_file)
+    track_variables(SMALL_SUITE_FILE,metadata_path,CONFIG_FILE,'air_pressure',False)
+    assert os.path.getmtime(index_file) == mtime
+    # A configuration with typedefs, under a new module name so that it is imported
+    config_dir = tmp_path / "config"
+    config_dir.mkdir()
+    new_config = str(config_dir / "track_variables_typedefs_config.py")
+    shutil.copy(CONFIG_FILE, new_config)
+    with open(new_config, 'a') as cfile:
+        cfile.write("\nTYPEDEFS_NEW_METADATA = {}\n")
+    track_variables(SMALL_SUITE_FILE,metadata_path,new_config,'air_pressure',False)
+    with open(index_file, 'r') as ifile:
+        new_index = json.load(ifile)
+    assert new_index['config'] != index['config']
+    assert new_index['variables'] == index['variables']
+    streams = capsys.readouterr()
+    assert streams.out.count("use the variable air_pressure:") == 3
+
+
+def test_bad_config(capsys, metadata_path):
     """Tests whether test_track_variables.py fails gracefully when provided a config file that does
        not exist."""
     with pytest.raises(Exception) as excinfo:
-        track_variables(SUITE_FILE,SAMPLE_FILES_DIR,f'{SAMPLE_FILES_DIR}/nofile','abc',False)
+        track_variables(SUITE_FILE,metadata_path,f'{SAMPLE_FILES_DIR}/nofile','abc',False)
     assert str(excinfo.value) == "Call to import_config failed."
 
 
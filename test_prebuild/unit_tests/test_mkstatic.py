@@ -1,4 +1,8 @@
+import logging
+
 from mkstatic import extract_parents_and_indices_from_local_name
+from mkstatic import conditional_block, thread_pointer, pointer_association, unit_conversion
+from mkcap import Var
 
 import pytest
 
@@ -20,3 +24,43 @@ def test_extract_parents_and_indices_from_local_name(input_, expected):
 
     assert parent == expected_parent
     assert set(inputs) == set(expected_inputs)
+
+
+def test_group_cap_fragments():
+    ptr = thread_pointer("opt_var_2_1_ptr")
+    assert ptr == "opt_var_2_1_ptr_array(cdata%thrd_no)%p"
+    actions = pointer_association(ptr, "tmpvar_1") + unit_conversion("tmpvar_1", "1.0E-3{kind}*{var}", "var2", "_kind_phys")
+    assert actions == "        opt_var_2_1_ptr_array(cdata%thrd_no)%p => tmpvar_1\n" + \
+                      "        tmpvar_1 = 1.0E-3_kind_phys*var2\n"
+    block = conditional_block("flag", actions)
+    assert block == "\n      if (flag) then\n" + actions + "      end if\n"
+    # Fragments are cached
+    assert conditional_block("flag", actions) is block
+
+
+@pytest.mark.parametrize(
+    "units,other_units",
+    [("mol mol-1", "kg kg-1"), ("1", "kg kg-1"), ("K s-1", "C s-1")],
+)
+def test_ambiguous_unit_conversion(units, other_units):
+    var = Var(standard_name="q", units=units, container="scheme_run")
+    with pytest.raises(Exception, match="not implemented"):
+        var.convert_to(other_units)
+    with pytest.raises(Exception, match="not implemented"):
+        var.convert_from(other_units)
+    # Units with the same normalized factors need no conversion
+    var = Var(standard_name="q", units="kg kg-1", container="scheme_run")
+    var.convert_from("kg-1 kg")
+    assert var.actions["in"] is None
+
+
+def test_unit_conversion_logging(caplog):
+    caplog.set_level(logging.INFO)
+    var = Var(standard_name="u", units="m s-1", container="scheme_run")
+    var.convert_to("s-1 m")
+    var.convert_from("s-1 m")
+    assert var.actions["out"] is None
+    assert var.actions["in"] is None
+    assert "Automatic unit conversion" not in caplog.text
+    var.convert_to("km s-1")
+    assert "Automatic unit conversion from m s-1 to km s-1" in caplog.text